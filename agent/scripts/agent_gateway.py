@@ -159,7 +159,17 @@ def main() -> None:
     existing = env.get("PYTHONPATH", "")
     env["PYTHONPATH"] = str(ROOT) if not existing else f"{ROOT}:{existing}"
     started = datetime.now(timezone.utc).isoformat()
-    proc = subprocess.run(cmd, cwd=str(ROOT), env=env)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from scripts.research_daemon import try_daemon
+
+    via_daemon = try_daemon({"op": "run", "workflow": args.workflow, "argv": forwarded})
+    if via_daemon is not None:
+        executor = "daemon"
+        exit_code = int(via_daemon.get("rc", 1))
+    else:
+        executor = "subprocess"
+        exit_code = int(subprocess.run(cmd, cwd=str(ROOT), env=env).returncode)
     ended = datetime.now(timezone.utc).isoformat()
 
     result = {
@@ -171,12 +181,13 @@ def main() -> None:
         "command_shell": cmd_str,
         "started_at_utc": started,
         "ended_at_utc": ended,
-        "exit_code": int(proc.returncode),
+        "executor": executor,
+        "exit_code": exit_code,
     }
     _write_json(run_dir / "result.json", result)
     print(f"[executed] run_dir={run_dir}")
-    print(f"[executed] exit_code={proc.returncode}")
-    raise SystemExit(int(proc.returncode))
+    print(f"[executed] exit_code={exit_code}")
+    raise SystemExit(exit_code)
 
 
 if __name__ == "__main__":
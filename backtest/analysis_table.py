@@ -0,0 +1,103 @@
+"""
+Analysis Table - one aligned (date, symbol) frame per backtest
+
+Every analysis consumer (IC, rollups, quantiles, segment summaries) used to
+re-merge signals with one of the return frames on (symbol, date) ==
+(symbol, signal_date). The table does that join once: one row per signal,
+with each return source as its own column (NaN where that source has no
+row) and the rebalance position (0 when not held).
+
+Columns:
+    date             datetime64, signal / rebalance date
+    symbol           str
+    signal           float64
+    fwd_return       float64, forward return with the execution quality filter
+    fwd_return_raw   float64, forward return without the quality filter
+    executed_return  float64, realized return of the executed position
+    position         int8, +1 long / -1 short / 0 not held
+
+Rows keep the signal order (date-major), so reductions over a column match
+the per-frame numbers bit for bit.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+ANALYSIS_COLUMNS = ['date', 'symbol', 'signal', 'fwd_return', 'fwd_return_raw', 'executed_return', 'position']
+RETURN_COLUMNS = ('fwd_return', 'fwd_return_raw', 'executed_return')
+
+
+def _lookup(keys: pd.MultiIndex, frame: Optional[pd.DataFrame], date_col: str, value_col: str) -> np.ndarray:
+    """Values of `frame[value_col]` aligned to `keys`, NaN where missing (first row wins on duplicates)."""
+    out = np.full(len(keys), np.nan)
+    if frame is None or len(frame) == 0 or not {'symbol', date_col, value_col}.issubset(frame.columns):
+        return out
+    idx = pd.MultiIndex.from_arrays([frame['symbol'].to_numpy(), frame[date_col].to_numpy()])
+    values = pd.to_numeric(frame[value_col], errors='coerce').to_numpy(dtype=float)
+    first = ~idx.duplicated(keep='first')
+    pos = idx[first].get_indexer(keys)
+    hit = pos >= 0
+    out[hit] = values[first][pos[hit]]
+    return out
+
+
+def build_analysis_table(signals: pd.DataFrame,
+                         forward_returns: Optional[pd.DataFrame] = None,
+                         forward_returns_raw: Optional[pd.DataFrame] = None,
+                         executed_returns: Optional[pd.DataFrame] = None,
+                         positions: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    signals: (symbol, date, signal)
+    forward_returns / forward_returns_raw / executed_returns: (symbol, signal_date, return)
+    positions: (symbol, date, position)
+    """
+    if signals is None or len(signals) == 0:
+        return pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'),
+            'symbol': pd.Series(dtype=object),
+            **{c: pd.Series(dtype=float) for c in ('signal',) + RETURN_COLUMNS},
+            'position': pd.Series(dtype=np.int8),
+        }, columns=ANALYSIS_COLUMNS)
+
+    sig = signals[['symbol', 'date', 'signal']]
+    # Join on the raw key values, exactly like the per-frame merges did
+    keys = pd.MultiIndex.from_arrays([sig['symbol'].to_numpy(), sig['date'].to_numpy()])
+    pos = _lookup(keys, positions, 'date', 'position')
+
+    # Parse each distinct date once
+    codes, labels = pd.factorize(sig['date'])
+    dates = pd.DatetimeIndex(pd.to_datetime(labels)).take(codes)
+
+    return pd.DataFrame({
+        'date': dates,
+        'symbol': sig['symbol'].to_numpy(),
+        'signal': pd.to_numeric(sig['signal'], errors='coerce').to_numpy(dtype=float),
+        'fwd_return': _lookup(keys, forward_returns, 'signal_date', 'return'),
+        'fwd_return_raw': _lookup(keys, forward_returns_raw, 'signal_date', 'return'),
+        'executed_return': _lookup(keys, executed_returns, 'signal_date', 'return'),
+        'position': np.sign(np.nan_to_num(pos)).astype(np.int8),
+    }, columns=ANALYSIS_COLUMNS)
+
+
+def default_return_column(table: Optional[pd.DataFrame]) -> str:
+    """Forward returns when any exist, else executed returns (the legacy fallback)."""
+    if table is not None and len(table) > 0 and table['fwd_return'].notna().any():
+        return 'fwd_return'
+    return 'executed_return'
+
+
+def column_frame(table: pd.DataFrame, return_col: str) -> pd.DataFrame:
+    """(date, symbol, signal, return) rows where `return_col` is present."""
+    if return_col not in RETURN_COLUMNS:
+        raise ValueError(f"unknown return column: {return_col}")
+    rows = table[table[return_col].notna()]
+    return pd.DataFrame({
+        'date': rows['date'].to_numpy(),
+        'symbol': rows['symbol'].to_numpy(),
+        'signal': rows['signal'].to_numpy(),
+        'return': rows[return_col].to_numpy(),
+    })
@@ -9,21 +9,29 @@ from .data_engine import DataEngine
 from .factor_engine import FactorEngine
 from .universe_builder import UniverseBuilder
 from .execution_simulator import ExecutionSimulator
+from .delta_executor import DEFAULT_RESIZE_TOL, DeltaExecutor, check_holding_period
+from .ic_engine import ICEngine
+from .analysis_table import build_analysis_table, column_frame
 from .market_cap_engine import MarketCapEngine
+from .profiler import StageProfiler
+from .run_checkpoint import RebalanceCheckpoint
+from .trading_calendar import TradingCalendar, load_trading_calendar
 
 
 class BacktestEngine:
-    def __init__(self, config_dict):
+    def __init__(self, config_dict, trading_calendar: TradingCalendar = None,
+                 data_engine: DataEngine = None, market_cap_engine: MarketCapEngine = None):
         self.config = config_dict
-        # DataEngine init (explicit args)
-        self.data_engine = DataEngine(
+        # Shared trading calendar (built lazily once per process if not injected)
+        self.trading_calendar = trading_calendar
+        # DataEngine init (explicit args); a warm injected engine keeps its price caches
+        self.data_engine = data_engine if data_engine is not None else DataEngine(
             config_dict.get('PRICE_DIR_ACTIVE'),
             config_dict.get('PRICE_DIR_DELISTED'),
             config_dict.get('DELISTED_INFO')
         )
-        market_cap_engine = None
         mc_dir = config_dict.get('MARKET_CAP_DIR')
-        if mc_dir and os.path.isdir(mc_dir):
+        if market_cap_engine is None and mc_dir and os.path.isdir(mc_dir):
             has_csv = any(f.endswith('.csv') for f in os.listdir(mc_dir))
             if has_csv:
                 market_cap_engine = MarketCapEngine(
@@ -45,6 +53,7 @@ class BacktestEngine:
             transaction_cost=config_dict.get('TRANSACTION_COST', 0.0020),
             execution_delay=config_dict.get('EXECUTION_DELAY', 1),
             execution_use_trading_days=bool(config_dict.get('EXECUTION_USE_TRADING_DAYS', False)),
+            trading_calendar=trading_calendar,
             enable_dynamic_cost=bool(config_dict.get('ENABLE_DYNAMIC_COST', False)),
             cost_multiplier=config_dict.get('COST_MULTIPLIER', 1.0),
             trade_size_usd=config_dict.get('TRADE_SIZE_USD', 10000),
@@ -58,6 +67,20 @@ class BacktestEngine:
         self._signal_cache_use = bool(self.config.get('SIGNAL_CACHE_USE', False))
         self._signal_cache_refresh = bool(self.config.get('SIGNAL_CACHE_REFRESH', False))
         self._signal_cache_sig = None
+        self.profiler = StageProfiler(enabled=bool(self.config.get('PROFILE_STAGES', True)))
+        self._instrument()
+
+    def _instrument(self) -> None:
+        """Time the per-symbol factor calls and the universe build; count cache hits per run."""
+        prof, fe = self.profiler, self.factor_engine
+        prof.instrument(self.universe_builder, ['get_universe'], 'universe.')
+        prof.instrument(fe, ['finalize_signals'], 'standardize.')
+        calcs = [n for n in dir(type(fe)) if n.startswith('calculate_') and n != 'calculate_all_factors']
+        prof.instrument(fe, calcs, 'factor.')
+        prof.watch_cache('price', lambda: self.data_engine.cache_stats)
+        # The EnginePool may swap in shared fundamentals engines after construction
+        prof.watch_cache('fundamentals', lambda: getattr(fe.fundamentals_engine, 'cache_stats', {}))
+        prof.watch_cache('value_fundamentals', lambda: getattr(fe.value_engine, 'cache_stats', {}))
 
     def _smooth_signals(self, signals_df: pd.DataFrame, history: dict) -> pd.DataFrame:
         window = int(self.config.get('SIGNAL_SMOOTH_WINDOW', 0) or 0)
@@ -99,6 +122,23 @@ class BacktestEngine:
         out['signal'] = smoothed
         return out
 
+    def _calendar_candidates(self) -> list[str]:
+        candidates = []
+        cal_sym = self.config.get('CALENDAR_SYMBOL')
+        if cal_sym:
+            candidates.append(cal_sym)
+        candidates.append('SPY')
+        return candidates
+
+    def get_shared_calendar(self) -> TradingCalendar:
+        """
+        Full-history trading calendar shared across engines in this process.
+        Returns None when no calendar symbol is available in the price cache.
+        """
+        if self.trading_calendar is None:
+            self.trading_calendar = load_trading_calendar(self.data_engine, self._calendar_candidates())
+        return self.trading_calendar
+
     def _get_trading_calendar(self, start_date: str, end_date: str) -> pd.DatetimeIndex:
         """
         Build a trading calendar from an existing liquid symbol in your price cache.
@@ -110,18 +150,12 @@ class BacktestEngine:
         start_ts = pd.Timestamp(start_date)
         end_ts = pd.Timestamp(end_date)
 
-        candidates = []
-        cal_sym = self.config.get('CALENDAR_SYMBOL')
-        if cal_sym:
-            candidates.append(cal_sym)
-        candidates.append('SPY')
-
-        # Try the candidates
-        for sym in candidates:
-            df = self.data_engine.get_price(sym, start_date=start_date, end_date=end_date)
-            if df is not None and len(df) > 10:
-                dates = pd.to_datetime(df['date']).sort_values().unique()
-                return pd.DatetimeIndex(dates)
+        # Shared calendar (CALENDAR_SYMBOL / SPY), sliced to the requested window
+        shared = self.get_shared_calendar()
+        if shared is not None:
+            window = shared.between(start_ts, end_ts)
+            if len(window) > 10:
+                return window
 
         # Fallback: pick one symbol from universe
         uni = self.universe_builder.get_universe(start_date)
@@ -137,11 +171,13 @@ class BacktestEngine:
         dates = pd.to_datetime(df['date']).sort_values().unique()
         return pd.DatetimeIndex(dates)
 
-    def _generate_rebalance_dates(self, start_date: str, end_date: str, rebalance_freq: int) -> list[str]:
+    def _generate_rebalance_dates(self, start_date: str, end_date: str, rebalance_freq: int,
+                                  cal: pd.DatetimeIndex = None) -> list[str]:
         """
         Generate rebalance dates by stepping through the trading calendar (NOT calendar days).
         """
-        cal = self._get_trading_calendar(start_date, end_date)
+        if cal is None:
+            cal = self._get_trading_calendar(start_date, end_date)
         if len(cal) == 0:
             return []
         # Ensure within bounds
@@ -211,6 +247,7 @@ class BacktestEngine:
     def _compute_signals_cached(self, date: str, factor_weights: dict) -> pd.DataFrame:
         if self._signal_cache_use and not self._signal_cache_refresh:
             cached = self._read_signal_cache(date, factor_weights)
+            self.profiler.count('signal', hit=cached is not None)
             if cached is not None:
                 return cached
         signals_df = self.factor_engine.compute_signals(date, factor_weights)
@@ -219,6 +256,33 @@ class BacktestEngine:
         self._write_signal_cache(date, factor_weights, signals_df)
         return signals_df
 
+    @staticmethod
+    def _ic_analysis(table: pd.DataFrame, return_col: str, yearly: bool = True):
+        """
+        Pooled IC and yearly pooled IC (>= 5 rows per year) of the signal vs one
+        return column of the analysis table.
+        Returns (ic, ic_yearly DataFrame or None, ICEngine or None when < 4 usable rows).
+        """
+        if table is None or len(table) == 0:
+            return None, None, None
+        merged = column_frame(table, return_col)
+        if len(merged) <= 3:
+            return None, None, None
+        merged = merged.replace([np.inf, -np.inf], np.nan).dropna(subset=['signal', 'return'])
+        engine = ICEngine(merged)
+        ic = engine.pooled_ic() if len(merged) > 3 else None
+        ic_yearly = None
+        if yearly:
+            roll = engine.rollup('Y', min_rows=5)
+            roll = roll[roll['ic'].notna()]
+            if len(roll) > 0:
+                ic_yearly = pd.DataFrame({
+                    'period': roll['period'].values,
+                    'ic': roll['ic'].values,
+                    'n': roll['n'].values,
+                })
+        return ic, ic_yearly, engine
+
     def run_backtest(self,
                     start_date: str,
                     end_date: str,
@@ -226,14 +290,33 @@ class BacktestEngine:
                     rebalance_freq: int = 5,
                     holding_period: int = 10,
                     long_pct: float = 0.2,
-                    short_pct: float = 0.0):
+                    short_pct: float = 0.0,
+                    checkpoint: str = None,
+                    checkpoint_every: int = 20,
+                    checkpoint_salt=None):
+        """
+        checkpoint: optional file for rebalance-level resume. The per-date loop
+        state is appended every `checkpoint_every` dates; a rerun of the same
+        call reloads the finished dates and continues after the last one.
+        checkpoint_salt: extra key material the engine cannot see itself (the
+        runners pass scripts.result_store.run_signature: input-data fingerprint
+        and code version), so a refresh or code change discards the checkpoint.
+        With EXECUTION_MODE='delta' holding_period must equal rebalance_freq
+        (names are held until they leave the target; see delta_executor).
+        """
+        execution_mode = str(self.config.get('EXECUTION_MODE') or 'trade').lower().strip()
+        if execution_mode == 'delta':
+            check_holding_period(holding_period, rebalance_freq, self.config.get('REBALANCE_MODE'))
 
-        # 1) Rebalance dates (TRADING-CALENDAR based)
-        rebalance_dates = self._generate_rebalance_dates(start_date, end_date, rebalance_freq)
+        prof = self.profiler
+        prof.reset()
+
+        # 1) Rebalance dates (TRADING-CALENDAR based; calendar resolved once per run)
+        cal = self._get_trading_calendar(start_date, end_date)
+        rebalance_dates = self._generate_rebalance_dates(start_date, end_date, rebalance_freq, cal=cal)
         self.last_rebalance_dates = rebalance_dates
         # Sync execution simulator calendar for trading-day execution (if enabled)
         try:
-            cal = self._get_trading_calendar(start_date, end_date)
             self.execution_simulator.set_trading_calendar(cal)
         except Exception:
             pass
@@ -243,28 +326,46 @@ class BacktestEngine:
         signal_history = {}
         universe_audit_rows = []
 
-        for d in rebalance_dates:
-            signals_df = self._compute_signals_cached(d, factor_weights)
+        ckpt = None
+        pending_dates = rebalance_dates
+        if checkpoint:
+            key = self._stable_hash([self.config, factor_weights, start_date, end_date, rebalance_freq,
+                                     long_pct, short_pct, rebalance_dates, checkpoint_salt])
+            ckpt = RebalanceCheckpoint(checkpoint, key, every=checkpoint_every)
+            state = ckpt.load()
+            all_signals = state['signals']
+            all_positions = state['positions']
+            universe_audit_rows = state['audit']
+            signal_history = state['history']
+            pending_dates = rebalance_dates[len(state['dates']):]
+
+        for d in pending_dates:
+            n_sig, n_pos, n_aud = len(all_signals), len(all_positions), len(universe_audit_rows)
+            with prof.stage('signals'):
+                signals_df = self._compute_signals_cached(d, factor_weights)
             audit = self.universe_builder.get_last_audit()
             if audit:
                 audit_row = dict(audit)
                 audit_row["rebalance_date"] = d
                 audit_row["n_signals"] = int(len(signals_df)) if signals_df is not None else 0
                 universe_audit_rows.append(audit_row)
-            if signals_df is None or len(signals_df) == 0:
-                continue
-            signals_df = self._smooth_signals(signals_df, signal_history)
-            all_signals.append(signals_df)
-
-            # Rank & pick positions inside factor engine / portfolio logic
-            positions_df = self.factor_engine.build_positions(
-                signals_df,
-                long_pct=long_pct,
-                short_pct=short_pct
-            )
-            if positions_df is None or len(positions_df) == 0:
-                continue
-            all_positions.append(positions_df)
+            if signals_df is not None and len(signals_df) > 0:
+                signals_df = self._smooth_signals(signals_df, signal_history)
+                all_signals.append(signals_df)
+
+                # Rank & pick positions inside factor engine / portfolio logic
+                with prof.stage('positions'):
+                    positions_df = self.factor_engine.build_positions(
+                        signals_df,
+                        long_pct=long_pct,
+                        short_pct=short_pct
+                    )
+                if positions_df is not None and len(positions_df) > 0:
+                    all_positions.append(positions_df)
+            if ckpt is not None:
+                ckpt.step(d, all_signals[n_sig:], all_positions[n_pos:], universe_audit_rows[n_aud:], signal_history)
+        if ckpt is not None:
+            ckpt.flush(signal_history)
 
         if len(all_signals) == 0:
             signals_df = pd.DataFrame(columns=['symbol', 'date', 'signal'])
@@ -277,108 +378,91 @@ class BacktestEngine:
             positions_df = pd.concat(all_positions, ignore_index=True)
 
         # 2) Execute + returns
-        executed = self.execution_simulator.execute_trades(positions_df)
-        returns_df = self.execution_simulator.calculate_returns(executed, holding_period=holding_period)
-        forward_returns_df = self.execution_simulator.calculate_forward_returns(
-            signals_df,
-            holding_period=holding_period,
-            apply_quality_filter=True
-        )
-        forward_returns_raw_df = self.execution_simulator.calculate_forward_returns(
-            signals_df,
-            holding_period=holding_period,
-            apply_quality_filter=False
-        )
-
-        analysis = {
-            'ic': None,
-            'ic_yearly': None,
-            'ic_positions': None,
-            'ic_yearly_positions': None
-        }
-
-        # IC on full signal cross-section (preferred)
-        if len(signals_df) > 0 and len(forward_returns_df) > 0:
-            merged = signals_df.merge(
-                forward_returns_df[['symbol', 'signal_date', 'return']],
-                left_on=['symbol', 'date'],
-                right_on=['symbol', 'signal_date'],
-                how='inner'
+        delta = None
+        with prof.stage('execution'):
+            if execution_mode == 'delta':
+                # Trade only the diff between consecutive target portfolios
+                delta = DeltaExecutor(
+                    self.execution_simulator,
+                    resize_tol=float(self.config.get('DELTA_RESIZE_TOL', DEFAULT_RESIZE_TOL)),
+                ).run(positions_df, end_date=end_date)
+                returns_df = delta['round_trips']
+                if len(returns_df) == 0:
+                    returns_df = pd.DataFrame(columns=['symbol', 'signal_date', 'return'])
+            else:
+                executed = self.execution_simulator.execute_trades(positions_df)
+                returns_df = self.execution_simulator.calculate_returns(executed, holding_period=holding_period)
+        with prof.stage('forward_returns'):
+            forward_returns_df = self.execution_simulator.calculate_forward_returns(
+                signals_df,
+                holding_period=holding_period,
+                apply_quality_filter=True
             )
-            if len(merged) > 3:
-                merged = merged.replace([np.inf, -np.inf], np.nan)
-                merged = merged.dropna(subset=['signal', 'return'])
-                if len(merged) > 3:
-                    analysis['ic'] = merged['signal'].corr(merged['return'])
-
-                merged['date_dt'] = pd.to_datetime(merged['date'])
-                def _safe_corr(x):
-                    if len(x) < 5:
-                        return np.nan
-                    return x['signal'].corr(x['return'])
-                ic_y = merged.groupby(merged['date_dt'].dt.year).apply(_safe_corr).dropna()
-                if len(ic_y) > 0:
-                    analysis['ic_yearly'] = pd.DataFrame({
-                        'period': ic_y.index.astype(str),
-                        'ic': ic_y.values,
-                        'n': merged.groupby(merged['date_dt'].dt.year).size().reindex(ic_y.index).values
-                    })
-
-        # IC on raw forward returns (no quality filter)
-        if len(signals_df) > 0 and len(forward_returns_raw_df) > 0:
-            merged_raw = signals_df.merge(
-                forward_returns_raw_df[['symbol', 'signal_date', 'return']],
-                left_on=['symbol', 'date'],
-                right_on=['symbol', 'signal_date'],
-                how='inner'
+            forward_returns_raw_df = self.execution_simulator.calculate_forward_returns(
+                signals_df,
+                holding_period=holding_period,
+                apply_quality_filter=False
             )
-            if len(merged_raw) > 3:
-                merged_raw = merged_raw.replace([np.inf, -np.inf], np.nan)
-                merged_raw = merged_raw.dropna(subset=['signal', 'return'])
-                if len(merged_raw) > 3:
-                    analysis['ic_raw'] = merged_raw['signal'].corr(merged_raw['return'])
-
-        # IC on executed positions (legacy)
-        if len(signals_df) > 0 and len(returns_df) > 0:
-            merged = signals_df.merge(
-                returns_df[['symbol', 'signal_date', 'return']],
-                left_on=['symbol', 'date'],
-                right_on=['symbol', 'signal_date'],
-                how='inner'
+
+        with prof.stage('analysis'):
+            # One aligned (date, symbol) table; every IC below reads from it
+            analysis_table = build_analysis_table(
+                signals_df,
+                forward_returns=forward_returns_df,
+                forward_returns_raw=forward_returns_raw_df,
+                executed_returns=returns_df,
+                positions=positions_df,
             )
-            if len(merged) > 3:
-                merged = merged.replace([np.inf, -np.inf], np.nan)
-                merged = merged.dropna(subset=['signal', 'return'])
-                if len(merged) > 3:
-                    analysis['ic_positions'] = merged['signal'].corr(merged['return'])
-
-                merged['date_dt'] = pd.to_datetime(merged['date'])
-                def _safe_corr_pos(x):
-                    if len(x) < 5:
-                        return np.nan
-                    return x['signal'].corr(x['return'])
-                ic_y = merged.groupby(merged['date_dt'].dt.year).apply(_safe_corr_pos).dropna()
-                if len(ic_y) > 0:
-                    analysis['ic_yearly_positions'] = pd.DataFrame({
-                        'period': ic_y.index.astype(str),
-                        'ic': ic_y.values,
-                        'n': merged.groupby(merged['date_dt'].dt.year).size().reindex(ic_y.index).values
-                    })
+
+            analysis = {
+                'ic': None,
+                'ic_yearly': None,
+                'ic_positions': None,
+                'ic_yearly_positions': None
+            }
+
+            # IC on full signal cross-section (preferred)
+            ic, ic_yearly, ic_engine = self._ic_analysis(analysis_table, 'fwd_return')
+            analysis['ic'] = ic
+            analysis['ic_yearly'] = ic_yearly
+            if ic_engine is not None:
+                analysis['ic_summary'] = ic_engine.summary(holding_period=holding_period,
+                                                           rebalance_freq=rebalance_freq)
+
+            # IC on raw forward returns (no quality filter)
+            if len(forward_returns_raw_df) > 0:
+                ic_raw, _, _ = self._ic_analysis(analysis_table, 'fwd_return_raw', yearly=False)
+                if ic_raw is not None:
+                    analysis['ic_raw'] = ic_raw
+
+            # IC on executed positions (legacy)
+            ic_pos, ic_yearly_pos, _ = self._ic_analysis(analysis_table, 'executed_return')
+            analysis['ic_positions'] = ic_pos
+            analysis['ic_yearly_positions'] = ic_yearly_pos
 
         # Filter stats
         filter_stats = self.execution_simulator.get_filter_stats()
 
-        return {
+        results = {
             'signals': signals_df,
             'positions': positions_df,
             'returns': returns_df,
             'forward_returns': forward_returns_df,
             'forward_returns_raw': forward_returns_raw_df,
+            'analysis_table': analysis_table,
             'analysis': analysis,
             'rebalance_dates': rebalance_dates,
             'filter_stats': filter_stats,
             'universe_audit': pd.DataFrame(universe_audit_rows) if len(universe_audit_rows) > 0 else pd.DataFrame(),
+            'execution_mode': execution_mode,
+            'profile': prof.to_dict(),
         }
+        if delta is not None:
+            results['portfolio_daily'] = delta['daily']
+            results['delta_trades'] = delta['trades']
+            results['holdings'] = delta['holdings']
+            results['delta_stats'] = delta['stats']
+        return results
 
     def run_out_of_sample_test(self, train_start, train_end, test_start, test_end,
                                factor_weights, rebalance_freq, holding_period,
@@ -25,6 +25,7 @@ TEST_END = "2026-01-28"
 EXECUTION_DELAY = 1  # T+1
 TRANSACTION_COST = 0.0020  # 20bps per trade
 EXECUTION_USE_TRADING_DAYS = True
+EXECUTION_MODE = "trade"  # "trade": price every position; "delta": trade only portfolio changes
 ENABLE_DYNAMIC_COST = True
 TRADE_SIZE_USD = 10000
 
@@ -9,6 +9,8 @@ from typing import Optional, List, Dict
 from datetime import datetime, timedelta
 import pickle
 
+from .data_quality_filter import PriceQualityMask
+
 class DataEngine:
     """
     Professional data management with point-in-time correctness
@@ -18,6 +20,12 @@ class DataEngine:
         self.active_dir = active_dir
         self.delisted_dir = delisted_dir
         self.price_cache = {}
+        # Per-symbol precomputed quality masks (aligned with price_cache rows)
+        self.quality_cache = {}
+        # Optional shared ColumnStore (backtest.shared_store) serving normalized frames
+        self.price_store = None
+        # Price cache lookups (read as per-run deltas by backtest.profiler)
+        self.cache_stats = {'hits': 0, 'misses': 0}
         
         # Load delisted information
         df = pd.read_csv(delisted_info)
@@ -72,13 +80,10 @@ class DataEngine:
                 end_date = delisted_date.strftime('%Y-%m-%d')
         
         # Load from cache or disk
-        if symbol not in self.price_cache:
-            df = self._load_symbol(symbol)
-            if df is None:
-                return None
-            self.price_cache[symbol] = df
-        
-        df = self.price_cache[symbol].copy()
+        df = self._cached_frame(symbol)
+        if df is None:
+            return None
+        df = df.copy()
         
         # Filter by date range
         if start_date:
@@ -88,8 +93,51 @@ class DataEngine:
         
         return df if len(df) > 0 else None
     
+    def _cached_frame(self, symbol: str) -> Optional[pd.DataFrame]:
+        if symbol in self.price_cache:
+            self.cache_stats['hits'] += 1
+        else:
+            self.cache_stats['misses'] += 1
+            df = self._load_symbol(symbol)
+            if df is None:
+                return None
+            self.price_cache[symbol] = df
+        return self.price_cache[symbol]
+
+    def get_price_window(self, symbol: str, start_date=None, end_date=None):
+        """
+        Zero-copy variant of get_price for hot paths.
+
+        Returns:
+            (full_df, lo, hi) where full_df.iloc[lo:hi] equals get_price(...),
+            or None if no rows fall in the window. full_df must not be mutated.
+        """
+        if symbol in self.delisted_info:
+            delisted_date = self.delisted_info[symbol]
+            if end_date is not None and pd.Timestamp(end_date) > delisted_date:
+                end_date = delisted_date
+
+        df = self._cached_frame(symbol)
+        if df is None:
+            return None
+        dates = df['date'].values
+        lo = 0 if start_date is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left'))
+        hi = len(df) if end_date is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right'))
+        if hi <= lo:
+            return None
+        return df, lo, hi
+
+    def get_quality_mask(self, symbol: str) -> Optional[PriceQualityMask]:
+        """Per-day quality flags for the symbol's full history (built once)."""
+        if symbol not in self.quality_cache:
+            df = self._cached_frame(symbol)
+            self.quality_cache[symbol] = PriceQualityMask.from_frame(df) if df is not None else None
+        return self.quality_cache[symbol]
+
     def _load_symbol(self, symbol: str) -> Optional[pd.DataFrame]:
         """Load symbol from disk"""
+        if self.price_store is not None and symbol in self.price_store:
+            return self.price_store.frame(symbol)
         # Try active first
         path = f"{self.active_dir}/{symbol}.pkl"
         if os.path.exists(path):
@@ -4,71 +4,179 @@ Data Quality Filter - Real-time data validation
 
 import pandas as pd
 import numpy as np
-from typing import List, Dict
+from collections import Counter
+from typing import List, Dict, Optional
+
+# Per-day quality flag bits
+FLAG_NONPOSITIVE = 1   # close <= 0 or open <= 0
+FLAG_JUMP = 2          # |close-to-close return| > 100%
+FLAG_OPEN_CLOSE = 4    # open/close ratio outside [0.5, 2.0]
+FLAG_ZERO_VOLUME = 8   # volume == 0
+
+REASON_NONPOSITIVE = "Zero/negative prices"
+REASON_ZERO_VOLUME = ">50% zero volume"
+REASON_JUMP = "Extreme jump detected"
+REASON_OPEN_CLOSE = "Open/Close ratio abnormal"
+
+
+def build_price_quality_flags(df: pd.DataFrame) -> np.ndarray:
+    """
+    One-time pass over a full per-symbol price history.
+    Returns a uint8 flag array aligned with df rows (see FLAG_* bits).
+    """
+    n = 0 if df is None else len(df)
+    flags = np.zeros(n, dtype=np.uint8)
+    if n == 0:
+        return flags
+    close = pd.to_numeric(df['close'], errors='coerce').to_numpy(dtype=float)
+    has_open = 'open' in df.columns
+    opn = pd.to_numeric(df['open'], errors='coerce').to_numpy(dtype=float) if has_open else None
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        nonpos = close <= 0
+        if has_open:
+            nonpos |= opn <= 0
+        flags[nonpos] |= FLAG_NONPOSITIVE
+
+        ret = np.full(n, np.nan)
+        ret[1:] = close[1:] / close[:-1] - 1.0
+        flags[np.abs(ret) > 1.0] |= FLAG_JUMP
+
+        if has_open:
+            ratio = opn / close
+            flags[(ratio > 2.0) | (ratio < 0.5)] |= FLAG_OPEN_CLOSE
+
+    if 'volume' in df.columns:
+        flags[(df['volume'] == 0).to_numpy()] |= FLAG_ZERO_VOLUME
+    return flags
+
+
+class PriceQualityMask:
+    """
+    Prefix-count view over per-day flags so any [lo, hi) row window is
+    validated in O(1) with the same rules as DataQualityFilter.validate_price_data.
+    """
+
+    def __init__(self, flags: np.ndarray, has_volume: bool = True):
+        self.flags = np.asarray(flags, dtype=np.uint8)
+        self.has_volume = bool(has_volume)
+        self._cum = {}
+        for bit in (FLAG_NONPOSITIVE, FLAG_JUMP, FLAG_OPEN_CLOSE, FLAG_ZERO_VOLUME):
+            c = np.zeros(len(self.flags) + 1, dtype=np.int64)
+            np.cumsum((self.flags & bit) > 0, out=c[1:])
+            self._cum[bit] = c
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceQualityMask":
+        has_volume = df is not None and 'volume' in df.columns
+        return cls(build_price_quality_flags(df), has_volume=has_volume)
+
+    def _count(self, bit: int, lo: int, hi: int) -> int:
+        if hi <= lo:
+            return 0
+        c = self._cum[bit]
+        return int(c[hi] - c[lo])
+
+    def window_reason(self, lo: int, hi: int) -> Optional[str]:
+        """First failing reason for rows [lo, hi), or None if the window is clean."""
+        n = hi - lo
+        if n <= 0:
+            return None
+        if self._count(FLAG_NONPOSITIVE, lo, hi) > 0:
+            return REASON_NONPOSITIVE
+        if self.has_volume and self._count(FLAG_ZERO_VOLUME, lo, hi) > n * 0.5:
+            return REASON_ZERO_VOLUME
+        # First row of a window has no in-window predecessor (pct_change -> NaN)
+        if self._count(FLAG_JUMP, lo + 1, hi) > 0:
+            return REASON_JUMP
+        if self._count(FLAG_OPEN_CLOSE, lo, hi) > 0:
+            return REASON_OPEN_CLOSE
+        return None
+
 
 class DataQualityFilter:
     """
     Filter out bad data in real-time
     """
-    
+
     def __init__(self, min_universe_pct: float = 0.7):
         self.min_universe_pct = min_universe_pct
-        self.quality_log = []
-    
+        # message -> occurrence count (bounded by distinct symbol/reason pairs)
+        self.quality_log: Counter = Counter()
+
+    def _log(self, message: str) -> None:
+        self.quality_log[message] += 1
+
     def validate_price_data(self, df: pd.DataFrame, symbol: str) -> bool:
         """
         Check if price data is valid
-        
+
         Returns:
             True if valid, False if should be excluded
         """
         if df is None or len(df) == 0:
             return False
-        
+
         # Check for zero/negative prices
         if (df['close'] <= 0).any() or (df['open'] <= 0).any():
-            self.quality_log.append(f"{symbol}: Zero/negative prices")
+            self._log(f"{symbol}: {REASON_NONPOSITIVE}")
             return False
-        
+
         # Check for zero volume
         if 'volume' in df.columns and (df['volume'] == 0).sum() > len(df) * 0.5:
-            self.quality_log.append(f"{symbol}: >50% zero volume")
+            self._log(f"{symbol}: {REASON_ZERO_VOLUME}")
             return False
-        
+
         # Check for extreme jumps (>100% in one day without valid reason)
         returns = df['close'].pct_change(fill_method=None)
         if (abs(returns) > 1.0).any():
-            self.quality_log.append(f"{symbol}: Extreme jump detected")
+            self._log(f"{symbol}: {REASON_JUMP}")
             return False
-        
+
         # Check open/close sanity
         if 'open' in df.columns:
             ratio = df['open'] / df['close']
             if (ratio > 2.0).any() or (ratio < 0.5).any():
-                self.quality_log.append(f"{symbol}: Open/Close ratio abnormal")
+                self._log(f"{symbol}: {REASON_OPEN_CLOSE}")
                 return False
-        
+
+        return True
+
+    def validate_window(self, mask: PriceQualityMask, lo: int, hi: int, symbol: str) -> bool:
+        """
+        Precomputed-mask equivalent of validate_price_data for rows [lo, hi)
+        of the symbol's full price history.
+        """
+        if mask is None or hi <= lo:
+            return False
+        reason = mask.window_reason(lo, hi)
+        if reason is not None:
+            self._log(f"{symbol}: {reason}")
+            return False
         return True
-    
-    def validate_universe_size(self, universe: List[str], 
+
+    def validate_universe_size(self, universe: List[str],
                               expected_size: int) -> bool:
         """
         Check if universe is large enough
-        
+
         Returns:
             True if universe is acceptable, False if too small
         """
         actual_pct = len(universe) / expected_size if expected_size > 0 else 0
-        
+
         if actual_pct < self.min_universe_pct:
-            self.quality_log.append(
+            self._log(
                 f"Universe too small: {len(universe)}/{expected_size} "
                 f"({actual_pct*100:.1f}% < {self.min_universe_pct*100:.0f}%)"
             )
             return False
-        
+
         return True
-    
+
     def get_log(self) -> List[str]:
-        """Return quality issues log"""
-        return self.quality_log
+        """Return quality issues log (one line per distinct issue, with counts)"""
+        return [f"{msg} (x{n})" if n > 1 else msg for msg, n in self.quality_log.items()]
+
+    def get_log_counts(self) -> Dict[str, int]:
+        return dict(self.quality_log)
@@ -0,0 +1,387 @@
+"""
+Delta Executor - turnover-aware rebalancing with a running holdings book
+
+Instead of pricing an entry and an exit for every position on every
+rebalance (ExecutionSimulator.execute_trades + calculate_returns), the
+target portfolios of consecutive rebalances are diffed and only the
+adds / drops / resizes are sent to the execution simulator. Names that
+are retained are neither re-priced nor charged.
+
+Conventions:
+  - target weights are equal-weight per leg (long leg sums to +1, short leg to -1)
+  - a retained name is resized only when its weight is off target by more
+    than resize_tol (relative, default 5%) of the target weight, so one name
+    entering or leaving a leg of 20+ names leaves the others untouched and
+    the leg sums may deviate from +/-1 by up to that tolerance
+  - weights are held constant between rebalances (no drift)
+  - a name is held from the rebalance it enters the target until the one it
+    leaves it: the executed holding period is the rebalance spacing, so a
+    separate holding_period is rejected (check_holding_period)
+  - trades fill at the execution bar open; cost is charged on |delta weight|
+  - daily return on a trade day = overnight leg on the old weight
+    + intraday (open -> close) leg on the new weight
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .execution_simulator import ExecutionSimulator
+
+DEFAULT_RESIZE_TOL = 0.05
+
+
+def target_weights(positions_df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """positions (symbol, date, position) -> {date: {symbol: weight}}"""
+    out: Dict[str, Dict[str, float]] = {}
+    if positions_df is None or len(positions_df) == 0:
+        return out
+    df = positions_df[['symbol', 'date', 'position']].copy()
+    df = df[df['position'] != 0]
+    for d, g in df.groupby('date', sort=True):
+        w = {}
+        longs = g[g['position'] > 0]
+        shorts = g[g['position'] < 0]
+        for sym in longs['symbol']:
+            w[sym] = 1.0 / len(longs)
+        for sym in shorts['symbol']:
+            w[sym] = -1.0 / len(shorts)
+        out[d] = w
+    return out
+
+
+def within_tol(w0: float, w1: float, tol: float = DEFAULT_RESIZE_TOL) -> bool:
+    """True if a held weight w0 is close enough to the target w1 (relative to |w1|) to skip a resize."""
+    return abs(w1 - w0) <= tol * abs(w1)
+
+
+def check_holding_period(holding_period: int, rebalance_freq: int, rebalance_mode: str = '') -> None:
+    """
+    Delta execution holds each name until it leaves the target, i.e. for the
+    rebalance spacing. Reject a different holding_period instead of silently
+    ignoring it (month_end spacing is in months and is not checked).
+    """
+    if str(rebalance_mode or '').lower().strip() == 'month_end':
+        return
+    if int(holding_period) != int(rebalance_freq):
+        raise ValueError(
+            f"EXECUTION_MODE='delta' holds names from one rebalance to the next, so holding_period "
+            f"({holding_period}) must equal rebalance_freq ({rebalance_freq}); use EXECUTION_MODE='trade' "
+            f"for overlapping holdings"
+        )
+
+
+def diff_targets(current: Dict[str, float], target: Dict[str, float],
+                 tol: float = DEFAULT_RESIZE_TOL) -> List[tuple]:
+    """Return [(symbol, prev_weight, target_weight, kind)] for names that must trade."""
+    changes = []
+    for sym in sorted(set(current) | set(target)):
+        w0 = float(current.get(sym, 0.0))
+        w1 = float(target.get(sym, 0.0))
+        if within_tol(w0, w1, tol):
+            continue
+        if w0 == 0.0:
+            kind = 'add'
+        elif w1 == 0.0:
+            kind = 'drop'
+        else:
+            kind = 'resize'
+        changes.append((sym, w0, w1, kind))
+    return changes
+
+
+class DeltaExecutor:
+    """
+    Diff consecutive target portfolios, trade only the changes and keep a
+    running holdings book that yields a daily portfolio return series.
+    """
+
+    def __init__(self, simulator: ExecutionSimulator, resize_tol: float = DEFAULT_RESIZE_TOL):
+        self.sim = simulator
+        self.data_engine = simulator.data_engine
+        self.resize_tol = float(resize_tol)
+        self._series_cache: Dict[str, Optional[pd.Series]] = {}
+
+    def _close_series(self, symbol: str, end_date) -> Optional[pd.Series]:
+        if symbol not in self._series_cache:
+            df = self.data_engine.get_price(symbol, end_date=end_date)
+            if df is None or len(df) == 0:
+                self._series_cache[symbol] = None
+            else:
+                s = pd.Series(df['close'].to_numpy(dtype=float), index=pd.DatetimeIndex(df['date']))
+                self._series_cache[symbol] = s[~s.index.duplicated(keep='last')]
+        return self._series_cache[symbol]
+
+    def _last_close_before(self, symbol: str, date: pd.Timestamp, end_date):
+        s = self._close_series(symbol, end_date)
+        if s is None:
+            return None, None
+        pos = int(s.index.searchsorted(date, side='left')) - 1
+        if pos < 0:
+            return None, None
+        return s.index[pos], float(s.iloc[pos])
+
+    def _delisting_return(self, symbol: str, lot: dict, last_price: float) -> float:
+        handler = self.sim.delisting_handler
+        if handler is None or last_price is None or last_price <= 0:
+            return -0.5
+        r = handler.estimate_delisting_return(
+            symbol=symbol,
+            entry_price=float(lot['entry_price']),
+            last_price=float(last_price),
+            position=lot['position'],
+            delisting_reason=None,
+        )
+        return max(min(float(r), 1.0), -0.95)
+
+    def _close_lot(self, symbol: str, lot: dict, exit_price: Optional[float], exit_date, exit_type: str,
+                   round_trips: list, ret: Optional[float] = None) -> None:
+        entry = float(lot['entry_price'])
+        if ret is None:
+            if exit_price is None or entry <= 0:
+                ret = -0.5
+            elif lot['position'] > 0:
+                ret = (float(exit_price) - entry) / entry
+            else:
+                ret = (entry - float(exit_price)) / entry
+            ret = max(min(float(ret), 1.0), -0.95)
+        round_trips.append({
+            'symbol': symbol,
+            'signal_date': lot['signal_date'],
+            'entry_price': entry,
+            'exit_price': float(exit_price) if exit_price is not None else None,
+            'position': lot['position'],
+            'return': float(ret),
+            'entry_date': lot['entry_date'],
+            'exit_date': exit_date,
+            'exit_type': exit_type,
+        })
+
+    def _check_delistings(self, book, lots, before: pd.Timestamp, end_date, events, round_trips):
+        """Close held names whose price history ended before `before` (delisted / data gap)."""
+        for sym in sorted(book):
+            s = self._close_series(sym, end_date)
+            if s is None or len(s) == 0:
+                continue
+            last_date = s.index[-1]
+            if last_date >= before:
+                continue
+            last_px = float(s.iloc[-1])
+            lot = lots.pop(sym, None)
+            w0 = book.pop(sym)
+            r_est = self._delisting_return(sym, lot, last_px) if lot else -0.5
+            terminal = 0.0
+            if lot and last_px > 0:
+                # value path: entry -> last mark -> (1 + r_est) * entry
+                sign = 1.0 if w0 > 0 else -1.0
+                lot_value = 1.0 + r_est if sign > 0 else 1.0 - r_est
+                terminal = sign * (lot_value * float(lot['entry_price']) / last_px - 1.0)
+            events.append({
+                'symbol': sym,
+                'signal_date': None,
+                'fill_date': last_date + pd.Timedelta(days=1),
+                'kind': 'delisted',
+                'prev_weight': w0,
+                'target_weight': 0.0,
+                'price': None,
+                'cost': 0.0,
+                'terminal': terminal,
+            })
+            if lot:
+                self._close_lot(sym, lot, last_px, last_date, 'delisted', round_trips, ret=r_est)
+
+    def run(self, positions_df: pd.DataFrame, end_date: Optional[str] = None) -> Dict[str, object]:
+        targets = target_weights(positions_df)
+        empty = {
+            'trades': pd.DataFrame(),
+            'holdings': pd.DataFrame(columns=['date', 'symbol', 'weight']),
+            'daily': pd.DataFrame(columns=['date', 'gross_return', 'cost', 'net_return', 'turnover', 'n_holdings']),
+            'round_trips': pd.DataFrame(),
+            'stats': {},
+        }
+        if not targets:
+            return empty
+
+        book: Dict[str, float] = {}
+        lots: Dict[str, dict] = {}
+        events: List[dict] = []
+        round_trips: List[dict] = []
+        holdings_rows = []
+        stats = {
+            'rebalances': len(targets),
+            'target_positions': int(sum(len(t) for t in targets.values())),
+            'adds': 0, 'drops': 0, 'resizes': 0, 'retained': 0,
+            'missed_adds': 0, 'missed_resizes': 0, 'forced_exits': 0, 'delisted': 0,
+            'execution_lookups': 0,
+        }
+
+        for d in sorted(targets):
+            exec_date = self.sim._execution_date(d)
+            self._check_delistings(book, lots, exec_date, end_date, events, round_trips)
+            target = targets[d]
+            changes = diff_targets(book, target, tol=self.resize_tol)
+            stats['retained'] += sum(1 for s in target if s in book and within_tol(book[s], target[s], self.resize_tol))
+            for sym, w0, w1, kind in changes:
+                side = 'buy' if w1 > w0 else 'sell'
+                stats['execution_lookups'] += 1
+                fill = self.sim.get_execution_fill(sym, d, side=side, apply_cost=True)
+                if fill is None and kind == 'add':
+                    stats['missed_adds'] += 1
+                    continue
+                if fill is None and kind == 'resize':
+                    stats['missed_resizes'] += 1
+                    continue
+                if fill is None:
+                    # Drop without a tradable bar: exit at the last available close.
+                    last_date, last_px = self._last_close_before(sym, exec_date, end_date)
+                    stats['forced_exits'] += 1
+                    events.append({
+                        'symbol': sym, 'signal_date': d, 'fill_date': exec_date, 'kind': 'drop',
+                        'prev_weight': w0, 'target_weight': 0.0, 'price': None, 'cost': 0.0, 'terminal': 0.0,
+                    })
+                    book.pop(sym, None)
+                    lot = lots.pop(sym, None)
+                    if lot:
+                        self._close_lot(sym, lot, last_px, last_date, 'no_data', round_trips)
+                    continue
+
+                price, cost = fill['price'], fill['cost']
+                events.append({
+                    'symbol': sym, 'signal_date': d, 'fill_date': pd.Timestamp(fill['date']), 'kind': kind,
+                    'prev_weight': w0, 'target_weight': w1, 'price': price, 'cost': cost, 'terminal': 0.0,
+                })
+                stats[kind + 's'] += 1
+                if kind == 'drop':
+                    book.pop(sym, None)
+                    lot = lots.pop(sym, None)
+                    if lot:
+                        exit_px = price * (1 - cost) if lot['position'] > 0 else price * (1 + cost)
+                        self._close_lot(sym, lot, exit_px, pd.Timestamp(fill['date']), 'normal', round_trips)
+                    continue
+                book[sym] = w1
+                if kind == 'add':
+                    position = 1 if w1 > 0 else -1
+                    lots[sym] = {
+                        'signal_date': d,
+                        'position': position,
+                        'entry_price': price * (1 + cost) if position > 0 else price * (1 - cost),
+                        'entry_date': pd.Timestamp(fill['date']),
+                    }
+            for sym, w in sorted(book.items()):
+                holdings_rows.append({'date': d, 'symbol': sym, 'weight': w})
+
+        end_ts = pd.Timestamp(end_date) if end_date is not None else None
+        if end_ts is not None:
+            sessions = self._calendar_days(end_ts - pd.Timedelta(days=14), end_ts)
+            last_session = sessions[-1] if len(sessions) > 0 else end_ts
+            self._check_delistings(book, lots, last_session, end_date, events, round_trips)
+        stats['delisted'] = int(sum(1 for e in events if e['kind'] == 'delisted'))
+
+        daily = self._daily_returns(events, end_ts)
+
+        # Mark remaining open lots at the last close in range
+        for sym, lot in sorted(lots.items()):
+            s = self._close_series(sym, end_date)
+            if s is None or len(s) == 0:
+                continue
+            self._close_lot(sym, lot, float(s.iloc[-1]), s.index[-1], 'open_mtm', round_trips)
+
+        rt = pd.DataFrame(round_trips)
+        if len(rt) > 0:
+            rt['holding_period'] = self._session_count(rt['entry_date'], rt['exit_date'])
+
+        n_target = stats['target_positions']
+        stats['legacy_lookups_est'] = 2 * n_target
+        stats['retention_rate'] = (stats['retained'] / n_target) if n_target else None
+
+        trades = pd.DataFrame(events)
+        if len(trades) > 0:
+            trades['delta_weight'] = trades['target_weight'] - trades['prev_weight']
+        return {
+            'trades': trades,
+            'holdings': pd.DataFrame(holdings_rows, columns=['date', 'symbol', 'weight']),
+            'daily': daily,
+            'round_trips': rt,
+            'stats': stats,
+        }
+
+    def _calendar_days(self, start: pd.Timestamp, end: Optional[pd.Timestamp]) -> pd.DatetimeIndex:
+        cal = self.sim._calendar
+        if cal is not None and len(cal) > 0:
+            return cal.between(start, end)
+        return pd.bdate_range(start=start, end=end if end is not None else start)
+
+    def _session_count(self, entry_dates, exit_dates) -> np.ndarray:
+        cal = self.sim._calendar
+        a = pd.DatetimeIndex(pd.to_datetime(entry_dates))
+        b = pd.DatetimeIndex(pd.to_datetime(exit_dates))
+        if cal is not None and len(cal) > 0:
+            return (cal.index_of(b) - cal.index_of(a)).astype(int)
+        return np.asarray((b - a).days, dtype=int)
+
+    def _daily_returns(self, events: List[dict], end_ts: Optional[pd.Timestamp]) -> pd.DataFrame:
+        cols = ['date', 'gross_return', 'cost', 'net_return', 'turnover', 'n_holdings']
+        if not events:
+            return pd.DataFrame(columns=cols)
+        first = min(e['fill_date'] for e in events)
+        last = end_ts if end_ts is not None else max(e['fill_date'] for e in events)
+        days = self._calendar_days(first, last)
+        if len(days) == 0:
+            return pd.DataFrame(columns=cols)
+
+        symbols = sorted({e['symbol'] for e in events})
+        col = {s: i for i, s in enumerate(symbols)}
+        T, S = len(days), len(symbols)
+        close = np.full((T, S), np.nan)
+        prev_close = np.full((T, S), np.nan)
+        for s, j in col.items():
+            ser = self._close_series(s, last)
+            if ser is None or len(ser) == 0:
+                continue
+            idx = ser.index.searchsorted(days, side='right') - 1
+            ok = idx >= 0
+            close[ok, j] = ser.to_numpy()[idx[ok]]
+            pidx = ser.index.searchsorted(days, side='left') - 1
+            pok = pidx >= 0
+            prev_close[pok, j] = ser.to_numpy()[pidx[pok]]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.where((prev_close > 0) & np.isfinite(close), close / prev_close - 1.0, 0.0)
+
+        weights = np.zeros((T, S))
+        correction = np.zeros(T)
+        cost = np.zeros(T)
+        turnover = np.zeros(T)
+        for e in sorted(events, key=lambda x: x['fill_date']):
+            k = int(days.searchsorted(e['fill_date'], side='left'))
+            if k >= T:
+                continue
+            j = col[e['symbol']]
+            w0, w1 = float(e['prev_weight']), float(e['target_weight'])
+            weights[k:, j] = w1
+            dw = abs(w1 - w0)
+            turnover[k] += dw
+            cost[k] += dw * float(e['cost'])
+            if e['kind'] == 'delisted':
+                correction[k] += w0 * float(e['terminal'])
+                continue
+            px = e['price']
+            if px is None or not (px > 0):
+                continue
+            c, pc = close[k, j], prev_close[k, j]
+            overnight = (px / pc - 1.0) if (pc > 0) else 0.0
+            intraday = (c / px - 1.0) if np.isfinite(c) else 0.0
+            correction[k] += w0 * overnight + w1 * intraday - w1 * r[k, j]
+
+        gross = (weights * r).sum(axis=1) + correction
+        return pd.DataFrame({
+            'date': days,
+            'gross_return': gross,
+            'cost': cost,
+            'net_return': gross - cost,
+            'turnover': turnover,
+            'n_holdings': (weights != 0).sum(axis=1),
+        })
@@ -0,0 +1,191 @@
+"""
+Engine Pool - warm BacktestEngines shared across segments and factors
+
+Building a BacktestEngine lists the price directories, reads the delisted
+csv and starts with empty price / fundamentals / event caches, so a fresh
+engine per segment re-unpickles every symbol it touches. EnginePool keeps:
+  - one BacktestEngine per full engine config (reused across segments)
+  - one DataEngine (price cache + quality masks) and trading calendar per
+    price-data config, injected into every engine built on that data
+  - one MarketCapEngine per (dir, strict), one Fundamentals / Value engine
+    per (dir, staleness) and the FactorEngine event caches (institutional,
+    owner earnings, earnings calendar / history, earnings dates) per source
+All shared objects are point-in-time lookups keyed by symbol and date, so a
+warm engine returns the same results as a fresh one.
+
+With a store_root the pool also serves price and fundamentals frames from
+memory-mapped ColumnStores (backtest.shared_store) so the workers of a
+process pool share one copy of the data. prepare_stores() builds them (run it
+once in the parent); get() only attaches stores that already exist and match
+their sources.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .backtest_engine import BacktestEngine
+from .data_engine import DataEngine
+from .market_cap_engine import MarketCapEngine
+from .shared_store import ColumnStore, open_fundamentals_store, open_price_store
+
+DATA_KEYS = ('PRICE_DIR_ACTIVE', 'PRICE_DIR_DELISTED', 'DELISTED_INFO')
+
+# FactorEngine lazy caches -> config key naming their source file
+EVENT_CACHES = {
+    '_institutional_summary_cache': 'INSTITUTIONAL_SUMMARY_PATH',
+    '_owner_earnings_cache': 'OWNER_EARNINGS_PATH',
+    '_earnings_calendar_cache': 'EARNINGS_CALENDAR_PATH',
+    '_earnings_history_cache': 'EARNINGS_HISTORY_PATH',
+}
+
+
+def config_hash(obj) -> str:
+    """Same hash BacktestEngine uses for its signal cache signature."""
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+class EnginePool:
+    """Hands out warm BacktestEngines; get() resets per-run counters only."""
+
+    def __init__(self, store_root: Optional[str] = None):
+        self.store_root = store_root
+        self._stores: Dict[str, Optional[ColumnStore]] = {}
+        self._engines: Dict[str, BacktestEngine] = {}
+        self._data: Dict[Tuple, DataEngine] = {}
+        self._calendars: Dict[Tuple, object] = {}
+        self._market_caps: Dict[Tuple, MarketCapEngine] = {}
+        self._fundamentals: Dict[Tuple, object] = {}
+        self._values: Dict[Tuple, object] = {}
+        self._events: Dict[Tuple, dict] = {}
+        self._earnings_dates: Dict[str, dict] = {}
+        self._configs: Dict[str, dict] = {}
+        self.stats = {'engines_built': 0, 'engines_reused': 0, 'data_engines_built': 0}
+
+    def __len__(self) -> int:
+        return len(self._engines)
+
+    @staticmethod
+    def _data_key(config_dict: dict) -> Tuple:
+        return tuple(str(config_dict.get(k)) for k in DATA_KEYS)
+
+    def _store(self, kind: str, source, opener, build: bool) -> Optional[ColumnStore]:
+        if not self.store_root:
+            return None
+        path = str(Path(self.store_root) / f"{kind}_{config_hash(source)[:16]}")
+        if self._stores.get(path) is None:
+            self._stores[path] = opener(path, build)
+        return self._stores[path]
+
+    def _price_store(self, data_engine: DataEngine, key: Tuple, build: bool) -> Optional[ColumnStore]:
+        return self._store('prices', key, lambda path, b: open_price_store(data_engine, path, build=b), build)
+
+    def _fundamentals_store(self, engine, build: bool) -> Optional[ColumnStore]:
+        if not Path(engine.fundamentals_dir).is_dir():
+            return None
+        return self._store(
+            'fundamentals', str(engine.fundamentals_dir),
+            lambda path, b: open_fundamentals_store(engine, path, build=b), build,
+        )
+
+    def _data_engine(self, config_dict: dict) -> DataEngine:
+        key = self._data_key(config_dict)
+        if key not in self._data:
+            data_engine = DataEngine(*(config_dict.get(k) for k in DATA_KEYS))
+            data_engine.price_store = self._price_store(data_engine, key, build=False)
+            self._data[key] = data_engine
+            self.stats['data_engines_built'] += 1
+        return self._data[key]
+
+    def _market_cap_engine(self, config_dict: dict) -> Optional[MarketCapEngine]:
+        mc_dir = config_dict.get('MARKET_CAP_DIR')
+        if not mc_dir or not os.path.isdir(mc_dir):
+            return None
+        strict = bool(config_dict.get('MARKET_CAP_STRICT', True))
+        key = (str(mc_dir), strict)
+        if key not in self._market_caps:
+            if not any(f.endswith('.csv') for f in os.listdir(mc_dir)):
+                return None
+            self._market_caps[key] = MarketCapEngine(mc_dir, strict=strict)
+        return self._market_caps[key]
+
+    def _share_factor_caches(self, engine: BacktestEngine) -> None:
+        fe = engine.factor_engine
+        f = fe.fundamentals_engine
+        fe.fundamentals_engine = self._fundamentals.setdefault((str(f.fundamentals_dir), f.max_staleness_days), f)
+        v = fe.value_engine
+        fe.value_engine = self._values.setdefault((str(v.fundamentals_dir), v.max_staleness_days), v)
+        for fund in (fe.fundamentals_engine, fe.value_engine):
+            if fund.store is None:
+                fund.store = self._fundamentals_store(fund, build=False)
+        for attr, key in EVENT_CACHES.items():
+            cached = self._events.get((attr, str(engine.config.get(key))))
+            if cached is not None:
+                setattr(fe, attr, cached)
+        earnings_dir = getattr(fe.pead_factor, 'earnings_dir', None)
+        if earnings_dir is not None:
+            fe._earnings_date_cache = self._earnings_dates.setdefault(str(earnings_dir), fe._earnings_date_cache)
+
+    def _harvest(self, engine: BacktestEngine) -> None:
+        """Keep event caches an engine loaded lazily so the next engine starts warm."""
+        fe = engine.factor_engine
+        for attr, key in EVENT_CACHES.items():
+            cached = getattr(fe, attr, None)
+            if cached is not None:
+                self._events.setdefault((attr, str(engine.config.get(key))), cached)
+        if engine.trading_calendar is not None:
+            self._calendars.setdefault(self._data_key(engine.config), engine.trading_calendar)
+
+    def get(self, config_dict: dict) -> BacktestEngine:
+        """Warm engine for this exact config (built on shared data engines if new)."""
+        for engine in self._engines.values():
+            self._harvest(engine)
+        key = config_hash(config_dict)
+        engine = self._engines.get(key)
+        if engine is None:
+            engine = BacktestEngine(
+                config_dict,
+                trading_calendar=self._calendars.get(self._data_key(config_dict)),
+                data_engine=self._data_engine(config_dict),
+                market_cap_engine=self._market_cap_engine(config_dict),
+            )
+            self._share_factor_caches(engine)
+            self._engines[key] = engine
+            self._configs[key] = dict(config_dict)
+            self.stats['engines_built'] += 1
+        else:
+            self.stats['engines_reused'] += 1
+        engine.execution_simulator.reset_filter_stats()
+        return engine
+
+    def prepare_stores(self, config_dict: dict, fundamentals: bool = False) -> None:
+        """Build (or validate) the shared stores for this config; call before forking workers."""
+        if not self.store_root:
+            return
+        data_engine = self._data_engine(config_dict)
+        if data_engine.price_store is None:
+            data_engine.price_store = self._price_store(data_engine, self._data_key(config_dict), build=True)
+        if fundamentals:
+            fe = self.get(config_dict).factor_engine
+            for fund in (fe.fundamentals_engine, fe.value_engine):
+                if fund.store is None:
+                    fund.store = self._fundamentals_store(fund, build=True)
+
+    def configs(self) -> list:
+        """Configs of every engine built since the last clear(); their inputs back the warm caches."""
+        return list(self._configs.values())
+
+    def release_engines(self) -> None:
+        """Drop the per-config engines but keep the shared data engines, stores and event caches."""
+        for engine in self._engines.values():
+            self._harvest(engine)
+        self._engines.clear()
+
+    def clear(self) -> None:
+        """Drop engines and caches (stores stay on disk and are reattached on demand)."""
+        self.__init__(self.store_root)
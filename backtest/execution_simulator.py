@@ -6,6 +6,12 @@ from .data_engine import DataEngine
 from .data_quality_filter import DataQualityFilter
 from .delisting_handler import DelistingHandler
 from .cost_model import CostModel
+from .trading_calendar import TradingCalendar
+
+FORWARD_RETURN_COLUMNS = [
+    'symbol', 'signal_date', 'entry_price', 'exit_price',
+    'position', 'return', 'holding_period', 'exit_type', 'method'
+]
 
 
 class ExecutionSimulator:
@@ -14,7 +20,7 @@ class ExecutionSimulator:
                  transaction_cost: float = 0.0020,
                  execution_delay: int = 1,
                  execution_use_trading_days: bool = False,
-                 trading_calendar: Optional[pd.DatetimeIndex] = None,
+                 trading_calendar=None,
                  enable_quality_filter: bool = True,
                  enable_smart_delisting: bool = True,
                  enable_dynamic_cost: bool = False,
@@ -37,10 +43,18 @@ class ExecutionSimulator:
         self.trade_size_usd = float(trade_size_usd) if trade_size_usd is not None else 10000.0
         self._trading_calendar = None
         self._trading_index = None
+        self._calendar: Optional[TradingCalendar] = None
+        self._exec_date_cache = {}
         if trading_calendar is not None:
             self.set_trading_calendar(trading_calendar)
 
         self.quality_filter = DataQualityFilter() if enable_quality_filter else None
+        # Zero-copy windows + precomputed quality masks need the stock DataEngine
+        # price path (subclasses overriding get_price keep the legacy route).
+        self._fast_window = (
+            isinstance(data_engine, DataEngine)
+            and type(data_engine).get_price is DataEngine.get_price
+        )
         self.delisting_handler = DelistingHandler() if enable_smart_delisting else None
         base_cost = float(transaction_cost) * self.cost_multiplier
         self.cost_model = CostModel(base_cost=base_cost) if enable_dynamic_cost else None
@@ -48,6 +62,10 @@ class ExecutionSimulator:
         self.volatility_cache = {}
 
         # Categorized counters
+        self.reset_filter_stats()
+
+    def reset_filter_stats(self):
+        """Zero the filter counters (e.g. when a warm simulator starts a new run)."""
         self.filter_stats = {
             # Execution-related calls (apply_cost=True)
             'execution_price_calls': 0,
@@ -68,36 +86,40 @@ class ExecutionSimulator:
             'pct_of_volume_count': 0,
         }
 
-    def set_trading_calendar(self, calendar: pd.DatetimeIndex):
+    def set_trading_calendar(self, calendar):
+        """Accept a TradingCalendar or any date sequence (DatetimeIndex)."""
+        self._exec_date_cache = {}
         if calendar is None or len(calendar) == 0:
             self._trading_calendar = None
             self._trading_index = None
+            self._calendar = None
             return
-        cal = pd.DatetimeIndex(pd.to_datetime(calendar)).sort_values().unique()
-        self._trading_calendar = cal
-        self._trading_index = pd.DatetimeIndex(cal)
+        if not isinstance(calendar, TradingCalendar):
+            calendar = TradingCalendar(calendar)
+        self._calendar = calendar
+        self._trading_calendar = calendar.dates
+        self._trading_index = calendar.dates
 
     def _shift_date(self, base_date: pd.Timestamp, n_days: int) -> pd.Timestamp:
-        if not self.execution_use_trading_days or self._trading_index is None:
+        if not self.execution_use_trading_days or self._calendar is None:
             return base_date + pd.Timedelta(days=int(n_days))
-
-        cal = self._trading_index
-        base = pd.Timestamp(base_date)
-        # Use next trading date if base is not a trading day
-        pos = cal.searchsorted(base)
-        if pos >= len(cal):
-            return cal[-1]
-        if cal[pos] != base and pos < len(cal):
-            base_pos = pos
-        else:
-            base_pos = pos
-
-        target = base_pos + int(n_days)
-        if target < 0:
-            target = 0
-        if target >= len(cal):
-            target = len(cal) - 1
-        return cal[target]
+        # Next trading date if base is not a trading day, then step n sessions (clipped)
+        return self._calendar.shift(pd.Timestamp(base_date), int(n_days))
+
+    def _shift_dates(self, dates, n_days: int) -> pd.DatetimeIndex:
+        """Vectorized _shift_date over a sequence of dates."""
+        idx = pd.DatetimeIndex(pd.to_datetime(dates))
+        if not self.execution_use_trading_days or self._calendar is None:
+            return idx + pd.Timedelta(days=int(n_days))
+        return self._calendar.shift(idx, int(n_days))
+
+    def _execution_date(self, signal_date) -> pd.Timestamp:
+        key = signal_date if isinstance(signal_date, str) else pd.Timestamp(signal_date)
+        hit = self._exec_date_cache.get(key)
+        if hit is None:
+            hit = self._shift_date(pd.Timestamp(signal_date), self.execution_delay)
+            self._exec_date_cache[key] = hit
+        return hit
 
     def _get_volatility(self, symbol: str, end_date: pd.Timestamp) -> float:
         self.filter_stats['aux_volatility_calls'] += 1
@@ -127,28 +149,68 @@ class ExecutionSimulator:
                             side: str = 'buy',
                             apply_cost: bool = True,
                             apply_quality_filter: bool = True) -> Optional[float]:
-
+        fill = self.get_execution_fill(
+            symbol,
+            signal_date,
+            side=side,
+            apply_cost=apply_cost,
+            apply_quality_filter=apply_quality_filter,
+        )
+        if fill is None:
+            return None
+        if not apply_cost:
+            return fill['price']
+        if side == 'buy':
+            return fill['price'] * (1 + fill['cost'])
+        return fill['price'] * (1 - fill['cost'])
+
+    def get_execution_fill(self,
+                           symbol: str,
+                           signal_date: str,
+                           side: str = 'buy',
+                           apply_cost: bool = True,
+                           apply_quality_filter: bool = True) -> Optional[dict]:
+        """
+        Resolve the execution bar for a signal.
+        Returns {'date', 'price' (raw open/close), 'cost' (fraction, 0.0 if apply_cost=False)}
+        or None when the trade cannot be filled.
+        """
         # Count calls
         if apply_cost:
             self.filter_stats['execution_price_calls'] += 1
         else:
             self.filter_stats['aux_data_calls'] += 1
 
-        execution_date = self._shift_date(pd.Timestamp(signal_date), self.execution_delay)
-
-        start_date = (execution_date - pd.Timedelta(days=5)).strftime('%Y-%m-%d')
-        end_date = (execution_date + pd.Timedelta(days=5)).strftime('%Y-%m-%d')
-
-        df = self.data_engine.get_price(symbol, start_date=start_date, end_date=end_date)
-        if df is None or len(df) == 0:
-            self.filter_stats['no_price_data'] += 1
-            return None
+        execution_date = self._execution_date(signal_date)
+
+        start_date = execution_date - pd.Timedelta(days=5)
+        end_date = execution_date + pd.Timedelta(days=5)
+
+        if self._fast_window:
+            window = self.data_engine.get_price_window(symbol, start_date=start_date, end_date=end_date)
+            if window is None:
+                self.filter_stats['no_price_data'] += 1
+                return None
+            full, lo, hi = window
+            df = full.iloc[lo:hi]
+            # Quality filter: O(1) lookup on the symbol's precomputed per-day flags
+            if apply_quality_filter and self.quality_filter:
+                mask = self.data_engine.get_quality_mask(symbol)
+                if not self.quality_filter.validate_window(mask, lo, hi, symbol):
+                    if apply_cost:
+                        self.filter_stats['quality_filter_dropped'] += 1
+                    return None
+        else:
+            df = self.data_engine.get_price(symbol, start_date=start_date, end_date=end_date)
+            if df is None or len(df) == 0:
+                self.filter_stats['no_price_data'] += 1
+                return None
 
-        # Quality filter
-        if apply_quality_filter and self.quality_filter and not self.quality_filter.validate_price_data(df, symbol):
-            if apply_cost:
-                self.filter_stats['quality_filter_dropped'] += 1
-            return None
+            # Quality filter
+            if apply_quality_filter and self.quality_filter and not self.quality_filter.validate_price_data(df, symbol):
+                if apply_cost:
+                    self.filter_stats['quality_filter_dropped'] += 1
+                return None
 
         df = df[df['date'] >= execution_date]
         if len(df) == 0:
@@ -176,8 +238,9 @@ class ExecutionSimulator:
                             self.filter_stats['limit_up_down_blocked'] += 1
                         return None
 
+        fill = {'date': row['date'], 'price': float(base_price), 'cost': 0.0}
         if not apply_cost:
-            return float(base_price)
+            return fill
 
         # Cost
         if self.cost_model:
@@ -197,12 +260,10 @@ class ExecutionSimulator:
         else:
             cost = self.base_cost * self.cost_multiplier
 
-        if side == 'buy':
-            return float(base_price) * (1 + float(cost))
-        else:
-            if self.apply_stamp_tax:
-                cost = float(cost) + float(self.stamp_tax_rate)
-            return float(base_price) * (1 - float(cost))
+        if side != 'buy' and self.apply_stamp_tax:
+            cost = float(cost) + float(self.stamp_tax_rate)
+        fill['cost'] = float(cost)
+        return fill
 
     def execute_trades(self, positions_df: pd.DataFrame) -> pd.DataFrame:
         results = []
@@ -236,7 +297,10 @@ class ExecutionSimulator:
         if executed_trades is None or len(executed_trades) == 0:
             return pd.DataFrame(results)
 
-        for _, tr in executed_trades.iterrows():
+        exit_dates = self._shift_dates(executed_trades['signal_date'], holding_period + self.execution_delay)
+        exit_signal_dates = self._shift_dates(exit_dates, -self.execution_delay)
+
+        for i, (_, tr) in enumerate(executed_trades.iterrows()):
             symbol = tr['symbol']
             signal_date = tr['signal_date']
             entry = float(tr['execution_price'])  # includes entry cost
@@ -247,8 +311,8 @@ class ExecutionSimulator:
                 self.filter_stats['entry_sanity_dropped'] += 1
                 continue
 
-            exit_date = self._shift_date(pd.Timestamp(signal_date), holding_period + self.execution_delay)
-            exit_signal_date = self._shift_date(exit_date, -self.execution_delay)
+            exit_date = exit_dates[i]
+            exit_signal_date = exit_signal_dates[i]
 
             exit_px = self.get_execution_price(
                 symbol,
@@ -337,14 +401,33 @@ class ExecutionSimulator:
         Compute forward returns for the full signal cross-section (no position filtering).
         Uses execution_delay and holding_period, but does NOT apply transaction costs.
         """
-        results = []
+        terms = self.calculate_forward_return_terms(
+            signals_df,
+            holding_periods=[holding_period],
+            apply_quality_filter=apply_quality_filter
+        )
+        return terms[holding_period]
+
+    def calculate_forward_return_terms(self,
+                                       signals_df: pd.DataFrame,
+                                       holding_periods,
+                                       apply_quality_filter: bool = True) -> dict:
+        """
+        Forward returns for several holding periods in one pass: {holding_period: frame}.
+        The entry fill is resolved once per signal row and shared by every horizon;
+        each frame equals calculate_forward_returns(signals_df, holding_period).
+        """
+        holds = list(dict.fromkeys(holding_periods))
         if signals_df is None or len(signals_df) == 0:
-            return pd.DataFrame(columns=[
-                'symbol', 'signal_date', 'entry_price', 'exit_price',
-                'position', 'return', 'holding_period', 'exit_type', 'method'
-            ])
+            return {h: pd.DataFrame(columns=FORWARD_RETURN_COLUMNS) for h in holds}
 
-        for _, row in signals_df.iterrows():
+        exits = {}
+        for h in holds:
+            exit_dates = self._shift_dates(signals_df['date'], h + self.execution_delay)
+            exits[h] = (exit_dates, self._shift_dates(exit_dates, -self.execution_delay))
+
+        results = {h: [] for h in holds}
+        for i, (_, row) in enumerate(signals_df.iterrows()):
             symbol = row['symbol']
             signal_date = row['date']
 
@@ -358,70 +441,75 @@ class ExecutionSimulator:
             if entry is None or pd.isna(entry) or entry <= 0:
                 continue
 
-            exit_date = self._shift_date(pd.Timestamp(signal_date), holding_period + self.execution_delay)
-            exit_signal_date = self._shift_date(exit_date, -self.execution_delay)
-            exit_px = self.get_execution_price(
+            for h in holds:
+                exit_dates, exit_signal_dates = exits[h]
+                rec = self._forward_return_row(
+                    symbol, signal_date, float(entry), exit_dates[i], exit_signal_dates[i], h, apply_quality_filter
+                )
+                if rec is not None:
+                    results[h].append(rec)
+
+        return {
+            h: pd.DataFrame(rows) if rows else pd.DataFrame(columns=FORWARD_RETURN_COLUMNS)
+            for h, rows in results.items()
+        }
+
+    def _forward_return_row(self, symbol, signal_date, entry: float, exit_date, exit_signal_date,
+                            holding_period, apply_quality_filter: bool) -> Optional[dict]:
+        exit_px = self.get_execution_price(
+            symbol,
+            exit_signal_date.strftime('%Y-%m-%d'),
+            side='sell',
+            apply_cost=False,
+            apply_quality_filter=apply_quality_filter
+        )
+
+        if exit_px is not None and not pd.isna(exit_px) and exit_px > 0:
+            r = (float(exit_px) - entry) / entry
+            r = max(min(float(r), 1.0), -0.95)
+            return {
+                'symbol': symbol,
+                'signal_date': signal_date,
+                'entry_price': entry,
+                'exit_price': float(exit_px),
+                'position': 1,
+                'return': float(r),
+                'holding_period': holding_period,
+                'exit_type': 'normal',
+                'method': 'forward_full'
+            }
+
+        # Delisted/no data path
+        if self.delisting_handler:
+            last_raw = self.get_execution_price(
                 symbol,
-                exit_signal_date.strftime('%Y-%m-%d'),
+                exit_date.strftime('%Y-%m-%d'),
                 side='sell',
                 apply_cost=False,
                 apply_quality_filter=apply_quality_filter
             )
-
-            if exit_px is not None and not pd.isna(exit_px) and exit_px > 0:
-                exit_type = 'normal'
-                r = (float(exit_px) - float(entry)) / float(entry)
+            if last_raw is not None and last_raw > 0:
+                r = self.delisting_handler.estimate_delisting_return(
+                    symbol=symbol,
+                    entry_price=entry,
+                    last_price=float(last_raw),
+                    position=1,
+                    delisting_reason=None
+                )
                 r = max(min(float(r), 1.0), -0.95)
-                results.append({
+                return {
                     'symbol': symbol,
                     'signal_date': signal_date,
-                    'entry_price': float(entry),
-                    'exit_price': float(exit_px),
+                    'entry_price': entry,
+                    'exit_price': float(last_raw),
                     'position': 1,
                     'return': float(r),
                     'holding_period': holding_period,
-                    'exit_type': exit_type,
+                    'exit_type': 'delisted',
                     'method': 'forward_full'
-                })
-                continue
-
-            # Delisted/no data path
-            if self.delisting_handler:
-                last_raw = self.get_execution_price(
-                    symbol,
-                    exit_date.strftime('%Y-%m-%d'),
-                    side='sell',
-                    apply_cost=False,
-                    apply_quality_filter=apply_quality_filter
-                )
-                if last_raw is not None and last_raw > 0:
-                    r = self.delisting_handler.estimate_delisting_return(
-                        symbol=symbol,
-                        entry_price=float(entry),
-                        last_price=float(last_raw),
-                        position=1,
-                        delisting_reason=None
-                    )
-                    r = max(min(float(r), 1.0), -0.95)
-                    results.append({
-                        'symbol': symbol,
-                        'signal_date': signal_date,
-                        'entry_price': float(entry),
-                        'exit_price': float(last_raw),
-                        'position': 1,
-                        'return': float(r),
-                        'holding_period': holding_period,
-                        'exit_type': 'delisted',
-                        'method': 'forward_full'
-                    })
-            # If we still cannot compute, skip the row (return is undefined).
-
-        if not results:
-            return pd.DataFrame(columns=[
-                'symbol', 'signal_date', 'entry_price', 'exit_price',
-                'position', 'return', 'holding_period', 'exit_type', 'method'
-            ])
-        return pd.DataFrame(results)
+                }
+        # If we still cannot compute, skip the row (return is undefined).
+        return None
 
     def get_filter_stats(self):
         exec_calls = self.filter_stats['execution_price_calls']
@@ -0,0 +1,187 @@
+"""
+Exposure Engine - full-coverage size / turnover / industry exposure of a signal panel
+
+All diagnostics run over every signal date at once:
+  - symbols are encoded once as sorted int codes
+  - market caps are attached with one as-of merge (last value on or before
+    the signal date) against the long market-cap panel
+  - per-date size correlations come from grouped sums (ic_engine.grouped_corr)
+  - top-bucket overlap between consecutive dates is a membership test on
+    sorted (date, code) keys, so no per-date frame filtering is done
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ic_engine import grouped_corr
+from .market_cap_engine import MarketCapEngine
+
+
+def encode_symbols(symbols) -> tuple[np.ndarray, np.ndarray]:
+    """(codes, sorted unique symbols) so that uniq[codes] == symbols."""
+    uniq, codes = np.unique(np.asarray(symbols).astype(str), return_inverse=True)
+    return codes.reshape(-1).astype(np.int64), uniq
+
+
+def _date_codes(dates) -> tuple[np.ndarray, pd.DatetimeIndex]:
+    codes, labels = pd.factorize(pd.Series(dates), sort=False)
+    parsed = pd.DatetimeIndex(pd.to_datetime(labels))
+    uniq, remap = np.unique(parsed.to_numpy(), return_inverse=True)
+    return remap.reshape(-1)[codes].astype(np.int64), pd.DatetimeIndex(uniq)
+
+
+def market_cap_panel(market_cap: MarketCapEngine, symbols: Iterable[str]) -> pd.DataFrame:
+    """Long (symbol, date, marketCap) panel for the given symbols, sorted by date."""
+    parts = []
+    for sym in sorted(set(str(s) for s in symbols)):
+        try:
+            df = market_cap.history(sym)
+        except Exception:
+            df = None
+        if df is None or len(df) == 0:
+            continue
+        parts.append(pd.DataFrame({
+            'symbol': sym,
+            'date': df['date'].to_numpy(),
+            'marketCap': pd.to_numeric(df['marketCap'], errors='coerce').to_numpy(dtype=float),
+        }))
+    if not parts:
+        return pd.DataFrame(columns=['symbol', 'date', 'marketCap'])
+    return pd.concat(parts, ignore_index=True).sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def asof_market_cap(signals: pd.DataFrame, panel: pd.DataFrame) -> np.ndarray:
+    """Market cap as of each signal row (last panel value on or before the date), NaN if none."""
+    out = np.full(len(signals), np.nan)
+    if len(signals) == 0 or panel is None or len(panel) == 0:
+        return out
+    codes, uniq = encode_symbols(signals['symbol'])
+    pcode = pd.Index(uniq).get_indexer(panel['symbol'].astype(str).to_numpy())
+    keep = pcode >= 0
+    right = pd.DataFrame({
+        'code': pcode[keep],
+        'date': pd.to_datetime(panel['date'].to_numpy()[keep]),
+        'marketCap': panel['marketCap'].to_numpy(dtype=float)[keep],
+    }).sort_values('date', kind='stable')
+    left = pd.DataFrame({
+        'row': np.arange(len(signals)),
+        'code': codes,
+        'date': pd.to_datetime(signals['date']).to_numpy(),
+    }).sort_values('date', kind='stable')
+    right['date'] = right['date'].astype(left['date'].dtype)
+    merged = pd.merge_asof(left, right, on='date', by='code', direction='backward')
+    out[merged['row'].to_numpy()] = merged['marketCap'].to_numpy(dtype=float)
+    return out
+
+
+def size_exposure(signals: pd.DataFrame, market_cap: np.ndarray,
+                  min_names: int = 30, min_pooled: int = 100) -> Dict:
+    """
+    Per-date correlation of signal with log market cap.
+    Returns mean (over dates with >= min_names usable rows), pooled corr,
+    n_dates and the per-date frame (date, n, corr). When no date qualifies,
+    'value' falls back to the pooled corr (needs >= min_pooled rows).
+    """
+    out = {'value': None, 'mean_corr': None, 'pooled_corr': None, 'n_dates': 0, 'by_date': None}
+    if len(signals) == 0:
+        return out
+    sig = pd.to_numeric(signals['signal'], errors='coerce').to_numpy(dtype=float)
+    cap = np.asarray(market_cap, dtype=float)
+    ok = np.isfinite(sig) & np.isfinite(cap) & (cap > 0)
+    if not ok.any():
+        return out
+    g, dates = _date_codes(signals['date'].to_numpy()[ok])
+    x, y = np.log(cap[ok]), sig[ok]
+    corr, n = grouped_corr(g, x, y, len(dates))
+    by_date = pd.DataFrame({'date': dates, 'n': n, 'corr': np.where(n >= int(min_names), corr, np.nan)})
+    valid = by_date['corr'].dropna()
+    out['by_date'] = by_date
+    out['n_dates'] = int(len(valid))
+    if len(valid) > 0:
+        out['mean_corr'] = float(valid.mean())
+    if len(x) >= int(min_pooled):
+        c = np.corrcoef(x, y)[0, 1]
+        if np.isfinite(c):
+            out['pooled_corr'] = float(c)
+    out['value'] = out['mean_corr'] if out['mean_corr'] is not None else out['pooled_corr']
+    return out
+
+
+def top_overlap(signals: pd.DataFrame, top_pct: float = 0.2) -> Dict:
+    """
+    Share of each date's top-`top_pct` names that were also in the previous
+    date's top bucket (ties broken by row order, like DataFrame.nlargest).
+    Returns mean overlap, n_pairs and the per-date frame (date, n_top, overlap).
+    """
+    out = {'mean': None, 'n_pairs': 0, 'by_date': None}
+    if len(signals) < 2:
+        return out
+    g, dates = _date_codes(signals['date'].to_numpy())
+    D = len(dates)
+    if D < 2:
+        return out
+    codes, uniq = encode_symbols(signals['symbol'])
+    S = len(uniq)
+    sig = pd.to_numeric(signals['signal'], errors='coerce').to_numpy(dtype=float)
+
+    size = np.bincount(g, minlength=D)
+    n_top = np.maximum(1, (size * float(top_pct)).astype(np.int64))
+    valid = ~np.isnan(sig)
+    # Per date: valid rows by descending signal, then row order
+    order = np.lexsort((np.arange(len(sig)), -sig, ~valid, g))
+    gs = g[order]
+    starts = np.searchsorted(gs, np.arange(D))
+    pos = np.arange(len(gs)) - starts[gs]
+    take = order[(pos < n_top[gs]) & valid[order]]
+
+    tg = g[take]
+    keys = np.unique(tg * S + codes[take])
+    prev = (tg - 1) * S + codes[take]
+    hit = (tg > 0) & np.isin(prev, keys, assume_unique=False)
+    hits = np.bincount(tg, weights=hit.astype(float), minlength=D)
+    members = np.bincount(tg, minlength=D)
+    overlap = hits / np.maximum(1, members)
+    overlap[0] = np.nan
+    out['by_date'] = pd.DataFrame({'date': dates, 'n_top': members, 'overlap': overlap})
+    out['mean'] = float(np.mean(overlap[1:]))
+    out['n_pairs'] = int(D - 1)
+    return out
+
+
+def industry_exposure(signals: pd.DataFrame, profiles: Optional[pd.DataFrame], top_n: int = 10) -> Optional[Dict]:
+    """Mean signal by industry / sector over all rows, plus per-date industry coverage."""
+    if profiles is None:
+        return None
+    prof = profiles[['symbol', 'industry', 'sector']].copy()
+    prof['symbol'] = prof['symbol'].astype(str)
+    prof = prof.drop_duplicates(subset=['symbol']).set_index('symbol')
+    codes, uniq = encode_symbols(signals['symbol'])
+    industry = prof['industry'].reindex(uniq).to_numpy(dtype=object)[codes]
+    sector = prof['sector'].reindex(uniq).to_numpy(dtype=object)[codes]
+    frame = pd.DataFrame({
+        'date': signals['date'].to_numpy(),
+        'signal': pd.to_numeric(signals['signal'], errors='coerce').to_numpy(dtype=float),
+        'industry': industry,
+        'sector': sector,
+    })
+    has_ind = frame['industry'].notna()
+    by_date_cov = has_ind.groupby(frame['date']).mean()
+
+    def _top(col):
+        return (
+            frame.groupby(col)['signal'].mean().dropna()
+            .sort_values(key=lambda s: s.abs(), ascending=False)
+            .head(top_n)
+        )
+
+    return {
+        'coverage': float(has_ind.mean()),
+        'min_date_coverage': float(by_date_cov.min()) if len(by_date_cov) else None,
+        'n_dates': int(len(by_date_cov)),
+        'top_industry_mean_signal': _top('industry').round(6).to_dict(),
+        'top_sector_mean_signal': _top('sector').round(6).to_dict(),
+    }
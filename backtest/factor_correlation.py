@@ -0,0 +1,221 @@
+"""
+Factor Correlation - streaming cross-sectional rank correlation across factors
+
+The accumulator takes one date's cross-section at a time (symbols x factors)
+and adds that date's rank-correlation matrix to running sums, so the panel
+is never held in memory. Per date, each factor is ranked over the names it
+covers (average ranks), and the pairwise-complete Pearson correlation of
+the ranks is computed for all pairs with a few matrix products.
+
+Outputs: average / std correlation matrices, the number of dates behind
+each pair, average-linkage clustering on 1 - |corr| and a "redundant with"
+list per factor.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+def weights_hash(weights: dict) -> str:
+    """Same key BacktestEngine uses for the factor weights in signal cache file names."""
+    payload = json.dumps(weights, sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.md5(payload.encode("utf-8")).hexdigest()
+
+
+def _column_ranks(values: np.ndarray) -> np.ndarray:
+    """Average ranks per column; NaN stays NaN."""
+    return pd.DataFrame(values).rank(method='average').to_numpy(dtype=float)
+
+
+class FactorCorrelationAccumulator:
+    """
+    Running sums of per-date Spearman correlations for a fixed factor list.
+
+    update() ignores a pair on a date when fewer than `min_names` names have
+    both factors, or when either factor is constant over those names.
+    """
+
+    def __init__(self, factors: Iterable[str], min_names: int = 20):
+        self.factors = [str(f) for f in factors]
+        self.min_names = int(min_names)
+        F = len(self.factors)
+        self._pos = {f: i for i, f in enumerate(self.factors)}
+        self.sum = np.zeros((F, F))
+        self.sum_sq = np.zeros((F, F))
+        self.count = np.zeros((F, F), dtype=np.int64)
+        self.n_dates = 0
+
+    def update(self, cross_section: pd.DataFrame) -> None:
+        """One date: rows are symbols, columns are (a subset of) the factors."""
+        cols = [c for c in cross_section.columns if c in self._pos]
+        if len(cols) < 2 or len(cross_section) < self.min_names:
+            return
+        X = cross_section[cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        X = np.where(np.isfinite(X), X, np.nan)
+        R = _column_ranks(X)
+        M = (~np.isnan(R)).astype(float)
+        R0 = np.nan_to_num(R)
+
+        # Pairwise-complete sums: entry (i, j) is over rows where both i and j exist
+        n = M.T @ M
+        sx = R0.T @ M            # sum of factor i over rows where j exists
+        sxx = (R0 * R0).T @ M
+        sxy = R0.T @ R0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            corr = cov / np.sqrt(var_i * var_i.T)
+        ok = (n >= self.min_names) & np.isfinite(corr) & (var_i > 1e-12) & (var_i.T > 1e-12)
+        corr = np.clip(np.where(ok, corr, 0.0), -1.0, 1.0)
+
+        idx = np.array([self._pos[c] for c in cols])
+        block = np.ix_(idx, idx)
+        self.sum[block] += corr
+        self.sum_sq[block] += corr * corr
+        self.count[block] += ok
+        self.n_dates += 1
+
+    def merge(self, other: "FactorCorrelationAccumulator") -> "FactorCorrelationAccumulator":
+        """Add another accumulator's sums (same factor list), e.g. from a worker."""
+        if other.factors != self.factors:
+            raise ValueError("factor lists differ")
+        self.sum += other.sum
+        self.sum_sq += other.sum_sq
+        self.count += other.count
+        self.n_dates += other.n_dates
+        return self
+
+    def mean(self) -> pd.DataFrame:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            m = np.where(self.count > 0, self.sum / self.count, np.nan)
+        return pd.DataFrame(m, index=self.factors, columns=self.factors)
+
+    def std(self) -> pd.DataFrame:
+        c = self.count.astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (self.sum_sq - self.sum * self.sum / c) / (c - 1.0)
+        s = np.where(self.count > 1, np.sqrt(np.maximum(var, 0.0)), np.nan)
+        return pd.DataFrame(s, index=self.factors, columns=self.factors)
+
+    def pair_counts(self) -> pd.DataFrame:
+        return pd.DataFrame(self.count, index=self.factors, columns=self.factors)
+
+    def clusters(self, threshold: float = 0.7) -> pd.DataFrame:
+        """
+        Average-linkage clusters on distance 1 - |mean corr|, cut so that
+        members are on average at least `threshold` correlated.
+        Returns factor, cluster, order (dendrogram leaf order).
+        """
+        from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+        from scipy.spatial.distance import squareform
+
+        covered = [i for i in range(len(self.factors)) if self.count[i, i] > 0]
+        if len(covered) < 2:
+            return pd.DataFrame({'factor': [self.factors[i] for i in covered], 'cluster': 1, 'order': 0})
+        m = self.mean().to_numpy()[np.ix_(covered, covered)]
+        dist = 1.0 - np.abs(np.nan_to_num(m, nan=0.0))
+        np.fill_diagonal(dist, 0.0)
+        dist = np.clip((dist + dist.T) / 2.0, 0.0, 1.0)
+        Z = linkage(squareform(dist, checks=False), method='average')
+        labels = fcluster(Z, t=1.0 - float(threshold), criterion='distance')
+        order = np.empty(len(covered), dtype=np.int64)
+        order[leaves_list(Z)] = np.arange(len(covered))
+        return pd.DataFrame({
+            'factor': [self.factors[i] for i in covered],
+            'cluster': labels.astype(int),
+            'order': order,
+        }).sort_values('order').reset_index(drop=True)
+
+    def redundancy(self, threshold: float = 0.7, min_dates: int = 1) -> pd.DataFrame:
+        """
+        Per factor: every other factor with |mean corr| >= threshold (and at
+        least `min_dates` dates), strongest first.
+        Columns: factor, max_abs_corr, most_similar, n_redundant, redundant_with.
+        """
+        m = self.mean().to_numpy()
+        rows = []
+        for i, f in enumerate(self.factors):
+            a = np.abs(m[i].copy())
+            a[i] = np.nan
+            a[self.count[i] < int(min_dates)] = np.nan
+            if np.all(np.isnan(a)):
+                rows.append({'factor': f, 'max_abs_corr': None, 'most_similar': None,
+                             'n_redundant': 0, 'redundant_with': ''})
+                continue
+            hit = np.flatnonzero(a >= float(threshold))
+            hit = hit[np.argsort(-a[hit], kind='stable')]
+            j = int(np.nanargmax(a))
+            rows.append({
+                'factor': f,
+                'max_abs_corr': float(a[j]),
+                'most_similar': self.factors[j],
+                'n_redundant': int(len(hit)),
+                'redundant_with': ';'.join(f"{self.factors[k]}:{m[i, k]:.3f}" for k in hit),
+            })
+        return pd.DataFrame(rows)
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(path, factors=np.array(self.factors), sum=self.sum, sum_sq=self.sum_sq,
+                            count=self.count, n_dates=self.n_dates, min_names=self.min_names)
+
+    @classmethod
+    def load(cls, path: Path) -> "FactorCorrelationAccumulator":
+        z = np.load(path, allow_pickle=False)
+        acc = cls([str(f) for f in z['factors']], min_names=int(z['min_names']))
+        acc.sum, acc.sum_sq, acc.count = z['sum'], z['sum_sq'], z['count']
+        acc.n_dates = int(z['n_dates'])
+        return acc
+
+
+def cache_cross_sections(cache_dir: Union[Path, Dict[str, Path]], factors: Dict[str, dict],
+                         dates: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Per-date cross-sections from a BacktestEngine signal cache directory
+    (<cache_dir>/<YYYYMMDD>_<weights hash>.pkl), one column per factor name.
+    `factors` maps a factor name to the weights it was run with; cache_dir is
+    one directory or a {factor name: directory} map (factors cached under
+    different config signatures). Only one date is loaded at a time.
+    """
+    dirs = cache_dir if isinstance(cache_dir, dict) else {name: cache_dir for name in factors}
+    by_dir: Dict[Path, Dict[str, List[str]]] = {}
+    for name, w in factors.items():
+        if name in dirs:
+            by_dir.setdefault(Path(dirs[name]), {}).setdefault(weights_hash(w), []).append(name)
+    files: Dict[str, List[Tuple[List[str], Path]]] = {}
+    for d, by_hash in by_dir.items():
+        for p in d.glob("*.pkl"):
+            day, _, h = p.stem.partition("_")
+            if h in by_hash:
+                files.setdefault(day, []).append((by_hash[h], p))
+    wanted = None if dates is None else {str(d).replace("-", "") for d in dates}
+    for day in sorted(files):
+        if wanted is not None and day not in wanted:
+            continue
+        cols = {}
+        for names, p in files[day]:
+            try:
+                df = pd.read_pickle(p)
+            except Exception:
+                continue
+            if df is None or len(df) == 0 or not {'symbol', 'signal'}.issubset(df.columns):
+                continue
+            s = pd.Series(pd.to_numeric(df['signal'], errors='coerce').to_numpy(), index=df['symbol'].astype(str))
+            s = s[~s.index.duplicated(keep='last')]
+            for name in names:
+                cols[name] = s
+        if len(cols) >= 2:
+            yield f"{day[:4]}-{day[4:6]}-{day[6:]}", pd.DataFrame(cols)
+
+
+def frame_cross_sections(signals: pd.DataFrame, factors: Iterable[str]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Per-date cross-sections from a wide signals frame (symbol, date, <factor columns>)."""
+    cols = [c for c in factors if c in signals.columns]
+    for d, g in signals.groupby('date', sort=True):
+        yield d, g.set_index('symbol')[cols]
@@ -20,6 +20,63 @@ from .factor_factory import standardize_signal, resolve_factor_date
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 
+# Inputs FactorEngine reads from these defaults when the config does not name them
+DEFAULT_SOURCES = {
+    'FUNDAMENTALS_DIR': '../data/fmp/ratios/quality',
+    'VALUE_DIR': '../data/fmp/ratios/value',
+    'INSTITUTIONAL_SUMMARY_PATH': 'data/fmp/institutional/institutional-ownership__symbol-positions-summary.jsonl',
+    'OWNER_EARNINGS_PATH': 'data/fmp/owner_earnings/owner-earnings.jsonl',
+    'EARNINGS_CALENDAR_PATH': 'data/fmp/earnings/earnings_calendar.csv',
+    'EARNINGS_HISTORY_PATH': 'data/fmp/earnings_history/earnings.jsonl',
+}
+
+
+def resolve_data_path(path_value: Optional[str], default_rel: str) -> Path:
+    """Configured path (or default), tried as given, under the project root, then without a leading ../"""
+    raw = str(path_value).strip() if path_value else default_rel
+    cand = Path(raw)
+    if cand.exists():
+        return cand
+    cand2 = (PROJECT_ROOT / raw).resolve()
+    if cand2.exists():
+        return cand2
+    if raw.startswith("../"):
+        cand3 = (PROJECT_ROOT / raw.replace("../", "", 1)).resolve()
+        if cand3.exists():
+            return cand3
+    return cand2
+
+
+def resolve_earnings_dir(config: dict) -> str:
+    """EARNINGS_DIR, else Owner_Earnings next to the active price directory."""
+    earnings_dir = config.get('EARNINGS_DIR')
+    if earnings_dir:
+        return earnings_dir
+    price_dir = config.get('PRICE_DIR_ACTIVE')
+    if price_dir:
+        try:
+            return str(Path(price_dir).resolve().parent / "Owner_Earnings")
+        except Exception:
+            pass
+    return "../data/Owner_Earnings"
+
+
+def input_paths(config: dict) -> Dict[str, str]:
+    """Every data source a FactorEngine built on `config` may read, resolved the way the engine does."""
+    out = {
+        'EARNINGS_DIR': resolve_earnings_dir(config),
+        'FUNDAMENTALS_DIR': config.get('FUNDAMENTALS_DIR', DEFAULT_SOURCES['FUNDAMENTALS_DIR']),
+        'VALUE_DIR': config.get('VALUE_DIR', DEFAULT_SOURCES['VALUE_DIR']),
+    }
+    for key in ('INSTITUTIONAL_SUMMARY_PATH', 'OWNER_EARNINGS_PATH', 'EARNINGS_CALENDAR_PATH',
+                'EARNINGS_HISTORY_PATH'):
+        out[key] = str(resolve_data_path(config.get(key), DEFAULT_SOURCES[key]))
+    for key in ('INDUSTRY_MAP_PATH', 'UNIVERSE_EXCLUDE_SYMBOLS_PATH'):
+        if config.get(key):
+            out[key] = str(config[key])
+    return out
+
+
 class FactorEngine:
     """
     Calculate factors including SUE-based PEAD and produce signals/positions.
@@ -57,29 +114,19 @@ class FactorEngine:
             )
 
         # Resolve earnings_dir robustly (avoid cwd relative path issues)
-        earnings_dir = self.config.get('EARNINGS_DIR')
-        if not earnings_dir:
-            price_dir = self.config.get('PRICE_DIR_ACTIVE')
-            if price_dir:
-                try:
-                    from pathlib import Path
-                    earnings_dir = str(Path(price_dir).resolve().parent / "Owner_Earnings")
-                except Exception:
-                    earnings_dir = "../data/Owner_Earnings"
-            else:
-                earnings_dir = "../data/Owner_Earnings"
+        earnings_dir = resolve_earnings_dir(self.config)
 
         factor_cls = self.config.get('PEAD_FACTOR_CLASS', pead_factor_cached.CachedPEADFactor)
         self.pead_factor = factor_cls(earnings_dir=earnings_dir)
         # Cache earnings dates per symbol for quick lookup
         self._earnings_date_cache = {}
 
-        fundamentals_dir = self.config.get('FUNDAMENTALS_DIR', '../data/fmp/ratios/quality')
+        fundamentals_dir = self.config.get('FUNDAMENTALS_DIR', DEFAULT_SOURCES['FUNDAMENTALS_DIR'])
         self.fundamentals_engine = FundamentalsEngine(
             fundamentals_dir,
             max_staleness_days=self.config.get('QUALITY_MAX_STALENESS_DAYS', 270),
         )
-        value_dir = self.config.get('VALUE_DIR', '../data/fmp/ratios/value')
+        value_dir = self.config.get('VALUE_DIR', DEFAULT_SOURCES['VALUE_DIR'])
         self.value_engine = ValueFundamentalsEngine(
             value_dir,
             max_staleness_days=self.config.get('VALUE_MAX_STALENESS_DAYS', 270),
@@ -130,18 +177,7 @@ class FactorEngine:
         return dict(zip(df['symbol'].astype(str), df[col].astype(str)))
 
     def _resolve_data_path(self, path_value: Optional[str], default_rel: str) -> Path:
-        raw = str(path_value).strip() if path_value else default_rel
-        cand = Path(raw)
-        if cand.exists():
-            return cand
-        cand2 = (PROJECT_ROOT / raw).resolve()
-        if cand2.exists():
-            return cand2
-        if raw.startswith("../"):
-            cand3 = (PROJECT_ROOT / raw.replace("../", "", 1)).resolve()
-            if cand3.exists():
-                return cand3
-        return cand2
+        return resolve_data_path(path_value, default_rel)
 
     def _load_symbol_payload_cache(self, path: Path, required_cols: set[str]) -> Dict[str, pd.DataFrame]:
         out: Dict[str, list[dict]] = {}
@@ -183,7 +219,7 @@ class FactorEngine:
         if self._institutional_summary_cache is None:
             p = self._resolve_data_path(
                 self.config.get("INSTITUTIONAL_SUMMARY_PATH"),
-                "data/fmp/institutional/institutional-ownership__symbol-positions-summary.jsonl",
+                DEFAULT_SOURCES["INSTITUTIONAL_SUMMARY_PATH"],
             )
             self._institutional_summary_cache = self._load_symbol_payload_cache(
                 p,
@@ -201,7 +237,7 @@ class FactorEngine:
         if self._owner_earnings_cache is None:
             p = self._resolve_data_path(
                 self.config.get("OWNER_EARNINGS_PATH"),
-                "data/fmp/owner_earnings/owner-earnings.jsonl",
+                DEFAULT_SOURCES["OWNER_EARNINGS_PATH"],
             )
             self._owner_earnings_cache = self._load_symbol_payload_cache(
                 p,
@@ -213,7 +249,7 @@ class FactorEngine:
         if self._earnings_calendar_cache is not None:
             return self._earnings_calendar_cache
         out: Dict[str, pd.DataFrame] = {}
-        p = self._resolve_data_path(self.config.get("EARNINGS_CALENDAR_PATH"), "data/fmp/earnings/earnings_calendar.csv")
+        p = self._resolve_data_path(self.config.get("EARNINGS_CALENDAR_PATH"), DEFAULT_SOURCES["EARNINGS_CALENDAR_PATH"])
         if p.exists():
             try:
                 df = pd.read_csv(p)
@@ -286,7 +322,7 @@ class FactorEngine:
         if self._earnings_history_cache is None:
             p = self._resolve_data_path(
                 self.config.get("EARNINGS_HISTORY_PATH"),
-                "data/fmp/earnings_history/earnings.jsonl",
+                DEFAULT_SOURCES["EARNINGS_HISTORY_PATH"],
             )
             self._earnings_history_cache = self._load_symbol_data_cache(
                 p,
@@ -2977,13 +3013,7 @@ class FactorEngine:
             return pd.DataFrame(columns=['symbol', 'date', 'signal'])
 
         needed = {k for k, w in factor_weights.items() if w is not None and float(w) != 0.0}
-        neutralize_cols = self.config.get('SIGNAL_NEUTRALIZE_COLS')
-        if neutralize_cols is None:
-            neutralize_cols = []
-            if self.config.get('SIGNAL_NEUTRALIZE_SIZE'):
-                neutralize_cols.append('size')
-            if self.config.get('SIGNAL_NEUTRALIZE_BETA'):
-                neutralize_cols.append('beta')
+        neutralize_cols = self._neutralize_cols()
         if neutralize_cols:
             for c in neutralize_cols:
                 needed.add(c)
@@ -3137,7 +3167,25 @@ class FactorEngine:
         if not rows:
             return pd.DataFrame(columns=['symbol', 'date', 'signal'])
 
-        df = pd.DataFrame(rows)
+        return self.finalize_signals(pd.DataFrame(rows), factor_weights)
+
+    def _neutralize_cols(self) -> list:
+        cols = self.config.get('SIGNAL_NEUTRALIZE_COLS')
+        if cols is None:
+            cols = []
+            if self.config.get('SIGNAL_NEUTRALIZE_SIZE'):
+                cols.append('size')
+            if self.config.get('SIGNAL_NEUTRALIZE_BETA'):
+                cols.append('beta')
+        return cols
+
+    def finalize_signals(self, df: pd.DataFrame, factor_weights: dict) -> pd.DataFrame:
+        """
+        Combo formula, NaN drop and standardization of one date's raw signal rows
+        (the tail of compute_signals; callers that build the raw 'signal' column
+        themselves, e.g. the momentum sweep, reuse it unchanged).
+        """
+        neutralize_cols = self._neutralize_cols()
 
         # Optional combo-level formula overrides (mainly for value+momentum research).
         combo_formula = str(self.config.get("COMBO_FORMULA", "linear")).lower()
@@ -4,6 +4,7 @@ Factor Factory: standardize cross-sectional signals with consistent rules.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Optional, Dict, Iterable, List
 import numpy as np
 import pandas as pd
@@ -42,7 +43,9 @@ def winsorize_series_pct(s: pd.Series, low: Optional[float], high: Optional[floa
     return s.clip(lower=lo, upper=hi)
 
 
+@lru_cache(maxsize=65536)
 def lag_date(date: str, lag_days: Optional[int]) -> str:
+    # Memoized: every symbol on a rebalance date resolves the same (date, lag) pair.
     if not lag_days:
         return date
     d = pd.Timestamp(date) - pd.Timedelta(days=int(lag_days))
@@ -0,0 +1,340 @@
+"""
+IC Analytics - incremental rolling / calendar / regime IC from per-date IC
+
+ICAnalytics consumes the per-date IC series (date, n, ic, rank_ic, as
+produced by ICEngine.per_date or written to ic_by_date.csv) one date at a
+time and keeps only sufficient statistics:
+  - one ring buffer with running sum / sum of squares per rolling window
+  - count / sum / sum of squares per calendar year, calendar month and
+    market regime bucket (SPY trend, SPY realized vol, trend x vol)
+Adding a date is O(1) in the length of the history, and the state
+round-trips through a plain dict (to_dict / from_dict), so a daily job can
+load yesterday's state and add only the new dates. The saved state is
+bounded: ring buffers, bucket sums and the last date / regime, not the
+per-date rows (frame() of a restored object covers the dates added since).
+Ring buffer sums are re-summed from the buffer every RESUM_EVERY pushes so
+add / subtract rounding does not accumulate over years of daily updates.
+
+Regime labels use SPY closes up to and including each date only:
+  trend  'up' when close >= its trend_window-day mean, else 'down'
+  vol    annualized vol_window-day realized vol bucketed by fixed bounds
+         ('low' / 'mid' / 'high'), so past labels never change
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (20, 60, 120)
+VOL_LABELS = ('low', 'mid', 'high')
+BUCKET_KINDS = ('year', 'month', 'trend', 'vol', 'regime')
+RESUM_EVERY = 1000
+
+
+def close_series(prices: pd.DataFrame) -> pd.Series:
+    """Close (adjusted when available) indexed by date from a DataEngine-style price frame."""
+    col = 'adjClose' if 'adjClose' in prices.columns else 'close'
+    s = pd.Series(pd.to_numeric(prices[col], errors='coerce').to_numpy(dtype=float),
+                  index=pd.DatetimeIndex(pd.to_datetime(prices['date'])))
+    s = s[~s.index.duplicated(keep='last')].sort_index()
+    return s.dropna()
+
+
+def market_regimes(close: pd.Series, trend_window: int = 200, vol_window: int = 63,
+                   vol_bounds: Tuple[float, float] = (0.15, 0.25)) -> pd.DataFrame:
+    """
+    Per trading date: trend ('up' / 'down'), vol ('low' / 'mid' / 'high')
+    and regime ('<trend>/<vol>'). Dates without enough history get None.
+    """
+    close = close.sort_index()
+    ma = close.rolling(trend_window, min_periods=trend_window).mean()
+    ret = np.log(close).diff()
+    vol = ret.rolling(vol_window, min_periods=vol_window).std() * np.sqrt(252.0)
+
+    trend = np.where(ma.isna(), None, np.where(close >= ma, 'up', 'down'))
+    lo, hi = float(vol_bounds[0]), float(vol_bounds[1])
+    vol_lab = np.where(vol.isna(), None,
+                       np.where(vol < lo, VOL_LABELS[0], np.where(vol < hi, VOL_LABELS[1], VOL_LABELS[2])))
+    regime = [f"{t}/{v}" if (t is not None and v is not None) else None for t, v in zip(trend, vol_lab)]
+    return pd.DataFrame({'trend': trend, 'vol': vol_lab, 'regime': regime, 'realized_vol': vol.to_numpy()},
+                        index=close.index)
+
+
+def regime_at(dates, regimes: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """As-of regime labels (last market date on or before each date)."""
+    idx = pd.DatetimeIndex(pd.to_datetime(pd.Series(dates)))
+    if regimes is None or len(regimes) == 0:
+        return pd.DataFrame({'trend': None, 'vol': None}, index=idx)
+    pos = regimes.index.searchsorted(idx, side='right') - 1
+    ok = pos >= 0
+    take = np.where(ok, pos, 0)
+    trend = np.where(ok, regimes['trend'].to_numpy(dtype=object)[take], None)
+    vol = np.where(ok, regimes['vol'].to_numpy(dtype=object)[take], None)
+    return pd.DataFrame({'trend': trend, 'vol': vol}, index=idx)
+
+
+class _Window:
+    """Last `size` finite values with running sum / sum of squares."""
+
+    def __init__(self, size: int):
+        self.size = int(size)
+        self.buf: deque = deque(maxlen=self.size)
+        self.s = 0.0
+        self.ss = 0.0
+        self.pushes = 0  # since the last re-summation
+
+    def push(self, v: float) -> None:
+        if len(self.buf) == self.size:
+            old = self.buf[0]
+            self.s -= old
+            self.ss -= old * old
+        self.buf.append(v)
+        self.s += v
+        self.ss += v * v
+        self.pushes += 1
+        if self.pushes >= RESUM_EVERY:
+            self.resum()
+
+    def resum(self) -> None:
+        """Exact sums of the buffer (drops the rounding of the running add / subtract)."""
+        self.s = math.fsum(self.buf)
+        self.ss = math.fsum(v * v for v in self.buf)
+        self.pushes = 0
+
+    def state(self) -> Dict:
+        return {'values': list(self.buf), 's': self.s, 'ss': self.ss, 'pushes': self.pushes}
+
+    @classmethod
+    def from_state(cls, size: int, state: Optional[Dict]) -> "_Window":
+        """Restore buffer, running sums and re-summation phase, so a resumed run matches a full pass."""
+        out = cls(size)
+        if state:
+            out.buf.extend(float(v) for v in state.get('values', []))
+            out.s, out.ss = float(state.get('s', 0.0)), float(state.get('ss', 0.0))
+            out.pushes = int(state.get('pushes', 0))
+        return out
+
+    def mean(self, min_periods: int) -> float:
+        k = len(self.buf)
+        return self.s / k if k >= min_periods and k > 0 else float('nan')
+
+    def std(self, min_periods: int) -> float:
+        k = len(self.buf)
+        if k < max(2, min_periods):
+            return float('nan')
+        return float(np.sqrt(max(self.ss - self.s * self.s / k, 0.0) / (k - 1)))
+
+
+def _moment_stats(m: List[float]) -> Dict:
+    """count, sum, sum_sq -> mean, std, t (iid)."""
+    k, s, ss = m
+    if k <= 0:
+        return {'mean': None, 'std': None, 't_stat': None}
+    mean = s / k
+    std = float(np.sqrt(max(ss - s * s / k, 0.0) / (k - 1))) if k > 1 else None
+    t = mean / (std / np.sqrt(k)) if std else None
+    return {'mean': float(mean), 'std': std, 't_stat': float(t) if t is not None else None}
+
+
+class ICAnalytics:
+    """
+    Incremental IC analytics for one factor.
+
+    update() takes one date (strictly after the last one); extend() takes a
+    per-date frame and skips dates already seen, so re-feeding a growing
+    ic_by_date.csv only processes the new tail. rows holds the dates added
+    to this object (not persisted); last_date / len() cover the full history.
+    """
+
+    def __init__(self, windows: Iterable[int] = DEFAULT_WINDOWS):
+        self.windows = tuple(sorted({int(w) for w in windows}))
+        self.rows: List[Dict] = []
+        self._last_date: Optional[str] = None
+        self._n_dates = 0
+        self._last_regime: Tuple = (None, None)
+        self._ic = {w: _Window(w) for w in self.windows}
+        self._rank = {w: _Window(w) for w in self.windows}
+        # bucket key "<kind>|<label>" -> [k_ic, s_ic, ss_ic, k_rank, s_rank, ss_rank, sum_n]
+        self.buckets: Dict[str, List[float]] = {}
+
+    @staticmethod
+    def min_periods(window: int) -> int:
+        """Same min_periods the factor report's rolling IC has always used."""
+        return max(3, int(window) // 5)
+
+    @property
+    def last_date(self) -> Optional[str]:
+        return self._last_date
+
+    def __len__(self) -> int:
+        return self._n_dates
+
+    def _bucket(self, kind: str, label, ic: float, rank_ic: float, n: float) -> None:
+        if label is None:
+            return
+        b = self.buckets.setdefault(f"{kind}|{label}", [0.0] * 7)
+        if np.isfinite(ic):
+            b[0] += 1
+            b[1] += ic
+            b[2] += ic * ic
+        if np.isfinite(rank_ic):
+            b[3] += 1
+            b[4] += rank_ic
+            b[5] += rank_ic * rank_ic
+        b[6] += n
+
+    def update(self, date, n, ic, rank_ic=float('nan'), trend=None, vol=None) -> Dict:
+        """Add one date; returns the row recorded for it (incl. rolling values)."""
+        ts = pd.Timestamp(date)
+        day = ts.strftime('%Y-%m-%d')
+        if self._last_date is not None and day <= self._last_date:
+            raise ValueError(f"date {day} is not after last date {self.last_date}")
+        ic = float(ic) if ic is not None and pd.notna(ic) else float('nan')
+        rank_ic = float(rank_ic) if rank_ic is not None and pd.notna(rank_ic) else float('nan')
+        n = float(n) if n is not None and pd.notna(n) else 0.0
+
+        row = {'date': day, 'n': n, 'ic': ic, 'rank_ic': rank_ic, 'trend': trend, 'vol': vol}
+        for w in self.windows:
+            if np.isfinite(ic):
+                self._ic[w].push(ic)
+            if np.isfinite(rank_ic):
+                self._rank[w].push(rank_ic)
+            mp = self.min_periods(w)
+            row[f'rolling_ic_{w}'] = self._ic[w].mean(mp) if np.isfinite(ic) else float('nan')
+            row[f'rolling_rank_ic_{w}'] = self._rank[w].mean(mp) if np.isfinite(rank_ic) else float('nan')
+            row[f'rolling_icir_{w}'] = (row[f'rolling_ic_{w}'] / self._ic[w].std(mp)
+                                        if np.isfinite(ic) and self._ic[w].std(mp) > 0 else float('nan'))
+
+        self._bucket('year', ts.strftime('%Y'), ic, rank_ic, n)
+        self._bucket('month', ts.strftime('%Y-%m'), ic, rank_ic, n)
+        self._bucket('trend', trend, ic, rank_ic, n)
+        self._bucket('vol', vol, ic, rank_ic, n)
+        self._bucket('regime', f"{trend}/{vol}" if trend is not None and vol is not None else None, ic, rank_ic, n)
+        self.rows.append(row)
+        self._last_date, self._n_dates, self._last_regime = day, self._n_dates + 1, (trend, vol)
+        return row
+
+    def extend(self, per_date: pd.DataFrame, regimes: Optional[pd.DataFrame] = None) -> int:
+        """
+        Add the dates of a per-date IC frame (date, n, ic[, rank_ic]) that are
+        after last_date. Duplicate dates keep the last row. Returns the number added.
+        """
+        if per_date is None or len(per_date) == 0:
+            return 0
+        df = per_date.copy()
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.drop_duplicates(subset=['date'], keep='last').sort_values('date')
+        if self._last_date is not None:
+            df = df[df['date'] > pd.Timestamp(self._last_date)]
+        if len(df) == 0:
+            return 0
+        labels = regime_at(df['date'], regimes)
+        rank = df['rank_ic'] if 'rank_ic' in df.columns else pd.Series(np.nan, index=df.index)
+        n = df['n'] if 'n' in df.columns else pd.Series(0, index=df.index)
+        for d, k, ic, ric, trend, vol in zip(df['date'], n, df['ic'], rank, labels['trend'], labels['vol']):
+            self.update(d, k, ic, ric, trend=trend, vol=vol)
+        return int(len(df))
+
+    @classmethod
+    def from_per_date(cls, per_date: pd.DataFrame, regimes: Optional[pd.DataFrame] = None,
+                      windows: Iterable[int] = DEFAULT_WINDOWS) -> "ICAnalytics":
+        out = cls(windows)
+        out.extend(per_date, regimes)
+        return out
+
+    # -- views ---------------------------------------------------------------
+
+    def frame(self) -> pd.DataFrame:
+        """One row per date: date, n, ic, rank_ic, trend, vol, rolling_* columns."""
+        if not self.rows:
+            cols = ['date', 'n', 'ic', 'rank_ic', 'trend', 'vol']
+            for w in self.windows:
+                cols += [f'rolling_ic_{w}', f'rolling_rank_ic_{w}', f'rolling_icir_{w}']
+            return pd.DataFrame(columns=cols)
+        out = pd.DataFrame(self.rows)
+        out['date'] = pd.to_datetime(out['date'])
+        return out
+
+    def rolling(self, window: int) -> pd.Series:
+        """Rolling mean IC at `window` over the dates with a valid IC."""
+        f = self.frame()
+        f = f[f['ic'].notna()]
+        return pd.Series(f[f'rolling_ic_{int(window)}'].to_numpy(dtype=float), index=pd.DatetimeIndex(f['date']))
+
+    def latest(self) -> Dict:
+        """Last rolling values per window (from the last date with a valid IC) plus the current regime."""
+        out: Dict = {'last_date': self.last_date, 'n_dates': len(self)}
+        for w in self.windows:
+            mp = self.min_periods(w)
+            out[f'rolling_ic_{w}'] = _none_if_nan(self._ic[w].mean(mp))
+            out[f'rolling_rank_ic_{w}'] = _none_if_nan(self._rank[w].mean(mp))
+        if self._last_date is not None:
+            out['trend'], out['vol'] = self._last_regime
+        return out
+
+    def buckets_frame(self, kind: str) -> pd.DataFrame:
+        """
+        One row per bucket of `kind` ('year', 'month', 'trend', 'vol', 'regime'):
+        bucket, n_dates, ic_mean, ic_std, icir, t_stat, rank_ic_mean, rank_ic_std, avg_names.
+        """
+        if kind not in BUCKET_KINDS:
+            raise ValueError(f"unknown bucket kind: {kind}")
+        cols = ['bucket', 'n_dates', 'ic_mean', 'ic_std', 'icir', 't_stat', 'rank_ic_mean', 'rank_ic_std', 'avg_names']
+        rows = []
+        prefix = f"{kind}|"
+        for key in sorted(k for k in self.buckets if k.startswith(prefix)):
+            b = self.buckets[key]
+            ic = _moment_stats(b[0:3])
+            rk = _moment_stats(b[3:6])
+            dates = max(b[0], b[3])
+            rows.append({
+                'bucket': key[len(prefix):],
+                'n_dates': int(b[0]),
+                'ic_mean': ic['mean'],
+                'ic_std': ic['std'],
+                'icir': ic['mean'] / ic['std'] if ic['mean'] is not None and ic['std'] else None,
+                't_stat': ic['t_stat'],
+                'rank_ic_mean': rk['mean'],
+                'rank_ic_std': rk['std'],
+                'avg_names': b[6] / dates if dates > 0 else None,
+            })
+        return pd.DataFrame(rows, columns=cols)
+
+    # -- persistence ---------------------------------------------------------
+
+    def to_dict(self) -> Dict:
+        """JSON-safe state of bounded size (window buffers, bucket sums, last date / regime)."""
+        return {
+            'windows': list(self.windows),
+            'last_date': self._last_date,
+            'n_dates': self._n_dates,
+            'last_regime': list(self._last_regime),
+            'ring_ic': {str(w): self._ic[w].state() for w in self.windows},
+            'ring_rank_ic': {str(w): self._rank[w].state() for w in self.windows},
+            'buckets': self.buckets,
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "ICAnalytics":
+        out = cls(state.get('windows') or DEFAULT_WINDOWS)
+        rows = state.get('rows') or []  # states saved before rows were dropped
+        out._last_date = state.get('last_date', rows[-1]['date'] if rows else None)
+        out._n_dates = int(state.get('n_dates', len(rows)))
+        last = state.get('last_regime') or ([rows[-1].get('trend'), rows[-1].get('vol')] if rows else [None, None])
+        out._last_regime = (last[0], last[1])
+        for w in out.windows:
+            out._ic[w] = _Window.from_state(w, state.get('ring_ic', {}).get(str(w)))
+            out._rank[w] = _Window.from_state(w, state.get('ring_rank_ic', {}).get(str(w)))
+        out.buckets = {k: [float(x) for x in v] for k, v in (state.get('buckets') or {}).items()}
+        return out
+
+
+def _none_if_nan(v):
+    if isinstance(v, float) and not np.isfinite(v):
+        return None
+    return v
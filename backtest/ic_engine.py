@@ -0,0 +1,245 @@
+"""
+IC Engine - vectorized per-date Pearson / rank IC with HAC inference
+
+Signals and forward returns are merged once and sorted by date. Every
+per-date and per-period correlation is computed from grouped,
+group-centered sums (bincount) over the sorted arrays, so no per-group
+Python callback runs. Rank IC uses average ranks within each date.
+
+Conventions match pandas Series.corr: rows with NaN in either column are
+dropped, a group containing +/-inf or with zero variance yields NaN, and
+fewer than two rows yields NaN.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .analysis_table import column_frame
+
+
+def grouped_corr(group: np.ndarray, x: np.ndarray, y: np.ndarray, n_groups: int):
+    """
+    Pearson correlation of x, y inside each group id in [0, n_groups).
+    Returns (corr, n) arrays of length n_groups.
+    """
+    group = np.asarray(group, dtype=np.int64)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = ~(np.isnan(x) | np.isnan(y))
+    group, x, y = group[keep], x[keep], y[keep]
+
+    n = np.bincount(group, minlength=n_groups).astype(float)
+    corr = np.full(n_groups, np.nan)
+    if len(x) == 0:
+        return corr, n.astype(np.int64)
+
+    has_inf = np.bincount(group, weights=(np.isinf(x) | np.isinf(y)).astype(float), minlength=n_groups) > 0
+    fin = np.isfinite(x) & np.isfinite(y)
+    gf, xf, yf = group[fin], x[fin], y[fin]
+    nf = np.bincount(gf, minlength=n_groups).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mx = np.bincount(gf, weights=xf, minlength=n_groups) / nf
+        my = np.bincount(gf, weights=yf, minlength=n_groups) / nf
+        dx = xf - mx[gf]
+        dy = yf - my[gf]
+        sxx = np.bincount(gf, weights=dx * dx, minlength=n_groups)
+        syy = np.bincount(gf, weights=dy * dy, minlength=n_groups)
+        sxy = np.bincount(gf, weights=dx * dy, minlength=n_groups)
+        ok = (n >= 2) & ~has_inf & (sxx > 0) & (syy > 0)
+        corr[ok] = np.clip(sxy[ok] / np.sqrt(sxx[ok] * syy[ok]), -1.0, 1.0)
+    return corr, n.astype(np.int64)
+
+
+def average_ranks(group: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """1-based ranks of `values` within each group, ties get the average rank (NaN stays NaN)."""
+    group = np.asarray(group, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    out = np.full(len(values), np.nan)
+    ok = ~np.isnan(values)
+    idx = np.flatnonzero(ok)
+    if len(idx) == 0:
+        return out
+    g, v = group[idx], values[idx]
+    m = len(idx)
+    # (group, value) order: sort by value, then a stable (radix) sort on the group id.
+    # Order among equal values does not matter since ties are averaged.
+    by_value = np.argsort(v)
+    order = by_value[np.argsort(g[by_value], kind='stable')]
+    gs, vs = g[order], v[order]
+    new_group = np.r_[True, gs[1:] != gs[:-1]]
+    new_run = new_group | np.r_[True, vs[1:] != vs[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, np.arange(m), 0))
+    pos = np.arange(m) - group_start + 1.0
+    run_id = np.cumsum(new_run) - 1
+    run_mean = np.bincount(run_id, weights=pos) / np.bincount(run_id)
+    ranks = np.empty(m)
+    ranks[order] = run_mean[run_id]
+    out[idx] = ranks
+    return out
+
+
+def newey_west_tstat(series, lags: int):
+    """Mean, HAC standard error and t-stat of a series (Bartlett kernel)."""
+    x = np.asarray(series, dtype=float)
+    x = x[np.isfinite(x)]
+    T = len(x)
+    if T < 2:
+        return None, None, None
+    m = float(x.mean())
+    e = x - m
+    lags = int(max(0, min(int(lags), T - 1)))
+    var = float(e @ e) / T
+    for k in range(1, lags + 1):
+        var += 2.0 * (1.0 - k / (lags + 1.0)) * float(e[k:] @ e[:-k]) / T
+    if var <= 0:
+        return m, None, None
+    se = float(np.sqrt(var / T))
+    return m, se, m / se
+
+
+def default_hac_lags(n: int, holding_period: Optional[int] = None, rebalance_freq: Optional[int] = None) -> int:
+    """Overlap-implied lags when the horizon is known, else the Newey-West rule of thumb."""
+    if holding_period and rebalance_freq:
+        return max(0, int(np.ceil(float(holding_period) / float(rebalance_freq))) - 1)
+    return int(np.floor(4.0 * (max(n, 1) / 100.0) ** (2.0 / 9.0)))
+
+
+class ICEngine:
+    """
+    Per-date Pearson and rank IC for a whole (date, symbol) panel at once,
+    plus summary statistics (mean IC, ICIR, t / HAC t) and period rollups.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        df = frame[['date', 'signal', 'return']]
+        self.x = pd.to_numeric(df['signal'], errors='coerce').to_numpy(dtype=float)
+        self.y = pd.to_numeric(df['return'], errors='coerce').to_numpy(dtype=float)
+        # Parse each distinct date once, then map rows to sorted date ids
+        codes, labels = pd.factorize(df['date'])
+        parsed = pd.DatetimeIndex(pd.to_datetime(labels))
+        uniq, remap = np.unique(parsed.to_numpy(), return_inverse=True)
+        self.dates = pd.DatetimeIndex(uniq)
+        self.date_idx = remap.reshape(-1)[codes].astype(np.int64)
+        self._per_date: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_signals(cls, signals_df: pd.DataFrame, returns_df: pd.DataFrame) -> "ICEngine":
+        """Merge signals (symbol, date, signal) with returns (symbol, signal_date, return)."""
+        merged = pd.merge(
+            signals_df[['symbol', 'date', 'signal']],
+            returns_df[['symbol', 'signal_date', 'return']],
+            left_on=['symbol', 'date'],
+            right_on=['symbol', 'signal_date'],
+            how='inner'
+        )
+        return cls(merged)
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, return_col: str = 'fwd_return') -> "ICEngine":
+        """Rows of a BacktestEngine analysis table where `return_col` is present (no re-merge)."""
+        return cls(column_frame(table, return_col))
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def pooled_ic(self) -> float:
+        """Correlation over all rows (legacy 'ic_overall')."""
+        keep = ~(np.isnan(self.x) | np.isnan(self.y))
+        x, y = self.x[keep], self.y[keep]
+        if len(x) < 2 or not (np.isfinite(x).all() and np.isfinite(y).all()):
+            return float('nan')
+        if x.std() == 0 or y.std() == 0:
+            return float('nan')
+        # Same kernel as Series.corr so the pooled number is bit-identical
+        return float(np.corrcoef(x, y)[0, 1])
+
+    def per_date(self) -> pd.DataFrame:
+        """date, n, ic (Pearson), rank_ic (Spearman) for every date."""
+        if self._per_date is None:
+            D = len(self.dates)
+            ic, n = grouped_corr(self.date_idx, self.x, self.y, D)
+            valid = ~(np.isnan(self.x) | np.isnan(self.y))
+            g = self.date_idx[valid]
+            rx = average_ranks(g, self.x[valid])
+            ry = average_ranks(g, self.y[valid])
+            rank_ic, _ = grouped_corr(g, rx, ry, D)
+            self._per_date = pd.DataFrame({'date': self.dates, 'n': n, 'ic': ic, 'rank_ic': rank_ic})
+        return self._per_date
+
+    def summary(self, hac_lags: Optional[int] = None, holding_period: Optional[int] = None,
+                rebalance_freq: Optional[int] = None) -> Dict:
+        """
+        Mean IC, ICIR, iid t-stat / p-value and HAC (Newey-West) t-stat for
+        both Pearson and rank IC over the per-date series.
+        """
+        pdf = self.per_date()
+        out: Dict = {}
+        for name in ('ic', 'rank_ic'):
+            s = pdf[name].dropna().to_numpy()
+            n = len(s)
+            prefix = '' if name == 'ic' else 'rank_'
+            if n > 1:
+                mean = float(s.mean())
+                std = float(s.std(ddof=1))
+                t_stat = mean / (std / np.sqrt(n)) if std > 0 else None
+                p_value = 2 * (1 - stats.t.cdf(abs(t_stat), n - 1)) if t_stat is not None else None
+                lags = hac_lags if hac_lags is not None else default_hac_lags(n, holding_period, rebalance_freq)
+                _, _, hac_t = newey_west_tstat(s, lags)
+                hac_p = 2 * (1 - stats.t.cdf(abs(hac_t), n - 1)) if hac_t is not None else None
+            else:
+                mean = std = t_stat = p_value = hac_t = hac_p = None
+                lags = None
+            out[name] = mean
+            out[f'{prefix}ic_std'] = std
+            out[f'{prefix}icir'] = (mean / std) if (mean is not None and std) else None
+            out[f'{prefix}t_stat'] = t_stat
+            out[f'{prefix}p_value'] = p_value
+            out[f'{prefix}hac_t_stat'] = hac_t
+            out[f'{prefix}hac_p_value'] = hac_p
+            if name == 'ic':
+                out['n'] = int(n)
+                out['hac_lags'] = lags
+        return out
+
+    def rollup(self, freq: str = 'Y', min_rows: int = 0) -> pd.DataFrame:
+        """
+        Per period (pandas Period freq, e.g. 'Y' or 'M'):
+          ic           pooled correlation over all rows in the period
+          t_stat       ic * sqrt(n - 2) / sqrt(1 - ic^2)
+          n            rows in the period
+          ic_mean / rank_ic_mean / n_dates   from the per-date series
+        Periods with fewer than `min_rows` rows get ic = NaN.
+        """
+        cols = ['period', 'ic', 't_stat', 'n', 'ic_mean', 'rank_ic_mean', 'n_dates']
+        if len(self) == 0:
+            return pd.DataFrame(columns=cols)
+        periods = self.dates.to_period(freq)
+        p_codes, p_uniq = pd.factorize(periods, sort=True)
+        P = len(p_uniq)
+        row_period = p_codes[self.date_idx]
+        ic, n = grouped_corr(row_period, self.x, self.y, P)
+        # legacy counts every merged row, NaNs included
+        n_rows = np.bincount(row_period, minlength=P)
+        ic = np.where(n_rows < int(min_rows), np.nan, ic)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = np.where((n_rows > 2) & np.isfinite(ic), ic * np.sqrt(n_rows - 2) / np.sqrt(1 - ic ** 2), np.nan)
+
+        pdf = self.per_date()
+        agg = pd.DataFrame({'p': p_codes, 'ic': pdf['ic'], 'rank_ic': pdf['rank_ic']}).groupby('p')
+        ic_mean = agg['ic'].mean().reindex(range(P)).to_numpy()
+        rank_mean = agg['rank_ic'].mean().reindex(range(P)).to_numpy()
+        n_dates = agg['ic'].count().reindex(range(P)).fillna(0).astype(int).to_numpy()
+        return pd.DataFrame({
+            'period': [str(p) for p in p_uniq],
+            'ic': ic,
+            't_stat': [float(v) if np.isfinite(v) else None for v in t],
+            'n': n_rows.astype(int),
+            'ic_mean': ic_mean,
+            'rank_ic_mean': rank_mean,
+            'n_dates': n_dates,
+        }, columns=cols)
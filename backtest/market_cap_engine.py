@@ -32,15 +32,14 @@ class MarketCapEngine:
             return None
         return df.sort_values('date').reset_index(drop=True)
 
-    def get_market_cap(self, symbol: str, date: str) -> Optional[float]:
+    def history(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Full (date, marketCap, ...) history for a symbol, sorted by date (cached)."""
         if symbol not in self._cache:
-            df = self._load_symbol(symbol)
-            if df is None:
-                self._cache[symbol] = None
-            else:
-                self._cache[symbol] = df
+            self._cache[symbol] = self._load_symbol(symbol)
+        return self._cache.get(symbol)
 
-        df = self._cache.get(symbol)
+    def get_market_cap(self, symbol: str, date: str) -> Optional[float]:
+        df = self.history(symbol)
         if df is None or len(df) == 0:
             return None
 
@@ -0,0 +1,240 @@
+"""
+Momentum Sweep - the (lookback, skip, holding period, rebalance freq) grid in one pass
+
+A momentum parameter grid run through run_backtest repeats the same work for
+every combination: the universe of each rebalance date, one price window per
+(symbol, date), and an entry + exit fill per signal row. None of that depends
+on lookback or skip, and the entry fill does not depend on the holding period.
+MomentumSweep.run(start, end) therefore
+
+  - builds the rebalance dates of every frequency and takes their union, so
+    the universe is resolved once per distinct date
+  - computes the daily momentum of every (lookback, skip) pair for every
+    (symbol, date) at once, as log ratios of the closes at shifted positions of
+    each symbol's cached price array (the same rows calculate_momentum reads)
+  - standardizes each pair's cross-sections with FactorEngine.finalize_signals
+  - resolves one forward-return term structure (entry once, one exit per
+    holding period) over the union of (symbol, date) rows
+  - scores each combination by subsetting its frequency's dates and joining
+    the term structure's column for its holding period
+
+Per combination the IC equals run_backtest(...)['analysis']['ic'] on the same
+window (same calendar, same signal rows, same forward returns). Only the
+momentum-only daily signal is covered; sweep_unsupported() names the configs
+(monthly / residual momentum, combo formulas, size / beta neutralization,
+non-stock price sources) that need the per-combination engine run instead.
+Executed-trade statistics are not produced.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis_table import build_analysis_table
+from .backtest_engine import BacktestEngine
+from .data_engine import DataEngine
+from .factor_factory import resolve_factor_date
+
+
+def sweep_unsupported(engine: BacktestEngine, factor_weights: dict) -> Optional[str]:
+    """Why the sweep cannot reproduce run_backtest for this engine / weights (None when it can)."""
+    cfg = engine.config
+    other = [k for k, w in factor_weights.items() if k != 'momentum' and w is not None and float(w) != 0.0]
+    if other or not float(factor_weights.get('momentum') or 0.0):
+        return f"weights are not momentum-only: {sorted(factor_weights)}"
+    if cfg.get('MOMENTUM_USE_MONTHLY'):
+        return "MOMENTUM_USE_MONTHLY"
+    if cfg.get('MOMENTUM_USE_RESIDUAL'):
+        return "MOMENTUM_USE_RESIDUAL"
+    if str(cfg.get('COMBO_FORMULA', 'linear')).lower() != 'linear':
+        return f"COMBO_FORMULA={cfg.get('COMBO_FORMULA')}"
+    if engine.factor_engine._neutralize_cols():
+        return "size/beta neutralization"
+    if cfg.get('SIGNAL_CACHE_USE'):
+        return "SIGNAL_CACHE_USE"
+    de = engine.data_engine
+    if not isinstance(de, DataEngine) or type(de).get_price is not DataEngine.get_price:
+        return "custom DataEngine.get_price"
+    return None
+
+
+class MomentumSweep:
+    """
+    IC of every (lookback, skip, holding_period, rebalance_freq) combination of
+    a momentum-only signal over one window, computed in a single shared pass.
+    """
+
+    def __init__(self, engine: BacktestEngine, lookbacks: Iterable[int], skips: Iterable[int],
+                 holding_periods: Iterable[int], rebalance_freqs: Iterable[int],
+                 factor_weights: Optional[dict] = None):
+        self.engine = engine
+        self.lookbacks = [int(x) for x in lookbacks]
+        self.skips = [int(x) for x in skips]
+        self.holding_periods = [int(x) for x in holding_periods]
+        self.rebalance_freqs = [int(x) for x in rebalance_freqs]
+        self.factor_weights = dict(factor_weights or {'momentum': 1.0})
+        reason = sweep_unsupported(engine, self.factor_weights)
+        if reason:
+            raise ValueError(f"momentum sweep does not support this config: {reason}")
+        self.pairs: List[Tuple[int, int]] = [(lb, sk) for lb in self.lookbacks for sk in self.skips]
+        # symbol -> (dates int64 ns, closes, pct returns) of the full cached history
+        self._arrays: Dict[str, Optional[tuple]] = {}
+
+    # -- panel -----------------------------------------------------------------
+
+    def _symbol_arrays(self, symbol: str) -> Optional[tuple]:
+        if symbol not in self._arrays:
+            df = self.engine.data_engine._cached_frame(symbol)
+            if df is None or len(df) == 0:
+                self._arrays[symbol] = None
+            else:
+                close = df['close']
+                self._arrays[symbol] = (
+                    df['date'].to_numpy(dtype='datetime64[ns]').view('int64'),
+                    close.to_numpy(dtype=float),
+                    close.pct_change(fill_method=None).to_numpy(dtype=float),
+                )
+        return self._arrays[symbol]
+
+    def _raw_momentum(self, symbols: List[str], mom_dates: List[str]) -> Dict[Tuple[int, int], np.ndarray]:
+        """
+        calculate_momentum(symbol, mom_date, lb, skip) for each row and pair, NaN where
+        it returns None. Rows are grouped by symbol so each pair is a few array ops.
+        """
+        n = len(symbols)
+        out = {p: np.full(n, np.nan) for p in self.pairs}
+        vol_lb = self.engine.config.get('MOMENTUM_VOL_LOOKBACK')
+        vol_lb = int(vol_lb) if vol_lb else 0
+        delisted = self.engine.data_engine.delisted_info
+
+        by_symbol: Dict[str, List[int]] = {}
+        for i, sym in enumerate(symbols):
+            by_symbol.setdefault(sym, []).append(i)
+        date_ns = pd.DatetimeIndex(pd.to_datetime(mom_dates)).as_unit('ns').asi8
+
+        for sym, rows in by_symbol.items():
+            arrays = self._symbol_arrays(sym)
+            if arrays is None:
+                continue
+            dates, close, ret = arrays
+            rows = np.asarray(rows)
+            when = date_ns[rows]
+            # get_price clips the window end to the delisting date (day granularity)
+            end = when
+            if sym in delisted:
+                gone = pd.Timestamp(delisted[sym])
+                end = np.where(when > gone.value, pd.Timestamp(gone.strftime('%Y-%m-%d')).value, when)
+            hi = np.searchsorted(dates, end, side='right')
+            for lb, sk in self.pairs:
+                span = np.int64(pd.Timedelta(days=(lb + sk) * 2).value)
+                lo = np.searchsorted(dates, when - span, side='left')
+                ok = (hi - lo) >= lb + sk + 1
+                if not ok.any():
+                    continue
+                idx = rows[ok]
+                e = hi[ok] - 1 - sk
+                s = e - lb
+                start_px, end_px = close[s], close[e]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    sig = np.log(end_px / start_px)
+                sig[start_px <= 0] = np.nan
+                if vol_lb:
+                    for j, (a, b) in enumerate(zip(np.maximum(lo[ok] + 1, hi[ok] - vol_lb), hi[ok])):
+                        vol = pd.Series(ret[a:b]).std()
+                        if vol and not np.isnan(vol) and vol > 0:
+                            sig[j] = sig[j] / vol
+                out[(lb, sk)][idx] = sig
+        return out
+
+    # -- grid ------------------------------------------------------------------
+
+    def _finalize(self, date: str, symbols: List[str], raw: np.ndarray) -> pd.DataFrame:
+        keep = ~np.isnan(raw)
+        if not keep.any():
+            return pd.DataFrame(columns=['symbol', 'date', 'signal'])
+        mom = raw[keep]
+        w = float(self.factor_weights['momentum'])
+        df = pd.DataFrame({
+            'symbol': [s for s, k in zip(symbols, keep) if k],
+            'date': date,
+            'signal': w * mom,
+            'momentum': mom,
+        })
+        return self.engine.factor_engine.finalize_signals(df, self.factor_weights)
+
+    def run(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        One row per combination: lookback, skip, holding_period, rebalance_freq,
+        ic, ic_yearly (list of dicts or None), n_obs (rows in the IC), n_dates.
+        """
+        engine = self.engine
+        cfg = engine.config
+        cal = engine._get_trading_calendar(start_date, end_date)
+        dates_by_freq = {f: engine._generate_rebalance_dates(start_date, end_date, f, cal=cal)
+                         for f in self.rebalance_freqs}
+        sim = engine.execution_simulator
+        sim.set_trading_calendar(cal)
+        all_dates = sorted(set().union(*dates_by_freq.values())) if dates_by_freq else []
+
+        # 1) Universe once per distinct date; one flat (symbol, date) row list
+        row_syms: List[str] = []
+        row_mom_dates: List[str] = []
+        bounds: Dict[str, Tuple[int, int]] = {}
+        lag, mom_lag = cfg.get('FACTOR_LAG_DAYS', 0), cfg.get('MOMENTUM_LAG_DAYS')
+        for d in all_dates:
+            universe = engine.universe_builder.get_universe(d) or []
+            bounds[d] = (len(row_syms), len(row_syms) + len(universe))
+            row_syms.extend(universe)
+            row_mom_dates.extend([resolve_factor_date(d, lag, mom_lag)] * len(universe))
+
+        # 2) Raw momentum of every pair, then per-date standardization
+        raw = self._raw_momentum(row_syms, row_mom_dates)
+        signals: Dict[Tuple[int, int], Dict[str, pd.DataFrame]] = {}
+        for pair in self.pairs:
+            per_date = {}
+            for d in all_dates:
+                a, b = bounds[d]
+                if b > a:
+                    per_date[d] = self._finalize(d, row_syms[a:b], raw[pair][a:b])
+            signals[pair] = per_date
+
+        # 3) One forward-return term structure over the union of signal rows
+        frames = [f for per_date in signals.values() for f in per_date.values() if len(f) > 0]
+        if frames:
+            union = pd.concat([f[['symbol', 'date']] for f in frames], ignore_index=True)
+            union = union.drop_duplicates(subset=['symbol', 'date']).reset_index(drop=True)
+        else:
+            union = pd.DataFrame(columns=['symbol', 'date'])
+        terms = sim.calculate_forward_return_terms(union, self.holding_periods, apply_quality_filter=True)
+
+        # 4) Score every combination on its own date subset
+        rows = []
+        for lb, sk in self.pairs:
+            per_date = signals[(lb, sk)]
+            for f in self.rebalance_freqs:
+                history: dict = {}
+                parts = []
+                for d in dates_by_freq[f]:
+                    df = per_date.get(d)
+                    if df is not None and len(df) > 0:
+                        parts.append(engine._smooth_signals(df, history))
+                sig = (pd.concat(parts, ignore_index=True) if parts
+                       else pd.DataFrame(columns=['symbol', 'date', 'signal']))
+                for hp in self.holding_periods:
+                    table = build_analysis_table(sig, forward_returns=terms[hp])
+                    ic, ic_yearly, _ = engine._ic_analysis(table, 'fwd_return')
+                    usable = table[['signal', 'fwd_return']].replace([np.inf, -np.inf], np.nan).dropna()
+                    rows.append({
+                        'lookback': lb,
+                        'skip': sk,
+                        'holding_period': hp,
+                        'rebalance_freq': f,
+                        'ic': float(ic) if ic is not None and not np.isnan(ic) else None,
+                        'ic_yearly': ic_yearly.to_dict(orient='records') if ic_yearly is not None else None,
+                        'n_obs': int(len(usable)),
+                        'n_dates': len(dates_by_freq[f]),
+                    })
+        return pd.DataFrame(rows)
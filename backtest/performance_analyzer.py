@@ -7,6 +7,9 @@ import numpy as np
 from typing import Dict, List, Tuple
 from scipy import stats
 
+from .ic_engine import ICEngine
+from .analysis_table import column_frame
+
 class PerformanceAnalyzer:
     """
     Analyze backtest performance with IC, Sharpe, etc.
@@ -15,16 +18,19 @@ class PerformanceAnalyzer:
     def __init__(self):
         pass
     
-    def calculate_ic(self, signals_df: pd.DataFrame, returns_df: pd.DataFrame) -> Dict:
+    def calculate_ic(self, signals_df: pd.DataFrame, returns_df: pd.DataFrame,
+                     holding_period: int = None, rebalance_freq: int = None) -> Dict:
         """
         Calculate Information Coefficient
         
         Args:
             signals_df: DataFrame with columns [symbol, date, signal]
             returns_df: DataFrame with columns [symbol, signal_date, return]
+            holding_period / rebalance_freq: optional, set the HAC lag count
+                for overlapping forward returns (ceil(holding / rebalance) - 1)
         
         Returns:
-            Dict with IC statistics
+            Dict with IC statistics (mean IC, ICIR, t / HAC t, rank IC)
         """
         required_signal_cols = {'symbol', 'date', 'signal'}
         required_return_cols = {'symbol', 'signal_date', 'return'}
@@ -35,43 +41,8 @@ class PerformanceAnalyzer:
             or not required_return_cols.issubset(set(returns_df.columns))
         ):
             return {'ic': None, 't_stat': None, 'p_value': None, 'n': 0}
-        # Merge signals and returns
-        merged = pd.merge(
-            signals_df[['symbol', 'date', 'signal']],
-            returns_df[['symbol', 'signal_date', 'return']],
-            left_on=['symbol', 'date'],
-            right_on=['symbol', 'signal_date'],
-            how='inner'
-        )
-        
-        if len(merged) == 0:
-            return {'ic': None, 't_stat': None, 'p_value': None, 'n': 0}
-        
         # Per-date IC (cross-sectional), then aggregate
-        merged['date'] = pd.to_datetime(merged['date'])
-        ic_by_date = merged.groupby('date')[['signal', 'return']].apply(lambda g: g['signal'].corr(g['return']))
-        ic_by_date = ic_by_date.dropna()
-
-        ic_overall = merged['signal'].corr(merged['return'])
-        n = len(ic_by_date)
-        if n > 1:
-            ic = float(ic_by_date.mean())
-            std = float(ic_by_date.std(ddof=1))
-            t_stat = ic / (std / np.sqrt(n)) if std > 0 else None
-            p_value = 2 * (1 - stats.t.cdf(abs(t_stat), n - 1)) if t_stat is not None else None
-        else:
-            ic = None
-            t_stat = None
-            p_value = None
-        
-        return {
-            'ic': ic,
-            'ic_overall': ic_overall,
-            't_stat': t_stat,
-            'p_value': p_value,
-            'n': int(n),
-            'n_merged': int(len(merged))
-        }
+        return self._ic_stats(ICEngine.from_signals(signals_df, returns_df), holding_period, rebalance_freq)
     
     def calculate_ic_by_period(self, signals_df: pd.DataFrame,
                                returns_df: pd.DataFrame,
@@ -85,7 +56,7 @@ class PerformanceAnalyzer:
             freq: 'M' for monthly, 'Y' for yearly
         
         Returns:
-            DataFrame with period, ic, t_stat
+            DataFrame with period, ic (pooled), t_stat, n, ic_mean / rank_ic_mean (per-date)
         """
         required_signal_cols = {'symbol', 'date', 'signal'}
         required_return_cols = {'symbol', 'signal_date', 'return'}
@@ -96,40 +67,58 @@ class PerformanceAnalyzer:
             or not required_return_cols.issubset(set(returns_df.columns))
         ):
             return pd.DataFrame()
-        # Merge
-        merged = pd.merge(
-            signals_df[['symbol', 'date', 'signal']],
-            returns_df[['symbol', 'signal_date', 'return']],
-            left_on=['symbol', 'date'],
-            right_on=['symbol', 'signal_date'],
-            how='inner'
-        )
+        engine = ICEngine.from_signals(signals_df, returns_df)
         
-        if len(merged) == 0:
+        if len(engine) == 0:
             return pd.DataFrame()
         
-        merged['date'] = pd.to_datetime(merged['date'])
-        merged['period'] = merged['date'].dt.to_period(freq)
-        
-        # Calculate IC by period
-        results = []
-        for period, group in merged.groupby('period'):
-            ic = group[['signal', 'return']]['signal'].corr(group[['signal', 'return']]['return'])
-            n = len(group)
-            
-            if n > 2 and not np.isnan(ic):
-                t_stat = ic * np.sqrt(n - 2) / np.sqrt(1 - ic**2)
-            else:
-                t_stat = None
-            
-            results.append({
-                'period': str(period),
-                'ic': ic,
-                't_stat': t_stat,
-                'n': n
-            })
-        
-        return pd.DataFrame(results)
+        return engine.rollup(freq)
+    
+    def calculate_ic_table(self, table: pd.DataFrame, return_col: str = 'fwd_return',
+                           holding_period: int = None, rebalance_freq: int = None) -> Dict:
+        """
+        calculate_ic() over a BacktestEngine analysis table (results['analysis_table'])
+        
+        Args:
+            table: aligned (date, symbol) frame with signal and return columns
+            return_col: 'fwd_return', 'fwd_return_raw' or 'executed_return'
+        """
+        if table is None or len(table) == 0:
+            return {'ic': None, 't_stat': None, 'p_value': None, 'n': 0}
+        return self._ic_stats(ICEngine.from_table(table, return_col), holding_period, rebalance_freq)
+    
+    def analyze_table(self, table: pd.DataFrame, return_col: str = 'fwd_return',
+                      holding_period: int = None, rebalance_freq: int = None) -> Dict:
+        """
+        analyze_backtest() over one return column of an analysis table, with a
+        single IC engine for the summary and both rollups. The full
+        calculate_ic() dict is returned under 'ic_stats' and the per-date
+        series (date, n, ic, rank_ic) under 'ic_by_date'.
+        """
+        if table is None or len(table) == 0:
+            frame = pd.DataFrame(columns=['date', 'symbol', 'signal', 'return'])
+        else:
+            frame = column_frame(table, return_col)
+        engine = ICEngine(frame)
+        ic_stats = self._ic_stats(engine, holding_period, rebalance_freq)
+        out = self._summarize(
+            ic_stats,
+            engine.rollup('Y') if len(engine) else pd.DataFrame(),
+            engine.rollup('M') if len(engine) else pd.DataFrame(),
+            frame['return'],
+        )
+        out['ic_stats'] = ic_stats
+        out['ic_by_date'] = engine.per_date() if len(engine) else pd.DataFrame(columns=['date', 'n', 'ic', 'rank_ic'])
+        return out
+    
+    @staticmethod
+    def _ic_stats(engine: ICEngine, holding_period: int = None, rebalance_freq: int = None) -> Dict:
+        if len(engine) == 0:
+            return {'ic': None, 't_stat': None, 'p_value': None, 'n': 0}
+        out = engine.summary(holding_period=holding_period, rebalance_freq=rebalance_freq)
+        out['ic_overall'] = engine.pooled_ic()
+        out['n_merged'] = int(len(engine))
+        return out
     
     def calculate_sharpe(self, returns: pd.Series, periods_per_year: int = 252) -> float:
         """
@@ -171,13 +160,17 @@ class PerformanceAnalyzer:
         # IC by month
         ic_monthly = self.calculate_ic_by_period(signals_df, returns_df, freq='M')
         
+        return self._summarize(ic_stats, ic_yearly, ic_monthly, returns_df['return'] if len(returns_df) > 0 else None)
+    
+    def _summarize(self, ic_stats: Dict, ic_yearly: pd.DataFrame, ic_monthly: pd.DataFrame,
+                   returns: pd.Series) -> Dict:
         # Return statistics
-        if len(returns_df) > 0:
-            mean_return = returns_df['return'].mean()
-            median_return = returns_df['return'].median()
-            std_return = returns_df['return'].std()
-            sharpe = self.calculate_sharpe(returns_df['return'])
-            win_rate = (returns_df['return'] > 0).mean()
+        if returns is not None and len(returns) > 0:
+            mean_return = returns.mean()
+            median_return = returns.median()
+            std_return = returns.std()
+            sharpe = self.calculate_sharpe(returns)
+            win_rate = (returns > 0).mean()
         else:
             mean_return = None
             median_return = None
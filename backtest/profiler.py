@@ -0,0 +1,175 @@
+"""
+Stage Profiler - per-run wall / CPU time, call counts and cache hit rates
+
+BacktestEngine keeps one StageProfiler and resets it at the start of every
+run_backtest. Stages are timed with perf_counter / process_time around whole
+pipeline steps (universe build, standardization, execution, forward returns,
+analysis) and around each bound calculate_* method of the FactorEngine, so
+the cost is two clock reads per call and nothing per row. Nested calls are
+timed inclusively (a blend that calls calculate_quality counts both).
+
+Cache counters are plain ints on the engines that own the caches; the
+profiler records their deltas over a run, so engines shared through the
+EnginePool report per-run numbers. reset() also restarts the kernel's
+peak-RSS mark (VmHWM), so peak_rss_mb is the peak of this run, not of the
+process lifetime. Set PROFILE_STAGES=False to turn the timers off (the
+cache counters are always kept).
+"""
+
+from __future__ import annotations
+
+import functools
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (MB); VmHWM honours a reset via /proc/self/clear_refs."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def reset_peak_rss() -> None:
+    """Restart VmHWM at the current RSS (Linux; a no-op elsewhere) so peak_rss_mb() covers one run."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class StageProfiler:
+    """Accumulates {stage: calls / wall / cpu} and {cache: hits / misses} for one run."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = bool(enabled)
+        self.stages: Dict[str, list] = {}
+        self.caches: Dict[str, Dict[str, int]] = {}
+        self._cache_sources: Dict[str, Callable[[], Dict[str, int]]] = {}
+        self._cache_base: Dict[str, Dict[str, int]] = {}
+
+    def reset(self) -> None:
+        """Start a new run: clear stage timings, re-base the cache counters and the peak RSS."""
+        self.stages = {}
+        self.caches = {}
+        self._cache_base = {name: dict(fn()) for name, fn in self._cache_sources.items()}
+        reset_peak_rss()
+
+    def add(self, name: str, wall: float, cpu: float, calls: int = 1) -> None:
+        acc = self.stages.get(name)
+        if acc is None:
+            self.stages[name] = [calls, wall, cpu]
+        else:
+            acc[0] += calls
+            acc[1] += wall
+            acc[2] += cpu
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - w0, time.process_time() - c0)
+
+    def wrap(self, fn: Callable, name: str) -> Callable:
+        """Timed version of fn recorded under `name`."""
+        perf, cpu, add = time.perf_counter, time.process_time, self.add
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            w0, c0 = perf(), cpu()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                add(name, perf() - w0, cpu() - c0)
+
+        return timed
+
+    def instrument(self, obj, names: Iterable[str], prefix: str) -> None:
+        """Replace bound methods of obj with timed wrappers (instance attributes, once)."""
+        if not self.enabled:
+            return
+        for attr in names:
+            fn = getattr(obj, attr, None)
+            if fn is None or getattr(fn, '_stage_profiled', False):
+                continue
+            timed = self.wrap(fn, f"{prefix}{attr}")
+            timed._stage_profiled = True
+            setattr(obj, attr, timed)
+
+    def watch_cache(self, name: str, counters: Callable[[], Dict[str, int]]) -> None:
+        """Report the hits / misses returned by counters() as deltas since reset()."""
+        self._cache_sources[name] = counters
+        self._cache_base[name] = dict(counters())
+
+    def count(self, cache: str, hit: bool, n: int = 1) -> None:
+        """Count directly for caches that live in the caller (e.g. the signal cache)."""
+        c = self.caches.setdefault(cache, {'hits': 0, 'misses': 0})
+        c['hits' if hit else 'misses'] += n
+
+    def to_dict(self) -> dict:
+        caches = {k: dict(v) for k, v in self.caches.items()}
+        for name, fn in self._cache_sources.items():
+            now, base = fn(), self._cache_base.get(name, {})
+            caches[name] = {k: int(now.get(k, 0)) - int(base.get(k, 0)) for k in ('hits', 'misses')}
+        for c in caches.values():
+            total = c['hits'] + c['misses']
+            c['hit_rate'] = round(c['hits'] / total, 4) if total else None
+        return {
+            'runs': 1,
+            'stages': {
+                name: {'calls': int(calls), 'wall_seconds': round(wall, 6), 'cpu_seconds': round(cpu, 6)}
+                for name, (calls, wall, cpu) in sorted(self.stages.items())
+            },
+            'caches': dict(sorted(caches.items())),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+
+def merge_profiles(profiles: Iterable[Optional[dict]]) -> dict:
+    """Sum stage timings and cache counts of several runs; peak RSS is the max."""
+    stages: Dict[str, dict] = {}
+    caches: Dict[str, dict] = {}
+    peak = 0.0
+    runs = 0
+    for p in profiles:
+        if not p:
+            continue
+        runs += int(p.get('runs', 1))
+        for name, s in (p.get('stages') or {}).items():
+            acc = stages.setdefault(name, {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            acc['calls'] += int(s.get('calls', 0))
+            acc['wall_seconds'] += float(s.get('wall_seconds', 0.0))
+            acc['cpu_seconds'] += float(s.get('cpu_seconds', 0.0))
+        for name, c in (p.get('caches') or {}).items():
+            acc = caches.setdefault(name, {'hits': 0, 'misses': 0})
+            acc['hits'] += int(c.get('hits', 0))
+            acc['misses'] += int(c.get('misses', 0))
+        peak = max(peak, float(p.get('peak_rss_mb') or 0.0))
+    for s in stages.values():
+        s['wall_seconds'] = round(s['wall_seconds'], 6)
+        s['cpu_seconds'] = round(s['cpu_seconds'], 6)
+    for c in caches.values():
+        total = c['hits'] + c['misses']
+        c['hit_rate'] = round(c['hits'] / total, 4) if total else None
+    return {
+        'runs': runs,
+        'stages': dict(sorted(stages.items())),
+        'caches': dict(sorted(caches.items())),
+        'peak_rss_mb': round(peak, 1),
+    }
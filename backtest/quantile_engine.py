@@ -0,0 +1,291 @@
+"""
+Quantile Engine - all quantile buckets from one signal / forward-return set
+
+Signals and forward returns are merged once and sorted by (date, signal);
+every (date, symbol) then gets its within-date rank from one lexsort.
+Bucket assignment for any number of quantiles, any long_pct / short_pct
+split, bucket returns, spreads, hit rates and membership turnover are all
+grouped reductions (bincount) over those arrays, so sweeping N or long_pct
+needs no re-merge and no backtest rerun.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis_table import column_frame
+
+
+def rank_within_groups(group: np.ndarray, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ascending 1-based rank of `values` inside each group (ties by order of
+    appearance, same as Series.rank(method='first')).
+
+    Returns (order, rank, group_size); rank/group_size are aligned with the input.
+    """
+    n = len(values)
+    order = np.lexsort((np.arange(n), values, group))
+    g_sorted = group[order]
+    starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]]) if n else np.zeros(0, dtype=np.int64)
+    sizes = np.diff(np.r_[starts, n])
+    pos = np.arange(n) - np.repeat(starts, sizes)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = pos + 1
+    size = np.empty(n, dtype=np.int64)
+    size[order] = np.repeat(sizes, sizes)
+    return order, rank, size
+
+
+def assign_buckets(rank: np.ndarray, size: np.ndarray, n_buckets: int, method: str = 'qcut') -> np.ndarray:
+    """
+    Bucket ids 1..n_buckets from within-group ranks (0 = unassigned).
+
+    method='qcut'  : pd.qcut(rank, n_buckets, labels=False) + 1; groups with
+                     fewer than n_buckets members are left unassigned
+    method='split' : equal-count slices at np.linspace(0, size, n_buckets + 1, dtype=int);
+                     small groups leave some buckets empty
+    """
+    N = int(n_buckets)
+    rank = np.asarray(rank, dtype=np.int64)
+    size = np.asarray(size, dtype=np.int64)
+    out = np.zeros(len(rank), dtype=np.int64)
+    ok = size >= (N if method == 'qcut' else 1)
+    if method == 'qcut':
+        r, s = rank[ok], size[ok]
+        q = np.ones(len(r), dtype=np.int64)
+        multi = s > 1
+        # smallest k with rank <= 1 + (s - 1) * k / N
+        q[multi] = np.maximum(1, -((-(r[multi] - 1) * N) // (s[multi] - 1)))
+        out[ok] = q
+    elif method == 'split':
+        for s in np.unique(size[ok]):
+            m = ok & (size == s)
+            edges = np.linspace(0, s, N + 1, dtype=int)
+            out[m] = np.searchsorted(edges[1:-1], rank[m] - 1, side='right') + 1
+    else:
+        raise ValueError(f"Unknown bucket method: {method}")
+    return out
+
+
+class QuantileEngine:
+    """
+    Vectorized quantile analytics over (date, symbol, signal, return) rows.
+
+    Quantile 1 holds the lowest signals unless descending=True.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        df = frame[['date', 'symbol', 'signal', 'return']].copy()
+        df['date'] = pd.to_datetime(df['date'])
+        df['signal'] = pd.to_numeric(df['signal'], errors='coerce')
+        df['return'] = pd.to_numeric(df['return'], errors='coerce')
+        df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=['signal', 'return']).reset_index(drop=True)
+        self.frame = df
+        self.dates, date_idx = np.unique(df['date'].to_numpy(), return_inverse=True)
+        self.dates = pd.DatetimeIndex(self.dates)
+        self.date_idx = date_idx.astype(np.int64)
+        self.symbols, sym_idx = np.unique(df['symbol'].astype(str).to_numpy(), return_inverse=True)
+        self.sym_idx = sym_idx.astype(np.int64)
+        self.signal = df['signal'].to_numpy(dtype=float)
+        self.ret = df['return'].to_numpy(dtype=float)
+        _, self.rank, self.size = rank_within_groups(self.date_idx, self.signal)
+        self._bucket_cache: Dict[Tuple, np.ndarray] = {}
+
+    @classmethod
+    def from_signals(cls, signals: pd.DataFrame, forward_returns: pd.DataFrame) -> "QuantileEngine":
+        """Merge signals (symbol, date, signal) with forward returns (symbol, signal_date, return) once."""
+        if signals is None or forward_returns is None or len(signals) == 0 or len(forward_returns) == 0:
+            return cls(pd.DataFrame(columns=['date', 'symbol', 'signal', 'return']))
+        merged = pd.merge(
+            signals[['symbol', 'date', 'signal']],
+            forward_returns[['symbol', 'signal_date', 'return']],
+            left_on=['symbol', 'date'],
+            right_on=['symbol', 'signal_date'],
+            how='inner',
+        )
+        return cls(merged)
+
+    @classmethod
+    def from_table(cls, table: pd.DataFrame, return_col: str = 'fwd_return') -> "QuantileEngine":
+        """Build from a BacktestEngine analysis table (no re-merge)."""
+        return cls(column_frame(table, return_col))
+
+    def __len__(self) -> int:
+        return len(self.ret)
+
+    @property
+    def n_dates(self) -> int:
+        return len(self.dates)
+
+    # ---- bucket assignment -------------------------------------------------
+
+    def buckets(self, n_quantiles: int, method: str = 'qcut', descending: bool = False) -> np.ndarray:
+        key = (int(n_quantiles), method, bool(descending))
+        if key not in self._bucket_cache:
+            rank = self.size - self.rank + 1 if descending else self.rank
+            self._bucket_cache[key] = assign_buckets(rank, self.size, n_quantiles, method=method)
+        return self._bucket_cache[key]
+
+    def _grouped(self, gid: np.ndarray, n_groups: int, values: np.ndarray):
+        count = np.bincount(gid, minlength=n_groups).astype(float)
+        total = np.bincount(gid, weights=values, minlength=n_groups)
+        sq = np.bincount(gid, weights=values * values, minlength=n_groups)
+        wins = np.bincount(gid, weights=(values > 0).astype(float), minlength=n_groups)
+        return count, total, sq, wins
+
+    def bucket_returns(self, n_quantiles: int, method: str = 'qcut', descending: bool = False) -> pd.DataFrame:
+        """Per (date, quantile): mean_return, std, count, hit_rate."""
+        N = int(n_quantiles)
+        q = self.buckets(N, method=method, descending=descending)
+        m = q > 0
+        if not m.any():
+            return pd.DataFrame(columns=['date', 'quantile', 'mean_return', 'std', 'count', 'hit_rate'])
+        gid = self.date_idx[m] * N + (q[m] - 1)
+        count, total, sq, wins = self._grouped(gid, self.n_dates * N, self.ret[m])
+        has = count > 0
+        mean = np.divide(total, count, out=np.full_like(total, np.nan), where=has)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            var = (sq - count * mean * mean) / (count - 1)
+        std = np.where(count > 1, np.sqrt(np.clip(var, 0.0, None)), np.nan)
+        idx = np.flatnonzero(has)
+        return pd.DataFrame({
+            'date': self.dates[idx // N],
+            'quantile': (idx % N) + 1,
+            'mean_return': mean[idx],
+            'std': std[idx],
+            'count': count[idx].astype(int),
+            'hit_rate': wins[idx] / count[idx],
+        })
+
+    def summary(self, n_quantiles: int, method: str = 'qcut', descending: bool = False) -> pd.DataFrame:
+        """Average of per-date bucket means (equal weight per date)."""
+        br = self.bucket_returns(n_quantiles, method=method, descending=descending)
+        if br.empty:
+            return pd.DataFrame()
+        out = br.groupby('quantile').agg(
+            mean_return=('mean_return', 'mean'),
+            hit_rate=('hit_rate', 'mean'),
+            n_dates=('date', 'size'),
+        ).reset_index()
+        return out.sort_values('quantile').reset_index(drop=True)
+
+    def cumulative(self, n_quantiles: int, method: str = 'qcut') -> pd.DataFrame:
+        """Compounded per-date bucket means: date, quantile, mean_return, cum_return."""
+        br = self.bucket_returns(n_quantiles, method=method)
+        if br.empty:
+            return pd.DataFrame()
+        df = br[['date', 'quantile', 'mean_return']].sort_values(['quantile', 'date']).reset_index(drop=True)
+        df['cum_return'] = (1.0 + df['mean_return']).groupby(df['quantile']).cumprod() - 1.0
+        return df
+
+    def spread(self, n_quantiles: int, method: str = 'qcut') -> pd.DataFrame:
+        """Per-date top-minus-bottom quantile spread."""
+        N = int(n_quantiles)
+        br = self.bucket_returns(N, method=method)
+        if br.empty:
+            return pd.DataFrame(columns=['date', 'top', 'bottom', 'spread'])
+        wide = br.pivot(index='date', columns='quantile', values='mean_return')
+        if 1 not in wide.columns or N not in wide.columns:
+            return pd.DataFrame(columns=['date', 'top', 'bottom', 'spread'])
+        out = pd.DataFrame({'top': wide[N], 'bottom': wide[1]}).dropna()
+        out['spread'] = out['top'] - out['bottom']
+        return out.reset_index()
+
+    def turnover(self, n_quantiles: int, method: str = 'qcut') -> pd.DataFrame:
+        """Average bucket membership turnover (1 - |A∩B| / |A∪B|) between consecutive dates."""
+        N = int(n_quantiles)
+        q = self.buckets(N, method=method)
+        m = q > 0
+        cols = ['quantile', 'avg_turnover', 'n_pairs']
+        if self.n_dates < 2 or not m.any():
+            return pd.DataFrame(columns=cols)
+        d, s, b = self.date_idx[m], self.sym_idx[m], q[m]
+        S = len(self.symbols)
+        key = (d * S + s) * (N + 1) + b
+        key_sorted = np.sort(key)
+        prev_key = ((d - 1) * S + s) * (N + 1) + b
+        pos = np.searchsorted(key_sorted, prev_key)
+        hit = (pos < len(key_sorted)) & (key_sorted[np.minimum(pos, len(key_sorted) - 1)] == prev_key) & (d > 0)
+
+        G = self.n_dates * N
+        gid = d * N + (b - 1)
+        members = np.bincount(gid, minlength=G).reshape(self.n_dates, N)
+        inter = np.bincount(gid[hit], minlength=G).reshape(self.n_dates, N)
+        cur, prev = members[1:], members[:-1]
+        inter = inter[1:]
+        union = cur + prev - inter
+        valid = (cur > 0) & (prev > 0)
+        t = np.where(union > 0, 1.0 - inter / np.maximum(union, 1), 0.0)
+        rows = []
+        for j in range(N):
+            v = valid[:, j]
+            rows.append({
+                'quantile': j + 1,
+                'avg_turnover': float(t[v, j].mean()) if v.any() else None,
+                'n_pairs': int(v.sum()),
+            })
+        return pd.DataFrame(rows, columns=cols)
+
+    # ---- long_pct / short_pct splits --------------------------------------
+
+    def top_bottom(self, long_pct: float, short_pct: Optional[float] = None) -> pd.DataFrame:
+        """
+        Per-date long (top long_pct) and short (bottom short_pct) leg returns,
+        with leg sizes as in FactorEngine.build_positions
+        (floor(n * pct), at least one long name).
+        """
+        short_pct = long_pct if short_pct is None else short_pct
+        cols = ['date', 'n_long', 'n_short', 'long_mean', 'short_mean', 'spread', 'long_hit_rate', 'short_hit_rate']
+        if len(self) == 0:
+            return pd.DataFrame(columns=cols)
+        n = self.size
+        n_long = np.floor(n * float(long_pct)).astype(np.int64) if long_pct and long_pct > 0 else np.zeros_like(n)
+        if long_pct and long_pct > 0:
+            n_long = np.maximum(n_long, 1)
+        n_short = np.floor(n * float(short_pct)).astype(np.int64) if short_pct and short_pct > 0 else np.zeros_like(n)
+        desc_rank = n - self.rank + 1
+        is_long = desc_rank <= n_long
+        is_short = self.rank <= n_short
+
+        D = self.n_dates
+        lc, lt, _, lw = self._grouped(self.date_idx[is_long], D, self.ret[is_long])
+        sc, st, _, sw = self._grouped(self.date_idx[is_short], D, self.ret[is_short])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            long_mean = np.where(lc > 0, lt / lc, np.nan)
+            short_mean = np.where(sc > 0, st / sc, np.nan)
+            long_hit = np.where(lc > 0, lw / lc, np.nan)
+            short_hit = np.where(sc > 0, sw / sc, np.nan)
+        return pd.DataFrame({
+            'date': self.dates,
+            'n_long': lc.astype(int),
+            'n_short': sc.astype(int),
+            'long_mean': long_mean,
+            'short_mean': short_mean,
+            'spread': long_mean - short_mean,
+            'long_hit_rate': long_hit,
+            'short_hit_rate': short_hit,
+        }, columns=cols)
+
+    def sweep(self, long_pcts: Iterable[float], short_pct: Optional[float] = None) -> pd.DataFrame:
+        """Summary row per long_pct: mean leg returns, spread, spread t-stat and hit rates."""
+        rows = []
+        for p in long_pcts:
+            tb = self.top_bottom(p, short_pct=short_pct)
+            sp = tb['spread'].dropna()
+            n = len(sp)
+            sd = float(sp.std(ddof=1)) if n > 1 else np.nan
+            rows.append({
+                'long_pct': float(p),
+                'short_pct': float(p if short_pct is None else short_pct),
+                'n_dates': int(tb['long_mean'].notna().sum()),
+                'long_mean': float(tb['long_mean'].mean()) if len(tb) else np.nan,
+                'short_mean': float(tb['short_mean'].mean()) if len(tb) else np.nan,
+                'spread_mean': float(sp.mean()) if n else np.nan,
+                'spread_tstat': float(sp.mean() / sd * np.sqrt(n)) if n > 1 and sd > 0 else np.nan,
+                'spread_hit_rate': float((sp > 0).mean()) if n else np.nan,
+                'long_hit_rate': float(tb['long_hit_rate'].mean()) if len(tb) else np.nan,
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,129 @@
+"""
+Run Checkpoint - rebalance-level resume for BacktestEngine.run_backtest
+
+The per-date loop of run_backtest (signals -> smoothing -> positions) is
+where a long daily-rebalanced run spends its time; execution and the IC
+analysis run afterwards over the collected frames. RebalanceCheckpoint
+appends the loop's output every N rebalance dates to one file so a
+restarted run reloads the finished dates and continues with the next one.
+
+File layout (append-only; a torn tail from a crash is ignored and cut off):
+  record := <u64 payload length> <u32 crc32> <pickled payload>
+  first record   {'kind': 'header', 'key': run key}
+  other records  {'kind': 'batch', 'dates': [...], 'signals': [frames],
+                  'positions': [frames], 'audit': [rows], 'history': {...}}
+Each batch keeps the per-date frames column-oriented as pandas stores them,
+so a resumed run concatenates exactly the frames an uninterrupted run would.
+'history' is the signal smoothing state after the batch's last date. A file
+whose header key differs from the current run (other config, weights, window
+or rebalance dates) is discarded.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_HEAD = struct.Struct('<QI')
+
+
+def _read_records(path: Path):
+    """(records, byte offset after the last intact record)."""
+    records, good = [], 0
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos = 0
+    while pos + _HEAD.size <= len(data):
+        n, crc = _HEAD.unpack_from(data, pos)
+        body = data[pos + _HEAD.size: pos + _HEAD.size + n]
+        if len(body) < n or zlib.crc32(body) != crc:
+            break
+        try:
+            records.append(pickle.loads(body))
+        except Exception:
+            break
+        pos += _HEAD.size + n
+        good = pos
+    return records, good
+
+
+class RebalanceCheckpoint:
+    """Append-only per-batch state of one run_backtest call."""
+
+    def __init__(self, path, key: str, every: int = 20):
+        self.path = Path(path)
+        self.key = key
+        self.every = max(1, int(every))
+        self._dates: List[str] = []
+        self._signals: list = []
+        self._positions: list = []
+        self._audit: list = []
+
+    def load(self) -> Dict[str, Any]:
+        """Completed state (dates, signals, positions, audit, history); starts a new file if none matches."""
+        state = {'dates': [], 'signals': [], 'positions': [], 'audit': [], 'history': {}}
+        records, good = ([], 0)
+        if self.path.exists():
+            records, good = _read_records(self.path)
+        if records and records[0].get('kind') == 'header' and records[0].get('key') == self.key:
+            for rec in records[1:]:
+                state['dates'].extend(rec['dates'])
+                state['signals'].extend(rec['signals'])
+                state['positions'].extend(rec['positions'])
+                state['audit'].extend(rec['audit'])
+                state['history'] = rec['history']
+            with open(self.path, 'r+b') as f:
+                f.truncate(good)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                self._write(f, {'kind': 'header', 'key': self.key})
+            os.replace(tmp, self.path)
+        return state
+
+    @staticmethod
+    def _write(f, payload: dict) -> None:
+        body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(_HEAD.pack(len(body), zlib.crc32(body)))
+        f.write(body)
+
+    def step(self, date: str, signals: list, positions: list, audit: list, history: dict) -> None:
+        """Record one finished rebalance date; flushes every `every` dates."""
+        self._dates.append(date)
+        self._signals.extend(signals)
+        self._positions.extend(positions)
+        self._audit.extend(audit)
+        if len(self._dates) >= self.every:
+            self.flush(history)
+
+    def flush(self, history: dict) -> None:
+        if not self._dates:
+            return
+        payload = {
+            'kind': 'batch',
+            'dates': self._dates,
+            'signals': self._signals,
+            'positions': self._positions,
+            'audit': self._audit,
+            'history': history,
+        }
+        with open(self.path, 'ab') as f:
+            self._write(f, payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._dates, self._signals, self._positions, self._audit = [], [], [], []
+
+    def discard(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+def checkpoint_path(root, start: str, end: str) -> Optional[Path]:
+    """Conventional checkpoint file for one [start, end] run under root (None when root is None)."""
+    if root is None:
+        return None
+    return Path(root) / f"{str(start).replace('-', '')}_{str(end).replace('-', '')}.ckpt"
@@ -0,0 +1,197 @@
+"""
+Shared Store - memory-mapped per-symbol frames for process pools
+
+Every process that builds a DataEngine unpickles the price files it touches
+into its own heap, so N parallel runs hold N copies of the same history.
+ColumnStore writes the normalized per-symbol frames once into flat column
+files (one file per (column, dtype), rows of all symbols back to back) and
+workers open them with np.memmap: frame(symbol) returns a DataFrame whose
+numeric / datetime columns are read-only views into pages the OS shares
+between processes. Object columns (rare in price / fundamentals files) are
+kept in a small pickle per symbol and loaded on demand.
+
+Layout of a store directory:
+  index.json   symbols, row offsets, column table, per-symbol column order,
+               source signature (file count / size / mtime of the inputs)
+  col_<k>.bin  raw column k (dtype in index.json)
+  obj/<i>.pkl  object columns of symbol i (only where present)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+INDEX_FILE = 'index.json'
+
+
+def source_signature(dirs: Iterable[str], suffix: str = '.pkl') -> dict:
+    """Cheap fingerprint of the input directories (file count, bytes, newest mtime)."""
+    sig = {}
+    for d in dirs:
+        n, size, mtime = 0, 0, 0
+        if d and os.path.isdir(d):
+            with os.scandir(d) as it:
+                for entry in it:
+                    if entry.name.endswith(suffix):
+                        st = entry.stat()
+                        n += 1
+                        size += st.st_size
+                        mtime = max(mtime, st.st_mtime_ns)
+        sig[str(d)] = [n, size, mtime]
+    return sig
+
+
+class ColumnStore:
+    """Read-only memory-mapped frames keyed by symbol."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        with open(self.path / INDEX_FILE) as f:
+            meta = json.load(f)
+        self.signature = meta.get('signature', {})
+        self.symbols: List[str] = meta['symbols']
+        self._pos = {s: i for i, s in enumerate(self.symbols)}
+        self._offsets = np.asarray(meta['offsets'], dtype=np.int64)
+        self._layout = meta['layout']
+        self._object_symbols = set(meta.get('object_symbols', []))
+        total = int(self._offsets[-1]) if len(self._offsets) else 0
+        self._columns = []
+        for k, (name, dtype) in enumerate(meta['columns']):
+            file = self.path / f'col_{k}.bin'
+            arr = np.memmap(file, dtype=np.dtype(dtype), mode='r', shape=(total,)) if total else np.empty(0, dtype=dtype)
+            self._columns.append((name, arr))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._pos
+
+    def frame(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Stored frame for symbol; numeric columns are zero-copy read-only views."""
+        i = self._pos.get(symbol)
+        if i is None:
+            return None
+        lo, hi = int(self._offsets[i]), int(self._offsets[i + 1])
+        data = {}
+        for entry in self._layout[i]:
+            if isinstance(entry, int):
+                name, arr = self._columns[entry]
+                data[name] = np.asarray(arr[lo:hi])
+            else:
+                data[entry] = None
+        if i in self._object_symbols:
+            with open(self.path / 'obj' / f'{i}.pkl', 'rb') as f:
+                objects = pickle.load(f)
+            for name, values in objects.items():
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
+
+    @classmethod
+    def build(cls, path: str, symbols: Iterable[str], loader: Callable[[str], Optional[pd.DataFrame]],
+              signature: Optional[dict] = None) -> 'ColumnStore':
+        """Write loader(symbol) for every symbol in one streaming pass (one frame in memory at a time)."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        (path / INDEX_FILE).unlink(missing_ok=True)
+        columns: List[tuple] = []
+        col_ids: Dict[tuple, int] = {}
+        files = []
+        stored, offsets, layout, object_symbols = [], [0], [], []
+        total = 0
+        try:
+            for symbol in symbols:
+                df = loader(symbol)
+                if df is None or len(df) == 0:
+                    continue
+                i = len(stored)
+                n = len(df)
+                entries, objects = [], {}
+                written = set()
+                for name in df.columns:
+                    values = df[name].to_numpy()
+                    if values.dtype == object:
+                        objects[name] = values
+                        entries.append(str(name))
+                        continue
+                    key = (str(name), values.dtype.str)
+                    k = col_ids.get(key)
+                    if k is None:
+                        k = col_ids[key] = len(columns)
+                        columns.append(key)
+                        fh = open(path / f'col_{k}.bin', 'wb')
+                        fh.write(np.zeros(total, dtype=values.dtype).tobytes())
+                        files.append(fh)
+                    files[k].write(np.ascontiguousarray(values).tobytes())
+                    written.add(k)
+                    entries.append(k)
+                for k, (_, dtype) in enumerate(columns):
+                    if k not in written:
+                        files[k].write(np.zeros(n, dtype=np.dtype(dtype)).tobytes())
+                if objects:
+                    (path / 'obj').mkdir(exist_ok=True)
+                    with open(path / 'obj' / f'{i}.pkl', 'wb') as f:
+                        pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    object_symbols.append(i)
+                stored.append(str(symbol))
+                layout.append(entries)
+                total += n
+                offsets.append(total)
+        finally:
+            for fh in files:
+                fh.close()
+        meta = {
+            'symbols': stored,
+            'offsets': offsets,
+            'columns': [list(c) for c in columns],
+            'layout': layout,
+            'object_symbols': object_symbols,
+            'signature': signature or {},
+        }
+        # index.json last: a store without it is incomplete and gets rebuilt
+        tmp = path / (INDEX_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, path / INDEX_FILE)
+        return cls(path)
+
+    @classmethod
+    def open_or_build(cls, path: str, symbols: Callable[[], Iterable[str]],
+                      loader: Callable[[str], Optional[pd.DataFrame]], signature: dict,
+                      build: bool = True) -> Optional['ColumnStore']:
+        """Reuse the store at path if its source signature matches, else rebuild it (or None if not build)."""
+        path = Path(path)
+        if (path / INDEX_FILE).exists():
+            store = cls(path)
+            if store.signature == json.loads(json.dumps(signature)):
+                return store
+        if not build:
+            return None
+        return cls.build(path, symbols(), loader, signature=signature)
+
+
+def open_price_store(data_engine, path: str, build: bool = True) -> Optional[ColumnStore]:
+    """Store of the DataEngine's normalized price frames (active + delisted dirs)."""
+    signature = source_signature([data_engine.active_dir, data_engine.delisted_dir])
+    return ColumnStore.open_or_build(
+        path, lambda: sorted(data_engine.get_all_symbols()), data_engine._load_symbol, signature, build=build
+    )
+
+
+def open_fundamentals_store(engine, path: str, build: bool = True) -> Optional[ColumnStore]:
+    """Store of a Fundamentals / ValueFundamentals engine's per-symbol frames."""
+    src = engine.fundamentals_dir
+
+    def _symbols():
+        return sorted(p.stem for p in Path(src).glob('*.pkl')) if Path(src).is_dir() else []
+
+    return ColumnStore.open_or_build(
+        path, _symbols, engine._load_symbol, source_signature([str(src)]), build=build
+    )
@@ -0,0 +1,292 @@
+"""
+Span Backtest - one signal / forward-return pass shared by many date windows
+
+Walk-forward windows overlap heavily (3y train / 1y test stepping yearly
+touches every year up to four times). With fixed factor weights a
+rebalance date's universe, signals, positions and returns do not depend on
+the window it belongs to, so SpanBacktest computes them once per distinct
+rebalance date over the whole span and run(start, end) assembles the same
+result dict BacktestEngine.run_backtest would return by date slicing.
+
+What stays window-specific (to keep results identical to run_backtest):
+  - rebalance dates are still anchored at each window's first session
+  - signal smoothing (SIGNAL_SMOOTH_*) restarts per window, and positions /
+    executed returns are then rebuilt from the window's smoothed signals
+  - with EXECUTION_USE_TRADING_DAYS, run_backtest clips execution / exit
+    dates to the window's calendar; rows whose shifted dates differ between
+    the window and span calendars are recomputed with the window calendar
+  - EXECUTION_MODE='delta' runs the DeltaExecutor per window
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis_table import build_analysis_table
+from .backtest_engine import BacktestEngine
+from .delta_executor import DEFAULT_RESIZE_TOL, DeltaExecutor, check_holding_period
+
+
+def _date_keys(values) -> np.ndarray:
+    """YYYY-MM-DD strings for a date column (str or datetime); each distinct value parsed once."""
+    codes, uniq = pd.factorize(pd.Series(values))
+    labels = pd.DatetimeIndex(pd.to_datetime(uniq)).strftime('%Y-%m-%d').to_numpy(dtype=object)
+    return labels[codes] if len(codes) else np.array([], dtype=object)
+
+
+class SpanBacktest:
+    """
+    Shared per-date work for many run_backtest windows of one factor.
+
+    prepare(windows) computes every distinct rebalance date of the given
+    (start, end) windows in one pass; run(start, end) then only slices.
+    Dates not covered by prepare() are computed on first use.
+    """
+
+    def __init__(self, engine: BacktestEngine, factor_weights: dict, rebalance_freq: int = 5,
+                 holding_period: int = 10, long_pct: float = 0.2, short_pct: float = 0.0):
+        self.engine = engine
+        self.factor_weights = factor_weights
+        self.rebalance_freq = rebalance_freq
+        self.holding_period = holding_period
+        self.long_pct = long_pct
+        self.short_pct = short_pct
+        cfg = engine.config
+        self.smoothing = (int(cfg.get('SIGNAL_SMOOTH_WINDOW', 0) or 0) > 1
+                          or str(cfg.get('SIGNAL_SMOOTH_METHOD', 'sma')).lower() == 'ema')
+        self.execution_mode = str(cfg.get('EXECUTION_MODE') or 'trade').lower().strip()
+        if self.execution_mode == 'delta':
+            check_holding_period(holding_period, rebalance_freq, cfg.get('REBALANCE_MODE'))
+        self.trading_days = bool(engine.execution_simulator.execution_use_trading_days)
+
+        self._signals: Dict[str, pd.DataFrame] = {}
+        self._audit: Dict[str, dict] = {}
+        self._span_cal: Optional[pd.DatetimeIndex] = None
+        # Per-row results over all prepared dates (rows of every date, in date order)
+        self._fwd: Optional[pd.DataFrame] = None
+        self._fwd_raw: Optional[pd.DataFrame] = None
+        self._positions: Optional[pd.DataFrame] = None
+        self._executed: Optional[pd.DataFrame] = None
+
+    # -- shared pass -----------------------------------------------------------
+
+    def window_dates(self, start_date: str, end_date: str) -> Tuple[pd.DatetimeIndex, List[str]]:
+        cal = self.engine._get_trading_calendar(start_date, end_date)
+        return cal, self.engine._generate_rebalance_dates(start_date, end_date, self.rebalance_freq, cal=cal)
+
+    def prepare(self, windows: Iterable[Tuple[str, str]]) -> int:
+        """Compute signals and returns for every distinct rebalance date of the windows."""
+        windows = list(windows)
+        dates = set()
+        for start, end in windows:
+            dates.update(self.window_dates(start, end)[1])
+        if not windows:
+            return 0
+        if self._span_cal is None:
+            # Fixed once set: every shared row is computed and checked against this calendar
+            self._span_cal = self.engine._get_trading_calendar(min(s for s, _ in windows), max(e for _, e in windows))
+        self._compute_dates(sorted(dates))
+        return len(dates)
+
+    def _compute_dates(self, dates: List[str]) -> None:
+        new = [d for d in dates if d not in self._signals]
+        for d in new:
+            signals_df = self.engine._compute_signals_cached(d, self.factor_weights)
+            audit = self.engine.universe_builder.get_last_audit()
+            if audit:
+                row = dict(audit)
+                row['rebalance_date'] = d
+                row['n_signals'] = int(len(signals_df)) if signals_df is not None else 0
+                self._audit[d] = row
+            self._signals[d] = signals_df
+        if not new:
+            return
+
+        frames = [self._signals[d] for d in new if self._signals[d] is not None and len(self._signals[d]) > 0]
+        signals = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['symbol', 'date', 'signal'])
+        sim = self.engine.execution_simulator
+        if self._span_cal is not None:
+            sim.set_trading_calendar(self._span_cal)
+        fwd = sim.calculate_forward_returns(signals, holding_period=self.holding_period, apply_quality_filter=True)
+        fwd_raw = sim.calculate_forward_returns(signals, holding_period=self.holding_period, apply_quality_filter=False)
+        self._fwd = self._append(self._fwd, fwd)
+        self._fwd_raw = self._append(self._fwd_raw, fwd_raw)
+
+        if not self.smoothing:
+            pos_frames = []
+            for f in frames:
+                p = self.engine.factor_engine.build_positions(f, long_pct=self.long_pct, short_pct=self.short_pct)
+                if p is not None and len(p) > 0:
+                    pos_frames.append(p)
+            positions = (pd.concat(pos_frames, ignore_index=True) if pos_frames
+                         else pd.DataFrame(columns=['symbol', 'date', 'position']))
+            self._positions = self._append(self._positions, positions)
+            if self.execution_mode != 'delta':
+                executed = sim.execute_trades(positions)
+                self._executed = self._append(self._executed, sim.calculate_returns(executed, holding_period=self.holding_period))
+
+    @staticmethod
+    def _append(old: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+        if old is None or len(old) == 0:
+            return new
+        if new is None or len(new) == 0:
+            return old
+        return pd.concat([old, new], ignore_index=True)
+
+    # -- per window ------------------------------------------------------------
+
+    @staticmethod
+    def _slice(frame: Optional[pd.DataFrame], date_col: str, dates: List[str]) -> Optional[pd.DataFrame]:
+        if frame is None:
+            return None
+        if len(frame) == 0:
+            return frame.iloc[0:0]
+        keys = _date_keys(frame[date_col])
+        rows = np.flatnonzero(np.isin(keys, np.asarray(dates, dtype=object)))
+        # Date order (dates computed on demand may have been appended late), row order within a date
+        rows = rows[np.argsort(keys[rows], kind='stable')]
+        return frame.iloc[rows].reset_index(drop=True)
+
+    def _calendar_mismatch(self, dates, cal: pd.DatetimeIndex) -> np.ndarray:
+        """Rows whose execution / exit dates differ between the span and window calendars."""
+        n = len(dates)
+        if not self.trading_days or n == 0 or self._span_cal is None:
+            return np.zeros(n, dtype=bool)
+        sim = self.engine.execution_simulator
+        delay, hp = int(sim.execution_delay), int(self.holding_period)
+
+        def _shifts(calendar):
+            sim.set_trading_calendar(calendar)
+            entry = sim._shift_dates(dates, delay)
+            exit_ = sim._shift_dates(dates, hp + delay)
+            return entry.to_numpy(), exit_.to_numpy(), sim._shift_dates(exit_, -delay).to_numpy()
+
+        span = _shifts(self._span_cal)
+        window = _shifts(cal)
+        bad = np.zeros(n, dtype=bool)
+        for a, b in zip(span, window):
+            bad |= a != b
+        return bad
+
+    def _patch_rows(self, shared: pd.DataFrame, inputs: pd.DataFrame, input_date_col: str,
+                    cal: pd.DatetimeIndex, compute) -> pd.DataFrame:
+        """
+        Replace the shared rows of inputs whose dates shift differently under the
+        window calendar with `compute(rows)` run on that calendar (input order kept).
+        """
+        if inputs is None or len(inputs) == 0:
+            return shared
+        bad = self._calendar_mismatch(inputs[input_date_col], cal)
+        if not bad.any():
+            return shared
+        sim = self.engine.execution_simulator
+        sim.set_trading_calendar(cal)
+        redo = compute(inputs[bad])
+        bad_keys = set(zip(inputs.loc[bad, 'symbol'].astype(str), _date_keys(inputs.loc[bad, input_date_col])))
+        keys = list(zip(shared['symbol'].astype(str), _date_keys(shared['signal_date']))) if len(shared) else []
+        keep_shared = np.array([k not in bad_keys for k in keys], dtype=bool)
+
+        # Re-interleave in input-row order: each output row follows its input row
+        order_keys = pd.Series(np.arange(len(inputs)),
+                               index=pd.MultiIndex.from_arrays([inputs['symbol'].astype(str).to_numpy(),
+                                                                _date_keys(inputs[input_date_col])]))
+        order_keys = order_keys[~order_keys.index.duplicated(keep='first')]
+        parts = [shared[keep_shared], redo]
+        out = pd.concat([p for p in parts if len(p) > 0], ignore_index=True) if any(len(p) for p in parts) else shared.iloc[0:0]
+        if len(out) == 0:
+            return out
+        rank = order_keys.reindex(pd.MultiIndex.from_arrays([out['symbol'].astype(str).to_numpy(),
+                                                            _date_keys(out['signal_date'])])).to_numpy()
+        return out.iloc[np.argsort(rank, kind='stable')].reset_index(drop=True)
+
+    def run(self, start_date: str, end_date: str) -> Dict:
+        """Same keys as BacktestEngine.run_backtest (minus the in-engine IC analysis)."""
+        cal, rebalance_dates = self.window_dates(start_date, end_date)
+        if self._span_cal is None:
+            self._span_cal = cal
+        self._compute_dates(rebalance_dates)
+        engine = self.engine
+        sim = engine.execution_simulator
+
+        all_signals, all_positions, audit_rows = [], [], []
+        history: dict = {}
+        for d in rebalance_dates:
+            if d in self._audit:
+                audit_rows.append(self._audit[d])
+            signals_df = self._signals.get(d)
+            if signals_df is None or len(signals_df) == 0:
+                continue
+            if self.smoothing:
+                signals_df = engine._smooth_signals(signals_df, history)
+                positions_df = engine.factor_engine.build_positions(signals_df, long_pct=self.long_pct,
+                                                                    short_pct=self.short_pct)
+                if positions_df is not None and len(positions_df) > 0:
+                    all_positions.append(positions_df)
+            all_signals.append(signals_df)
+
+        signals_df = (pd.concat(all_signals, ignore_index=True) if all_signals
+                      else pd.DataFrame(columns=['symbol', 'date', 'signal']))
+        if self.smoothing:
+            positions_df = (pd.concat(all_positions, ignore_index=True) if all_positions
+                            else pd.DataFrame(columns=['symbol', 'date', 'position']))
+        else:
+            positions_df = self._slice(self._positions, 'date', rebalance_dates)
+            if positions_df is None:
+                positions_df = pd.DataFrame(columns=['symbol', 'date', 'position'])
+
+        hp = self.holding_period
+        fwd = self._patch_rows(
+            self._slice(self._fwd, 'signal_date', rebalance_dates), signals_df, 'date', cal,
+            lambda rows: sim.calculate_forward_returns(rows, holding_period=hp, apply_quality_filter=True))
+        fwd_raw = self._patch_rows(
+            self._slice(self._fwd_raw, 'signal_date', rebalance_dates), signals_df, 'date', cal,
+            lambda rows: sim.calculate_forward_returns(rows, holding_period=hp, apply_quality_filter=False))
+
+        sim.set_trading_calendar(cal)
+        delta = None
+        if self.execution_mode == 'delta':
+            delta = DeltaExecutor(
+                sim, resize_tol=float(engine.config.get('DELTA_RESIZE_TOL', DEFAULT_RESIZE_TOL)),
+            ).run(positions_df, end_date=end_date)
+            returns_df = delta['round_trips']
+            if len(returns_df) == 0:
+                returns_df = pd.DataFrame(columns=['symbol', 'signal_date', 'return'])
+        elif self.smoothing:
+            returns_df = sim.calculate_returns(sim.execute_trades(positions_df), holding_period=hp)
+        else:
+            held = positions_df[positions_df['position'] != 0] if len(positions_df) else positions_df
+            returns_df = self._patch_rows(
+                self._slice(self._executed, 'signal_date', rebalance_dates), held, 'date', cal,
+                lambda rows: sim.calculate_returns(sim.execute_trades(rows), holding_period=hp))
+            if returns_df is None:
+                returns_df = pd.DataFrame()
+        sim.set_trading_calendar(cal)
+
+        analysis_table = build_analysis_table(
+            signals_df,
+            forward_returns=fwd,
+            forward_returns_raw=fwd_raw,
+            executed_returns=returns_df,
+            positions=positions_df,
+        )
+        results = {
+            'signals': signals_df,
+            'positions': positions_df,
+            'returns': returns_df,
+            'forward_returns': fwd,
+            'forward_returns_raw': fwd_raw,
+            'analysis_table': analysis_table,
+            'rebalance_dates': rebalance_dates,
+            'filter_stats': sim.get_filter_stats(),  # cumulative over the shared pass
+            'universe_audit': pd.DataFrame(audit_rows) if audit_rows else pd.DataFrame(),
+            'execution_mode': self.execution_mode,
+        }
+        if delta is not None:
+            results['portfolio_daily'] = delta['daily']
+            results['delta_trades'] = delta['trades']
+            results['holdings'] = delta['holdings']
+            results['delta_stats'] = delta['stats']
+        return results
@@ -0,0 +1,319 @@
+"""
+Synthetic Market - deterministic N symbols x T days universe on the real data layout
+
+Writes the files the engines read, under one root:
+  prices/<SYM>.pkl, prices_delisted/<SYM>.pkl    DataEngine (date, open, high, low, close, volume)
+  delisted_companies.csv                         DataEngine delisted info (symbol, delistedDate)
+  fmp/market_cap_history/<SYM>.csv               MarketCapEngine (symbol, date, marketCap)
+  fmp/ratios/quality/<SYM>.pkl                   FundamentalsEngine (quarterly, available_date lagged)
+  fmp/ratios/value/<SYM>.pkl                     ValueFundamentalsEngine
+  Owner_Earnings/<SYM>.pkl                       PEAD factors (epsActual / epsEstimated per event)
+  fmp/earnings/earnings_calendar.csv             revenue-surprise factors
+  industry_map.csv                               sector per symbol
+  synthetic_market.json                          spec + engine config paths
+
+Prices follow a one-factor model around the SPY index symbol with per-symbol
+beta / volatility / liquidity. The history carries what real data does: late
+listings, delistings, missing rows (gaps), split-like level jumps that are not
+back-adjusted, zero-volume days and price moves on earnings days that follow
+the EPS surprise. Every symbol draws from its own seeded stream, so a given
+(seed, symbol index) yields the same history at any N, and a spec always
+produces byte-identical files.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+INDEX_SYMBOL = 'SPY'
+SECTORS = ('Technology', 'Financials', 'Health Care', 'Industrials', 'Energy', 'Consumer', 'Utilities', 'Materials')
+LAYOUT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class MarketSpec:
+    n_symbols: int = 200
+    n_days: int = 756
+    start: str = '2015-01-02'
+    seed: int = 7
+    delist_frac: float = 0.12        # share of symbols that stop trading before the end
+    late_listing_frac: float = 0.15  # share that list after the first day
+    gap_frac: float = 0.002          # per-day probability of a missing row
+    split_rate: float = 0.15         # expected split-like jumps per symbol over the history
+    zero_volume_frac: float = 0.001  # per-day probability of a zero-volume day
+
+    @property
+    def key(self) -> str:
+        return f"n{self.n_symbols}_t{self.n_days}_s{self.seed}"
+
+    @classmethod
+    def parse(cls, text: str, **overrides) -> 'MarketSpec':
+        """'500x1260' -> MarketSpec(n_symbols=500, n_days=1260, ...)."""
+        n, t = str(text).lower().split('x')
+        return cls(n_symbols=int(n), n_days=int(t), **overrides)
+
+
+def symbol_name(i: int) -> str:
+    return f"SYN{i:04d}"
+
+
+def _trading_days(spec: MarketSpec) -> pd.DatetimeIndex:
+    return pd.bdate_range(spec.start, periods=spec.n_days)
+
+
+def _index_returns(spec: MarketSpec) -> np.ndarray:
+    rng = np.random.default_rng([spec.seed, 0])
+    # Calm / stressed regimes so volatility clusters like the real index
+    regime = np.where(rng.random(spec.n_days) < 0.9, 0.009, 0.022)
+    regime = pd.Series(regime).rolling(20, min_periods=1).mean().to_numpy()
+    return rng.normal(0.0004, 1.0, spec.n_days) * regime
+
+
+def _index_frame(spec: MarketSpec, days: pd.DatetimeIndex, r_m: np.ndarray) -> pd.DataFrame:
+    rng = np.random.default_rng([spec.seed, 1])
+    close = 200.0 * np.exp(np.cumsum(r_m))
+    opn = close / np.exp(r_m) * np.exp(rng.normal(0, 0.002, len(days)))
+    return pd.DataFrame({
+        'date': days,
+        'open': opn,
+        'high': np.maximum(opn, close) * (1 + np.abs(rng.normal(0, 0.004, len(days)))),
+        'low': np.minimum(opn, close) * (1 - np.abs(rng.normal(0, 0.004, len(days)))),
+        'close': close,
+        'volume': rng.integers(50_000_000, 120_000_000, len(days)).astype(float),
+    })
+
+
+def _quarter_ends(days: pd.DatetimeIndex) -> pd.DatetimeIndex:
+    return pd.date_range(days[0] - pd.offsets.QuarterEnd(2), days[-1], freq='QE')
+
+
+def _symbol_history(spec: MarketSpec, i: int, days: pd.DatetimeIndex, r_m: np.ndarray) -> dict:
+    """Prices, events and fundamentals of symbol i (independent of the other symbols)."""
+    rng = np.random.default_rng([spec.seed, 2, i])
+    n = len(days)
+    beta = rng.uniform(0.4, 1.8)
+    idio_vol = rng.uniform(0.008, 0.035)
+    shares = float(np.exp(rng.normal(np.log(150e6), 1.2)))
+    price0 = float(np.exp(rng.normal(np.log(40.0), 0.9)))
+    turnover = float(np.exp(rng.normal(np.log(0.006), 0.6)))
+    sector = SECTORS[int(rng.integers(len(SECTORS)))]
+
+    first = int(rng.integers(1, max(2, n // 2))) if rng.random() < spec.late_listing_frac else 0
+    last = n - 1
+    delisted = rng.random() < spec.delist_frac
+    if delisted:
+        last = int(rng.integers(first + min(60, n // 4), n - 5)) if n - 5 > first + min(60, n // 4) else n - 1
+        delisted = last < n - 1
+
+    ret = beta * r_m + rng.standard_t(4, n) * idio_vol / np.sqrt(2.0)
+    if delisted:
+        # Failing names drift down into the delisting
+        tail = min(60, last - first)
+        ret[last - tail + 1:last + 1] -= rng.uniform(0.002, 0.01)
+
+    # Earnings: ~35 days after each quarter end; the price reacts to the surprise
+    q_ends = _quarter_ends(days)
+    eps_level = rng.normal(0.8, 0.5)
+    rev_level = shares * price0 * rng.uniform(0.05, 0.4)
+    events = []
+    for q in q_ends:
+        ann = q + pd.Timedelta(days=int(rng.integers(25, 50)))
+        pos = int(days.searchsorted(ann))
+        eps_level += rng.normal(0.01, 0.08)
+        rev_level *= float(np.exp(rng.normal(0.01, 0.05)))
+        est = eps_level + rng.normal(0, 0.05)
+        surprise = rng.normal(0.0, 0.12)
+        rev_est = rev_level * float(np.exp(rng.normal(0, 0.02)))
+        rev_act = rev_est * float(np.exp(rng.normal(0, 0.03) + surprise * 0.05))
+        if pos < n and first <= pos <= last:
+            ret[pos] += float(np.clip(surprise / max(abs(est), 0.1), -2, 2)) * 0.05
+            ret[pos + 1:pos + 21] += surprise * 0.0008  # post-announcement drift
+        if not days[first] <= ann <= days[last]:
+            continue
+        events.append({
+            'date': days[min(pos, n - 1)].normalize(),
+            'symbol': symbol_name(i),
+            'fiscalDateEnding': q.normalize(),
+            'epsEstimated': round(float(est), 4),
+            'epsActual': round(float(est + surprise), 4),
+            'revenueEstimated': round(rev_est, 0),
+            'revenueActual': round(rev_act, 0),
+        })
+
+    close = price0 * np.exp(np.cumsum(ret))
+    # Split-like jumps in the raw (not back-adjusted) price; volume moves inversely
+    level = np.ones(n)
+    for _ in range(int(rng.poisson(spec.split_rate))):
+        at = int(rng.integers(first + 1, last + 1)) if last > first + 1 else last
+        ratio = float(rng.choice([0.5, 1.0 / 3.0, 3.0]))
+        level[at:] *= ratio
+    close = close * level
+    gap = rng.normal(0, idio_vol * 0.4, n)
+    opn = close / np.exp(ret) * np.exp(gap)
+    high = np.maximum(opn, close) * (1 + np.abs(rng.normal(0, idio_vol * 0.5, n)))
+    low = np.minimum(opn, close) * (1 - np.abs(rng.normal(0, idio_vol * 0.5, n)))
+    volume = shares * turnover / level * np.exp(rng.normal(0, 0.5, n) + 8 * np.abs(ret))
+    volume = np.round(volume)
+    volume[rng.random(n) < spec.zero_volume_frac] = 0.0
+
+    keep = np.zeros(n, dtype=bool)
+    keep[first:last + 1] = True
+    keep[first + 1:last] &= rng.random(max(last - first - 1, 0)) >= spec.gap_frac
+    prices = pd.DataFrame({
+        'date': days[keep], 'open': opn[keep], 'high': high[keep], 'low': low[keep],
+        'close': close[keep], 'volume': volume[keep],
+    }).reset_index(drop=True)
+
+    # Market cap history: shares outstanding drift slowly and follow the splits
+    share_path = shares * np.exp(np.cumsum(rng.normal(0, 0.0005, n))) / level
+    mcap = pd.DataFrame({
+        'symbol': symbol_name(i), 'date': days[keep], 'marketCap': np.round((close * share_path)[keep]),
+    })
+
+    # Quarterly fundamentals, available ~45 days after the quarter end
+    quality_rows, value_rows = [], []
+    roe, roa, gm = rng.normal(0.12, 0.06), rng.normal(0.05, 0.03), rng.uniform(0.2, 0.7)
+    cfo, de = rng.normal(0.07, 0.03), abs(rng.normal(0.8, 0.5))
+    ey, fcf, ev = rng.normal(0.05, 0.03), rng.normal(0.04, 0.03), rng.normal(0.08, 0.04)
+    for q in q_ends:
+        available = q + pd.Timedelta(days=int(rng.integers(30, 60)))
+        if available > days[last] or available < days[first]:
+            continue
+        roe = 0.8 * roe + 0.2 * 0.12 + rng.normal(0, 0.02)
+        roa = 0.8 * roa + 0.2 * 0.05 + rng.normal(0, 0.01)
+        gm = float(np.clip(gm + rng.normal(0, 0.01), 0.05, 0.9))
+        cfo = 0.8 * cfo + 0.2 * 0.07 + rng.normal(0, 0.01)
+        de = abs(de + rng.normal(0, 0.05))
+        ey, fcf, ev = ey + rng.normal(0, 0.005), fcf + rng.normal(0, 0.005), ev + rng.normal(0, 0.006)
+        quality_rows.append({'date': q, 'available_date': available, 'roe': roe, 'roa': roa,
+                             'gross_margin': gm, 'cfo_to_assets': cfo, 'debt_to_equity': de})
+        value_rows.append({'date': q, 'available_date': available, 'earnings_yield': ey,
+                           'fcf_yield': fcf, 'ev_ebitda_yield': ev})
+
+    return {
+        'symbol': symbol_name(i),
+        'sector': sector,
+        'prices': prices,
+        'delisted_date': days[last] + pd.offsets.BDay(1) if delisted else None,
+        'market_cap': mcap,
+        'quality': pd.DataFrame(quality_rows),
+        'value': pd.DataFrame(value_rows),
+        'events': pd.DataFrame(events),
+    }
+
+
+def paths(root) -> dict:
+    """Engine config keys pointing into a synthetic market root."""
+    root = Path(root)
+    return {
+        'PRICE_DIR_ACTIVE': str(root / 'prices'),
+        'PRICE_DIR_DELISTED': str(root / 'prices_delisted'),
+        'DELISTED_INFO': str(root / 'delisted_companies.csv'),
+        'MARKET_CAP_DIR': str(root / 'fmp' / 'market_cap_history'),
+        'FUNDAMENTALS_DIR': str(root / 'fmp' / 'ratios' / 'quality'),
+        'VALUE_DIR': str(root / 'fmp' / 'ratios' / 'value'),
+        'EARNINGS_DIR': str(root / 'Owner_Earnings'),
+        'EARNINGS_CALENDAR_PATH': str(root / 'fmp' / 'earnings' / 'earnings_calendar.csv'),
+        'INDUSTRY_MAP_PATH': str(root / 'industry_map.csv'),
+    }
+
+
+def write_market(spec: MarketSpec, root, overwrite: bool = False) -> dict:
+    """
+    Write the synthetic market under root and return its engine config paths.
+    An existing root with the same spec is reused unless overwrite is set.
+    """
+    root = Path(root)
+    meta_path = root / 'synthetic_market.json'
+    want = {'layout_version': LAYOUT_VERSION, 'spec': asdict(spec)}
+    if meta_path.exists() and not overwrite:
+        with open(meta_path) as f:
+            have = json.load(f)
+        if {k: have.get(k) for k in want} == want:
+            return paths(root)
+    if root.exists():
+        shutil.rmtree(root)
+    cfg = paths(root)
+    for key in ('PRICE_DIR_ACTIVE', 'PRICE_DIR_DELISTED', 'MARKET_CAP_DIR', 'FUNDAMENTALS_DIR', 'VALUE_DIR',
+                'EARNINGS_DIR'):
+        Path(cfg[key]).mkdir(parents=True, exist_ok=True)
+    Path(cfg['EARNINGS_CALENDAR_PATH']).parent.mkdir(parents=True, exist_ok=True)
+
+    days = _trading_days(spec)
+    r_m = _index_returns(spec)
+    _index_frame(spec, days, r_m).to_pickle(Path(cfg['PRICE_DIR_ACTIVE']) / f"{INDEX_SYMBOL}.pkl")
+
+    delisted_rows, industry_rows, calendar = [], [], []
+    n_delisted = 0
+    for i in range(spec.n_symbols):
+        h = _symbol_history(spec, i, days, r_m)
+        sym = h['symbol']
+        industry_rows.append({'symbol': sym, 'sector': h['sector']})
+        if h['delisted_date'] is not None:
+            n_delisted += 1
+            h['prices'].to_pickle(Path(cfg['PRICE_DIR_DELISTED']) / f"{sym}.pkl")
+            delisted_rows.append({
+                'symbol': sym, 'companyName': f"Synthetic {sym}", 'exchange': 'SYN',
+                'ipoDate': h['prices']['date'].iloc[0].strftime('%Y-%m-%d'),
+                'delistedDate': h['delisted_date'].strftime('%Y-%m-%d'),
+            })
+        else:
+            h['prices'].to_pickle(Path(cfg['PRICE_DIR_ACTIVE']) / f"{sym}.pkl")
+        h['market_cap'].to_csv(Path(cfg['MARKET_CAP_DIR']) / f"{sym}.csv", index=False, date_format='%Y-%m-%d')
+        if len(h['quality']):
+            h['quality'].to_pickle(Path(cfg['FUNDAMENTALS_DIR']) / f"{sym}.pkl")
+            h['value'].to_pickle(Path(cfg['VALUE_DIR']) / f"{sym}.pkl")
+        if len(h['events']):
+            h['events'].to_pickle(Path(cfg['EARNINGS_DIR']) / f"{sym}.pkl")
+            calendar.append(h['events'])
+
+    cols = ['symbol', 'companyName', 'exchange', 'ipoDate', 'delistedDate']
+    pd.DataFrame(delisted_rows, columns=cols).to_csv(cfg['DELISTED_INFO'], index=False)
+    pd.DataFrame(industry_rows).to_csv(cfg['INDUSTRY_MAP_PATH'], index=False)
+    cal = pd.concat(calendar, ignore_index=True) if calendar else pd.DataFrame(columns=['symbol', 'date'])
+    cal.drop(columns=['fiscalDateEnding'], errors='ignore').to_csv(
+        cfg['EARNINGS_CALENDAR_PATH'], index=False, date_format='%Y-%m-%d'
+    )
+
+    meta = dict(want, start=str(days[0].date()), end=str(days[-1].date()), n_delisted=n_delisted,
+                index_symbol=INDEX_SYMBOL, config={k: str(Path(v).relative_to(root)) for k, v in cfg.items()})
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+    return cfg
+
+
+def engine_config(root, **overrides) -> dict:
+    """BacktestEngine config for a written synthetic market (filters loose enough for small universes)."""
+    cfg = paths(root)
+    cfg.update({
+        'MIN_MARKET_CAP': 100e6,
+        'MIN_DOLLAR_VOLUME': 1e6,
+        'MIN_PRICE': 2.0,
+        'MARKET_CAP_STRICT': False,
+        'EXECUTION_USE_TRADING_DAYS': True,
+        'CALENDAR_SYMBOL': INDEX_SYMBOL,
+        'MOMENTUM_LOOKBACK': 120,
+        'MOMENTUM_SKIP': 20,
+        'MOMENTUM_USE_MONTHLY': False,
+        'QUALITY_WEIGHTS': {'roe': 1.0, 'roa': 0.5, 'gross_margin': 0.5, 'cfo_to_assets': 1.0, 'debt_to_equity': -0.5},
+        'VALUE_WEIGHTS': {'earnings_yield': 1.0, 'fcf_yield': 1.0, 'ev_ebitda_yield': 1.0},
+    })
+    cfg.update(overrides)
+    return cfg
+
+
+def market_span(root) -> Optional[tuple]:
+    """(first day, last day) recorded for a written market, or None."""
+    meta_path = Path(root) / 'synthetic_market.json'
+    if not meta_path.exists():
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return meta.get('start'), meta.get('end')
@@ -0,0 +1,171 @@
+"""
+Trading Calendar - shared trading-day <-> index mapping
+
+Dates are held once as a sorted DatetimeIndex plus int codes (YYYYMMDD).
+A dense day-number lookup table maps any calendar date to the position of
+the first trading day on/after it, so date->index and shift() are O(1)
+array lookups instead of per-call searchsorted / strftime round trips.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def date_codes(dates) -> np.ndarray:
+    """Convert dates to int YYYYMMDD codes."""
+    idx = pd.DatetimeIndex(pd.to_datetime(dates))
+    return (idx.year * 10000 + idx.month * 100 + idx.day).to_numpy(dtype=np.int64)
+
+
+def code_to_timestamp(code: int) -> pd.Timestamp:
+    c = int(code)
+    return pd.Timestamp(year=c // 10000, month=(c // 100) % 100, day=c % 100)
+
+
+def _day_numbers(dates) -> np.ndarray:
+    """Days since epoch for scalar/array-like dates."""
+    if isinstance(dates, (str, pd.Timestamp, np.datetime64)) or not hasattr(dates, "__len__"):
+        dates = [dates]
+    vals = pd.DatetimeIndex(pd.to_datetime(dates)).values.astype("datetime64[D]")
+    return vals.astype(np.int64)
+
+
+class TradingCalendar:
+    """
+    Immutable trading-day calendar.
+
+    index_of(d): position of the first trading day on/after d (len(cal) if after the end)
+    shift(d, n): trading date n sessions after index_of(d), clipped to the calendar
+    """
+
+    def __init__(self, dates: Iterable):
+        idx = pd.DatetimeIndex(pd.to_datetime(list(dates) if not isinstance(dates, pd.Index) else dates))
+        idx = idx.normalize().sort_values().unique()
+        self.dates = pd.DatetimeIndex(idx)
+        self.codes = date_codes(self.dates)
+        self._days = self.dates.values.astype("datetime64[D]").astype(np.int64)
+        if len(self._days) > 0:
+            self._day0 = int(self._days[0])
+            span = np.arange(self._day0, int(self._days[-1]) + 1, dtype=np.int64)
+            self._next_idx = np.searchsorted(self._days, span, side="left").astype(np.int64)
+        else:
+            self._day0 = 0
+            self._next_idx = np.empty(0, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        if len(self) == 0:
+            return "TradingCalendar(empty)"
+        return f"TradingCalendar({self.codes[0]}..{self.codes[-1]}, n={len(self)})"
+
+    def index_of(self, dates) -> np.ndarray:
+        """Vectorized date -> calendar position (next trading day on/after each date)."""
+        days = _day_numbers(dates)
+        n = len(self._days)
+        out = np.full(len(days), n, dtype=np.int64)
+        if n == 0:
+            return out
+        off = days - self._day0
+        inside = (off >= 0) & (off < len(self._next_idx))
+        out[off < 0] = 0
+        out[inside] = self._next_idx[off[inside]]
+        return out
+
+    def code_of(self, dates) -> np.ndarray:
+        return date_codes(dates)
+
+    def date_of(self, positions) -> pd.DatetimeIndex:
+        pos = np.asarray(positions, dtype=np.int64)
+        return self.dates[np.clip(pos, 0, max(len(self) - 1, 0))]
+
+    def shift_index(self, dates, n: int) -> np.ndarray:
+        """Vectorized shift returning calendar positions (same semantics as shift)."""
+        n_cal = len(self)
+        base = self.index_of(dates)
+        target = np.clip(base + int(n), 0, max(n_cal - 1, 0))
+        # Dates past the end of the calendar collapse to the last session.
+        target[base >= n_cal] = n_cal - 1
+        return target
+
+    def shift(self, dates, n: int):
+        """
+        Shift date(s) by n trading sessions.
+        Returns a Timestamp for scalar input, DatetimeIndex otherwise.
+        """
+        scalar = isinstance(dates, (str, pd.Timestamp, np.datetime64)) or not hasattr(dates, "__len__")
+        out = self.dates[self.shift_index(dates, n)]
+        return out[0] if scalar else out
+
+    def between(self, start_date=None, end_date=None) -> pd.DatetimeIndex:
+        lo = 0 if start_date is None else int(self.index_of(start_date)[0])
+        if end_date is None:
+            hi = len(self)
+        else:
+            end_day = int(_day_numbers(end_date)[0])
+            hi = int(np.searchsorted(self._days, end_day, side="right"))
+        return self.dates[lo:hi]
+
+    def is_trading_day(self, dates) -> np.ndarray:
+        days = _day_numbers(dates)
+        pos = self.index_of(dates)
+        ok = pos < len(self)
+        res = np.zeros(len(days), dtype=bool)
+        res[ok] = self._days[pos[ok]] == days[ok]
+        return res
+
+
+_CALENDAR_CACHE: Dict[Tuple, Optional[TradingCalendar]] = {}
+
+
+def _source_signature(data_engine, symbols: Tuple[str, ...]) -> Tuple:
+    """(size, mtime) of each candidate's price file, so a refreshed file misses the cache."""
+    sig = []
+    for sym in symbols:
+        for d in (getattr(data_engine, "active_dir", None), getattr(data_engine, "delisted_dir", None)):
+            try:
+                st = os.stat(os.path.join(str(d), f"{sym}.pkl"))
+            except (OSError, TypeError):
+                continue
+            sig.append((sym, str(d), st.st_size, st.st_mtime_ns))
+    return tuple(sig)
+
+
+def load_trading_calendar(data_engine, symbols: Iterable[str], min_rows: int = 10) -> Optional[TradingCalendar]:
+    """
+    Build (once per process) a full-history calendar from the first candidate
+    symbol with enough bars. Results are cached per price directory + candidates
+    and the size / mtime of the candidates' price files, so a long-lived
+    process picks up a data refresh.
+    """
+    symbols = tuple(s for s in symbols if s)
+    active_dir = getattr(data_engine, "active_dir", None)
+    delisted_dir = getattr(data_engine, "delisted_dir", None)
+    key = None
+    if active_dir is not None or delisted_dir is not None:
+        key = (str(active_dir), str(delisted_dir), symbols, _source_signature(data_engine, symbols))
+        if key in _CALENDAR_CACHE:
+            return _CALENDAR_CACHE[key]
+
+    cal = None
+    for sym in symbols:
+        df = data_engine.get_price(sym)
+        if df is not None and len(df) > int(min_rows):
+            cal = TradingCalendar(df["date"])
+            break
+
+    if key is not None:
+        for old in [k for k in _CALENDAR_CACHE if k[:3] == key[:3]]:
+            del _CALENDAR_CACHE[old]  # superseded by the refreshed files
+        _CALENDAR_CACHE[key] = cal
+    return cal
+
+
+def clear_calendar_cache() -> None:
+    _CALENDAR_CACHE.clear()
@@ -9,9 +9,13 @@ class ValueFundamentalsEngine:
     def __init__(self, fundamentals_dir: str, max_staleness_days: Optional[int] = None):
         self.fundamentals_dir = Path(fundamentals_dir)
         self._cache: Dict[str, pd.DataFrame] = {}
+        self.cache_stats = {'hits': 0, 'misses': 0}
+        self.store = None  # optional shared ColumnStore of this directory
         self.max_staleness_days = int(max_staleness_days) if max_staleness_days else None
 
     def _load_symbol(self, symbol: str) -> Optional[pd.DataFrame]:
+        if self.store is not None:
+            return self.store.frame(symbol)
         p = self.fundamentals_dir / f"{symbol}.pkl"
         if not p.exists():
             return None
@@ -25,7 +29,10 @@ class ValueFundamentalsEngine:
         return df.sort_values('date').reset_index(drop=True)
 
     def get_latest_metrics(self, symbol: str, date: str) -> Optional[dict]:
-        if symbol not in self._cache:
+        if symbol in self._cache:
+            self.cache_stats['hits'] += 1
+        else:
+            self.cache_stats['misses'] += 1
             self._cache[symbol] = self._load_symbol(symbol)
         df = self._cache.get(symbol)
         if df is None or len(df) == 0:
@@ -7,8 +7,10 @@ import argparse
 import csv
 import datetime as dt
 import json
+import os
 import subprocess
 import sys
+import tempfile
 import time
 from pathlib import Path
 from typing import Any
@@ -58,6 +60,14 @@ def _default_policy() -> dict[str, Any]:
             "fixed_out_json": "audit/factor_registry/next_run_plan_fixed.json",
             "fixed_out_md": "audit/factor_registry/next_run_plan_fixed.md",
         },
+        "dag": {
+            "enabled": False,
+            "cpu_budget": 0,
+            "mem_budget_gb": 0,
+            "node_cpu": 1,
+            "node_mem_gb": 0,
+            "stamp_dir": "audit/auto_research/dag_stamps",
+        },
     }
 
 
@@ -70,7 +80,7 @@ def _load_policy(path: Path | None) -> dict[str, Any]:
         if not isinstance(loaded, dict):
             return out
         out.update({k: v for k, v in loaded.items() if k in out and not isinstance(out[k], dict)})
-        for k in ["stagnation", "retry", "candidate_queue", "next_run_plan"]:
+        for k in ["stagnation", "retry", "candidate_queue", "next_run_plan", "dag"]:
             if isinstance(loaded.get(k), dict):
                 out[k].update(loaded[k])
     except Exception:
@@ -78,7 +88,23 @@ def _load_policy(path: Path | None) -> dict[str, Any]:
     return out
 
 
+def _daemon_run(cmd: list[str], cwd: Path) -> dict[str, Any] | None:
+    """Run through the research daemon when V4_RESEARCH_DAEMON is set (None = run locally)."""
+    root = Path(__file__).resolve().parents[1]
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    from scripts.research_daemon import run_command
+
+    res = run_command(cmd, cwd=cwd, stream=False)
+    if res is None:
+        return None
+    return {"cmd": cmd, "rc": int(res.get("rc", 1)), "stdout": res["stdout"], "stderr": res["stderr"]}
+
+
 def _run(cmd: list[str], cwd: Path) -> dict[str, Any]:
+    via_daemon = _daemon_run(cmd, cwd)
+    if via_daemon is not None:
+        return via_daemon
     proc = subprocess.run(cmd, cwd=str(cwd), capture_output=True, text=True)
     return {
         "cmd": cmd,
@@ -88,6 +114,26 @@ def _run(cmd: list[str], cwd: Path) -> dict[str, Any]:
     }
 
 
+def _run_measured(cmd: list[str], cwd: Path) -> dict[str, Any]:
+    """_run that also reports the peak RSS (GB) of a local run's process tree."""
+    via_daemon = _daemon_run(cmd, cwd)
+    if via_daemon is not None:
+        return via_daemon
+    from scripts.memory_governor import run_measured
+
+    with tempfile.TemporaryFile("w+") as out, tempfile.TemporaryFile("w+") as err:
+        rc, peak_gb = run_measured(cmd, cwd=str(cwd), stdout=out, stderr=err)
+        out.seek(0)
+        err.seek(0)
+        return {
+            "cmd": cmd,
+            "rc": int(rc),
+            "stdout": out.read().strip(),
+            "stderr": err.read().strip(),
+            "peak_rss_gb": round(peak_gb, 3),
+        }
+
+
 def _run_with_retry(
     *,
     cmd: list[str],
@@ -135,6 +181,70 @@ def _parse_plan_commands(path: Path) -> list[dict[str, Any]]:
     return []
 
 
+def _run_plan_dag(
+    *,
+    root: Path,
+    plan_json: Path,
+    commands: list[dict[str, Any]],
+    execute: bool,
+    dag_policy: dict[str, Any],
+) -> dict[str, Any]:
+    """
+    Run every plan command as a DAG node (scripts/research_dag.py). Without
+    execute the nodes are the --dry-run validations of each rank.
+    """
+    if str(root) not in sys.path:
+        sys.path.insert(0, str(root))
+    from scripts.memory_governor import MemoryGovernor, resolve_budget_gb
+    from scripts.research_dag import nodes_from_plan, run_dag
+
+    def _make_cmd(rank: int, row: dict[str, Any]) -> list[str]:
+        cmd = [sys.executable, "scripts/execute_next_run_plan.py", "--plan-json", str(plan_json), "--rank", str(rank)]
+        return cmd if execute else cmd + ["--dry-run"]
+
+    nodes = nodes_from_plan(
+        commands,
+        _make_cmd,
+        default_cpu=float(dag_policy.get("node_cpu", 1) or 1),
+        default_mem_gb=float(dag_policy.get("node_mem_gb", 0) or 0),
+    )
+    cpu_budget = float(dag_policy.get("cpu_budget", 0) or 0) or float(os.cpu_count() or 1)
+    stamp_dir = (root / str(dag_policy.get("stamp_dir", "audit/auto_research/dag_stamps"))).resolve()
+    governor = MemoryGovernor(
+        resolve_budget_gb(float(dag_policy.get("mem_budget_gb", 0) or 0)),
+        name="auto_research_dag",
+    )
+    if execute:
+        # Executed nodes without a declared mem_gb use the peak RSS learned from earlier runs
+        for row, n in zip(commands, nodes):
+            if not row.get("mem_gb"):
+                fp = governor.footprint(f"auto_research_dag:{n.meta.get('factor') or n.node_id}")
+                if fp.source == "history":
+                    n.mem_gb = fp.gb
+
+    def _runner(n) -> dict[str, Any]:
+        res = _run_measured(n.cmd, root)
+        res["stage"] = f"dag:{n.node_id}"
+        if execute and res.get("peak_rss_gb"):
+            governor.record(f"auto_research_dag:{n.meta.get('factor') or n.node_id}", res["peak_rss_gb"])
+        return res
+
+    try:
+        out = run_dag(
+            nodes,
+            _runner,
+            cwd=root,
+            cpu_budget=cpu_budget,
+            mem_budget_gb=governor.budget_gb,
+            stamp_dir=stamp_dir if execute else None,
+            governor=governor,
+        )
+    finally:
+        governor.close()
+    out["execute"] = bool(execute)
+    return out
+
+
 def _metric_improved(*, current: float, best: float | None, direction: str, min_delta: float) -> bool:
     if best is None:
         return True
@@ -166,6 +276,28 @@ def _write_md(path: Path, payload: dict[str, Any]) -> None:
             f"| {rr.get('round')} | {rr.get('queue_rc')} | {rr.get('plan_rc')} | {rr.get('repair_rc')} | "
             f"{rr.get('validate_rc')} | {rr.get('execute_rc')} | {rr.get('selected_factor','')} | {rr.get('selected_tag','')} |"
         )
+    dag_rounds = [rr for rr in payload.get("rounds", []) if isinstance(rr.get("dag"), dict)]
+    if dag_rounds:
+        lines += [
+            "",
+            "## DAG Nodes",
+            "",
+            "| round | node | status | deps | seconds | queued_seconds | mem_gb | peak_rss_gb |",
+            "|---:|---|---|---|---:|---:|---:|---:|",
+        ]
+        for rr in dag_rounds:
+            for n in rr["dag"].get("nodes", []):
+                lines.append(
+                    f"| {rr.get('round')} | {n.get('node_id','')} | {n.get('status','')} | {','.join(n.get('deps', []))} | "
+                    f"{n.get('seconds', '')} | {n.get('queued_seconds', '')} | {n.get('mem_gb', '')} | "
+                    f"{n.get('peak_rss_gb') or ''} |"
+                )
+            d = rr["dag"]
+            lines.append(
+                f"| {rr.get('round')} | (total) | wall={d.get('wall_seconds')} serial={d.get('serial_seconds')} | "
+                f"max_concurrency={d.get('max_concurrency')} | | | mem_budget={d.get('mem_budget_gb')} | "
+                f"peak_used={d.get('mem_peak_used_gb')} |"
+            )
     lines += ["", f"- output_json: `{payload.get('output_json','')}`"]
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text("\n".join(lines) + "\n")
@@ -226,6 +358,22 @@ def _update_ledger(*, root: Path, payload: dict[str, Any], out_json: Path, out_m
         "last_selected_priority_score": str(last_round.get("selected_priority_score", "")),
         "no_improve_streak": str(last_round.get("no_improve_streak", "")),
     }
+    # Per-node DAG timings (empty when the run did not use --dag)
+    dag_runs = [rr["dag"] for rr in rounds if isinstance(rr.get("dag"), dict)]
+    dag_nodes = [n for d in dag_runs for n in d.get("nodes", [])]
+    row.update(
+        {
+            "dag_nodes": str(len(dag_nodes)) if dag_runs else "",
+            "dag_ok": str(sum(1 for n in dag_nodes if n.get("status") == "ok")) if dag_runs else "",
+            "dag_skipped": str(sum(1 for n in dag_nodes if n.get("status") == "skipped_up_to_date")) if dag_runs else "",
+            "dag_failed": str(sum(1 for n in dag_nodes if n.get("status") in ("failed", "blocked"))) if dag_runs else "",
+            "dag_wall_seconds": str(round(sum(float(d.get("wall_seconds", 0.0)) for d in dag_runs), 3)) if dag_runs else "",
+            "dag_serial_seconds": str(round(sum(float(d.get("serial_seconds", 0.0)) for d in dag_runs), 3)) if dag_runs else "",
+            "dag_node_timings": json.dumps(
+                [{"node": n.get("node_id"), "status": n.get("status"), "seconds": n.get("seconds")} for n in dag_nodes]
+            ) if dag_runs else "",
+        }
+    )
     fields = list(row.keys())
     rows.append(row)
     _write_csv_rows(ledger_csv, rows, fields)
@@ -406,7 +554,12 @@ def main() -> None:
     p.add_argument("--max-executions", type=int, default=0)
     p.add_argument("--execute", action="store_true", help="Actually execute selected run command.")
     p.add_argument("--out-dir", default="")
+    p.add_argument("--force", action="store_true", help="Bypass the run result store in every executed runner.")
+    p.add_argument("--dag", action="store_true", help="Run all plan commands as a dependency DAG (policy 'dag').")
     args = p.parse_args()
+    if args.force:
+        # Inherited by every runner subprocess (and forwarded to the research daemon)
+        os.environ["V4_FORCE_RERUN"] = "1"
 
     root = Path(".").resolve()
     policy = _load_policy(Path(args.policy_json).resolve() if args.policy_json else None)
@@ -434,6 +587,8 @@ def main() -> None:
     retry_stages = {str(x) for x in list(retry.get("stages", []))}
     cqp = policy.get("candidate_queue") or {}
     npp = policy.get("next_run_plan") or {}
+    dag_policy = policy.get("dag") or {}
+    dag_enabled = bool(dag_policy.get("enabled", False)) or bool(args.dag)
 
     ts = dt.datetime.now().strftime("%Y-%m-%d_%H%M%S")
     out_dir = Path(args.out_dir).resolve() if args.out_dir else (root / "audit" / "auto_research" / f"{ts}_orchestrator")
@@ -570,67 +725,94 @@ def main() -> None:
         except Exception:
             rr["selected_priority_score"] = 0.0
 
-        validate_cmd = [
-            sys.executable,
-            "scripts/execute_next_run_plan.py",
-            "--plan-json",
-            str(fixed_plan),
-            "--rank",
-            str(rank),
-            "--dry-run",
-        ]
-        vd = _run_with_retry(
-            cmd=validate_cmd,
-            cwd=root,
-            stage="validate",
-            max_attempts=1,
-            backoff_seconds=0,
-            backoff_multiplier=1.0,
-        )
-        rr["validate_rc"] = vd["rc"]
-        rr["validate_stdout"] = vd["stdout"]
-        rr["validate_stderr"] = vd["stderr"]
-        rr["validate_attempt_count"] = vd.get("attempt_count", 1)
-        rr["validate_attempts"] = vd.get("attempts", [])
-        if vd["rc"] != 0:
-            rr["execute_rc"] = -1
-            rounds.append(rr)
-            stopped_reason = "validation_failed"
-            if stop_on_validation_failure:
-                break
-            continue
-
-        if execute_enabled and executions_done < max_executions:
-            exe_cmd = [
+        if dag_enabled:
+            dag_execute = execute_enabled and executions_done < max_executions
+            dag = _run_plan_dag(
+                root=root, plan_json=fixed_plan, commands=commands, execute=dag_execute, dag_policy=dag_policy
+            )
+            rr["dag"] = dag
+            dag_failed = int(dag["counts"]["failed"]) + int(dag["counts"]["blocked"])
+            if dag_execute:
+                rr["validate_rc"] = 0
+                rr["execute_rc"] = 1 if dag_failed else 0
+                executions_done += 1
+                if dag_failed:
+                    stopped_reason = "execution_failed"
+                    rounds.append(rr)
+                    break
+            else:
+                rr["validate_rc"] = 2 if dag_failed else 0
+                rr["execute_rc"] = -1 if dag_failed else 0
+                rr["execute_stdout"] = "execution skipped (safe mode)"
+                rr["execute_stderr"] = ""
+                if dag_failed:
+                    rounds.append(rr)
+                    stopped_reason = "validation_failed"
+                    if stop_on_validation_failure:
+                        break
+                    continue
+        else:
+            validate_cmd = [
                 sys.executable,
                 "scripts/execute_next_run_plan.py",
                 "--plan-json",
                 str(fixed_plan),
                 "--rank",
                 str(rank),
+                "--dry-run",
             ]
-            ex = _run_with_retry(
-                cmd=exe_cmd,
+            vd = _run_with_retry(
+                cmd=validate_cmd,
                 cwd=root,
-                stage="execute",
+                stage="validate",
                 max_attempts=1,
                 backoff_seconds=0,
                 backoff_multiplier=1.0,
             )
-            rr["execute_rc"] = ex["rc"]
-            rr["execute_stdout"] = ex["stdout"]
-            rr["execute_stderr"] = ex["stderr"]
-            rr["execute_attempt_count"] = ex.get("attempt_count", 1)
-            rr["execute_attempts"] = ex.get("attempts", [])
-            executions_done += 1
-            if ex["rc"] != 0:
-                stopped_reason = "execution_failed"
+            rr["validate_rc"] = vd["rc"]
+            rr["validate_stdout"] = vd["stdout"]
+            rr["validate_stderr"] = vd["stderr"]
+            rr["validate_attempt_count"] = vd.get("attempt_count", 1)
+            rr["validate_attempts"] = vd.get("attempts", [])
+            if vd["rc"] != 0:
+                rr["execute_rc"] = -1
                 rounds.append(rr)
-                break
-        else:
-            rr["execute_rc"] = 0
-            rr["execute_stdout"] = "execution skipped (safe mode)"
-            rr["execute_stderr"] = ""
+                stopped_reason = "validation_failed"
+                if stop_on_validation_failure:
+                    break
+                continue
+
+            if execute_enabled and executions_done < max_executions:
+                exe_cmd = [
+                    sys.executable,
+                    "scripts/execute_next_run_plan.py",
+                    "--plan-json",
+                    str(fixed_plan),
+                    "--rank",
+                    str(rank),
+                ]
+                ex = _run_with_retry(
+                    cmd=exe_cmd,
+                    cwd=root,
+                    stage="execute",
+                    max_attempts=1,
+                    backoff_seconds=0,
+                    backoff_multiplier=1.0,
+                )
+                rr["execute_rc"] = ex["rc"]
+                rr["execute_stdout"] = ex["stdout"]
+                rr["execute_stderr"] = ex["stderr"]
+                rr["execute_attempt_count"] = ex.get("attempt_count", 1)
+                rr["execute_attempts"] = ex.get("attempts", [])
+                executions_done += 1
+                if ex["rc"] != 0:
+                    stopped_reason = "execution_failed"
+                    rounds.append(rr)
+                    break
+            else:
+                rr["execute_rc"] = 0
+                rr["execute_stdout"] = "execution skipped (safe mode)"
+                rr["execute_stderr"] = ""
 
         cur_score = float(rr.get("selected_priority_score", 0.0))
         improved_metrics: list[str] = []
@@ -685,6 +867,8 @@ def main() -> None:
         "root_dir": str(root),
         "policy_json": str(Path(args.policy_json).resolve()) if args.policy_json else "",
         "execute_enabled": execute_enabled,
+        "force_rerun": bool(args.force),
+        "dag_enabled": dag_enabled,
         "max_rounds": max_rounds,
         "max_executions": max_executions,
         "stagnation": {
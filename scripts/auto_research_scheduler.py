@@ -25,6 +25,7 @@ def _default_policy() -> dict[str, Any]:
         "stop_on_orchestrator_failure": True,
         "orchestrator_policy_json": "configs/research/auto_research_policy.json",
         "orchestrator_execute": False,
+        "orchestrator_dag": False,
         "lock_file": "audit/auto_research/auto_research_scheduler.lock",
         "heartbeat_json": "audit/auto_research/auto_research_scheduler_heartbeat.json",
         "ledger_csv": "audit/auto_research/auto_research_scheduler_ledger.csv",
@@ -122,10 +123,12 @@ def _release_lock(lock_file: Path) -> None:
         pass
 
 
-def _run_orchestrator(root: Path, orchestrator_policy_json: str, execute: bool) -> dict[str, Any]:
+def _run_orchestrator(root: Path, orchestrator_policy_json: str, execute: bool, dag: bool = False) -> dict[str, Any]:
     cmd = [sys.executable, "scripts/auto_research_orchestrator.py", "--policy-json", orchestrator_policy_json]
     if execute:
         cmd.append("--execute")
+    if dag:
+        cmd.append("--dag")
     proc = subprocess.run(cmd, cwd=str(root), capture_output=True, text=True)
     run_dir = ""
     report_json = ""
@@ -321,6 +324,7 @@ def main() -> None:
     stop_on_fail = bool(policy.get("stop_on_orchestrator_failure", True))
     orchestrator_policy_json = str(policy.get("orchestrator_policy_json", "configs/research/auto_research_policy.json"))
     orchestrator_execute = bool(policy.get("orchestrator_execute", False))
+    orchestrator_dag = bool(policy.get("orchestrator_dag", False))
     lock_file = (root / str(policy.get("lock_file", "audit/auto_research/auto_research_scheduler.lock"))).resolve()
     heartbeat_json = (root / str(policy.get("heartbeat_json", "audit/auto_research/auto_research_scheduler_heartbeat.json"))).resolve()
     ledger_csv = (root / str(policy.get("ledger_csv", "audit/auto_research/auto_research_scheduler_ledger.csv"))).resolve()
@@ -348,7 +352,9 @@ def main() -> None:
                 break
             cycle += 1
             started_at = dt.datetime.now().isoformat()
-            res = _run_orchestrator(root, orchestrator_policy_json=orchestrator_policy_json, execute=orchestrator_execute)
+            res = _run_orchestrator(
+                root, orchestrator_policy_json=orchestrator_policy_json, execute=orchestrator_execute, dag=orchestrator_dag
+            )
             ended_at = dt.datetime.now().isoformat()
             row = {
                 "cycle": cycle,
@@ -360,6 +366,7 @@ def main() -> None:
                 "stopped_reason": res["stopped_reason"],
                 "orchestrator_policy_json": orchestrator_policy_json,
                 "orchestrator_execute": str(orchestrator_execute),
+                "orchestrator_dag": str(orchestrator_dag),
             }
             rows.append(row)
             _write_csv_rows(ledger_csv, rows, list(row.keys()))
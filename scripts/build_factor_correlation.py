@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Average cross-sectional rank correlation across a factor catalog.
+
+Streams per-date signal cross-sections (BacktestEngine signal cache, or a
+wide signals csv with one column per factor) through
+FactorCorrelationAccumulator and writes:
+  - factor_corr_mean.csv / factor_corr_std.csv / factor_corr_pairs.csv
+  - factor_clusters.csv (average-linkage on 1 - |corr|)
+  - factor_redundancy.csv ("redundant with" list per factor)
+  - factor_corr_state.npz (accumulator sums; pass back with --state to extend)
+  - factor_corr_report.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.factor_correlation import (
+    FactorCorrelationAccumulator,
+    cache_cross_sections,
+    frame_cross_sections,
+    weights_hash,
+)
+
+DEFAULT_CATALOG = PROJECT_ROOT / "configs" / "research" / "logic100_catalog_batchA100_v1.json"
+
+
+def _catalog_weights(path: Path) -> dict[str, dict]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    out = {}
+    for item in payload.get("entries") or []:
+        key = str(item.get("candidate_id", "")).strip()
+        if key:
+            out[key] = dict(item.get("weights") or {})
+    return out
+
+
+def _signature_dirs(cache_root: Path, factors: dict[str, dict]) -> dict[str, Path]:
+    """Per factor, the signature sub-directory holding the most cache files for its weights."""
+    hashes = {name: weights_hash(w) for name, w in factors.items()}
+    best: dict[str, tuple[int, Path]] = {}
+    for d in sorted(p for p in cache_root.iterdir() if p.is_dir()):
+        counts = Counter(p.stem.partition("_")[2] for p in d.glob("*.pkl"))
+        for name, h in hashes.items():
+            if counts[h] > best.get(name, (0, None))[0]:
+                best[name] = (counts[h], d)
+    return {name: d for name, (_, d) in best.items()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Streaming factor correlation / redundancy matrix.")
+    ap.add_argument("--catalog", default=str(DEFAULT_CATALOG), help="Catalog json with entries[].candidate_id / weights")
+    ap.add_argument("--cache-dir", default="", help="Signal cache root (default: cache/signals)")
+    ap.add_argument("--signature", default="",
+                    help="Read every factor from this cache signature sub-directory (default: per factor, the "
+                    "sub-directory with the most dates for its weights)")
+    ap.add_argument("--signals-csv", default="", help="Wide signals csv (symbol, date, <factor columns>) instead of the cache")
+    ap.add_argument("--factors", default="", help="Comma list of factor columns for --signals-csv")
+    ap.add_argument("--start-date", default="")
+    ap.add_argument("--end-date", default="")
+    ap.add_argument("--min-names", type=int, default=20)
+    ap.add_argument("--threshold", type=float, default=0.7, help="|corr| for redundancy and cluster cut")
+    ap.add_argument("--state", default="", help="Existing factor_corr_state.npz to extend")
+    ap.add_argument("--out-dir", default="segment_results/factor_correlation")
+    args = ap.parse_args(argv)
+
+    if args.signals_csv:
+        signals = pd.read_csv(args.signals_csv)
+        names = [f.strip() for f in args.factors.split(",") if f.strip()] or [
+            c for c in signals.columns if c not in ("symbol", "date", "signal")
+        ]
+        stream = frame_cross_sections(signals, names)
+        source = str(Path(args.signals_csv).resolve())
+        missing = []
+    else:
+        factors = _catalog_weights(Path(args.catalog))
+        names = list(factors)
+        cache_root = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else PROJECT_ROOT / "cache" / "signals"
+        if args.signature:
+            sig_dir = cache_root / args.signature
+            if not sig_dir.is_dir():
+                raise SystemExit(f"No signal cache signature {args.signature} under {cache_root}")
+            hashes = {p.stem.partition("_")[2] for p in sig_dir.glob("*.pkl")}
+            dirs = {name: sig_dir for name, w in factors.items() if weights_hash(w) in hashes}
+        else:
+            dirs = _signature_dirs(cache_root, factors) if cache_root.is_dir() else {}
+        missing = [name for name in names if name not in dirs]
+        if len(dirs) < 2:
+            raise SystemExit(f"Signal cache under {cache_root} covers {len(dirs)} of {len(names)} catalog factors")
+        if missing:
+            print(f"[corr] WARNING: no cached signals for {len(missing)} of {len(names)} factors: "
+                  f"{', '.join(missing[:20])}{' ...' if len(missing) > 20 else ''}", file=sys.stderr, flush=True)
+        stream = cache_cross_sections(dirs, factors)
+        source = {name: str(d) for name, d in dirs.items()}
+
+    acc = FactorCorrelationAccumulator.load(Path(args.state)) if args.state else FactorCorrelationAccumulator(names, min_names=args.min_names)
+    n_seen = 0
+    for day, xs in stream:
+        d = str(day)[:10]
+        if (args.start_date and d < args.start_date) or (args.end_date and d > args.end_date):
+            continue
+        acc.update(xs)
+        n_seen += 1
+        if n_seen % 50 == 0:
+            print(f"[corr] dates={n_seen} last={d}", flush=True)
+
+    ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    out_dir = (PROJECT_ROOT / args.out_dir / f"factor_corr_{ts}").resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    acc.mean().to_csv(out_dir / "factor_corr_mean.csv")
+    acc.std().to_csv(out_dir / "factor_corr_std.csv")
+    acc.pair_counts().to_csv(out_dir / "factor_corr_pairs.csv")
+    clusters = acc.clusters(args.threshold)
+    clusters.to_csv(out_dir / "factor_clusters.csv", index=False)
+    redundancy = acc.redundancy(args.threshold)
+    redundancy.to_csv(out_dir / "factor_redundancy.csv", index=False)
+    acc.save(out_dir / "factor_corr_state.npz")
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "inputs": vars(args),
+        "source": source,
+        "missing_factors": missing,
+        "n_factors": len(acc.factors),
+        "n_dates": int(acc.n_dates),
+        "n_dates_this_run": n_seen,
+        "n_clusters": int(clusters["cluster"].nunique()) if len(clusters) else 0,
+        "n_with_redundant": int((redundancy["n_redundant"] > 0).sum()) if len(redundancy) else 0,
+        "out_dir": str(out_dir),
+    }
+    (out_dir / "factor_corr_report.json").write_text(json.dumps(report, indent=2, ensure_ascii=True))
+    print(f"[done] dates={acc.n_dates} factors={len(acc.factors)} clusters={report['n_clusters']} out={out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 """
 Generate a concise daily brief:
 - auto checks status (pass/fail)
+- incremental IC analytics refresh (rolling / regime IC per factor)
 - minimal manual decision section (if needed)
 """
 
@@ -11,9 +12,12 @@ import argparse
 import glob
 import json
 import subprocess
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
 
 def _latest_glob(pattern: str) -> Path | None:
     xs = sorted(glob.glob(pattern))
@@ -194,6 +198,85 @@ def _remote_official_run_status(host: str, remote_root: str, timeout_sec: int) -
     return (status, run_dir, tag)
 
 
+def _latest_ic_run_dir(root: Path, results_dir: str) -> Path | None:
+    """Most recently written segment run directory holding <factor>/ic_by_date.csv."""
+    files = glob.glob(str(root / results_dir / "*" / "*" / "ic_by_date.csv"))
+    if not files:
+        return None
+    return Path(max(files, key=lambda f: Path(f).stat().st_mtime)).parent.parent
+
+
+def _refresh_ic_analytics(root: Path, results_dir: str, state_path: Path, market_prices: Path,
+                          top_n: int = 10) -> tuple[list[str], str]:
+    """
+    Extend the saved per-factor ICAnalytics state with dates newer than its
+    last date (history is not re-merged) and return brief lines.
+    """
+    run_dir = _latest_ic_run_dir(root, results_dir)
+    if run_dir is None:
+        return (["- no ic_by_date.csv found"], "")
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    import pandas as pd
+
+    from backtest.ic_analytics import ICAnalytics, close_series, market_regimes
+
+    state = _load_json(state_path)
+    reset_note = []
+    if state.get("run_dir") != str(run_dir):
+        if state.get("factors"):
+            # A new segment run restarts every factor's history; say so instead of silently dropping it
+            note = (f"IC analytics state reset: run dir changed from {state.get('run_dir')} to {run_dir} "
+                    f"({len(state['factors'])} factors rebuilt from the new run)")
+            print(f"[brief] WARNING: {note}", file=sys.stderr, flush=True)
+            reset_note = [f"- WARNING: {note}"]
+        state = {"run_dir": str(run_dir), "factors": {}}
+    regimes = None
+    if market_prices.exists():
+        try:
+            regimes = market_regimes(close_series(pd.read_pickle(market_prices)))
+        except Exception:
+            regimes = None
+
+    rows = []
+    for path in sorted(run_dir.glob("*/ic_by_date.csv")):
+        factor = path.parent.name
+        analytics = ICAnalytics.from_dict(state["factors"][factor]) if factor in state["factors"] else ICAnalytics()
+        try:
+            added = analytics.extend(pd.read_csv(path), regimes)
+        except Exception:
+            continue
+        state["factors"][factor] = analytics.to_dict()
+        latest = analytics.latest()
+        by_regime = analytics.buckets_frame("regime").set_index("bucket")
+        regime = f"{latest.get('trend')}/{latest.get('vol')}"
+        latest["regime"] = regime
+        latest["regime_ic_mean"] = by_regime["ic_mean"].get(regime) if regime in by_regime.index else None
+        latest["added"] = added
+        rows.append((factor, latest))
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps(state, ensure_ascii=True))
+
+    def _key(item):
+        v = item[1].get("rolling_ic_60")
+        return -abs(v) if isinstance(v, (int, float)) else 0.0
+
+    lines = reset_note + [f"- ic_run_dir: `{run_dir}`", f"- factors: `{len(rows)}`"]
+    for factor, latest in sorted(rows, key=_key)[:top_n]:
+        rolls = ", ".join(
+            f"{k.replace('rolling_ic_', 'ic')}={v:.4f}" if isinstance(v, float) else f"{k.replace('rolling_ic_', 'ic')}=N/A"
+            for k, v in latest.items() if k.startswith("rolling_ic_")
+        )
+        reg_ic = latest["regime_ic_mean"]
+        reg_txt = f"{reg_ic:.4f}" if isinstance(reg_ic, float) and reg_ic == reg_ic else "N/A"
+        lines.append(
+            f"- {factor}: last_date={latest['last_date']} new_dates={latest['added']} {rolls} "
+            f"regime={latest['regime']} regime_ic={reg_txt}"
+        )
+    return (lines, str(state_path))
+
+
 def main() -> None:
     ap = argparse.ArgumentParser(description="Generate short daily dev/research brief.")
     ap.add_argument("--root", default=".", help="Project root")
@@ -202,6 +285,10 @@ def main() -> None:
     ap.add_argument("--remote-host", default="")
     ap.add_argument("--remote-root", default="")
     ap.add_argument("--remote-timeout-sec", type=int, default=5)
+    ap.add_argument("--ic-results-dir", default="segment_results", help="Segment runs with <factor>/ic_by_date.csv")
+    ap.add_argument("--ic-state", default="audit/daily/ic_analytics_state.json")
+    ap.add_argument("--market-prices", default="data/prices_divadj/SPY.pkl", help="Price pickle for regime labels")
+    ap.add_argument("--skip-ic-analytics", action="store_true")
     args = ap.parse_args()
 
     root = Path(args.root).expanduser().resolve()
@@ -249,6 +336,15 @@ def main() -> None:
     cleanup_ok, cleanup_planned_count, cleanup_json = _latest_cleanup_status(root)
     script_surface_ok, script_surface_unreferenced, script_surface_json = _latest_script_surface_status(root)
 
+    ic_lines, ic_state_json = [], ""
+    if not args.skip_ic_analytics:
+        ic_lines, ic_state_json = _refresh_ic_analytics(
+            root,
+            args.ic_results_dir,
+            (root / args.ic_state).resolve() if not Path(args.ic_state).is_absolute() else Path(args.ic_state),
+            (root / args.market_prices).resolve() if not Path(args.market_prices).is_absolute() else Path(args.market_prices),
+        )
+
     now = datetime.now(timezone.utc).isoformat()
     lines = [
         "# Daily Research Brief",
@@ -283,6 +379,12 @@ def main() -> None:
         ),
         f"- script_surface_report_json: `{script_surface_json}`" if script_surface_json else "- script_surface_report_json: N/A",
         "",
+    ]
+    if ic_lines:
+        lines += ["## IC Analytics", "", *ic_lines]
+        lines.append(f"- ic_state_json: `{ic_state_json}`" if ic_state_json else "- ic_state_json: N/A")
+        lines.append("")
+    lines += [
         "## Manual Decisions Needed",
         "",
     ]
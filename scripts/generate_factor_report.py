@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import argparse
 import json
 from datetime import datetime
@@ -7,60 +9,40 @@ from typing import Dict, Any, List
 import pandas as pd
 
 from backtest.backtest_engine import BacktestEngine
+from backtest.ic_analytics import ICAnalytics, close_series, market_regimes
+from backtest.ic_engine import ICEngine
 from backtest.performance_analyzer import PerformanceAnalyzer
+from backtest.quantile_engine import QuantileEngine
 from scripts import run_with_config as cfg_loader
 
 
-def _quantile_summary(signals: pd.DataFrame, fwd: pd.DataFrame, n_quantiles: int = 5) -> pd.DataFrame:
-    merged = pd.merge(
-        signals[["symbol", "date", "signal"]],
-        fwd[["symbol", "signal_date", "return"]],
-        left_on=["symbol", "date"],
-        right_on=["symbol", "signal_date"],
-        how="inner",
-    )
-    if merged.empty:
-        return pd.DataFrame()
+def _quantile_summary(signals: pd.DataFrame, fwd: pd.DataFrame, n_quantiles: int = 5,
+                      engine: QuantileEngine | None = None) -> pd.DataFrame:
+    engine = engine if engine is not None else QuantileEngine.from_signals(signals, fwd)
+    return engine.summary(n_quantiles)
 
-    merged["date"] = pd.to_datetime(merged["date"])
-    rows = []
-    for d, g in merged.groupby("date"):
-        if len(g) < n_quantiles:
-            continue
-        g = g.copy()
-        g["rank"] = g["signal"].rank(method="first")
-        try:
-            g["q"] = pd.qcut(g["rank"], n_quantiles, labels=False) + 1
-        except ValueError:
-            continue
-        qret = g.groupby("q")["return"].mean()
-        for q, r in qret.items():
-            rows.append({"date": d, "quantile": int(q), "mean_return": float(r)})
-
-    if not rows:
-        return pd.DataFrame()
 
-    df = pd.DataFrame(rows)
-    summary = df.groupby("quantile")["mean_return"].mean().reset_index()
-    return summary.sort_values("quantile").reset_index(drop=True)
+def _ic_analytics(table: pd.DataFrame, windows: List[int], regimes: pd.DataFrame | None = None) -> ICAnalytics:
+    analytics = ICAnalytics(windows)
+    if table is not None and len(table) > 0:
+        analytics.extend(ICEngine.from_table(table).per_date(), regimes)
+    return analytics
 
 
-def _rolling_ic(signals: pd.DataFrame, fwd: pd.DataFrame, window: int = 60) -> pd.Series:
-    merged = pd.merge(
-        signals[["symbol", "date", "signal"]],
-        fwd[["symbol", "signal_date", "return"]],
-        left_on=["symbol", "date"],
-        right_on=["symbol", "signal_date"],
-        how="inner",
-    )
-    if merged.empty:
-        return pd.Series(dtype=float)
-    merged["date"] = pd.to_datetime(merged["date"])
-    ic_by_date = merged.groupby("date").apply(lambda g: g["signal"].corr(g["return"]))
-    ic_by_date = ic_by_date.dropna().sort_index()
-    if ic_by_date.empty:
-        return ic_by_date
-    return ic_by_date.rolling(window=window, min_periods=max(3, window // 5)).mean()
+def _rolling_ic(table: pd.DataFrame, window: int = 60) -> pd.Series:
+    rolling = _ic_analytics(table, [window]).rolling(window)
+    rolling.index.name = "date"
+    return rolling
+
+
+def _market_regimes(engine: BacktestEngine, symbol: str = "SPY") -> pd.DataFrame | None:
+    try:
+        prices = engine.data_engine.get_price(symbol)
+    except Exception:
+        prices = None
+    if prices is None or len(prices) == 0:
+        return None
+    return market_regimes(close_series(prices))
 
 
 def _turnover_from_positions(positions: pd.DataFrame) -> Dict[str, Any]:
@@ -87,39 +69,14 @@ def _turnover_from_positions(positions: pd.DataFrame) -> Dict[str, Any]:
     return {"avg_turnover": float(pd.Series(turnovers).mean()), "n_dates": len(dates)}
 
 
-def _quantile_cumulative(signals: pd.DataFrame, fwd: pd.DataFrame, n_quantiles: int = 5) -> pd.DataFrame:
-    merged = pd.merge(
-        signals[["symbol", "date", "signal"]],
-        fwd[["symbol", "signal_date", "return"]],
-        left_on=["symbol", "date"],
-        right_on=["symbol", "signal_date"],
-        how="inner",
-    )
-    if merged.empty:
-        return pd.DataFrame()
+def _quantile_cumulative(signals: pd.DataFrame, fwd: pd.DataFrame, n_quantiles: int = 5,
+                         engine: QuantileEngine | None = None) -> pd.DataFrame:
+    engine = engine if engine is not None else QuantileEngine.from_signals(signals, fwd)
+    return engine.cumulative(n_quantiles)
 
-    merged["date"] = pd.to_datetime(merged["date"])
-    rows = []
-    for d, g in merged.groupby("date"):
-        if len(g) < n_quantiles:
-            continue
-        g = g.copy()
-        g["rank"] = g["signal"].rank(method="first")
-        try:
-            g["q"] = pd.qcut(g["rank"], n_quantiles, labels=False) + 1
-        except ValueError:
-            continue
-        qret = g.groupby("q")["return"].mean()
-        for q, r in qret.items():
-            rows.append({"date": d, "quantile": int(q), "mean_return": float(r)})
-
-    if not rows:
-        return pd.DataFrame()
 
-    df = pd.DataFrame(rows)
-    df = df.sort_values(["quantile", "date"]).reset_index(drop=True)
-    df["cum_return"] = df.groupby("quantile")["mean_return"].apply(lambda s: (1 + s).cumprod() - 1.0)
-    return df
+def _parse_pcts(text: str) -> List[float]:
+    return [float(x.strip()) for x in text.split(",") if x.strip()]
 
 
 def _factor_corr(signals: pd.DataFrame) -> pd.DataFrame:
@@ -171,10 +128,27 @@ def _write_md(report: Dict[str, Any], out_path: Path) -> None:
     lines.append("## Quantile Mean Returns (Test)")
     qdf = report.get("quantiles_test")
     if isinstance(qdf, list) and qdf:
-        lines.append("| Quantile | Mean Return |")
-        lines.append("|---|---|")
+        lines.append("| Quantile | Mean Return | Hit Rate |")
+        lines.append("|---|---|---|")
         for row in qdf:
-            lines.append(f"| {row['quantile']} | {row['mean_return']:.6f} |")
+            lines.append(f"| {row['quantile']} | {row['mean_return']:.6f} | {row['hit_rate']:.3f} |")
+    else:
+        lines.append("- (no data)")
+    spread = report.get("quantile_spread_test") or {}
+    if spread.get("n_dates"):
+        lines.append(f"- top-bottom spread: mean={spread.get('mean'):.6f} hit_rate={spread.get('hit_rate'):.3f} (n_dates={spread.get('n_dates')})")
+    lines.append("")
+
+    lines.append("## long_pct Sweep (Test)")
+    sweep = report.get("long_pct_sweep_test")
+    if isinstance(sweep, list) and sweep:
+        lines.append("| long_pct | Long Mean | Short Mean | Spread | Spread t | Spread Hit |")
+        lines.append("|---|---|---|---|---|---|")
+        for row in sweep:
+            lines.append(
+                f"| {row['long_pct']} | {row['long_mean']:.6f} | {row['short_mean']:.6f} | "
+                f"{row['spread_mean']:.6f} | {row['spread_tstat']:.2f} | {row['spread_hit_rate']:.3f} |"
+            )
     else:
         lines.append("- (no data)")
     lines.append("")
@@ -185,6 +159,23 @@ def _write_md(report: Dict[str, Any], out_path: Path) -> None:
         last = roll.get("last_value")
         lines.append(f"- rolling_window: {roll.get('window')}")
         lines.append(f"- last_value: {last}")
+        latest = roll.get("latest") or {}
+        for key, val in latest.items():
+            if key.startswith("rolling_ic_"):
+                lines.append(f"- {key}: {val}")
+    else:
+        lines.append("- (no data)")
+    lines.append("")
+
+    lines.append("## IC by Market Regime (Test)")
+    regimes = report.get("ic_by_regime_test")
+    if isinstance(regimes, list) and regimes:
+        lines.append("| Regime | Dates | IC Mean | Rank IC Mean | t |")
+        lines.append("|---|---|---|---|---|")
+        for row in regimes:
+            lines.append(
+                f"| {row['bucket']} | {row['n_dates']} | {row['ic_mean']} | {row['rank_ic_mean']} | {row['t_stat']} |"
+            )
     else:
         lines.append("- (no data)")
     lines.append("")
@@ -197,7 +188,7 @@ def _write_md(report: Dict[str, Any], out_path: Path) -> None:
         lines.append("| " + " | ".join(cols) + " |")
         lines.append("|" + "|".join(["---"] * len(cols)) + "|")
         for row in corr:
-            lines.append("| " + " | ".join([f\"{row[c]:.4f}\" if isinstance(row[c], (int, float)) else str(row[c]) for c in cols]) + " |")
+            lines.append("| " + " | ".join([f"{row[c]:.4f}" if isinstance(row[c], (int, float)) else str(row[c]) for c in cols]) + " |")
     else:
         lines.append("- (no data)")
     lines.append("")
@@ -222,7 +213,13 @@ def main() -> None:
     parser.add_argument("--strategy", required=True)
     parser.add_argument("--quantiles", type=int, default=5)
     parser.add_argument("--rolling-window", type=int, default=60)
+    parser.add_argument("--rolling-windows", type=str, default="20,60,120",
+                        help="comma-separated extra rolling IC windows (test period)")
+    parser.add_argument("--regime-symbol", type=str, default="SPY",
+                        help="market symbol for trend/vol regime IC buckets")
     parser.add_argument("--cost-multipliers", type=str, default="")
+    parser.add_argument("--long-pct-sweep", type=str, default="0.05,0.1,0.2,0.3",
+                        help="comma-separated long_pct values evaluated from the same signals")
     args = parser.parse_args()
 
     protocol_path = Path(args.protocol).resolve()
@@ -254,12 +251,20 @@ def main() -> None:
     )
 
     pa = PerformanceAnalyzer()
-    train_ic = pa.calculate_ic(results["train"]["signals"], results["train"]["forward_returns"])
-    test_ic = pa.calculate_ic(results["test"]["signals"], results["test"]["forward_returns"])
-
-    q_test = _quantile_summary(results["test"]["signals"], results["test"]["forward_returns"], args.quantiles)
-    q_cum = _quantile_cumulative(results["test"]["signals"], results["test"]["forward_returns"], args.quantiles)
-    rolling = _rolling_ic(results["test"]["signals"], results["test"]["forward_returns"], args.rolling_window)
+    test_table = results["test"]["analysis_table"]
+    train_ic = pa.calculate_ic_table(results["train"]["analysis_table"])
+    test_ic = pa.calculate_ic_table(test_table)
+
+    q_engine = QuantileEngine.from_table(test_table)
+    q_test = _quantile_summary(None, None, args.quantiles, engine=q_engine)
+    q_cum = _quantile_cumulative(None, None, args.quantiles, engine=q_engine)
+    q_turnover = q_engine.turnover(args.quantiles)
+    q_spread = q_engine.spread(args.quantiles)
+    pct_sweep = q_engine.sweep(_parse_pcts(args.long_pct_sweep), short_pct=short_pct or None)
+    windows = sorted({args.rolling_window, *(int(w) for w in args.rolling_windows.split(",") if w.strip())})
+    analytics = _ic_analytics(test_table, windows, _market_regimes(engine, args.regime_symbol))
+    rolling = analytics.rolling(args.rolling_window)
+    rolling.index.name = "date"
     corr = _factor_corr(results["test"]["signals"])
     turnover = _turnover_from_positions(results["test"]["positions"])
 
@@ -281,7 +286,7 @@ def main() -> None:
                 long_pct=long_pct,
                 short_pct=short_pct,
             )
-            ic = pa.calculate_ic(res["test"]["signals"], res["test"]["forward_returns"])
+            ic = pa.calculate_ic_table(res["test"]["analysis_table"])
             cost_sens.append({
                 "multiplier": float(m),
                 "test_ic": ic.get("ic"),
@@ -311,10 +316,20 @@ def main() -> None:
         },
         "quantiles_test": q_test.to_dict(orient="records") if isinstance(q_test, pd.DataFrame) and len(q_test) > 0 else [],
         "quantiles_cum_test": q_cum.to_dict(orient="records") if isinstance(q_cum, pd.DataFrame) and len(q_cum) > 0 else [],
+        "quantile_turnover_test": q_turnover.to_dict(orient="records") if len(q_turnover) > 0 else [],
+        "quantile_spread_test": {
+            "mean": float(q_spread["spread"].mean()) if len(q_spread) > 0 else None,
+            "hit_rate": float((q_spread["spread"] > 0).mean()) if len(q_spread) > 0 else None,
+            "n_dates": int(len(q_spread)),
+        },
+        "long_pct_sweep_test": pct_sweep.to_dict(orient="records") if len(pct_sweep) > 0 else [],
         "rolling_ic_test": {
             "window": args.rolling_window,
             "last_value": float(rolling.dropna().iloc[-1]) if not rolling.dropna().empty else None,
+            "latest": analytics.latest(),
         },
+        "ic_by_year_test": analytics.buckets_frame("year").to_dict(orient="records"),
+        "ic_by_regime_test": analytics.buckets_frame("regime").to_dict(orient="records"),
         "turnover_test": turnover,
         "factor_corr_test": corr.reset_index().to_dict(orient="records") if isinstance(corr, pd.DataFrame) and len(corr) > 0 else [],
         "cost_sensitivity": cost_sens,
@@ -328,12 +343,16 @@ def main() -> None:
     # Save auxiliary CSVs
     if isinstance(q_cum, pd.DataFrame) and len(q_cum) > 0:
         q_cum.to_csv(reports_dir / f"quantile_cum_{ts}.csv", index=False)
+    if len(pct_sweep) > 0:
+        pct_sweep.to_csv(reports_dir / f"long_pct_sweep_{ts}.csv", index=False)
     if isinstance(corr, pd.DataFrame) and len(corr) > 0:
         corr.to_csv(reports_dir / f"factor_corr_{ts}.csv")
     if isinstance(rolling, pd.Series) and len(rolling) > 0:
         rolling.reset_index().rename(columns={0: "rolling_ic"}).to_csv(
             reports_dir / f"rolling_ic_{ts}.csv", index=False
         )
+    if len(analytics) > 0:
+        analytics.frame().to_csv(reports_dir / f"ic_analytics_{ts}.csv", index=False, date_format="%Y-%m-%d")
     with open(json_path, "w") as f:
         json.dump(report, f, indent=2)
 
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -11,6 +12,9 @@ import pandas as pd
 
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backtest.quantile_engine import QuantileEngine
 
 
 @dataclass
@@ -135,23 +139,25 @@ def _load_realized_file(cfg: EvalConfig) -> pd.DataFrame:
 
 
 def _deciles_from_rank(matched: pd.DataFrame) -> pd.DataFrame:
+    cols = ["decile", "count", "mean", "std"]
     if matched.empty:
-        return pd.DataFrame(columns=["decile", "count", "mean", "std"])
-    matched = matched.sort_values("score", ascending=False).reset_index(drop=True)
-    n = len(matched)
-    boundaries = np.linspace(0, n, 11, dtype=int)
-    out = []
-    for i in range(10):
-        s = matched.iloc[boundaries[i] : boundaries[i + 1]]
-        out.append(
-            {
-                "decile": f"D{i+1}",
-                "count": int(len(s)),
-                "mean": float(s["ret_1d"].mean()) if len(s) else np.nan,
-                "std": float(s["ret_1d"].std(ddof=1)) if len(s) > 1 else np.nan,
-            }
-        )
-    return pd.DataFrame(out)
+        return pd.DataFrame(columns=cols)
+    frame = pd.DataFrame({
+        "date": matched["signal_date"] if "signal_date" in matched.columns else 0,
+        "symbol": matched["symbol"],
+        "signal": matched["score"],
+        "return": matched["ret_1d"],
+    })
+    # D1 = highest scores; equal-count slices as np.linspace(0, n, 11)
+    br = QuantileEngine(frame).bucket_returns(10, method="split", descending=True)
+    br = br.groupby("quantile").agg(count=("count", "sum"), mean=("mean_return", "mean"), std=("std", "mean"))
+    br = br.reindex(range(1, 11))
+    return pd.DataFrame({
+        "decile": [f"D{i}" for i in range(1, 11)],
+        "count": br["count"].fillna(0).astype(int).to_numpy(),
+        "mean": br["mean"].to_numpy(dtype=float),
+        "std": br["std"].to_numpy(dtype=float),
+    }, columns=cols)
 
 
 def _metrics(signals: pd.DataFrame, matched: pd.DataFrame, cfg: EvalConfig) -> pd.DataFrame:
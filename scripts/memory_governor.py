@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Memory-aware admission for parallel research jobs.
+
+Runners that fan out work (factor-factory batch / queue, segmented --jobs,
+production-gate WF shards, the auto-research DAG) used to size their pools
+by worker count alone; eight data-loading workers can exceed RAM and swap
+the workstation. A MemoryGovernor admits a job only while the sum of the
+projected footprints of the running jobs fits its budget (a job larger
+than the whole budget runs alone), so --jobs becomes an upper bound and
+memory the binding limit.
+
+Footprint of a job (footprint()):
+  - learned: the largest of the last HISTORY_WINDOW peak RSS samples
+    recorded for the job key in <state dir>/peaks.jsonl, scaled
+    up when the input data has grown since, plus HEADROOM
+  - estimated (no history yet): BASE_GB plus the on-disk bytes of the input
+    paths (result_store.data_paths of the engine config) times LOAD_FACTOR,
+    grown by FACTOR_GROWTH per extra active factor
+Peaks come from run_measured() (subprocess tree RSS, sampled) or
+reset_peak_rss() / peak_rss_gb() around an in-process task. Long-lived pool
+workers are bounded by private_bytes() instead: RSS also counts the shared
+memory-mapped stores every worker maps, so split_budget() gives each of the
+jobs an equal share of the budget in private (anonymous) memory.
+
+Budget: --mem-budget-gb, else V4_MEM_BUDGET_GB, else DEFAULT_BUDGET_FRACTION
+of physical memory (0 = unlimited where /proc/meminfo is unreadable).
+
+The state dir is V4_MEM_STATE_DIR, else ~/.cache/v4_research/memory_governor
+(under XDG_CACHE_HOME when set). Each live governor publishes its budget,
+usage, running and queued jobs to <state dir>/active/<name>-<pid>.json;
+`python scripts/memory_governor.py` prints them with the learned peaks.
+Admission counts the used_gb of the other live governors on this host
+(e.g. a segmented --jobs run next to a factor-factory batch) on top of
+its own jobs, re-reading them every PEER_POLL_SECONDS while a job waits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+
+ROOT = Path(__file__).resolve().parents[1]
+STATE_DIR_ENV = "V4_MEM_STATE_DIR"
+# Per user, outside the checkout: every checkout on a host shares one budget and one peak history
+DEFAULT_STATE_DIR = Path(
+    os.environ.get(STATE_DIR_ENV)
+    or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "v4_research" / "memory_governor"
+)
+BUDGET_ENV = "V4_MEM_BUDGET_GB"
+DEFAULT_BUDGET_FRACTION = 0.75
+# Footprint model used until a job key has recorded peaks
+BASE_GB = 0.5
+LOAD_FACTOR = 1.5
+FACTOR_GROWTH = 0.15
+HEADROOM = 0.10
+HISTORY_WINDOW = 20
+PEER_POLL_SECONDS = 1.0
+GB = float(1 << 30)
+
+
+def total_memory_gb() -> float:
+    """Physical memory from /proc/meminfo (0 when unavailable)."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemTotal:"):
+                    return int(line.split()[1]) * 1024 / GB
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0.0
+
+
+def resolve_budget_gb(flag: float | None = 0.0) -> float:
+    """Explicit flag > V4_MEM_BUDGET_GB > DEFAULT_BUDGET_FRACTION of RAM (<= 0: unlimited)."""
+    if flag is not None and float(flag) > 0:
+        return float(flag)
+    env = os.environ.get(BUDGET_ENV, "").strip()
+    if env:
+        try:
+            return max(0.0, float(env))
+        except ValueError:
+            pass
+    return round(total_memory_gb() * DEFAULT_BUDGET_FRACTION, 2)
+
+
+def input_bytes(paths: Iterable[str]) -> int:
+    """On-disk bytes of the input files / directories (directories are walked)."""
+    total = 0
+    for p in sorted(set(str(x) for x in paths)):
+        if os.path.isdir(p):
+            for dirpath, _, files in os.walk(p):
+                for name in files:
+                    try:
+                        total += os.stat(os.path.join(dirpath, name)).st_size
+                    except OSError:
+                        continue
+        elif os.path.exists(p):
+            total += os.stat(p).st_size
+    return total
+
+
+def estimate_gb(data_bytes: int, n_factors: int = 1) -> float:
+    """Footprint model for a job without recorded peaks."""
+    growth = 1.0 + FACTOR_GROWTH * max(0, int(n_factors) - 1)
+    return BASE_GB + data_bytes / GB * LOAD_FACTOR * growth
+
+
+# -- peak RSS -----------------------------------------------------------------
+
+
+def _proc_table() -> tuple[dict[int, list[int]], dict[int, int]]:
+    """(ppid -> child pids, pid -> rss pages) from /proc/<pid>/stat."""
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return children, rss
+    for name in entries:
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        pid = int(name)
+        children.setdefault(int(fields[1]), []).append(pid)
+        rss[pid] = int(fields[21])
+    return children, rss
+
+
+def tree_rss_bytes(pid: int) -> int:
+    """Resident set size of pid plus all its descendants (0 where /proc is unavailable)."""
+    children, rss = _proc_table()
+    total, stack, seen = 0, [int(pid)], set()
+    while stack:
+        p = stack.pop()
+        if p in seen:
+            continue
+        seen.add(p)
+        total += rss.get(p, 0)
+        stack.extend(children.get(p, []))
+    return total * os.sysconf("SC_PAGE_SIZE")
+
+
+def _signal_tree(proc: subprocess.Popen, sig: int, group: bool) -> None:
+    try:
+        if group:
+            os.killpg(proc.pid, sig)
+        else:
+            proc.send_signal(sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_measured(
+    cmd: list[str],
+    *,
+    interval: float = 0.5,
+    stop: threading.Event | None = None,
+    grace: float = 5.0,
+    **popen_kwargs: Any,
+) -> tuple[int, float]:
+    """
+    subprocess.run(cmd, **popen_kwargs) -> (return code, peak RSS in GB). The
+    peak is the larger of the sampled RSS of the whole process tree and the
+    kernel's ru_maxrss of the reaped child.
+
+    With a stop event the child runs in its own session; once stop is set its
+    process group gets SIGTERM, then SIGKILL after `grace` seconds (the return
+    code is then the negative signal number).
+    """
+    if stop is not None:
+        popen_kwargs.setdefault("start_new_session", True)
+    group = bool(popen_kwargs.get("start_new_session"))
+    proc = subprocess.Popen(cmd, **popen_kwargs)
+    peak = [0]
+    done = threading.Event()
+
+    def _sample() -> None:
+        stopped_at = None
+        while not done.is_set():
+            peak[0] = max(peak[0], tree_rss_bytes(proc.pid))
+            if stop is not None and stop.is_set():
+                if stopped_at is None:
+                    stopped_at = time.monotonic()
+                    _signal_tree(proc, signal.SIGTERM, group)
+                elif time.monotonic() - stopped_at >= grace:
+                    _signal_tree(proc, signal.SIGKILL, group)
+            done.wait(min(interval, 0.1) if stop is not None else interval)
+
+    sampler = threading.Thread(target=_sample, daemon=True)
+    sampler.start()
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    except ChildProcessError:
+        proc.wait()
+        usage = None
+    except BaseException:
+        # Interrupted (e.g. Ctrl-C): a child in its own session would not see the signal
+        if group:
+            _signal_tree(proc, signal.SIGKILL, group)
+        raise
+    finally:
+        done.set()
+        sampler.join()
+    if stop is not None and stop.is_set() and group:
+        # Grandchildren that outlived the leader
+        _signal_tree(proc, signal.SIGKILL, group)
+    if usage is not None:
+        peak[0] = max(peak[0], int(usage.ru_maxrss) * 1024)
+    return int(proc.returncode), peak[0] / GB
+
+
+def reset_peak_rss() -> None:
+    """Restart this process's high-water mark (VmHWM) so peak_rss_gb() covers what follows."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_gb() -> float:
+    """This process's peak RSS since start or the last reset_peak_rss()."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024 / GB
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 / GB
+    except Exception:
+        return 0.0
+
+
+# -- history ------------------------------------------------------------------
+
+
+def private_bytes(pid: int | str = "self") -> int:
+    """
+    Anonymous memory this process owns: Pss_Anon of smaps_rollup (heap and
+    copy-on-write pages, pages still shared with a forked parent counted
+    proportionally), without the pages of memory-mapped files or shm, which
+    every worker shares. Private_Dirty on kernels without Pss_Anon; 0 where
+    /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        value = fields.get("Pss_Anon", fields.get("Private_Dirty"))
+        if value is not None:
+            return int(value.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        # Older kernels: resident minus file-backed / shared pages
+        with open(f"/proc/{pid}/statm") as f:
+            fields = f.read().split()
+        return max(0, int(fields[1]) - int(fields[2])) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def split_budget(jobs: int, worker_gb: float, budget_gb: float) -> tuple[int, float]:
+    """
+    (jobs, per-worker private GB) with jobs * worker_gb <= budget_gb: a 0
+    worker_gb becomes budget / jobs, an explicit one lowers jobs to what fits
+    (at least 1). An unlimited budget (<= 0) leaves both as given.
+    """
+    jobs = max(1, int(jobs))
+    if budget_gb <= 0:
+        return jobs, max(0.0, float(worker_gb))
+    if worker_gb <= 0:
+        return jobs, budget_gb / jobs
+    return max(1, min(jobs, int(budget_gb // worker_gb))), float(worker_gb)
+
+
+class PeakHistory:
+    """Append-only JSONL of (key, peak_gb, data_bytes) samples from finished jobs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._rows: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            for line in self.path.read_text(errors="ignore").splitlines():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(row, dict) and row.get("key"):
+                    self._rows.setdefault(str(row["key"]), []).append(row)
+
+    def record(self, key: str, peak_gb: float, data_bytes: int = 0, **extra: Any) -> None:
+        if not peak_gb or peak_gb <= 0:
+            return
+        row = {
+            "key": key,
+            "peak_gb": round(float(peak_gb), 4),
+            "data_bytes": int(data_bytes),
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            **extra,
+        }
+        with self._lock:
+            self._rows.setdefault(key, []).append(row)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(row) + "\n")
+
+    def learned_gb(self, key: str, data_bytes: int = 0) -> float | None:
+        """Largest recent peak for key, scaled by data growth since it was recorded."""
+        rows = self._rows.get(key, [])[-HISTORY_WINDOW:]
+        if not rows:
+            return None
+        best = 0.0
+        for r in rows:
+            was = int(r.get("data_bytes") or 0)
+            scale = data_bytes / was if data_bytes and was and data_bytes > was else 1.0
+            best = max(best, float(r["peak_gb"]) * scale)
+        return best
+
+    def keys(self) -> dict[str, dict[str, Any]]:
+        return {
+            k: {"samples": len(v), "last_peak_gb": v[-1]["peak_gb"], "learned_gb": self.learned_gb(k)}
+            for k, v in sorted(self._rows.items())
+        }
+
+
+# -- governor -----------------------------------------------------------------
+
+
+@dataclass
+class Footprint:
+    key: str
+    gb: float
+    source: str  # "history" | "estimate"
+    data_bytes: int = 0
+
+
+class MemoryGovernor:
+    """
+    Admission control over a memory budget (budget_gb <= 0: unlimited).
+    Jobs are admitted first-fit in submission order; a job larger than the
+    whole budget is admitted only when nothing else runs.
+    """
+
+    def __init__(
+        self,
+        budget_gb: float = 0.0,
+        *,
+        name: str = "jobs",
+        state_dir: Path | str = DEFAULT_STATE_DIR,
+        publish: bool = True,
+        log: Callable[[str], None] | None = None,
+    ):
+        self.budget_gb = float(budget_gb or 0.0)
+        self.name = name
+        self.state_dir = Path(state_dir)
+        self.history = PeakHistory(self.state_dir / "peaks.jsonl")
+        self.status_path = self.state_dir / "active" / f"{name}-{os.getpid()}.json" if publish else None
+        self.log = log
+        self._cond = threading.Condition()
+        self._running: dict[str, dict[str, Any]] = {}
+        self._queued: dict[str, dict[str, Any]] = {}
+        self._size_cache: dict[tuple[str, ...], int] = {}
+        self._peers = (float("-inf"), 0.0)
+        self.peak_used_gb = 0.0
+        self.admitted = 0
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+
+    # footprints
+
+    def footprint(self, key: str, paths: Iterable[str] = (), n_factors: int = 1) -> Footprint:
+        paths_key = tuple(sorted(set(str(p) for p in paths)))
+        if paths_key not in self._size_cache:
+            self._size_cache[paths_key] = input_bytes(paths_key)
+        data_bytes = self._size_cache[paths_key]
+        learned = self.history.learned_gb(key, data_bytes)
+        if learned is not None:
+            return Footprint(key, round(learned * (1.0 + HEADROOM), 3), "history", data_bytes)
+        return Footprint(key, round(estimate_gb(data_bytes, n_factors), 3), "estimate", data_bytes)
+
+    def record(self, key: str, peak_gb: float, data_bytes: int = 0, **extra: Any) -> None:
+        self.history.record(key, peak_gb, data_bytes, runner=self.name, **extra)
+
+    # admission
+
+    @property
+    def used_gb(self) -> float:
+        return sum(j["gb"] for j in self._running.values())
+
+    def peers_used_gb(self) -> float:
+        """used_gb published by the other live governors on this host (re-read at most every 0.2s)."""
+        now = time.monotonic()
+        if now - self._peers[0] >= 0.2:
+            host = socket.gethostname()
+            gb = sum(
+                float(st.get("used_gb") or 0.0)
+                for st in active_status(self.state_dir, exclude=self.status_path)
+                if st.get("host", host) == host
+            )
+            self._peers = (now, gb)
+        return self._peers[1]
+
+    def fits(self, gb: float) -> bool:
+        with self._cond:
+            return self._fits(gb)
+
+    def _fits(self, gb: float) -> bool:
+        if self.budget_gb <= 0:
+            return True
+        used = self.used_gb + self.peers_used_gb()
+        # A job larger than the whole budget runs once nothing else does
+        return used <= 0 or used + float(gb) <= self.budget_gb
+
+    def enqueue(self, job_id: str, gb: float) -> None:
+        with self._cond:
+            self._queued[job_id] = {"job_id": job_id, "gb": float(gb), "since": time.time()}
+            self._publish()
+
+    def try_acquire(self, job_id: str, gb: float) -> bool:
+        with self._cond:
+            if not self._fits(gb):
+                self._queued.setdefault(job_id, {"job_id": job_id, "gb": float(gb), "since": time.time()})
+                self._publish()
+                return False
+            self._admit(job_id, gb)
+            return True
+
+    def acquire(self, job_id: str, gb: float) -> None:
+        """Block until job_id fits the budget."""
+        with self._cond:
+            self._queued.setdefault(job_id, {"job_id": job_id, "gb": float(gb), "since": time.time()})
+            self._publish()
+            while not self._fits(gb):
+                # Local releases notify; peers' releases are seen on the next poll
+                self._cond.wait(PEER_POLL_SECONDS)
+            self._admit(job_id, gb)
+
+    def _admit(self, job_id: str, gb: float) -> None:
+        queued = self._queued.pop(job_id, None)
+        now = time.time()
+        self._running[job_id] = {
+            "job_id": job_id,
+            "gb": float(gb),
+            "since": now,
+            "waited_seconds": round(now - queued["since"], 3) if queued else 0.0,
+        }
+        self.admitted += 1
+        self.peak_used_gb = max(self.peak_used_gb, self.used_gb)
+        if self.log:
+            self.log(f"[mem] admit {job_id} {gb:.2f}GB used={self.used_gb:.2f}/{self._budget_label()}")
+        self._publish()
+
+    def release(self, job_id: str) -> None:
+        with self._cond:
+            self._running.pop(job_id, None)
+            self._queued.pop(job_id, None)
+            self._publish()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, job_id: str, gb: float) -> Iterator[None]:
+        self.acquire(job_id, gb)
+        try:
+            yield
+        finally:
+            self.release(job_id)
+
+    def as_completed(
+        self, executor, fn: Callable[[Any], Any], items: list[tuple[str, float, Any]], max_in_flight: int
+    ) -> Iterator[tuple[Any, Any]]:
+        """
+        Submit fn(arg) for each (job_id, gb, arg) to executor as admission
+        allows (at most max_in_flight at once); yield (arg, future) as they finish.
+        """
+        pending = list(items)
+        for job_id, gb, _ in pending:
+            self.enqueue(job_id, gb)
+        running: dict[Any, tuple[str, Any]] = {}
+        while pending or running:
+            for item in list(pending):
+                if len(running) >= max(1, int(max_in_flight)):
+                    break
+                job_id, gb, arg = item
+                if self.try_acquire(job_id, gb):
+                    pending.remove(item)
+                    running[executor.submit(fn, arg)] = (job_id, arg)
+            if not running:
+                # Everything left waits on memory held by other governors
+                time.sleep(PEER_POLL_SECONDS)
+                continue
+            done, _ = wait(list(running), timeout=PEER_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for fut in done:
+                job_id, arg = running.pop(fut)
+                self.release(job_id)
+                yield arg, fut
+
+    # status
+
+    def _budget_label(self) -> str:
+        return f"{self.budget_gb:.2f}GB" if self.budget_gb > 0 else "unlimited"
+
+    def status(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "host": socket.gethostname(),
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "budget_gb": self.budget_gb,
+                "used_gb": round(self.used_gb, 3),
+                "peak_used_gb": round(self.peak_used_gb, 3),
+                "admitted": self.admitted,
+                "running": list(self._running.values()),
+                "queued": list(self._queued.values()),
+            }
+
+    def _publish(self) -> None:
+        if self.status_path is None:
+            return
+        payload = self.status()
+        try:
+            self.status_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.status_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, indent=2))
+            tmp.replace(self.status_path)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        if self.status_path is not None:
+            self.status_path.unlink(missing_ok=True)
+
+
+def active_status(state_dir: Path | str = DEFAULT_STATE_DIR, exclude: Path | None = None) -> list[dict[str, Any]]:
+    """
+    Status of every live governor (except the one publishing to `exclude`);
+    files of dead processes on this host are removed.
+    """
+    out = []
+    host = socket.gethostname()
+    for p in sorted((Path(state_dir) / "active").glob("*.json")):
+        if exclude is not None and p == exclude:
+            continue
+        try:
+            st = json.loads(p.read_text())
+            if st.get("host", host) == host:
+                os.kill(int(st["pid"]), 0)
+        except ProcessLookupError:
+            p.unlink(missing_ok=True)
+            continue
+        except (OSError, ValueError, KeyError):
+            continue
+        out.append(st)
+    return out
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Show live memory governors and learned job footprints.")
+    ap.add_argument("--state-dir", default=str(DEFAULT_STATE_DIR))
+    ap.add_argument("--json", action="store_true", help="Print one JSON document instead of text")
+    args = ap.parse_args(argv)
+
+    active = active_status(args.state_dir)
+    learned = PeakHistory(Path(args.state_dir) / "peaks.jsonl").keys()
+    if args.json:
+        print(json.dumps({"budget_gb": resolve_budget_gb(), "active": active, "learned": learned}, indent=2))
+        return
+    print(f"default budget: {resolve_budget_gb():.2f}GB (physical {total_memory_gb():.2f}GB)")
+    for st in active:
+        print(f"{st['name']} pid={st['pid']} used={st['used_gb']:.2f}/{st['budget_gb']:.2f}GB "
+              f"peak={st['peak_used_gb']:.2f}GB running={len(st['running'])} queued={len(st['queued'])}")
+        for j in st["running"]:
+            print(f"  run   {j['job_id']} {j['gb']:.2f}GB")
+        for j in st["queued"]:
+            print(f"  queue {j['job_id']} {j['gb']:.2f}GB")
+    if not active:
+        print("no active governors")
+    for key, row in learned.items():
+        print(f"learned {key}: {row['learned_gb']:.2f}GB over {row['samples']} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,35 @@
 """
 Post-hoc diagnostics for factor runs (no changes to backtest logic).
 Reads *_latest.csv outputs + latest run config, then computes:
-  - portfolio return series (equal-weight by signal_date)
-  - market beta vs SPY
+  - daily portfolio NAV (overlapping holding-period tranches), drawdown, exposure, turnover
+  - market beta vs SPY (daily returns)
   - industry/sector exposure summary
-  - signal coverage + turnover (top-quantile overlap)
-  - optional size exposure (corr with log market cap)
+  - signal coverage + turnover (top-quantile overlap), every date pair
+  - optional size exposure (corr with log market cap), every signal date
 """
 
 import argparse
 import json
+import sys
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.exposure_engine import (
+    asof_market_cap,
+    industry_exposure,
+    market_cap_panel,
+    size_exposure,
+    top_overlap,
+)
+from backtest.market_cap_engine import MarketCapEngine
+from backtest.portfolio_simulator import PortfolioSimulator, summarize_nav
+from backtest.trading_calendar import TradingCalendar
 
 
 def _find_latest_run_json(strategy_dir: Path) -> Path | None:
@@ -77,48 +90,62 @@ def _load_price_series(symbol: str) -> pd.DataFrame | None:
     return None
 
 
-def _first_bar_on_or_after(df: pd.DataFrame, target_date: pd.Timestamp) -> float | None:
-    if df is None or df.empty:
-        return None
-    idx = df["date"].searchsorted(target_date)
-    if idx >= len(df):
-        return None
-    row = df.iloc[idx]
-    if "adjOpen" in row and not pd.isna(row["adjOpen"]):
-        return float(row["adjOpen"])
-    if "adjClose" in row and not pd.isna(row["adjClose"]):
-        return float(row["adjClose"])
-    if "open" in row and not pd.isna(row["open"]):
-        return float(row["open"])
-    if "close" in row and not pd.isna(row["close"]):
-        return float(row["close"])
+def _price_field(df: pd.DataFrame, names) -> pd.Series | None:
+    for name in names:
+        if name in df.columns:
+            s = pd.Series(pd.to_numeric(df[name], errors="coerce").to_numpy(), index=pd.DatetimeIndex(df["date"]))
+            return s[~s.index.duplicated(keep="last")]
     return None
 
 
-def _market_return_series(signal_dates, execution_delay, holding_period, market_symbol="SPY"):
-    df_mkt = _load_price_series(market_symbol)
-    if df_mkt is None:
-        return None
-    returns = {}
-    for d in signal_dates:
-        d = pd.to_datetime(d)
-        entry_date = d + timedelta(days=int(execution_delay))
-        exit_date = entry_date + timedelta(days=int(holding_period))
-        entry_px = _first_bar_on_or_after(df_mkt, entry_date)
-        exit_px = _first_bar_on_or_after(df_mkt, exit_date)
-        if entry_px is None or exit_px is None:
+def _price_panels(symbols) -> tuple[pd.DataFrame, pd.DataFrame]:
+    closes, opens = {}, {}
+    for sym in sorted(set(symbols)):
+        df = _load_price_series(sym)
+        if df is None or df.empty:
             continue
-        returns[d] = (exit_px / entry_px) - 1.0
-    if not returns:
-        return None
-    return pd.Series(returns).sort_index()
+        c = _price_field(df, ("adjClose", "close"))
+        o = _price_field(df, ("adjOpen", "open"))
+        if c is None:
+            continue
+        closes[sym] = c
+        if o is not None:
+            opens[sym] = o
+    return pd.DataFrame(closes).sort_index(), pd.DataFrame(opens).sort_index()
 
 
-def _portfolio_return_series(returns_df: pd.DataFrame) -> pd.Series:
-    # Equal-weight by signal_date
-    returns_df["signal_date"] = pd.to_datetime(returns_df["signal_date"])
-    grouped = returns_df.groupby("signal_date")["return"].mean()
-    return grouped.sort_index()
+def _market_return_series(market_symbol="SPY") -> pd.Series | None:
+    df_mkt = _load_price_series(market_symbol)
+    if df_mkt is None or df_mkt.empty:
+        return None
+    close = _price_field(df_mkt, ("adjClose", "close"))
+    if close is None:
+        return None
+    return close.pct_change(fill_method=None).dropna()
+
+
+def _portfolio_daily(returns_df: pd.DataFrame, execution_delay, holding_period,
+                     calendar_dates=None) -> pd.DataFrame:
+    """Daily NAV from the executed positions (one tranche per signal_date)."""
+    positions = pd.DataFrame({
+        "symbol": returns_df["symbol"],
+        "date": pd.to_datetime(returns_df["signal_date"]),
+        "position": returns_df["position"] if "position" in returns_df.columns else 1,
+    })
+    close, open_ = _price_panels(positions["symbol"])
+    if close.empty:
+        return pd.DataFrame()
+    start = positions["date"].min()
+    end = positions["date"].max() + pd.Timedelta(days=int(holding_period) * 2 + 14)
+    dates = calendar_dates if calendar_dates is not None else close.index
+    dates = dates[(dates >= start) & (dates <= end)]
+    if len(dates) == 0:
+        return pd.DataFrame()
+    sim = PortfolioSimulator(holding_period=holding_period, execution_delay=execution_delay)
+    daily = sim.simulate(positions, close, open_=open_, calendar=TradingCalendar(dates))
+    # Drop the idle tail after the last tranche closes
+    active = np.flatnonzero((daily["gross_exposure"] > 0) | (daily["turnover"] > 0))
+    return daily.iloc[: active[-1] + 1] if len(active) > 0 else daily.iloc[0:0]
 
 
 def _beta(port: pd.Series, mkt: pd.Series, min_points: int = 5) -> float | None:
@@ -132,127 +159,29 @@ def _beta(port: pd.Series, mkt: pd.Series, min_points: int = 5) -> float | None:
     return float(np.cov(x, y, ddof=1)[0, 1] / np.var(x, ddof=1))
 
 
-def _industry_exposure(signals: pd.DataFrame, profiles: pd.DataFrame):
-    if profiles is None:
-        return None
-    prof = profiles[["symbol", "industry", "sector"]].copy()
-    merged = signals.merge(prof, on="symbol", how="left")
-    coverage = 1.0 - merged["industry"].isna().mean()
-    # Mean signal by industry/sector across all dates
-    ind = (
-        merged.groupby("industry")["signal"]
-        .mean()
-        .dropna()
-        .sort_values(key=lambda s: s.abs(), ascending=False)
-        .head(10)
-    )
-    sec = (
-        merged.groupby("sector")["signal"]
-        .mean()
-        .dropna()
-        .sort_values(key=lambda s: s.abs(), ascending=False)
-        .head(10)
-    )
-    return {
-        "coverage": float(coverage),
-        "top_industry_mean_signal": ind.round(6).to_dict(),
-        "top_sector_mean_signal": sec.round(6).to_dict(),
-    }
+def _turnover(signals: pd.DataFrame, top_pct=0.2):
+    """Top-bucket overlap between every pair of consecutive signal dates."""
+    return top_overlap(signals, top_pct=top_pct)
 
 
-def _turnover(signals: pd.DataFrame, top_pct=0.2):
-    signals = signals.copy()
-    signals["date"] = pd.to_datetime(signals["date"])
-    dates = sorted(signals["date"].unique())
-    if len(dates) < 2:
-        return None
-    overlaps = []
-    for i in range(1, len(dates)):
-        d0 = dates[i - 1]
-        d1 = dates[i]
-        s0 = signals[signals["date"] == d0]
-        s1 = signals[signals["date"] == d1]
-        n0 = max(1, int(len(s0) * top_pct))
-        n1 = max(1, int(len(s1) * top_pct))
-        top0 = set(s0.nlargest(n0, "signal")["symbol"])
-        top1 = set(s1.nlargest(n1, "signal")["symbol"])
-        overlap = len(top0 & top1) / max(1, len(top1))
-        overlaps.append(overlap)
-    return float(np.mean(overlaps))
-
-
-def _size_exposure(signals: pd.DataFrame, market_cap_dir: Path, max_dates=24):
+def _size_exposure(signals: pd.DataFrame, market_cap_dir: Path):
+    """Signal vs log market cap on every signal date (as-of merge against the cap history)."""
     if not market_cap_dir.exists():
         return None
-    # sample dates to avoid heavy scan
-    dates = sorted(pd.to_datetime(signals["date"].unique()))
-    if not dates:
-        return None
-    if len(dates) > max_dates:
-        step = len(dates) // max_dates
-        dates = dates[::step]
-
-    cap_cache = {}
-    def _load_cap(symbol: str):
-        if symbol in cap_cache:
-            return cap_cache[symbol]
-        p = market_cap_dir / f"{symbol}.csv"
-        if not p.exists():
-            cap_cache[symbol] = None
-            return None
-        try:
-            df = pd.read_csv(p)
-        except Exception:
-            cap_cache[symbol] = None
-            return None
-        if "date" not in df.columns or "marketCap" not in df.columns:
-            cap_cache[symbol] = None
-            return None
-        df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date")
-        cap_cache[symbol] = df
-        return df
+    engine = MarketCapEngine(str(market_cap_dir), strict=False)
+    panel = market_cap_panel(engine, signals["symbol"].unique())
+    return size_exposure(signals, asof_market_cap(signals, panel))
 
-    corrs = []
-    pooled_caps = []
-    pooled_sigs = []
-    for d in dates:
-        sub = signals[pd.to_datetime(signals["date"]) == d]
-        if sub.empty:
-            continue
-        caps = []
-        sigs = []
-        for _, row in sub.iterrows():
-            df = _load_cap(row["symbol"])
-            if df is None:
-                continue
-            idx = df["date"].searchsorted(d, side="right") - 1
-            if idx < 0:
-                continue
-            cap = pd.to_numeric(df.iloc[idx]["marketCap"], errors="coerce")
-            if pd.isna(cap) or float(cap) <= 0:
-                continue
-            log_cap = np.log(float(cap))
-            sig = pd.to_numeric(row["signal"], errors="coerce")
-            if pd.isna(sig):
-                continue
-            caps.append(log_cap)
-            sigs.append(float(sig))
-            pooled_caps.append(log_cap)
-            pooled_sigs.append(float(sig))
-        if len(caps) < 30:
-            continue
-        c = np.corrcoef(caps, sigs)[0, 1]
-        if np.isfinite(c):
-            corrs.append(float(c))
-    if corrs:
-        return float(np.mean(corrs))
-    # Fallback: pooled correlation across sampled dates.
-    if len(pooled_caps) >= 100:
-        c = np.corrcoef(pooled_caps, pooled_sigs)[0, 1]
-        if np.isfinite(c):
-            return float(c)
-    return None
+
+def _exposures_by_date(turnover: dict | None, size: dict | None) -> pd.DataFrame:
+    frames = []
+    if turnover and turnover.get("by_date") is not None:
+        frames.append(turnover["by_date"].rename(columns={"overlap": "top_overlap"}).set_index("date"))
+    if size and size.get("by_date") is not None:
+        frames.append(size["by_date"].rename(columns={"n": "n_size", "corr": "size_corr"}).set_index("date"))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, axis=1).sort_index().reset_index()
 
 
 def run_diagnostics(strategy_dir: Path, out_dir: Path, top_pct=0.2):
@@ -270,22 +199,27 @@ def run_diagnostics(strategy_dir: Path, out_dir: Path, top_pct=0.2):
     exec_delay = run_cfg.get("config", {}).get("execution_delay", 1)
     holding = run_cfg.get("config", {}).get("holding_period", 20)
 
-    # Portfolio returns + beta
-    port = _portfolio_return_series(returns_df)
-    mkt = _market_return_series(port.index, exec_delay, holding, market_symbol="SPY")
-    beta = _beta(port, mkt, min_points=5) if mkt is not None else None
+    # Portfolio NAV + beta (daily)
+    mkt = _market_return_series(market_symbol="SPY")
+    daily = _portfolio_daily(returns_df, exec_delay, holding,
+                             calendar_dates=mkt.index if mkt is not None else None)
+    port = daily.set_index("date")["net_return"] if len(daily) > 0 else pd.Series(dtype=float)
+    beta = _beta(port, mkt, min_points=20) if mkt is not None else None
+    nav_stats = summarize_nav(daily)
 
     # Industry exposure
     profiles_path = PROJECT_ROOT / "data" / "company_profiles.csv"
     profiles = pd.read_csv(profiles_path) if profiles_path.exists() else None
-    industry = _industry_exposure(signals, profiles)
+    industry = industry_exposure(signals, profiles)
 
-    # Turnover
-    turnover = _turnover(signals, top_pct=top_pct)
+    # Turnover (every consecutive date pair)
+    overlap = _turnover(signals, top_pct=top_pct)
+    turnover = overlap["mean"]
 
-    # Size exposure (optional)
+    # Size exposure (optional, every signal date)
     mcap_dir = PROJECT_ROOT / "data" / "fmp" / "market_cap_history"
-    size_corr = _size_exposure(signals, mcap_dir, max_dates=24)
+    size = _size_exposure(signals, mcap_dir)
+    size_corr = size["value"] if size else None
 
     report = {
         "strategy": strategy_dir.name,
@@ -297,9 +231,13 @@ def run_diagnostics(strategy_dir: Path, out_dir: Path, top_pct=0.2):
         },
         "diagnostics": {
             "beta_vs_spy": beta,
+            "portfolio_nav": nav_stats,
             "turnover_top_pct_overlap": turnover,
+            "turnover_n_pairs": overlap["n_pairs"],
             "industry_exposure": industry,
             "size_signal_corr_log_mcap": size_corr,
+            "size_n_dates": size["n_dates"] if size else 0,
+            "size_pooled_corr": size["pooled_corr"] if size else None,
         },
     }
 
@@ -307,6 +245,11 @@ def run_diagnostics(strategy_dir: Path, out_dir: Path, top_pct=0.2):
     ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
     json_path = out_dir / f"diagnostics_{ts}.json"
     json_path.write_text(json.dumps(report, indent=2))
+    if len(daily) > 0:
+        daily.to_csv(out_dir / f"portfolio_nav_{ts}.csv", index=False)
+    by_date = _exposures_by_date(overlap, size)
+    if len(by_date) > 0:
+        by_date.to_csv(out_dir / f"exposures_by_date_{ts}.csv", index=False)
 
     # Simple markdown summary
     md_path = out_dir / f"diagnostics_{ts}.md"
@@ -315,6 +258,9 @@ def run_diagnostics(strategy_dir: Path, out_dir: Path, top_pct=0.2):
         "",
         f"- Run date: {report['run_date']}",
         f"- Beta vs SPY: {beta}",
+        f"- Max drawdown: {nav_stats.get('max_drawdown')}",
+        f"- Avg gross exposure: {nav_stats.get('avg_gross_exposure')}",
+        f"- Avg daily turnover: {nav_stats.get('avg_daily_turnover')}",
         f"- Turnover (top {int(top_pct*100)}% overlap): {turnover}",
         f"- Size corr (log mcap): {size_corr}",
         "",
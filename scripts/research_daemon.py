@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+"""
+Local research daemon: runs research scripts in one warm process.
+
+Every workflow run (segmented / walk-forward / train-test / gates) normally
+starts a fresh interpreter that re-imports pandas, rebuilds the symbol
+inventory and re-unpickles the prices it touches. The daemon listens on a
+Unix socket, imports each script module once and calls its main() in-process,
+so modules, the shared EnginePool (DataEngine price cache, market caps,
+fundamentals and event caches) and any module-level state stay warm between
+jobs. Jobs run one at a time; their stdout / stderr are streamed back line by
+line.
+
+Protocol (newline-delimited JSON over the socket):
+  request   {"op": "run", "workflow": "segmented", "argv": [...]}
+            {"op": "run", "script": "scripts/x.py", "argv": [...]}
+            {"op": "ping"} | {"op": "stats"} | {"op": "shutdown"}
+  events    {"event": "accepted", "queued": k}, {"event": "started", "job_id": n}
+            {"event": "stdout" | "stderr", "data": "<line>"}
+            {"event": "done", "rc": int, "seconds": float}
+
+Clients opt in with V4_RESEARCH_DAEMON=<socket path> (or "1" for the default
+socket); try_daemon() returns None when the daemon is not configured or not
+reachable so callers fall back to their subprocess call. Restart the daemon
+after code changes: imported modules are not reloaded. Data refreshes need no
+restart: before each job the daemon fingerprints the inputs of every config
+the pool has served (scripts.result_store.data_fingerprint) and, when they
+changed since the last job, drops the EnginePool and the process-wide
+trading-calendar cache so the job reloads from disk. Other module-level
+caches in the scripts themselves are not covered. Subprocesses started by a
+job write to the daemon's own stdout, not the client stream.
+
+Usage:
+  python scripts/research_daemon.py serve [--socket PATH]
+  python scripts/research_daemon.py run --workflow segmented -- --factors value
+  python scripts/research_daemon.py stats | stop
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import faulthandler
+import importlib
+import importlib.util
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable
+
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.result_store import FORCE_ENV, data_fingerprint, data_paths, force_requested
+
+DAEMON_ENV = "V4_RESEARCH_DAEMON"
+DEFAULT_SOCKET = ROOT / "cache" / "research_daemon.sock"
+
+# Same workflow names as scripts/run_research_workflow.py
+WORKFLOW_TO_SCRIPT = {
+    "train_test": ROOT / "scripts" / "run_with_config.py",
+    "segmented": ROOT / "scripts" / "run_segmented_factors.py",
+    "walk_forward": ROOT / "scripts" / "run_walk_forward.py",
+    "production_gates": ROOT / "scripts" / "run_production_gates.py",
+    "statistical_gates": ROOT / "scripts" / "run_statistical_gates.py",
+}
+
+
+def daemon_socket() -> Path | None:
+    """Socket path from V4_RESEARCH_DAEMON ("1" = default path), or None if unset."""
+    value = os.environ.get(DAEMON_ENV, "").strip()
+    if not value or value == "0":
+        return None
+    return DEFAULT_SOCKET if value == "1" else Path(value).expanduser()
+
+
+# ---------------------------------------------------------------- client
+
+
+def submit(
+    request: dict[str, Any],
+    socket_path: Path,
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+    connect_timeout: float = 5.0,
+) -> dict[str, Any]:
+    """Send one request and consume its event stream; returns the final event (plus captured output)."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(connect_timeout)
+    sock.connect(str(socket_path))
+    sock.settimeout(None)
+    out: dict[str, Any] = {"rc": 1, "stdout": "", "stderr": ""}
+    chunks: dict[str, list[str]] = {"stdout": [], "stderr": []}
+    with sock, sock.makefile("rwb") as f:
+        f.write((json.dumps(request) + "\n").encode("utf-8"))
+        f.flush()
+        for raw in f:
+            event = json.loads(raw)
+            if on_event is not None:
+                on_event(event)
+            kind = event.get("event")
+            if kind in chunks:
+                chunks[kind].append(event.get("data", ""))
+            elif kind in ("done", "pong", "stats", "error", "bye"):
+                out.update(event)
+                break
+    out["stdout"] = "".join(chunks["stdout"]).strip()
+    out["stderr"] = "".join(chunks["stderr"]).strip()
+    return out
+
+
+def _echo(event: dict[str, Any]) -> None:
+    kind = event.get("event")
+    if kind == "stdout":
+        sys.stdout.write(event.get("data", ""))
+        sys.stdout.flush()
+    elif kind == "stderr":
+        sys.stderr.write(event.get("data", ""))
+        sys.stderr.flush()
+
+
+def try_daemon(request: dict[str, Any], stream: bool = True) -> dict[str, Any] | None:
+    """Run a request on the configured daemon; None if no daemon is configured or reachable."""
+    path = daemon_socket()
+    if path is None:
+        return None
+    try:
+        result = submit(request, path, on_event=_echo if stream else None)
+    except (FileNotFoundError, ConnectionRefusedError, socket.timeout) as e:
+        print(f"[daemon] unavailable at {path} ({e}); running locally", file=sys.stderr, flush=True)
+        return None
+    if result.get("event") == "error":
+        print(f"[daemon] rejected: {result.get('message')}; running locally", file=sys.stderr, flush=True)
+        return None
+    return result
+
+
+def run_command(cmd: list[str], cwd: Path | None = None, stream: bool = True) -> dict[str, Any] | None:
+    """Drop-in for subprocess.run of `python scripts/x.py ...`: daemon result, or None to run locally."""
+    if daemon_socket() is None:
+        return None
+    if cwd is not None and Path(cwd).resolve() != ROOT.resolve():
+        return None  # jobs run with the project root as cwd
+    if len(cmd) < 2 or not str(cmd[1]).endswith(".py"):
+        return None
+    script = Path(cmd[1])
+    if not script.is_absolute():
+        script = ROOT / script
+    request = {"op": "run", "script": str(script.resolve()), "argv": [str(x) for x in cmd[2:]]}
+    if force_requested():
+        request["force"] = True  # the daemon does not see this process's environment
+    return try_daemon(request, stream=stream)
+
+
+# ---------------------------------------------------------------- server
+
+
+class _LineStream(io.TextIOBase):
+    """File-like sink that forwards complete lines as events."""
+
+    def __init__(self, send: Callable[[dict[str, Any]], None], kind: str, fallback):
+        self._send = send
+        self._kind = kind
+        self._fallback = fallback
+        self._buf = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self._buf += s
+        while "\n" in self._buf:
+            line, self._buf = self._buf.split("\n", 1)
+            self._send({"event": self._kind, "data": line + "\n"})
+        return len(s)
+
+    def flush(self) -> None:
+        pass
+
+    def close_line(self) -> None:
+        if self._buf:
+            self._send({"event": self._kind, "data": self._buf})
+            self._buf = ""
+
+    def fileno(self) -> int:
+        # faulthandler and friends need a real fd: use the daemon's own stream
+        return self._fallback.fileno()
+
+
+class ResearchDaemon:
+    """Job runner holding the warm modules and the shared EnginePool."""
+
+    def __init__(self, scripts_dir: Path = ROOT / "scripts", max_engines: int = 16, store_root: str | None = None):
+        from backtest.engine_pool import EnginePool
+
+        self.scripts_dir = Path(scripts_dir).resolve()
+        self.max_engines = int(max_engines)
+        self.pool = EnginePool(store_root=store_root)
+        self._modules: dict[Path, Any] = {}
+        self._lock = threading.Lock()  # one job at a time (stdout redirection is process-wide)
+        self._state_lock = threading.Lock()
+        self._waiting = 0
+        self._jobs = 0
+        self._data_sig: str | None = None
+        self.invalidations = 0
+        self.started = time.time()
+        self.history: list[dict[str, Any]] = []
+
+    def _resolve(self, request: dict[str, Any]) -> Path:
+        if request.get("workflow"):
+            wf = str(request["workflow"])
+            if wf not in WORKFLOW_TO_SCRIPT:
+                raise ValueError(f"unknown workflow '{wf}', expected one of {sorted(WORKFLOW_TO_SCRIPT)}")
+            path = WORKFLOW_TO_SCRIPT[wf]
+            if self.scripts_dir != (ROOT / "scripts").resolve():
+                path = self.scripts_dir / path.name
+        else:
+            path = Path(str(request.get("script", "")))
+            if not path.is_absolute():
+                path = ROOT / path
+        path = path.resolve()
+        if path.parent != self.scripts_dir or path.suffix != ".py" or not path.exists():
+            raise ValueError(f"script not allowed: {path} (must be a .py file in {self.scripts_dir})")
+        return path
+
+    def _module(self, path: Path):
+        mod = self._modules.get(path)
+        if mod is None:
+            if self.scripts_dir == (ROOT / "scripts").resolve():
+                # Import under its package name so scripts importing each other share one warm module
+                mod = importlib.import_module(f"scripts.{path.stem}")
+            else:
+                spec = importlib.util.spec_from_file_location(f"_research_daemon_{path.stem}", path)
+                mod = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(mod)
+            if hasattr(mod, "ENGINE_POOL"):
+                mod.ENGINE_POOL = self.pool
+            self._modules[path] = mod
+        return mod
+
+    def _data_signature(self) -> str:
+        paths = set()
+        for config in self.pool.configs():
+            paths.update(data_paths(config))
+        return data_fingerprint(paths)
+
+    def _drop_stale_caches(self) -> bool:
+        """Clear the pool and calendar cache if the data behind them changed since the last job."""
+        if self._data_sig is None or self._data_signature() == self._data_sig:
+            return False
+        from backtest.trading_calendar import clear_calendar_cache
+
+        self.pool.clear()
+        clear_calendar_cache()
+        self._data_sig = None
+        self.invalidations += 1
+        return True
+
+    def run(self, request: dict[str, Any], send: Callable[[dict[str, Any]], None]) -> dict[str, Any]:
+        path = self._resolve(request)
+        argv = [str(x) for x in request.get("argv") or []]
+        if argv and argv[0] == "--":
+            argv = argv[1:]
+        with self._state_lock:
+            queued = self._waiting + (1 if self._lock.locked() else 0)
+            self._waiting += 1
+        send({"event": "accepted", "queued": queued})
+        with self._lock:
+            with self._state_lock:
+                self._waiting -= 1
+                self._jobs += 1
+                job_id = self._jobs
+            send({"event": "started", "job_id": job_id})
+            if self._drop_stale_caches():
+                print(f"[daemon] input data changed; dropped warm engines before job {job_id}",
+                      file=sys.__stdout__, flush=True)
+                send({"event": "stderr", "data": "[daemon] input data changed since the last job; reloading\n"})
+            out = _LineStream(send, "stdout", sys.__stdout__)
+            err = _LineStream(send, "stderr", sys.__stderr__)
+            t0 = time.time()
+            rc = 0
+            saved_argv = sys.argv
+            saved_force = os.environ.get(FORCE_ENV)
+            if request.get("force"):
+                os.environ[FORCE_ENV] = "1"
+            try:
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    try:
+                        mod = self._module(path)
+                        sys.argv = [str(path)] + argv
+                        if hasattr(mod, "main"):
+                            mod.main()
+                        else:
+                            import runpy
+
+                            runpy.run_path(str(path), run_name="__main__")
+                    except SystemExit as e:
+                        if e.code is None or isinstance(e.code, int):
+                            rc = int(e.code or 0)
+                        else:
+                            print(e.code, file=sys.stderr)
+                            rc = 1
+                    except Exception:
+                        traceback.print_exc()
+                        rc = 1
+            finally:
+                sys.argv = saved_argv
+                if saved_force is None:
+                    os.environ.pop(FORCE_ENV, None)
+                else:
+                    os.environ[FORCE_ENV] = saved_force
+                out.close_line()
+                err.close_line()
+                if len(self.pool) > self.max_engines:
+                    self.pool.release_engines()
+                self._data_sig = self._data_signature()
+            seconds = time.time() - t0
+            self.history.append({"job_id": job_id, "script": path.name, "argv": argv, "rc": rc, "seconds": seconds})
+            print(f"[daemon] job {job_id} {path.name} rc={rc} {seconds:.1f}s", file=sys.__stdout__, flush=True)
+            return {"event": "done", "job_id": job_id, "rc": rc, "seconds": seconds}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "event": "stats",
+            "pid": os.getpid(),
+            "uptime_seconds": time.time() - self.started,
+            "jobs": self._jobs,
+            "waiting": self._waiting,
+            "engines": len(self.pool),
+            "data_invalidations": self.invalidations,
+            "pool_stats": dict(self.pool.stats),
+            "modules": sorted(p.name for p in self._modules),
+            "recent": self.history[-10:],
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        daemon: ResearchDaemon = self.server.daemon_state
+        write_lock = threading.Lock()
+
+        def send(event: dict[str, Any]) -> None:
+            with write_lock:
+                try:
+                    self.wfile.write((json.dumps(event, default=str) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client went away; the job still finishes
+
+        raw = self.rfile.readline()
+        if not raw:
+            return
+        try:
+            request = json.loads(raw)
+            op = request.get("op", "run")
+            if op == "ping":
+                send({"event": "pong", "pid": os.getpid()})
+            elif op == "stats":
+                send(daemon.stats())
+            elif op == "shutdown":
+                send({"event": "bye"})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            elif op == "run":
+                send(daemon.run(request, send))
+            else:
+                send({"event": "error", "rc": 2, "message": f"unknown op '{op}'"})
+        except Exception as e:
+            send({"event": "error", "rc": 2, "message": str(e)})
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(socket_path: Path, daemon: ResearchDaemon) -> _Server:
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.connect(str(socket_path))
+            raise SystemExit(f"daemon already running at {socket_path}")
+        except ConnectionRefusedError:
+            socket_path.unlink()  # stale socket from a dead daemon
+    server = _Server(str(socket_path), _Handler)
+    os.chmod(socket_path, 0o600)
+    server.daemon_state = daemon
+    return server
+
+
+def serve(socket_path: Path, max_engines: int, store_root: str | None) -> None:
+    # Jobs run inside the daemon; nested calls must not route back to it
+    os.environ.pop(DAEMON_ENV, None)
+    os.chdir(ROOT)
+    faulthandler.enable()
+    daemon = ResearchDaemon(max_engines=max_engines, store_root=store_root)
+    server = make_server(socket_path, daemon)
+    print(f"[daemon] listening on {socket_path} pid={os.getpid()}", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        Path(socket_path).unlink(missing_ok=True)
+        print("[daemon] stopped", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Local research daemon holding warm engines.",
+        epilog="Job arguments for `run` go after '--'.",
+    )
+    parser.add_argument("command", choices=["serve", "run", "ping", "stats", "stop"])
+    parser.add_argument("--socket", default="", help=f"Socket path (default: ${DAEMON_ENV} or {DEFAULT_SOCKET})")
+    parser.add_argument("--max-engines", type=int, default=16, help="Release warm engines above this many configs")
+    parser.add_argument("--store-dir", default="", help="Attach shared memory-mapped stores built under this dir")
+    parser.add_argument("--workflow", default="", choices=[""] + sorted(WORKFLOW_TO_SCRIPT))
+    parser.add_argument("--script", default="", help="Script under scripts/ to run (instead of --workflow)")
+    argv = sys.argv[1:]
+    job_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[: argv.index("--")] if "--" in argv else argv)
+
+    socket_path = Path(args.socket).expanduser() if args.socket else (daemon_socket() or DEFAULT_SOCKET)
+    if args.command == "serve":
+        serve(socket_path, args.max_engines, args.store_dir or None)
+        return
+
+    if args.command == "run":
+        if not args.workflow and not args.script:
+            raise SystemExit("run requires --workflow or --script")
+        request = {"op": "run", "argv": job_args}
+        request["workflow" if args.workflow else "script"] = args.workflow or args.script
+    else:
+        request = {"op": {"ping": "ping", "stats": "stats", "stop": "shutdown"}[args.command]}
+    try:
+        result = submit(request, socket_path, on_event=_echo)
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise SystemExit(f"daemon not reachable at {socket_path}: {e}")
+    if args.command != "run":
+        for key in ("rc", "stdout", "stderr"):
+            result.pop(key, None)
+        print(json.dumps(result, indent=2, default=str))
+        return
+    if result.get("event") == "error":
+        print(f"[daemon] error: {result.get('message')}", file=sys.stderr)
+    raise SystemExit(int(result.get("rc", 0) or 0))
+
+
+if __name__ == "__main__":
+    main()
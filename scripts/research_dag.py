@@ -0,0 +1,354 @@
+"""
+Dependency-aware executor for auto-research plan commands.
+
+Each plan command (next_run_plan.json "commands" rows, see
+auto_research_orchestrator._parse_plan_commands) becomes a DAG node. Rows
+may declare, next to "command":
+  id        node name (default rank{rank}_{factor})
+  inputs    paths / globs the command reads
+  outputs   paths / globs the command writes
+  after     ids (or ranks) that must finish first
+  cpu       cores the node occupies (policy default otherwise)
+  mem_gb    memory the node needs (policy default otherwise)
+Without declarations, inputs are the command's --freeze-file / --dq-input-csv
+and outputs are audit/workstation_runs/*<--tag>*.
+
+A node depends on every node whose outputs match one of its inputs (equal
+path, path prefix or glob match) plus its `after` list. Ready nodes run
+concurrently while the sum of their cpu / mem_gb fits the budgets (a node
+larger than a budget runs alone). A node is skipped only when it has a
+stamp from its last successful run whose command hash and input signature
+(path, size, mtime of every input) match the node now, and all its outputs
+exist with none older than its newest input; outputs without a stamp are
+stale. Nodes downstream of a failure are reported "blocked".
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import shlex
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from scripts.memory_governor import MemoryGovernor
+
+
+@dataclass
+class DagNode:
+    node_id: str
+    cmd: list[str]
+    inputs: list[str] = field(default_factory=list)
+    outputs: list[str] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)
+    cpu: float = 1.0
+    mem_gb: float = 0.0
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+def _flag(tokens: list[str], flag: str) -> str:
+    for i, tok in enumerate(tokens):
+        if tok == flag and i + 1 < len(tokens):
+            return tokens[i + 1]
+    return ""
+
+
+def _as_list(v: Any) -> list[str]:
+    if v is None or v == "":
+        return []
+    if isinstance(v, (list, tuple)):
+        return [str(x) for x in v if str(x)]
+    return [str(v)]
+
+
+def nodes_from_plan(
+    commands: list[dict[str, Any]],
+    make_cmd: Callable[[int, dict[str, Any]], list[str]],
+    default_cpu: float = 1.0,
+    default_mem_gb: float = 0.0,
+) -> list[DagNode]:
+    """One node per plan row; make_cmd(rank, row) gives the argv that runs it."""
+    nodes: list[DagNode] = []
+    rank_ids: dict[str, str] = {}
+    for i, row in enumerate(commands, start=1):
+        rank = int(row.get("rank") or i)
+        try:
+            tokens = shlex.split(str(row.get("command") or ""))
+        except ValueError:
+            tokens = []
+        inputs = _as_list(row.get("inputs"))
+        if "inputs" not in row:
+            inputs = [p for p in (_flag(tokens, "--freeze-file"), _flag(tokens, "--dq-input-csv")) if p]
+        outputs = _as_list(row.get("outputs"))
+        tag = _flag(tokens, "--tag")
+        if "outputs" not in row and tag:
+            outputs = [f"audit/workstation_runs/*{tag}*"]
+        node_id = str(row.get("id") or f"rank{rank}_{row.get('factor') or 'cmd'}")
+        rank_ids[str(rank)] = node_id
+        nodes.append(
+            DagNode(
+                node_id=node_id,
+                cmd=make_cmd(i, row),
+                inputs=inputs,
+                outputs=outputs,
+                after=_as_list(row.get("after")),
+                cpu=float(row.get("cpu") or default_cpu),
+                mem_gb=float(row.get("mem_gb") or default_mem_gb),
+                meta={"rank": rank, "factor": row.get("factor", ""), "tag": tag},
+            )
+        )
+    for n in nodes:
+        n.after = [rank_ids.get(a, a) for a in n.after]
+    return nodes
+
+
+def _resolve(p: str, cwd: Path) -> str:
+    path = Path(p).expanduser()
+    return str(path if path.is_absolute() else (cwd / path))
+
+
+def _path_overlap(a: str, b: str) -> bool:
+    if a == b or fnmatch.fnmatch(a, b) or fnmatch.fnmatch(b, a):
+        return True
+    return a.startswith(b.rstrip("/") + "/") or b.startswith(a.rstrip("/") + "/")
+
+
+def dependencies(nodes: list[DagNode], cwd: Path) -> dict[str, set[str]]:
+    """node_id -> ids it waits for; raises ValueError on unknown ids or cycles."""
+    ids = [n.node_id for n in nodes]
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"duplicate node ids: {sorted({i for i in ids if ids.count(i) > 1})}")
+    outs = {n.node_id: [_resolve(p, cwd) for p in n.outputs] for n in nodes}
+    deps: dict[str, set[str]] = {}
+    for n in nodes:
+        unknown = [a for a in n.after if a not in outs]
+        if unknown:
+            raise ValueError(f"{n.node_id}: unknown 'after' ids {unknown}")
+        d = set(n.after)
+        for inp in (_resolve(p, cwd) for p in n.inputs):
+            for other, paths in outs.items():
+                if other != n.node_id and any(_path_overlap(inp, o) for o in paths):
+                    d.add(other)
+        deps[n.node_id] = d
+
+    seen: dict[str, int] = {}
+
+    def _visit(nid: str, stack: list[str]) -> None:
+        if seen.get(nid) == 2:
+            return
+        if seen.get(nid) == 1:
+            raise ValueError(f"dependency cycle: {' -> '.join(stack + [nid])}")
+        seen[nid] = 1
+        for d in sorted(deps[nid]):
+            _visit(d, stack + [nid])
+        seen[nid] = 2
+
+    for nid in ids:
+        _visit(nid, [])
+    return deps
+
+
+def _cmd_hash(node: DagNode) -> str:
+    return hashlib.sha256(json.dumps(node.cmd).encode("utf-8")).hexdigest()[:16]
+
+
+def _inputs_hash(node: DagNode, cwd: Path) -> str | None:
+    """Hash of (path, size, mtime) of every input match; None when an input is missing."""
+    entries = []
+    for pattern in node.inputs:
+        hits = sorted(glob.glob(_resolve(pattern, cwd)))
+        if not hits:
+            return None
+        for h in hits:
+            st = os.stat(h)
+            entries.append([h, st.st_size, st.st_mtime_ns])
+    return hashlib.sha256(json.dumps(entries).encode("utf-8")).hexdigest()[:16]
+
+
+def _stamp_path(stamp_dir: Path, node: DagNode) -> Path:
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in node.node_id)
+    return stamp_dir / f"{safe}.json"
+
+
+def up_to_date(node: DagNode, cwd: Path, stamp_dir: Path | None = None) -> bool:
+    """
+    A stamp with the node's command and input hashes exists, and the outputs
+    all exist with none older than the newest input. No stamp: stale.
+    """
+    if not node.outputs or stamp_dir is None:
+        return False
+    try:
+        stamp = json.loads(_stamp_path(stamp_dir, node).read_text())
+    except (OSError, ValueError):
+        return False
+    if stamp.get("cmd_hash") != _cmd_hash(node) or stamp.get("inputs_hash") != _inputs_hash(node, cwd):
+        return False
+    out_mtimes: list[float] = []
+    for pattern in node.outputs:
+        hits = glob.glob(_resolve(pattern, cwd))
+        if not hits:
+            return False
+        out_mtimes.extend(os.path.getmtime(h) for h in hits)
+    in_mtime = 0.0
+    for pattern in node.inputs:
+        hits = glob.glob(_resolve(pattern, cwd))
+        if not hits:
+            return False
+        in_mtime = max([in_mtime] + [os.path.getmtime(h) for h in hits])
+    return min(out_mtimes) >= in_mtime
+
+
+def run_dag(
+    nodes: list[DagNode],
+    runner: Callable[[DagNode], dict[str, Any]],
+    *,
+    cwd: Path,
+    cpu_budget: float,
+    mem_budget_gb: float = 0.0,
+    stamp_dir: Path | None = None,
+    force: bool = False,
+    log: Callable[[str], None] = print,
+    governor: MemoryGovernor | None = None,
+) -> dict[str, Any]:
+    """
+    Run the nodes in dependency order, concurrently within the budgets
+    (mem_budget_gb <= 0: unlimited). runner(node) returns at least {"rc": int}.
+    Memory is admitted through governor (one over mem_budget_gb by default),
+    which also publishes the running / queued nodes.
+    Node status: ok | failed | skipped_up_to_date | blocked.
+    """
+    cwd = Path(cwd)
+    deps = dependencies(nodes, cwd)
+    by_id = {n.node_id: n for n in nodes}
+    pending = [n.node_id for n in nodes]
+    status: dict[str, str] = {}
+    records: dict[str, dict[str, Any]] = {}
+    ready_at: dict[str, float] = {}
+    inputs_at_start: dict[str, str | None] = {}
+    running: dict[Any, str] = {}
+    used = {"cpu": 0.0}
+    if governor is None:
+        governor = MemoryGovernor(mem_budget_gb, name="research_dag", publish=False)
+    peak = 0
+    t0 = time.time()
+
+    def _fits(n: DagNode) -> bool:
+        if not running:
+            return True
+        if used["cpu"] + n.cpu > float(cpu_budget):
+            return False
+        return governor.fits(n.mem_gb)
+
+    def _record(nid: str, st: str, **extra: Any) -> None:
+        status[nid] = st
+        n = by_id[nid]
+        records[nid] = {
+            "node_id": nid,
+            "status": st,
+            "deps": sorted(deps[nid]),
+            "cpu": n.cpu,
+            "mem_gb": n.mem_gb,
+            "cmd": n.cmd,
+            **n.meta,
+            **extra,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, len(nodes))) as ex:
+        while pending or running:
+            scan = True
+            while scan:
+                # Repeat until nothing changes: a skip or block can unlock nodes listed earlier
+                scan = False
+                for nid in list(pending):
+                    d = deps[nid]
+                    if any(status.get(x) in ("failed", "blocked") for x in d):
+                        pending.remove(nid)
+                        _record(nid, "blocked", seconds=0.0)
+                        log(f"[dag] blocked {nid}")
+                        scan = True
+                        continue
+                    if not all(status.get(x) in ("ok", "skipped_up_to_date") for x in d):
+                        continue
+                    node = by_id[nid]
+                    ready_at.setdefault(nid, time.time())
+                    # A dependency that ran this round may have rewritten files inside an input directory
+                    rebuilt = any(status.get(x) == "ok" for x in d)
+                    if not force and not rebuilt and up_to_date(node, cwd, stamp_dir):
+                        pending.remove(nid)
+                        _record(nid, "skipped_up_to_date", seconds=0.0)
+                        log(f"[dag] up to date {nid}")
+                        scan = True
+                        continue
+                    if not _fits(node):
+                        governor.enqueue(nid, node.mem_gb)
+                        continue
+                    pending.remove(nid)
+                    used["cpu"] += node.cpu
+                    governor.try_acquire(nid, node.mem_gb)
+                    started = time.time()
+                    records[nid] = {"started": started}
+                    # Inputs as the run saw them; a change during the run leaves the stamp stale
+                    inputs_at_start[nid] = _inputs_hash(node, cwd)
+                    running[ex.submit(runner, node)] = nid
+                    peak = max(peak, len(running))
+                    log(f"[dag] start {nid} (running={len(running)} cpu={used['cpu']:g}/{cpu_budget:g})")
+            if not running:
+                if pending:
+                    # Unreachable with an acyclic graph; guard against a stalled loop
+                    for nid in pending:
+                        _record(nid, "blocked", seconds=0.0)
+                    pending = []
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                nid = running.pop(fut)
+                node = by_id[nid]
+                used["cpu"] -= node.cpu
+                governor.release(nid)
+                started = records[nid]["started"]
+                ended = time.time()
+                try:
+                    res = fut.result()
+                except Exception as e:
+                    res = {"rc": 1, "stderr": f"{type(e).__name__}: {e}"}
+                rc = int(res.get("rc", 1))
+                _record(
+                    nid,
+                    "ok" if rc == 0 else "failed",
+                    rc=rc,
+                    started_at=datetime.fromtimestamp(started).isoformat(),
+                    ended_at=datetime.fromtimestamp(ended).isoformat(),
+                    seconds=round(ended - started, 3),
+                    queued_seconds=round(started - ready_at.get(nid, started), 3),
+                    peak_rss_gb=res.get("peak_rss_gb"),
+                    stdout=str(res.get("stdout", ""))[-4000:],
+                    stderr=str(res.get("stderr", ""))[-4000:],
+                )
+                if rc == 0 and stamp_dir is not None:
+                    stamp = _stamp_path(stamp_dir, node)
+                    stamp.parent.mkdir(parents=True, exist_ok=True)
+                    stamp.write_text(json.dumps({"node_id": nid, "cmd_hash": _cmd_hash(node),
+                                                 "inputs_hash": inputs_at_start.get(nid),
+                                                 "finished_at": records[nid]["ended_at"]}))
+                log(f"[dag] {status[nid]} {nid} rc={rc} {ended - started:.1f}s")
+
+    out_nodes = [records[n.node_id] for n in nodes]
+    counts = {s: sum(1 for r in out_nodes if r["status"] == s)
+              for s in ("ok", "failed", "skipped_up_to_date", "blocked")}
+    return {
+        "nodes": out_nodes,
+        "counts": counts,
+        "wall_seconds": round(time.time() - t0, 3),
+        "serial_seconds": round(sum(float(r.get("seconds") or 0.0) for r in out_nodes), 3),
+        "max_concurrency": peak,
+        "cpu_budget": cpu_budget,
+        "mem_budget_gb": governor.budget_gb,
+        "mem_peak_used_gb": round(governor.peak_used_gb, 3),
+    }
@@ -0,0 +1,187 @@
+"""
+Content-addressed store of finished research runs.
+
+A run is identified by (config hash, data fingerprint, code version):
+  - config hash:      stable_hash of everything that determines the result
+                      (factor config snapshot, weights, segments / windows, ...)
+  - data fingerprint: file count / bytes / newest mtime of every input
+                      directory or file the engine config points at
+  - code version:     git commit, plus a hash of the uncommitted diff and of
+                      the contents of untracked (not ignored) files under the
+                      code paths when the tree is dirty (no git -> no memoization)
+The store keeps the small summary artifacts of each run under
+cache/result_store/<key[:2]>/<key>/ with an entry.json, so a runner that
+sees a known key copies the stored summary into its output dir instead of
+recomputing. --force (or V4_FORCE_RERUN=1, which survives subprocess layers)
+skips the lookup; the fresh result then replaces the stored one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from backtest.factor_engine import input_paths
+from scripts.research_governance import current_git_commit, stable_hash
+
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_ROOT = ROOT / "cache" / "result_store"
+FORCE_ENV = "V4_FORCE_RERUN"
+# Paths whose uncommitted changes can alter a result
+CODE_PATHS = ("backtest", "scripts", "strategies", "configs")
+
+
+def force_requested(flag: bool = False) -> bool:
+    return bool(flag) or os.environ.get(FORCE_ENV, "").strip() not in ("", "0")
+
+
+def code_version(root: Path = ROOT) -> Optional[str]:
+    """git commit, suffixed with a hash of tracked + untracked changes when the tree is dirty."""
+    commit = current_git_commit(root)
+    if not commit:
+        return None
+    try:
+        status = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=normal", "--", *CODE_PATHS],
+            cwd=str(root), stderr=subprocess.DEVNULL, text=True,
+        )
+        if not status.strip():
+            return commit
+        diff = subprocess.check_output(
+            ["git", "diff", "HEAD", "--", *CODE_PATHS], cwd=str(root), stderr=subprocess.DEVNULL, text=True
+        )
+        # New modules are not in the diff: hash what each untracked file contains
+        untracked = subprocess.check_output(
+            ["git", "ls-files", "--others", "--exclude-standard", "-z", "--", *CODE_PATHS],
+            cwd=str(root), stderr=subprocess.DEVNULL, text=True,
+        )
+        contents = {}
+        for rel in sorted(f for f in untracked.split("\0") if f):
+            with open(Path(root) / rel, "rb") as f:
+                contents[rel] = hashlib.sha256(f.read()).hexdigest()
+    except Exception:
+        return None
+    return f"{commit}+dirty.{stable_hash([status, diff, contents])[:16]}"
+
+
+def data_paths(config: Dict[str, Any], engine_defaults: bool = True) -> List[str]:
+    """
+    Existing input paths named by an engine config (*_DIR, *_DIR_*, *_PATH,
+    DELISTED_INFO) plus, with engine_defaults, the sources FactorEngine falls
+    back to when the config leaves them out (earnings next to the price data,
+    event jsonl / csv files under data/fmp, fundamentals dirs).
+    """
+    out = set()
+    if engine_defaults:
+        for value in input_paths(config).values():
+            if os.path.exists(value):
+                out.add(str(Path(value).resolve()))
+    for key, value in config.items():
+        named = key.endswith("_DIR") or "_DIR_" in key or key.endswith("_PATH") or key == "DELISTED_INFO"
+        if not isinstance(value, str) or not named:
+            continue
+        if key in ("SIGNAL_CACHE_DIR",):
+            continue
+        if os.path.exists(value):
+            out.add(str(Path(value).resolve()))
+    return sorted(out)
+
+
+def data_fingerprint(paths: Iterable[str]) -> str:
+    """Hash of (file count, bytes, newest mtime) per input path; directories are walked."""
+    sig = {}
+    for p in sorted(set(str(x) for x in paths)):
+        n, size, mtime = 0, 0, 0
+        if os.path.isdir(p):
+            for dirpath, _, files in os.walk(p):
+                for name in files:
+                    try:
+                        st = os.stat(os.path.join(dirpath, name))
+                    except OSError:
+                        continue
+                    n += 1
+                    size += st.st_size
+                    mtime = max(mtime, st.st_mtime_ns)
+        elif os.path.exists(p):
+            st = os.stat(p)
+            n, size, mtime = 1, st.st_size, st.st_mtime_ns
+        sig[p] = [n, size, mtime]
+    return stable_hash(sig)
+
+
+def run_signature(config: Dict[str, Any], root: Path = ROOT) -> Dict[str, Optional[str]]:
+    """Input-data fingerprint and code version of an engine config (mid-run checkpoint key material)."""
+    return {"data": data_fingerprint(data_paths(config)), "code": code_version(root)}
+
+
+def result_key(config_hash: str, data_fp: str, code: str) -> str:
+    return stable_hash({"config_hash": config_hash, "data_fingerprint": data_fp, "code_version": code})
+
+
+def update_run_meta(run_dir: Path, **fields) -> None:
+    """Merge fields into run_dir/run_meta.json (memo_hit / memo_key annotations)."""
+    path = Path(run_dir) / "run_meta.json"
+    meta = json.loads(path.read_text()) if path.exists() else {}
+    meta.update(fields)
+    with open(path, "w") as f:
+        json.dump(meta, f, indent=2)
+
+
+class ResultStore:
+    """Directory of stored run summaries keyed by result_key()."""
+
+    def __init__(self, root: Path | str = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def _dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry_path = self._dir(key) / "entry.json"
+        if not entry_path.exists():
+            return None
+        try:
+            entry = json.loads(entry_path.read_text())
+        except Exception:
+            return None
+        if not all((self._dir(key) / f).exists() for f in entry.get("files", [])):
+            return None
+        return entry
+
+    def restore(self, key: str, dest: Path) -> Optional[Dict[str, Any]]:
+        """Copy a stored run's files into dest; None on a miss."""
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        dest = Path(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        for name in entry["files"]:
+            shutil.copy2(self._dir(key) / name, dest / name)
+        return entry
+
+    def save(self, key: str, src: Path, files: Iterable[str], meta: Dict[str, Any]) -> Dict[str, Any]:
+        """Store the existing files of src under key (atomic replace of any previous entry)."""
+        src = Path(src)
+        names = [f for f in files if (src / f).exists()]
+        entry = dict(meta)
+        entry.update({"key": key, "files": names, "stored_at": datetime.now().isoformat(), "source_dir": str(src)})
+        final = self._dir(key)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=f".{key[:12]}_", dir=str(final.parent)))
+        for name in names:
+            shutil.copy2(src / name, tmp / name)
+        (tmp / "entry.json").write_text(json.dumps(entry, indent=2, ensure_ascii=True, default=str))
+        if final.exists():
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+        with open(self.root / "index.jsonl", "a") as f:
+            f.write(json.dumps({k: entry.get(k) for k in ("key", "runner", "factor", "config_hash", "stored_at")}) + "\n")
+        return entry
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the backtest hot paths on synthetic universes.
+
+Each scale (N symbols x T trading days) is written once by
+backtest.synthetic_market under cache/synthetic_market/<key> and reused.
+The suite times, per scale:
+  - load_prices          cold DataEngine, get_price for every symbol (unpickle + normalize)
+  - get_price            warm cache, one-year window per symbol
+  - get_price_window     warm cache, zero-copy window per symbol
+  - get_universe         liquidity / market-cap filters on --dates evaluation dates
+  - compute_signals:<f>  one cross-section per evaluation date for each --factors entry
+  - execute_trades       entry fills for the momentum positions of the evaluation window
+  - calculate_forward_returns  forward returns of every momentum signal (--holding-period)
+  - run_backtest         fresh engine, momentum over the evaluation window (+ its stage profile)
+The evaluation window is the last --eval-days trading days of each history.
+
+Outputs (--out-dir, default audit/benchmarks/<timestamp>):
+  - benchmarks.json / benchmarks.csv (seconds = best of --repeat, items, ms per item)
+  - with --baseline <benchmarks.json>: baseline seconds and speedup per row
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.data_engine import DataEngine
+from backtest.synthetic_market import MarketSpec, engine_config, market_span, write_market
+
+DEFAULT_SCALES = "100x504,300x756,800x1008"
+DEFAULT_FACTORS = "momentum,reversal,low_vol,size,quality,value,sue_eps_basic"
+DATA_ROOT = PROJECT_ROOT / "cache" / "synthetic_market"
+
+
+def _timed(fn, repeat: int):
+    """(best seconds, last result) over `repeat` calls."""
+    best, out = None, None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+
+def _eval_dates(engine: BacktestEngine, eval_days: int, n_dates: int) -> tuple:
+    """(window start, window end, n_dates evenly spaced trading days in the window)."""
+    cal = engine.get_shared_calendar()
+    days = cal.between(None, None)
+    window = days[-min(eval_days, len(days)):]
+    step = max(1, len(window) // max(1, n_dates))
+    picks = [d.strftime("%Y-%m-%d") for d in window[::step][:n_dates]]
+    return window[0].strftime("%Y-%m-%d"), window[-1].strftime("%Y-%m-%d"), picks
+
+
+def _bench_scale(spec: MarketSpec, root: Path, args, log) -> list:
+    t0 = time.perf_counter()
+    write_market(spec, root)
+    log(f"[data] {spec.key} ready in {time.perf_counter() - t0:.1f}s at {root} span={market_span(root)}")
+    cfg = engine_config(root)
+    rows = []
+
+    def record(bench: str, seconds: float, items: int, **extra):
+        row = {
+            "scale": f"{spec.n_symbols}x{spec.n_days}",
+            "bench": bench,
+            "seconds": round(seconds, 6),
+            "items": int(items),
+            "ms_per_item": round(1000.0 * seconds / items, 4) if items else None,
+        }
+        row.update(extra)
+        rows.append(row)
+        log(f"[bench] {row['scale']:>10} {bench:<34} {seconds:9.3f}s  items={items}")
+
+    def cold_load():
+        data = DataEngine(cfg["PRICE_DIR_ACTIVE"], cfg["PRICE_DIR_DELISTED"], cfg["DELISTED_INFO"])
+        return data, sum(data.get_price(s) is not None for s in data.get_all_symbols())
+
+    seconds, (_, n_loaded) = _timed(cold_load, args.repeat)
+    record("load_prices", seconds, n_loaded)
+
+    engine = BacktestEngine(cfg)
+    symbols = sorted(engine.data_engine.get_all_symbols())
+    start, end, dates = _eval_dates(engine, args.eval_days, args.dates)
+    year_ago = (pd.Timestamp(end) - pd.Timedelta(days=365)).strftime("%Y-%m-%d")
+    for s in symbols:
+        engine.data_engine.get_price(s)
+
+    seconds, _ = _timed(lambda: [engine.data_engine.get_price(s, year_ago, end) for s in symbols], args.repeat)
+    record("get_price", seconds, len(symbols))
+    seconds, _ = _timed(lambda: [engine.data_engine.get_price_window(s, year_ago, end) for s in symbols], args.repeat)
+    record("get_price_window", seconds, len(symbols))
+
+    seconds, sizes = _timed(lambda: [len(engine.universe_builder.get_universe(d)) for d in dates], args.repeat)
+    record("get_universe", seconds, len(dates), mean_universe=round(sum(sizes) / max(1, len(sizes)), 1))
+
+    fe = engine.factor_engine
+    for factor in args.factor_list:
+        seconds, frames = _timed(lambda: [fe.compute_signals(d, {factor: 1.0}) for d in dates], args.repeat)
+        record(f"compute_signals:{factor}", seconds, len(dates),
+               mean_names=round(sum(len(f) for f in frames) / max(1, len(frames)), 1))
+
+    # Momentum signals / positions of the whole evaluation window feed the execution benches
+    reb = engine._generate_rebalance_dates(start, end, args.rebalance_freq)
+    signals = [fe.compute_signals(d, {"momentum": 1.0}) for d in reb]
+    signals = [s for s in signals if s is not None and len(s) > 0]
+    signals_df = pd.concat(signals, ignore_index=True) if signals else pd.DataFrame(
+        columns=["symbol", "date", "signal"])
+    positions = [fe.build_positions(s, long_pct=0.2, short_pct=0.0) for s in signals]
+    positions = [p for p in positions if p is not None and len(p) > 0]
+    positions_df = pd.concat(positions, ignore_index=True) if positions else pd.DataFrame(
+        columns=["symbol", "date", "position"])
+    sim = engine.execution_simulator
+    sim.set_trading_calendar(engine._get_trading_calendar(start, end))
+
+    seconds, _ = _timed(lambda: sim.execute_trades(positions_df), args.repeat)
+    record("execute_trades", seconds, len(positions_df))
+    seconds, _ = _timed(lambda: sim.calculate_forward_returns(signals_df, holding_period=args.holding_period),
+                        args.repeat)
+    record("calculate_forward_returns", seconds, len(signals_df))
+
+    def full_run():
+        eng = BacktestEngine(cfg)
+        return eng.run_backtest(start, end, {"momentum": 1.0}, rebalance_freq=args.rebalance_freq,
+                                holding_period=args.holding_period, long_pct=0.2)
+
+    seconds, res = _timed(full_run, args.repeat)
+    record("run_backtest", seconds, len(res["rebalance_dates"]), profile=res.get("profile"))
+    return rows
+
+
+def _attach_baseline(rows: list, path: Path) -> None:
+    with open(path) as f:
+        base = {(r["scale"], r["bench"]): r for r in json.load(f).get("rows") or []}
+    for r in rows:
+        b = base.get((r["scale"], r["bench"]))
+        if b and b.get("seconds"):
+            r["baseline_seconds"] = b["seconds"]
+            r["speedup"] = round(float(b["seconds"]) / r["seconds"], 3) if r["seconds"] else None
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Time the backtest hot paths on deterministic synthetic universes.")
+    ap.add_argument("--scales", default=DEFAULT_SCALES, help="Comma list of <symbols>x<days>")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--factors", default=DEFAULT_FACTORS, help="Factors for the compute_signals benches")
+    ap.add_argument("--dates", type=int, default=8, help="Evaluation dates for get_universe / compute_signals")
+    ap.add_argument("--eval-days", type=int, default=126, help="Trading days of the execution / run_backtest window")
+    ap.add_argument("--rebalance-freq", type=int, default=5)
+    ap.add_argument("--holding-period", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=1, help="Report the best of N timings per bench")
+    ap.add_argument("--data-dir", default="", help="Synthetic market root (default: cache/synthetic_market)")
+    ap.add_argument("--out-dir", default="", help="Default: audit/benchmarks/<timestamp>")
+    ap.add_argument("--baseline", default="", help="Earlier benchmarks.json to compare against")
+    args = ap.parse_args(argv)
+    args.factor_list = [f.strip() for f in args.factors.split(",") if f.strip()]
+
+    specs = [MarketSpec.parse(s.strip(), seed=args.seed) for s in args.scales.split(",") if s.strip()]
+    data_root = Path(args.data_dir).expanduser().resolve() if args.data_dir else DATA_ROOT
+    if args.out_dir:
+        out_dir = Path(args.out_dir).expanduser().resolve()
+    else:
+        out_dir = PROJECT_ROOT / "audit" / "benchmarks" / datetime.now().strftime("%Y-%m-%d_%H%M%S")
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = []
+    for spec in specs:
+        rows.extend(_bench_scale(spec, data_root / spec.key, args, log=lambda m: print(m, flush=True)))
+    if args.baseline:
+        _attach_baseline(rows, Path(args.baseline))
+
+    payload = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "scales": [s.key for s in specs],
+        "settings": {k: getattr(args, k) for k in ("seed", "factors", "dates", "eval_days", "rebalance_freq",
+                                                    "holding_period", "repeat")},
+        "rows": rows,
+    }
+    (out_dir / "benchmarks.json").write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+    pd.DataFrame([{k: v for k, v in r.items() if k != "profile"} for r in rows]).to_csv(
+        out_dir / "benchmarks.csv", index=False
+    )
+    print(f"[done] {len(rows)} benches -> {out_dir}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
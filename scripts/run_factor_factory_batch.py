@@ -2,19 +2,30 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import faulthandler
 import itertools
 import json
+import math
 import os
 import random
 import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
 from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 
+if TYPE_CHECKING:
+    from scripts.memory_governor import Footprint, MemoryGovernor
+
 
 ROOT = Path(__file__).resolve().parents[1]
 
@@ -60,7 +71,9 @@ class Candidate:
     cmd: list[str]
 
 
-def _make_candidates(policy: dict[str, Any], run_dir: Path, max_candidates: int, seed: int) -> list[Candidate]:
+def _make_candidates(
+    policy: dict[str, Any], run_dir: Path, max_candidates: int, seed: int, force: bool = False
+) -> list[Candidate]:
     families = policy.get("families") if isinstance(policy.get("families"), list) else []
     years = int(policy.get("years", 2))
     default_sets = [str(x) for x in (policy.get("default_set") or [])]
@@ -106,6 +119,8 @@ def _make_candidates(policy: dict[str, Any], run_dir: Path, max_candidates: int,
             ]
             for s in sets:
                 cmd += ["--set", s]
+            if force:
+                cmd.append("--force")
 
             cands.append(
                 Candidate(
@@ -125,35 +140,307 @@ def _make_candidates(policy: dict[str, Any], run_dir: Path, max_candidates: int,
     return cands
 
 
-def _run_one(c: Candidate, dry_run: bool) -> dict[str, Any]:
-    if dry_run:
-        return {
-            "candidate_id": c.candidate_id,
-            "factor": c.factor,
-            "family": c.family,
-            "return_code": 0,
-            "dry_run": True,
-            "out_dir": str(c.out_dir),
-            "log_path": str(c.log_path),
-            "cmd": c.cmd,
-        }
+def _memo_hit(c: Candidate) -> bool:
+    meta_path = c.out_dir / c.factor / "run_meta.json"
+    try:
+        return bool(_read_json(meta_path).get("memo_hit", False))
+    except Exception:
+        return False
 
-    env = dict(os.environ)
-    env["PYTHONPATH"] = str(ROOT)
-    with open(c.log_path, "w") as f:
-        p = subprocess.run(c.cmd, cwd=str(ROOT), env=env, stdout=f, stderr=subprocess.STDOUT)
+
+def _result(
+    c: Candidate, return_code: int, dry_run: bool, seconds: float | None = None, peak_gb: float | None = None
+) -> dict[str, Any]:
     return {
         "candidate_id": c.candidate_id,
         "factor": c.factor,
         "family": c.family,
-        "return_code": int(p.returncode),
-        "dry_run": False,
+        "return_code": int(return_code),
+        "dry_run": dry_run,
         "out_dir": str(c.out_dir),
         "log_path": str(c.log_path),
         "cmd": c.cmd,
+        "seconds": seconds,
+        "peak_rss_gb": round(peak_gb, 3) if peak_gb is not None else None,
+        "memo_hit": False if dry_run else _memo_hit(c),
     }
 
 
+def _run_one(c: Candidate, dry_run: bool) -> dict[str, Any]:
+    if dry_run:
+        return _result(c, 0, dry_run=True)
+
+    t0 = time.time()
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT)
+    with open(c.log_path, "w") as f:
+        rc, peak_gb = _memory_governor().run_measured(
+            c.cmd, cwd=str(ROOT), env=env, stdout=f, stderr=subprocess.STDOUT
+        )
+    return _result(c, rc, dry_run=False, seconds=time.time() - t0, peak_gb=peak_gb)
+
+
+def _segmented_runner():
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import scripts.run_segmented_factors as rsf
+
+    return rsf
+
+
+def _memory_governor():
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import scripts.memory_governor as mg
+
+    return mg
+
+
+def _init_worker(store_root: str) -> None:
+    """Pool initializer: import the runner once and give it a worker-wide warm EnginePool."""
+    # The runner's relative defaults ('../data/...') resolve against the cwd, as for the subprocess runs
+    os.chdir(ROOT)
+    rsf = _segmented_runner()
+    from backtest.engine_pool import EnginePool
+
+    rsf.ENGINE_POOL = EnginePool(store_root=store_root or None)
+
+
+def _run_in_worker(c: Candidate) -> dict[str, Any]:
+    """Same run as the subprocess command (argv after the script path), inside a long-lived worker."""
+    rsf = _segmented_runner()
+    t0 = time.time()
+    code = 0
+    mg = _memory_governor()
+    mg.reset_peak_rss()
+    with open(c.log_path, "w") as f, contextlib.redirect_stdout(f), contextlib.redirect_stderr(f):
+        try:
+            rsf.main(c.cmd[2:])
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = int(e.code or 0)
+            else:
+                print(e.code)
+                code = 1
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            # Candidates differ in config, so engines are not reused; the data engines behind them are
+            rsf.ENGINE_POOL.release_engines()
+    # rsf.main() pointed faulthandler at the candidate log, whose descriptor is closed now
+    faulthandler.enable(file=sys.__stderr__)
+    return _result(c, code, dry_run=False, seconds=time.time() - t0, peak_gb=mg.peak_rss_gb())
+
+
+def _prepare_stores(cands: list[Candidate], store_root: str) -> str:
+    """Build the shared price / fundamentals stores once in the parent (first candidate per factor)."""
+    rsf = _segmented_runner()
+    from backtest.engine_pool import EnginePool
+
+    builder = EnginePool(store_root=store_root)
+    opts = argparse.Namespace(use_cache=False, cache_dir="", refresh_cache=False)
+    seen = set()
+    try:
+        for c in cands:
+            spec = rsf.FACTOR_SPECS.get(c.factor)
+            if spec is None or c.factor in seen:
+                continue
+            seen.add(c.factor)
+            cfg = rsf._load_cfg(spec["config_path"])
+            if isinstance(spec.get("set"), list):
+                rsf._apply_overrides(cfg, spec["set"])
+            rsf._apply_overrides(cfg, c.sets)
+            active = {k for k, v in spec["weights"].items() if v is not None and float(v) != 0.0}
+            builder.prepare_stores(rsf._engine_config(cfg, opts), fundamentals=bool(active & {"quality", "value"}))
+    except Exception as e:
+        print(f"[warn] shared store unavailable, workers load pickles: {e}", flush=True)
+        return ""
+    return store_root
+
+
+def _candidate_footprint(governor: MemoryGovernor, c: Candidate) -> Footprint:
+    """Projected memory of one candidate run: its factor's input data and active factor count."""
+    key = f"factor_factory_batch:{c.factor}"
+    rsf = _segmented_runner()
+    spec = rsf.FACTOR_SPECS.get(c.factor)
+    if spec is None:
+        return governor.footprint(key)
+    try:
+        cfg = rsf._load_cfg(spec["config_path"])
+        if isinstance(spec.get("set"), list):
+            rsf._apply_overrides(cfg, spec["set"])
+        rsf._apply_overrides(cfg, c.sets)
+        opts = argparse.Namespace(use_cache=False, cache_dir="", refresh_cache=False)
+        from scripts.result_store import data_paths
+
+        paths = data_paths(rsf._engine_config(cfg, opts), engine_defaults=False)
+    except Exception:
+        paths = []
+    active = [k for k, v in spec["weights"].items() if v is not None and float(v) != 0.0]
+    return governor.footprint(key, paths, len(active))
+
+
+def _execute_queued(
+    cands: list[Candidate], footprints: dict[str, Footprint], governor: MemoryGovernor, queue_db: str,
+    local_workers: int,
+) -> list[dict[str, Any]]:
+    """Enqueue the candidates on the shared work queue, work it with local_workers here, wait for all."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import scripts.work_queue as wqm
+
+    wq = wqm.WorkQueue(queue_db)
+    queue = cands[0].out_dir.parent.name
+    payloads = []
+    for c in cands:
+        fp = footprints[c.candidate_id]
+        payloads.append(wqm.command_task(c.cmd, c.log_path, mem_key=fp.key, mem_gb=fp.gb))
+    # Rung candidates of a halving search share an id, their commands differ
+    ids = [f"{queue}/{c.candidate_id}/{wqm.task_key(p)}" for c, p in zip(cands, payloads)]
+    wq.enqueue(payloads, queue=queue, max_attempts=1, task_ids=ids)
+    print(f"[queue] {len(ids)} tasks on {queue_db} queue={queue} local_workers={local_workers}", flush=True)
+
+    workers = None
+    if local_workers > 0:
+        workers = threading.Thread(
+            target=wqm.run_local_workers,
+            args=(wq, local_workers),
+            kwargs={"queue": queue, "governor": governor, "poll_seconds": 2.0},
+            daemon=True,
+        )
+        workers.start()
+    done = wq.wait(ids, poll_seconds=5.0, on_progress=lambda n: print(f"[queue] {n}", flush=True))
+    rows = {r["task_id"]: r for r in done}
+    if workers is not None:
+        workers.join()
+
+    results = []
+    for c, tid in zip(cands, ids):
+        row = rows[tid]
+        res = row["result"] or {}
+        rc = 0 if row["state"] == "done" else int(res.get("rc") or 1)
+        r = _result(c, rc, dry_run=False, seconds=res.get("seconds"), peak_gb=res.get("peak_rss_gb"))
+        r["worker"] = row["worker"]
+        r["mem_estimate_gb"] = footprints[c.candidate_id].gb
+        r["mem_estimate_source"] = footprints[c.candidate_id].source
+        results.append(r)
+    return results
+
+
+def _execute(
+    cands: list[Candidate], jobs: int, dry_run: bool, executor: str, store_root: str, governor: MemoryGovernor,
+    queue_db: str = "", queue_local_workers: int = -1,
+) -> list[dict[str, Any]]:
+    results = []
+    if dry_run:
+        with ThreadPoolExecutor(max_workers=jobs) as ex:
+            futs = [ex.submit(_run_one, c, dry_run) for c in cands]
+            for fut in as_completed(futs):
+                results.append(fut.result())
+        return results
+    footprints = {c.candidate_id: _candidate_footprint(governor, c) for c in cands}
+    if executor == "queue":
+        local = jobs if queue_local_workers < 0 else queue_local_workers
+        return _execute_queued(cands, footprints, governor, queue_db, local)
+    items = [(c.candidate_id, footprints[c.candidate_id].gb, c) for c in cands]
+    if executor == "subprocess":
+        pool = ThreadPoolExecutor(max_workers=jobs)
+        fn = partial(_run_one, dry_run=False)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(store_root,))
+        fn = _run_in_worker
+    with pool as ex:
+        for c, fut in governor.as_completed(ex, fn, items, max_in_flight=jobs):
+            r = fut.result()
+            fp = footprints[c.candidate_id]
+            r["mem_estimate_gb"] = fp.gb
+            r["mem_estimate_source"] = fp.source
+            governor.record(fp.key, r["peak_rss_gb"] or 0.0, fp.data_bytes)
+            results.append(r)
+            print(
+                f"[run] {len(results)}/{len(cands)} {r['candidate_id']} rc={r['return_code']} "
+                f"{r['seconds']:.1f}s peak={r['peak_rss_gb'] or 0:.2f}GB est={fp.gb:.2f}GB({fp.source})",
+                flush=True,
+            )
+    return results
+
+
+def _segment_order(n: int) -> list[int]:
+    """Segment indices ordered so every prefix is spread evenly over the full span."""
+    order: list[int] = []
+    for k in range(1, n + 1):
+        for i in range(k):
+            idx = int(round(i * (n - 1) / (k - 1))) if k > 1 else (n - 1) // 2
+            if idx not in order:
+                order.append(idx)
+    return order
+
+
+def _halving_schedule(n_segments: int, eta: int, min_segments: int) -> list[int]:
+    """Segments per rung: min_segments, x eta per rung, ending at all segments."""
+    sizes = [max(1, min(int(min_segments), n_segments))]
+    while sizes[-1] < n_segments:
+        sizes.append(min(n_segments, sizes[-1] * max(2, int(eta))))
+    return sizes
+
+
+def _rung_candidate(c: Candidate, rung: int, indices: list[int]) -> Candidate:
+    """Candidate restricted to some segments; --resume keeps the segments of earlier rungs."""
+    cmd = list(c.cmd) + ["--only-segments", ",".join(str(i) for i in sorted(indices))]
+    if rung > 0:
+        cmd.append("--resume")
+    return replace(c, log_path=c.out_dir / f"runner_rung{rung}.log", cmd=cmd)
+
+
+def _halving_metric(summary: dict[str, Any], metric: str) -> float:
+    if summary.get("n_valid", 0) == 0:
+        return -1e9
+    if metric == "ic_t":
+        # t-stat of segment ICs; a single segment falls back to its IC
+        mean, std, n = summary["ic_overall_mean"], summary["ic_overall_std"], summary["n_valid"]
+        return mean / (std / math.sqrt(n)) if n > 1 and std > 0 else mean
+    if metric == "ic_mean":
+        return float(summary["ic_overall_mean"])
+    return float(summary["score"])
+
+
+def _prune(cands: list[Candidate], rung: int, eta: int, metric: str, failed: set[str]):
+    """(survivors, log rows): keep the top ceil(n / eta) of each family by metric."""
+    survivors: list[Candidate] = []
+    log_rows: list[dict[str, Any]] = []
+    by_family: dict[str, list[Candidate]] = {}
+    for c in cands:
+        by_family.setdefault(c.family, []).append(c)
+    for family, members in by_family.items():
+        scored = []
+        for c in members:
+            summary = _summarize_candidate(c)
+            value = -1e9 if c.candidate_id in failed else _halving_metric(summary, metric)
+            scored.append((value, c.candidate_id, c, summary))
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        keep = max(1, math.ceil(len(scored) / max(2, int(eta))))
+        for rank, (value, cid, c, summary) in enumerate(scored, start=1):
+            kept = rank <= keep and cid not in failed
+            if kept:
+                survivors.append(c)
+            log_rows.append(
+                {
+                    "rung": rung,
+                    "candidate_id": cid,
+                    "family": family,
+                    "n_segments": summary.get("n_segments"),
+                    "metric": metric,
+                    "value": value,
+                    "rank_in_family": rank,
+                    "family_size": len(scored),
+                    "kept": kept,
+                    "reason": "failed" if cid in failed else ("promoted" if kept else f"below top {keep}"),
+                }
+            )
+    return survivors, log_rows
+
+
 def _summarize_candidate(c: Candidate) -> dict[str, Any]:
     summary_csv = c.out_dir / c.factor / "segment_summary.csv"
     if not summary_csv.exists():
@@ -219,7 +506,18 @@ def _write_md(path: Path, payload: dict[str, Any], ranked: pd.DataFrame) -> None
         f"- run_dir: `{payload.get('run_dir')}`",
         f"- dry_run: {payload.get('dry_run')}",
         f"- jobs: {payload.get('jobs')}",
+        f"- mem_budget_gb: {payload.get('mem_budget_gb')} (peak used {payload.get('mem_peak_used_gb')})",
         f"- candidates: {payload.get('candidate_count')}",
+        f"- search: {payload.get('search')}",
+    ]
+    halving = payload.get("halving")
+    if halving:
+        lines += [
+            f"- halving: eta={halving.get('eta')} metric={halving.get('metric')} schedule={halving.get('schedule')}",
+            f"- segment runs: {halving.get('segment_runs')} (full grid {halving.get('full_grid_segment_runs')})",
+            f"- pruning_log: `{halving.get('pruning_log_csv')}`",
+        ]
+    lines += [
         "",
         "## Top Candidates",
         "",
@@ -245,6 +543,42 @@ def main() -> None:
     ap.add_argument("--max-candidates", type=int, default=0)
     ap.add_argument("--seed", type=int, default=42)
     ap.add_argument("--dry-run", action="store_true")
+    ap.add_argument(
+        "--executor",
+        choices=["pool", "subprocess", "queue"],
+        default="pool",
+        help="pool: long-lived worker processes with warm data; subprocess: one interpreter per candidate; "
+        "queue: tasks on the multi-host work queue (--queue-db)",
+    )
+    ap.add_argument(
+        "--queue-db",
+        default="cache/work_queue/queue.sqlite",
+        help="queue executor: work queue database on a filesystem shared with the worker hosts",
+    )
+    ap.add_argument(
+        "--queue-local-workers",
+        type=int,
+        default=-1,
+        help="queue executor: workers run by this process (-1 = --jobs, 0 = only remote workers)",
+    )
+    ap.add_argument("--store-dir", default="", help="Shared price/fundamentals store (default: cache/shared_store)")
+    ap.add_argument("--no-shared-store", action="store_true")
+    ap.add_argument("--force", action="store_true", help="Recompute candidates already in the result store")
+    ap.add_argument(
+        "--mem-budget-gb",
+        type=float,
+        default=0.0,
+        help="Run candidates only while their projected memory fits (0 = V4_MEM_BUDGET_GB or 75%% of RAM)",
+    )
+    ap.add_argument(
+        "--search",
+        choices=["full", "halving"],
+        default="full",
+        help="full: every candidate runs every segment; halving: successive halving over segment subsets",
+    )
+    ap.add_argument("--eta", type=int, default=3, help="halving: keep 1/eta per family, x eta segments per rung")
+    ap.add_argument("--min-segments", type=int, default=1, help="halving: segments in the first rung")
+    ap.add_argument("--halving-metric", choices=["ic_t", "ic_mean", "score"], default="ic_t")
     args = ap.parse_args()
 
     policy_path = (ROOT / args.policy_json).resolve()
@@ -257,7 +591,7 @@ def main() -> None:
     run_dir = (ROOT / "audit" / "factor_factory" / f"{ts}_{batch_name}").resolve()
     run_dir.mkdir(parents=True, exist_ok=True)
 
-    cands = _make_candidates(policy, run_dir, max_candidates=int(args.max_candidates), seed=int(args.seed))
+    cands = _make_candidates(policy, run_dir, max_candidates=int(args.max_candidates), seed=int(args.seed), force=bool(args.force))
     if not cands:
         raise SystemExit("no candidates generated from policy")
 
@@ -279,15 +613,60 @@ def main() -> None:
     plan_csv = run_dir / "candidate_plan.csv"
     plan_df.to_csv(plan_csv, index=False)
 
-    results = []
     jobs = max(1, int(args.jobs))
-    with ThreadPoolExecutor(max_workers=jobs) as ex:
-        futs = [ex.submit(_run_one, c, bool(args.dry_run)) for c in cands]
-        for fut in as_completed(futs):
-            results.append(fut.result())
+    store_root = ""
+    if not args.dry_run and args.executor == "pool" and not args.no_shared_store:
+        store_dir = Path(args.store_dir).expanduser().resolve() if args.store_dir else ROOT / "cache" / "shared_store"
+        store_root = _prepare_stores(cands, str(store_dir))
+
+    queue_db = str((ROOT / args.queue_db).resolve())
+    mg = _memory_governor()
+    governor = mg.MemoryGovernor(mg.resolve_budget_gb(args.mem_budget_gb), name="factor_factory_batch")
+    rung_of = {c.candidate_id: 0 for c in cands}
+    pruning_rows: list[dict[str, Any]] = []
+    schedule: list[int] = []
+    segment_runs = 0
+    n_segments = 0
+    if args.search == "halving":
+        rsf = _segmented_runner()
+        n_segments = len(rsf._segment_ranges(rsf.DEFAULT_START, rsf.DEFAULT_END, cands[0].years))
+        order = _segment_order(n_segments)
+        schedule = _halving_schedule(n_segments, args.eta, args.min_segments)
+        print(f"[halving] segments={n_segments} schedule={schedule} eta={args.eta}", flush=True)
+        results = []
+        alive = list(cands)
+        prev = 0
+        for rung, size in enumerate(schedule):
+            t0 = time.time()
+            rung_results = _execute(
+                [_rung_candidate(c, rung, order[:size]) for c in alive],
+                jobs, bool(args.dry_run), args.executor, store_root, governor, queue_db, args.queue_local_workers,
+            )
+            for r in rung_results:
+                r["rung"] = rung
+                rung_of[r["candidate_id"]] = rung
+            results.extend(rung_results)
+            segment_runs += len(alive) * (size - prev)
+            prev = size
+            print(f"[halving] rung {rung}: {len(alive)} candidates x {size} segments {time.time() - t0:.1f}s", flush=True)
+            if args.dry_run or rung == len(schedule) - 1:
+                break
+            failed = {r["candidate_id"] for r in rung_results if r["return_code"] != 0}
+            alive, log_rows = _prune(alive, rung, args.eta, args.halving_metric, failed)
+            pruning_rows.extend(log_rows)
+    else:
+        results = _execute(
+            cands, jobs, bool(args.dry_run), args.executor, store_root, governor, queue_db, args.queue_local_workers
+        )
+    governor.close()
     res_df = pd.DataFrame(results).sort_values(["return_code", "candidate_id"])
     res_csv = run_dir / "execution_results.csv"
     res_df.to_csv(res_csv, index=False)
+    pruning_csv = run_dir / "pruning_log.csv"
+    if args.search == "halving":
+        pd.DataFrame(pruning_rows).to_csv(pruning_csv, index=False)
+        # The last rung a candidate ran decides its return code in the ranking
+        res_df = res_df.sort_values(["candidate_id", "rung"]).drop_duplicates("candidate_id", keep="last")
 
     ranked_rows = []
     if not args.dry_run:
@@ -297,10 +676,14 @@ def main() -> None:
             c = by_id[cid]
             s = _summarize_candidate(c)
             s["return_code"] = int(r.get("return_code", 1))
+            if args.search == "halving":
+                s["halving_rung"] = rung_of[cid]
             ranked_rows.append(s)
     ranked_df = pd.DataFrame(ranked_rows)
     if len(ranked_df) > 0:
-        ranked_df = ranked_df.sort_values("score", ascending=False)
+        # Halving: candidates that reached the last rung (all segments) rank ahead of pruned ones
+        keys = ["halving_rung", "score"] if args.search == "halving" else ["score"]
+        ranked_df = ranked_df.sort_values(keys, ascending=False)
     ranked_csv = run_dir / "leaderboard.csv"
     ranked_df.to_csv(ranked_csv, index=False)
 
@@ -310,12 +693,27 @@ def main() -> None:
         "run_dir": str(run_dir),
         "dry_run": bool(args.dry_run),
         "jobs": jobs,
+        "mem_budget_gb": governor.budget_gb,
+        "mem_peak_used_gb": round(governor.peak_used_gb, 3),
+        "executor": "dry_run" if args.dry_run else args.executor,
         "candidate_count": int(len(cands)),
+        "memo_hits": int(res_df["memo_hit"].sum()) if len(res_df) else 0,
         "plan_csv": str(plan_csv),
         "execution_csv": str(res_csv),
         "leaderboard_csv": str(ranked_csv),
         "all_success": bool((res_df["return_code"] == 0).all()) if len(res_df) else False,
+        "search": args.search,
     }
+    if args.search == "halving":
+        payload["halving"] = {
+            "eta": int(args.eta),
+            "metric": args.halving_metric,
+            "segments": n_segments,
+            "schedule": schedule,
+            "segment_runs": segment_runs,
+            "full_grid_segment_runs": int(len(cands) * n_segments),
+            "pruning_log_csv": str(pruning_csv),
+        }
     out_json = run_dir / "factor_factory_batch_report.json"
     _write_json(out_json, payload)
     out_md = run_dir / "factor_factory_batch_report.md"
@@ -45,6 +45,7 @@ def _write_md(path: Path, payload: dict[str, Any]) -> None:
         f"- queue_json: `{payload.get('queue_json')}`",
         f"- queue_name: `{payload.get('queue_name')}`",
         f"- jobs: {payload.get('jobs')}",
+        f"- mem_budget_gb: {payload.get('mem_budget_gb') or 'auto'}",
         f"- repeat: {payload.get('repeat')}",
         f"- cycles_completed: {payload.get('cycles_completed')}",
         "",
@@ -76,7 +77,18 @@ def main() -> None:
         default="configs/research/factory_queue/run_approval.json",
         help="Approval JSON path. Queue run is blocked unless this file explicitly approves the target queue.",
     )
-    ap.add_argument("--jobs", type=int, default=8, help="Parallel workers per batch.")
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Parallel workers per batch (upper bound; the batch admits fewer when --mem-budget-gb is short).",
+    )
+    ap.add_argument(
+        "--mem-budget-gb",
+        type=float,
+        default=0.0,
+        help="Memory budget per batch (0 = V4_MEM_BUDGET_GB or 75%% of RAM); see scripts/memory_governor.py.",
+    )
     ap.add_argument("--repeat", action="store_true", help="Repeat queue cycles indefinitely.")
     ap.add_argument("--sleep-sec", type=float, default=5.0, help="Sleep between queue items.")
     ap.add_argument(
@@ -116,6 +128,7 @@ def main() -> None:
     continue_on_error = bool(args.continue_on_error or bool(queue.get("continue_on_error", False)))
     sleep_sec = float(queue.get("sleep_sec", args.sleep_sec))
     jobs = max(1, int(args.jobs))
+    mem_budget_gb = float(queue.get("mem_budget_gb", args.mem_budget_gb) or 0.0)
 
     ts = datetime.now().strftime("%Y-%m-%d_%H%M%S")
     out_dir = (ROOT / "audit" / "factor_factory_queue" / f"{ts}_{queue_name}").resolve()
@@ -151,6 +164,8 @@ def main() -> None:
                     "--jobs",
                     str(jobs),
                 ]
+                if mem_budget_gb > 0:
+                    cmd += ["--mem-budget-gb", str(mem_budget_gb)]
                 if max_candidates is not None:
                     cmd += ["--max-candidates", str(int(max_candidates))]
                 if bool(item.get("dry_run", False)):
@@ -187,6 +202,7 @@ def main() -> None:
                 "queue_json": str(queue_path),
                 "queue_name": queue_name,
                 "jobs": jobs,
+                "mem_budget_gb": mem_budget_gb,
                 "repeat": repeat,
                 "continue_on_error": continue_on_error,
                 "cycles_completed": cycle if idx == len(items) else cycle - 1,
@@ -14,17 +14,84 @@ import yaml
 ROOT = Path(__file__).resolve().parents[1]
 
 
-def _run(cmd: list[str], dry_run: bool) -> int:
+def _run(cmd: list[str], dry_run: bool, peak: dict | None = None) -> int:
+    """Run cmd; with a peak dict, a local run also stores its peak RSS (GB) under peak["gb"]."""
     print("[cmd]", " ".join(cmd), flush=True)
     if dry_run:
         return 0
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from scripts.research_daemon import run_command
+
+    via_daemon = run_command(cmd, cwd=ROOT)
+    if via_daemon is not None:
+        return int(via_daemon.get("rc", 1))
     env = dict(os.environ)
     existing = env.get("PYTHONPATH", "")
     env["PYTHONPATH"] = str(ROOT) if not existing else f"{ROOT}:{existing}"
+    if peak is not None:
+        from scripts.memory_governor import run_measured
+
+        rc, peak["gb"] = run_measured(cmd, cwd=str(ROOT), env=env)
+        return rc
     p = subprocess.run(cmd, cwd=str(ROOT), env=env)
     return int(p.returncode)
 
 
+def _wf_data_paths(market_cap_dir: str) -> list[str]:
+    """Inputs a walk-forward run loads: backtest/config.py price dirs + delisted list, and the market cap dir."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    import backtest.config as core
+
+    core_dir = ROOT / "backtest"
+    names = ["PRICE_DIR_ACTIVE", "PRICE_DIR_DELISTED", "DELISTED_INFO"]
+    if getattr(core, "USE_ADJ_PRICES", False):
+        names += ["PRICE_DIR_ACTIVE_ADJ", "PRICE_DIR_DELISTED_ADJ"]
+    paths = [str((core_dir / getattr(core, n)).resolve()) for n in names if getattr(core, n, "")]
+    if market_cap_dir:
+        paths.append(market_cap_dir)
+    return [p for p in paths if os.path.exists(p)]
+
+
+def _run_shards_queued(shard_cmds: list[list[str]], wf_out: Path, args) -> list[int]:
+    """Run the WF shards as tasks of the multi-host work queue; returns their return codes."""
+    import threading
+
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from scripts.memory_governor import MemoryGovernor, resolve_budget_gb
+    from scripts.work_queue import WorkQueue, command_task, run_local_workers, task_key
+
+    db = Path(args.wf_queue_db).expanduser()
+    wq = WorkQueue(db if db.is_absolute() else ROOT / db)
+    governor = MemoryGovernor(resolve_budget_gb(args.mem_budget_gb), name="production_gates_wf")
+    fp = governor.footprint(f"run_walk_forward:{args.factor}", _wf_data_paths(""), len(args.factor.split(",")))
+    queue = f"{wf_out.parent.name}_wf"
+    payloads = [
+        command_task(cmd, wf_out / f"shard_{i:02d}.log", mem_key=fp.key, mem_gb=fp.gb)
+        for i, cmd in enumerate(shard_cmds)
+    ]
+    ids = [f"{queue}/shard_{i:02d}/{task_key(p)}" for i, p in enumerate(payloads)]
+    wq.enqueue(payloads, queue=queue, max_attempts=1, task_ids=ids)
+    local = len(shard_cmds) if args.wf_queue_local_workers < 0 else int(args.wf_queue_local_workers)
+    print(f"[queue] wf shards={len(ids)} db={wq.path} queue={queue} local_workers={local}", flush=True)
+    workers = None
+    if local > 0:
+        workers = threading.Thread(
+            target=run_local_workers, args=(wq, local),
+            kwargs={"queue": queue, "governor": governor, "poll_seconds": 2.0}, daemon=True,
+        )
+        workers.start()
+    try:
+        rows = {r["task_id"]: r for r in wq.wait(ids, poll_seconds=5.0)}
+        if workers is not None:
+            workers.join()
+    finally:
+        governor.close()
+    return [0 if rows[t]["state"] == "done" else int((rows[t]["result"] or {}).get("rc") or 1) for t in ids]
+
+
 def _latest_json(path: Path) -> Path | None:
     files = []
     for p in path.glob("*.json"):
@@ -110,6 +177,23 @@ def main() -> None:
     p.add_argument("--wf-end-year", type=int, default=2025)
     p.add_argument("--wf-rebalance-mode", default="None", help="WF REBALANCE_MODE override (combo default: None)")
     p.add_argument("--wf-shards", type=int, default=1, help="Parallel shards for walk-forward by test_year")
+    p.add_argument(
+        "--wf-queue-db",
+        default="",
+        help="Run WF shards as tasks of this multi-host work queue (scripts/work_queue.py) instead of local threads",
+    )
+    p.add_argument(
+        "--wf-queue-local-workers",
+        type=int,
+        default=-1,
+        help="With --wf-queue-db: shard workers run by this process (-1 = one per shard, 0 = only remote workers)",
+    )
+    p.add_argument(
+        "--mem-budget-gb",
+        type=float,
+        default=0.0,
+        help="Memory budget for parallel WF shards (0 = V4_MEM_BUDGET_GB or 75%% of RAM)",
+    )
     p.add_argument("--stress-cost-multiplier", type=float, default=1.5)
     p.add_argument("--stress-min-market-cap", type=float, default=2_000_000_000)
     p.add_argument("--stress-min-dollar-volume", type=float, default=5_000_000)
@@ -244,11 +328,39 @@ def main() -> None:
             if args.dry_run:
                 for cmd in shard_cmds:
                     codes.append(_run(cmd, dry_run=True))
+            elif args.wf_queue_db:
+                codes = _run_shards_queued(shard_cmds, wf_out, args)
             else:
-                with cf.ThreadPoolExecutor(max_workers=len(shard_cmds)) as ex:
-                    futs = [ex.submit(_run, cmd, False) for cmd in shard_cmds]
-                    for fut in futs:
-                        codes.append(int(fut.result()))
+                if str(ROOT) not in sys.path:
+                    sys.path.insert(0, str(ROOT))
+                from scripts.memory_governor import MemoryGovernor, resolve_budget_gb
+
+                # Shards start only while their projected footprints fit the memory budget
+                governor = MemoryGovernor(resolve_budget_gb(args.mem_budget_gb), name="production_gates_wf")
+                mc_dir = str(mc_path) if args.stress_market_cap_dir else ""
+                fp = governor.footprint(
+                    f"run_walk_forward:{args.factor}", _wf_data_paths(mc_dir), len(args.factor.split(","))
+                )
+                print(
+                    f"[mem] wf shards={len(shard_cmds)} per-shard={fp.gb:.2f}GB({fp.source}) "
+                    f"budget={governor.budget_gb:.1f}GB",
+                    flush=True,
+                )
+
+                def _shard(i: int, cmd: list[str]) -> int:
+                    peak: dict = {}
+                    with governor.slot(f"shard_{i:02d}", fp.gb):
+                        rc = _run(cmd, False, peak=peak)
+                    governor.record(fp.key, peak.get("gb", 0.0), fp.data_bytes)
+                    return rc
+
+                try:
+                    with cf.ThreadPoolExecutor(max_workers=len(shard_cmds)) as ex:
+                        futs = [ex.submit(_shard, i, cmd) for i, cmd in enumerate(shard_cmds)]
+                        for fut in futs:
+                            codes.append(int(fut.result()))
+                finally:
+                    governor.close()
             wf_code = 0 if all(c == 0 for c in codes) else 1
 
             if not args.dry_run and wf_code == 0:
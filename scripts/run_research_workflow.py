@@ -40,6 +40,14 @@ def main() -> None:
         forwarded = forwarded[1:]
 
     cmd = [sys.executable, str(script)] + forwarded
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from scripts.research_daemon import try_daemon
+
+    via_daemon = try_daemon({"op": "run", "workflow": args.workflow, "argv": forwarded})
+    if via_daemon is not None:
+        raise SystemExit(int(via_daemon.get("rc", 1)))
+
     print("[dispatch]", " ".join(cmd), flush=True)
     env = dict(os.environ)
     existing = env.get("PYTHONPATH", "")
@@ -6,15 +6,41 @@ import argparse
 import faulthandler
 import gc
 import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import importlib.util as _ilu
 
 import pandas as pd
 
+from backtest.analysis_table import default_return_column
 from backtest.backtest_engine import BacktestEngine
+from backtest.engine_pool import EnginePool
 from backtest.performance_analyzer import PerformanceAnalyzer
+from backtest.profiler import merge_profiles
+from backtest.run_checkpoint import checkpoint_path
 import backtest.config as core
+from scripts.memory_governor import (
+    MemoryGovernor,
+    peak_rss_gb,
+    private_bytes,
+    reset_peak_rss,
+    resolve_budget_gb,
+    split_budget,
+)
+from scripts.result_store import (
+    DEFAULT_ROOT as RESULT_STORE_ROOT,
+    ResultStore,
+    code_version,
+    data_fingerprint,
+    data_paths,
+    force_requested,
+    result_key,
+    run_signature,
+    update_run_meta,
+)
 from scripts.research_governance import (
     build_manifest,
     check_non_negative_int,
@@ -27,6 +53,17 @@ from scripts.research_governance import (
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 CORE_DIR = Path(core.__file__).resolve().parent
+DEFAULT_START = getattr(core, "TRAIN_START", "2015-01-01")
+DEFAULT_END = getattr(core, "TEST_END", "2026-01-28")
+
+# Warm engines shared by every segment / factor with the same data config
+ENGINE_POOL = EnginePool()
+
+# Per-worker private-memory budget in --jobs mode (0 = unbounded); see run_parallel
+WORKER_MEM_BYTES = 0
+
+# Per-factor artifacts kept in the result store
+MEMO_FILES = ("segment_summary.csv", "ic_by_date.csv", "universe_filter_audit.csv", "run_meta.json")
 
 
 FACTOR_SPECS = {
@@ -738,6 +775,7 @@ def _make_engine_config(cfg):
         "TRANSACTION_COST": getattr(cfg, "TRANSACTION_COST", core.TRANSACTION_COST),
         "EXECUTION_DELAY": getattr(cfg, "EXECUTION_DELAY", core.EXECUTION_DELAY),
         "EXECUTION_USE_TRADING_DAYS": getattr(cfg, "EXECUTION_USE_TRADING_DAYS", False),
+        "EXECUTION_MODE": getattr(cfg, "EXECUTION_MODE", getattr(core, "EXECUTION_MODE", "trade")),
         "ENABLE_DYNAMIC_COST": getattr(cfg, "ENABLE_DYNAMIC_COST", False),
         "TRADE_SIZE_USD": getattr(cfg, "TRADE_SIZE_USD", 10000),
         "CALENDAR_SYMBOL": getattr(cfg, "CALENDAR_SYMBOL", getattr(core, "CALENDAR_SYMBOL", "SPY")),
@@ -846,6 +884,7 @@ def _make_engine_config(cfg):
         "COMBO_GATE_CLIP",
         "COMBO_VALUE_KEEP_Q",
         "COMBO_MOM_DROP_Q",
+        "PROFILE_STAGES",
     ]
     for key in optional_keys:
         if hasattr(cfg, key):
@@ -874,18 +913,148 @@ def _segment_ranges(start_date: str, end_date: str, years: int):
     return segments
 
 
-def _analyze_segment(signals_df: pd.DataFrame, returns_df: pd.DataFrame):
-    analyzer = PerformanceAnalyzer()
-    ic_stats = analyzer.calculate_ic(signals_df, returns_df)
-    summary = analyzer.analyze_backtest(signals_df, returns_df)
-    return ic_stats, summary
+def _slice_frame(frame, start: str, end: str):
+    if frame is None or len(frame) == 0:
+        return frame
+    date_col = next((c for c in ("date", "signal_date", "rebalance_date") if c in frame.columns), None)
+    if date_col is None:
+        return frame
+    dates = pd.to_datetime(frame[date_col])
+    mask = (dates >= pd.Timestamp(start)) & (dates <= pd.Timestamp(end))
+    return frame.loc[mask.to_numpy()].reset_index(drop=True)
 
 
-def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
-    factor_dir = out_dir / factor
-    factor_dir.mkdir(parents=True, exist_ok=True)
-    print(f"[{factor}] start | segments={len(segments)} out={factor_dir}", flush=True)
+def _slice_results(results: dict, start: str, end: str) -> dict:
+    """One segment's view of a full-span run (signal dates in [start, end])."""
+    keys = ("signals", "returns", "forward_returns_raw", "analysis_table", "universe_audit")
+    return {k: _slice_frame(results.get(k), start, end) for k in keys}
+
+
+def _analyze_segment(table: pd.DataFrame, return_col: str):
+    summary = PerformanceAnalyzer().analyze_table(table, return_col)
+    return summary["ic_stats"], summary
+
+
+def _engine_config(cfg, args) -> dict:
+    cfg_dict = _make_engine_config(cfg)
+    if args.use_cache:
+        cache_root = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else (PROJECT_ROOT / "cache" / "signals")
+        cfg_dict["SIGNAL_CACHE_DIR"] = str(cache_root)
+    cfg_dict["SIGNAL_CACHE_USE"] = bool(args.use_cache)
+    cfg_dict["SIGNAL_CACHE_REFRESH"] = bool(args.refresh_cache)
+    # Optional market cap history for PIT filtering
+    mc_dir = getattr(cfg, "MARKET_CAP_DIR", None)
+    if mc_dir:
+        cfg_dict["MARKET_CAP_DIR"] = _resolve_path(mc_dir)
+        cfg_dict["MARKET_CAP_STRICT"] = bool(getattr(cfg, "MARKET_CAP_STRICT", True))
+    return cfg_dict
+
+
+def _checkpoint_dir(factor_dir: Path, args):
+    """Rebalance-level checkpoints of unfinished segments (None when disabled)."""
+    return factor_dir / "checkpoints" if args.checkpoint_every > 0 else None
+
+
+def _clear_checkpoints(factor_dir: Path, args, spans) -> None:
+    root = _checkpoint_dir(factor_dir, args)
+    for start, end in spans:
+        path = checkpoint_path(root, start, end)
+        if path is not None:
+            path.unlink(missing_ok=True)
+    if root is not None and root.is_dir() and not any(root.iterdir()):
+        root.rmdir()
+
+
+def _run_backtest(factor: str, cfg_dict: dict, weights: dict, rebalance_freq, holding_period, start: str, end: str, args,
+                  factor_dir: Path = None):
+    engine = BacktestEngine(cfg_dict) if args.no_engine_reuse else ENGINE_POOL.get(cfg_dict)
+    ckpt = checkpoint_path(_checkpoint_dir(factor_dir, args), start, end) if factor_dir is not None else None
+    try:
+        print(f"[{factor}] run_backtest enter", flush=True)
+        results = engine.run_backtest(
+            start,
+            end,
+            factor_weights=weights,
+            rebalance_freq=rebalance_freq,
+            holding_period=holding_period,
+            long_pct=args.long_pct,
+            short_pct=args.short_pct,
+            checkpoint=str(ckpt) if ckpt is not None else None,
+            checkpoint_every=args.checkpoint_every,
+            checkpoint_salt=run_signature(cfg_dict) if ckpt is not None else None,
+        )
+        print(f"[{factor}] run_backtest exit | keys={list(results.keys())}", flush=True)
+    except Exception as e:
+        print(f"[{factor}] segment error {start} -> {end}: {e}", flush=True)
+        raise
+    if args.no_engine_reuse:
+        del engine
+        gc.collect()
+    return results
+
+
+def _segment_record(factor: str, results: dict, seg_start: str, seg_end: str, rebalance_freq, holding_period,
+                    args, factor_dir: Path):
+    """(summary row, per-date IC frame, universe audit records) for one segment's results."""
+    table = results["analysis_table"]
+    ic_stats, summary = _analyze_segment(table, default_return_column(table))
+    raw_returns = results.get("forward_returns_raw")
+    ic_stats_raw = None
+    if raw_returns is not None and len(raw_returns) > 0:
+        ic_stats_raw = PerformanceAnalyzer().calculate_ic_table(table, "fwd_return_raw")
+
+    row = {
+        "factor": factor,
+        "segment_start": seg_start,
+        "segment_end": seg_end,
+        "ic": ic_stats.get("ic"),
+        "ic_raw": ic_stats_raw.get("ic") if ic_stats_raw else None,
+        "ic_overall": ic_stats.get("ic_overall"),
+        "ic_raw_overall": ic_stats_raw.get("ic_overall") if ic_stats_raw else None,
+        "t_stat": ic_stats.get("t_stat"),
+        "p_value": ic_stats.get("p_value"),
+        "n_dates": ic_stats.get("n"),
+        "n_signals": ic_stats.get("n_merged"),
+        "mean_return": summary.get("mean_return"),
+        "median_return": summary.get("median_return"),
+        "std_return": summary.get("std_return"),
+        "sharpe": summary.get("sharpe"),
+        "win_rate": summary.get("win_rate"),
+        "rebalance_freq": rebalance_freq,
+        "holding_period": holding_period,
+    }
+
+    ic_frame = None
+    ic_by_date = summary.get("ic_by_date")
+    if ic_by_date is not None and len(ic_by_date) > 0:
+        ic_frame = ic_by_date.assign(factor=factor, segment_start=seg_start, segment_end=seg_end)
 
+    audit_records = []
+    uni_audit = results.get("universe_audit")
+    if uni_audit is not None and len(uni_audit) > 0:
+        audit_df = uni_audit.copy()
+        audit_df["factor"] = factor
+        audit_df["segment_start"] = seg_start
+        audit_df["segment_end"] = seg_end
+        audit_records = audit_df.to_dict(orient="records")
+
+    if args.save_raw:
+        safe_tag = f"{seg_start.replace('-', '')}_{seg_end.replace('-', '')}"
+        results["signals"].to_csv(factor_dir / f"signals_{safe_tag}.csv", index=False)
+        results["returns"].to_csv(factor_dir / f"returns_{safe_tag}.csv", index=False)
+        results["analysis_table"].to_csv(factor_dir / f"analysis_{safe_tag}.csv", index=False)
+
+    print(
+        f"[{factor}] {seg_start} -> {seg_end} | "
+        f"ic={row['ic'] if row['ic'] is not None else 'N/A'} "
+        f"ic_raw={row['ic_raw'] if row['ic_raw'] is not None else 'N/A'} "
+        f"n={row['n_signals'] if row['n_signals'] is not None else 0}"
+    )
+    return row, ic_frame, audit_records
+
+
+def _done_segments(factor_dir: Path, args):
+    """(existing summary or None, {(segment_start, segment_end)}) for --resume."""
     summary_path = factor_dir / "segment_summary.csv"
     existing = None
     done_keys = set()
@@ -896,109 +1065,45 @@ def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
                 done_keys.add((r.get("segment_start"), r.get("segment_end")))
         except Exception:
             existing = None
+    return existing, done_keys
 
-    rows = []
-    audit_rows = []
-    for seg_start, seg_end in segments:
-        if (seg_start, seg_end) in done_keys:
-            continue
-        print(f"[{factor}] segment start {seg_start} -> {seg_end}", flush=True)
-        cfg_dict = _make_engine_config(cfg)
-        if args.use_cache:
-            cache_root = Path(args.cache_dir).expanduser().resolve() if args.cache_dir else (PROJECT_ROOT / "cache" / "signals")
-            cfg_dict["SIGNAL_CACHE_DIR"] = str(cache_root)
-        cfg_dict["SIGNAL_CACHE_USE"] = bool(args.use_cache)
-        cfg_dict["SIGNAL_CACHE_REFRESH"] = bool(args.refresh_cache)
-        # Optional market cap history for PIT filtering
-        mc_dir = getattr(cfg, "MARKET_CAP_DIR", None)
-        if mc_dir:
-            cfg_dict["MARKET_CAP_DIR"] = _resolve_path(mc_dir)
-            cfg_dict["MARKET_CAP_STRICT"] = bool(getattr(cfg, "MARKET_CAP_STRICT", True))
-        engine = BacktestEngine(cfg_dict)
-        try:
-            print(f"[{factor}] run_backtest enter", flush=True)
-            results = engine.run_backtest(
-                seg_start,
-                seg_end,
-                factor_weights=weights,
-                rebalance_freq=cfg.REBALANCE_FREQ,
-                holding_period=cfg.HOLDING_PERIOD,
-                long_pct=args.long_pct,
-                short_pct=args.short_pct,
-            )
-            print(f"[{factor}] run_backtest exit | keys={list(results.keys())}", flush=True)
-        except Exception as e:
-            print(f"[{factor}] segment error {seg_start} -> {seg_end}: {e}", flush=True)
-            raise
-
-        returns_for_ic = results.get("forward_returns")
-        if returns_for_ic is None or len(returns_for_ic) == 0:
-            returns_for_ic = results["returns"]
-        ic_stats, summary = _analyze_segment(results["signals"], returns_for_ic)
-        raw_returns = results.get("forward_returns_raw")
-        ic_stats_raw = None
-        if raw_returns is not None and len(raw_returns) > 0:
-            ic_stats_raw, _ = _analyze_segment(results["signals"], raw_returns)
-
-        row = {
-            "factor": factor,
-            "segment_start": seg_start,
-            "segment_end": seg_end,
-            "ic": ic_stats.get("ic"),
-            "ic_raw": ic_stats_raw.get("ic") if ic_stats_raw else None,
-            "ic_overall": ic_stats.get("ic_overall"),
-            "ic_raw_overall": ic_stats_raw.get("ic_overall") if ic_stats_raw else None,
-            "t_stat": ic_stats.get("t_stat"),
-            "p_value": ic_stats.get("p_value"),
-            "n_dates": ic_stats.get("n"),
-            "n_signals": ic_stats.get("n_merged"),
-            "mean_return": summary.get("mean_return"),
-            "median_return": summary.get("median_return"),
-            "std_return": summary.get("std_return"),
-            "sharpe": summary.get("sharpe"),
-            "win_rate": summary.get("win_rate"),
-            "rebalance_freq": cfg.REBALANCE_FREQ,
-            "holding_period": cfg.HOLDING_PERIOD,
-        }
-        rows.append(row)
-
-        uni_audit = results.get("universe_audit")
-        if uni_audit is not None and len(uni_audit) > 0:
-            audit_df = uni_audit.copy()
-            audit_df["factor"] = factor
-            audit_df["segment_start"] = seg_start
-            audit_df["segment_end"] = seg_end
-            audit_rows.extend(audit_df.to_dict(orient="records"))
-
-        if args.save_raw:
-            safe_tag = f"{seg_start.replace('-', '')}_{seg_end.replace('-', '')}"
-            results["signals"].to_csv(factor_dir / f"signals_{safe_tag}.csv", index=False)
-            results["returns"].to_csv(factor_dir / f"returns_{safe_tag}.csv", index=False)
-
-        print(
-            f"[{factor}] {seg_start} -> {seg_end} | "
-            f"ic={row['ic'] if row['ic'] is not None else 'N/A'} "
-            f"ic_raw={row['ic_raw'] if row['ic_raw'] is not None else 'N/A'} "
-            f"n={row['n_signals'] if row['n_signals'] is not None else 0}"
-        )
-
-        del engine
-        gc.collect()
 
+def _write_factor_outputs(factor: str, factor_dir: Path, rows, ic_date_frames, audit_rows, existing, merge: bool,
+                          segments, args, sort: bool = False):
+    summary_path = factor_dir / "segment_summary.csv"
     df = pd.DataFrame(rows)
     if existing is not None:
         combined = pd.concat([existing, df], ignore_index=True)
         combined = combined.drop_duplicates(subset=["segment_start", "segment_end"])
+        if sort:
+            combined = combined.sort_values(["segment_start", "segment_end"], kind="stable").reset_index(drop=True)
         combined.to_csv(summary_path, index=False)
         df = combined
     else:
         df.to_csv(summary_path, index=False)
     print(f"[{factor}] done | rows={len(df)} summary={summary_path}", flush=True)
 
+    # Per-date IC series (input to the bootstrap in run_statistical_gates)
+    ic_dates_path = factor_dir / "ic_by_date.csv"
+    if len(ic_date_frames) > 0:
+        icd = pd.concat(ic_date_frames, ignore_index=True)
+        icd = icd[["factor", "segment_start", "segment_end", "date", "n", "ic", "rank_ic"]]
+        if merge and ic_dates_path.exists():
+            try:
+                old_icd = pd.read_csv(ic_dates_path)
+                icd = pd.concat([old_icd, icd], ignore_index=True)
+                icd["date"] = pd.to_datetime(icd["date"])
+                icd = icd.drop_duplicates(subset=["segment_start", "segment_end", "date"], keep="last")
+                if sort:
+                    icd = icd.sort_values(["segment_start", "date"], kind="stable")
+            except Exception:
+                pass
+        icd.to_csv(ic_dates_path, index=False, date_format="%Y-%m-%d")
+
     audit_path = factor_dir / "universe_filter_audit.csv"
     if len(audit_rows) > 0:
         aud = pd.DataFrame(audit_rows)
-        if args.resume and audit_path.exists():
+        if merge and audit_path.exists():
             try:
                 old_aud = pd.read_csv(audit_path)
                 aud = pd.concat([old_aud, aud], ignore_index=True)
@@ -1006,6 +1111,8 @@ def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
                     subset=["factor", "segment_start", "segment_end", "rebalance_date"],
                     keep="last",
                 )
+                if sort:
+                    aud = aud.sort_values(["segment_start", "rebalance_date"], kind="stable")
             except Exception:
                 pass
         aud.to_csv(audit_path, index=False)
@@ -1025,6 +1132,9 @@ def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
         "use_cache": bool(args.use_cache),
         "cache_dir": str(Path(args.cache_dir).expanduser().resolve()) if args.cache_dir else None,
         "refresh_cache": bool(args.refresh_cache),
+        "single_pass": bool(args.single_pass),
+        "engine_reuse": not args.no_engine_reuse,
+        "jobs": int(args.jobs),
     }
     with open(factor_dir / "run_meta.json", "w") as f:
         json.dump(meta, f, indent=2)
@@ -1032,17 +1142,255 @@ def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
     return df
 
 
-def main():
+def _profile_entry(results: dict, start: str, end: str, seconds: float) -> dict:
+    return dict(results.get("profile") or {}, segment_start=start, segment_end=end, seconds=round(seconds, 3))
+
+
+def _write_profile(factor: str, factor_dir: Path, entries, merge: bool) -> dict:
+    """profile.json next to segment_summary.csv: per-segment stage profiles plus their total."""
+    path = factor_dir / "profile.json"
+    if merge and path.exists():
+        try:
+            with open(path) as f:
+                old = json.load(f).get("segments") or []
+        except (OSError, ValueError):
+            old = []
+        new_keys = {(e["segment_start"], e["segment_end"]) for e in entries}
+        entries = [e for e in old if (e.get("segment_start"), e.get("segment_end")) not in new_keys] + list(entries)
+        entries.sort(key=lambda e: (str(e.get("segment_start")), str(e.get("segment_end"))))
+    total = merge_profiles(entries)
+    total["seconds"] = round(sum(float(e.get("seconds") or 0.0) for e in entries), 3)
+    with open(path, "w") as f:
+        json.dump({"factor": factor, "total": total, "segments": entries}, f, indent=2)
+    return total
+
+
+def _read_profile(factor_dir: Path):
+    try:
+        with open(factor_dir / "profile.json") as f:
+            return json.load(f).get("total")
+    except (OSError, ValueError):
+        return None
+
+
+def run_factor(factor: str, cfg, weights: dict, segments, args, out_dir: Path):
+    factor_dir = out_dir / factor
+    factor_dir.mkdir(parents=True, exist_ok=True)
+    print(f"[{factor}] start | segments={len(segments)} out={factor_dir}", flush=True)
+
+    existing, done_keys = _done_segments(factor_dir, args)
+    cfg_dict = _engine_config(cfg, args)
+
+    def _run(start: str, end: str):
+        return _run_backtest(
+            factor, cfg_dict, weights, cfg.REBALANCE_FREQ, cfg.HOLDING_PERIOD, start, end, args, factor_dir
+        )
+
+    pending = [seg for seg in segments if seg not in done_keys]
+    span_results = None
+    profiles = []
+    if args.single_pass and pending:
+        print(f"[{factor}] single pass {pending[0][0]} -> {pending[-1][1]}", flush=True)
+        t0 = time.time()
+        span_results = _run(pending[0][0], pending[-1][1])
+        profiles.append(_profile_entry(span_results, pending[0][0], pending[-1][1], time.time() - t0))
+
+    rows = []
+    audit_rows = []
+    ic_date_frames = []
+    for seg_start, seg_end in pending:
+        print(f"[{factor}] segment start {seg_start} -> {seg_end}", flush=True)
+        if span_results is not None:
+            results = _slice_results(span_results, seg_start, seg_end)
+        else:
+            t0 = time.time()
+            results = _run(seg_start, seg_end)
+            profiles.append(_profile_entry(results, seg_start, seg_end, time.time() - t0))
+        row, ic_frame, audit_records = _segment_record(
+            factor, results, seg_start, seg_end, cfg.REBALANCE_FREQ, cfg.HOLDING_PERIOD, args, factor_dir
+        )
+        rows.append(row)
+        if ic_frame is not None:
+            ic_date_frames.append(ic_frame)
+        audit_rows.extend(audit_records)
+
+    df = _write_factor_outputs(
+        factor, factor_dir, rows, ic_date_frames, audit_rows, existing, bool(args.resume), segments, args
+    )
+    if profiles:
+        _write_profile(factor, factor_dir, profiles, bool(args.resume))
+    spans = [(pending[0][0], pending[-1][1])] if span_results is not None else pending
+    _clear_checkpoints(factor_dir, args, spans)
+    return df
+
+
+def _init_worker(store_root: str, worker_mem_gb: float):
+    global ENGINE_POOL, WORKER_MEM_BYTES
+    ENGINE_POOL = EnginePool(store_root=store_root or None)
+    WORKER_MEM_BYTES = int(worker_mem_gb * (1 << 30)) if worker_mem_gb and worker_mem_gb > 0 else 0
+
+
+def _segment_task(task: dict):
+    """Process-pool entry: one (factor, segment) backtest -> summary row, IC frame, audit records."""
+    args = task["args"]
+    t0 = time.time()
+    reset_peak_rss()
+    results = _run_backtest(
+        task["factor"], task["cfg_dict"], task["weights"], task["rebalance_freq"], task["holding_period"],
+        task["segment_start"], task["segment_end"], args, Path(task["factor_dir"]),
+    )
+    record = _segment_record(
+        task["factor"], results, task["segment_start"], task["segment_end"],
+        task["rebalance_freq"], task["holding_period"], args, Path(task["factor_dir"]),
+    )
+    profile = _profile_entry(results, task["segment_start"], task["segment_end"], time.time() - t0)
+    del results
+    private = private_bytes()
+    # Bounded memory: prices / fundamentals are shared mmap pages (not private); the warm engines are the
+    # only per-worker growth, so drop them once the worker's private memory crosses its share.
+    if WORKER_MEM_BYTES and private > WORKER_MEM_BYTES:
+        ENGINE_POOL.clear()
+        gc.collect()
+    info = {"seconds": time.time() - t0, "private_mb": private / (1 << 20), "peak_gb": peak_rss_gb(),
+            "pid": os.getpid(), "profile": profile}
+    return record, info
+
+
+def run_parallel(run_plan, segments, args, out_dir: Path):
+    """Run factors x segments on a process pool sharing memory-mapped price / fundamentals stores."""
+    store_root = ""
+    if not args.no_shared_store:
+        store_root = str(
+            Path(args.store_dir).expanduser().resolve() if args.store_dir else (PROJECT_ROOT / "cache" / "shared_store")
+        )
+        builder = EnginePool(store_root=store_root)
+        for p in run_plan:
+            active = {k for k, v in p["weights"].items() if v is not None and float(v) != 0.0}
+            builder.prepare_stores(_engine_config(p["cfg_obj"], args), fundamentals=bool(active & {"quality", "value"}))
+        print(f"[jobs] shared store {store_root}", flush=True)
+        del builder
+        gc.collect()
+
+    state = {}
+    tasks = []
+    for p in run_plan:
+        factor, cfg = p["factor"], p["cfg_obj"]
+        factor_dir = out_dir / factor
+        factor_dir.mkdir(parents=True, exist_ok=True)
+        existing, done_keys = _done_segments(factor_dir, args)
+        state[factor] = {"dir": factor_dir, "existing": existing, "merge": bool(args.resume), "written": 0}
+        cfg_dict = _engine_config(cfg, args)
+        for seg_start, seg_end in segments:
+            if (seg_start, seg_end) in done_keys:
+                continue
+            tasks.append({
+                "factor": factor,
+                "cfg_dict": cfg_dict,
+                "weights": p["weights"],
+                "rebalance_freq": cfg.REBALANCE_FREQ,
+                "holding_period": cfg.HOLDING_PERIOD,
+                "segment_start": seg_start,
+                "segment_end": seg_end,
+                "factor_dir": str(factor_dir),
+                "args": args,
+            })
+
+    # Memory admission: a task starts only while the projected footprints of the running ones fit the budget
+    governor = MemoryGovernor(resolve_budget_gb(args.mem_budget_gb), name="run_segmented_factors")
+    footprints = {}
+    for p in run_plan:
+        active = [k for k, v in p["weights"].items() if v is not None and float(v) != 0.0]
+        footprints[p["factor"]] = governor.footprint(
+            f"run_segmented_factors:{p['factor']}", data_paths(_engine_config(p["cfg_obj"], args), engine_defaults=False), len(active)
+        )
+    budget = f"{governor.budget_gb:.1f}GB" if governor.budget_gb > 0 else "unlimited"
+    estimates = " ".join(f"{f}={fp.gb:.2f}GB({fp.source})" for f, fp in footprints.items())
+    print(f"[mem] budget={budget} per-task {estimates}", flush=True)
+    items = [
+        (f"{t['factor']}:{t['segment_start']}:{t['segment_end']}", footprints[t["factor"]].gb, t) for t in tasks
+    ]
+
+    # Workers outlive their tasks: jobs x per-worker private memory stays within the budget
+    jobs, worker_gb = split_budget(args.jobs, args.worker_mem_gb, governor.budget_gb)
+    if jobs < args.jobs:
+        print(f"[mem] --jobs {args.jobs} x {worker_gb:.1f}GB exceeds the budget; using {jobs} workers", flush=True)
+
+    results = {}
+    n_total = len(tasks)
+    cap = f"{worker_gb:.1f}GB" if worker_gb > 0 else "unbounded"
+    print(f"[jobs] tasks={n_total} jobs={jobs} worker_private={cap}", flush=True)
+    t0 = time.time()
+    done = 0
+    try:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=(store_root, worker_gb)
+        ) as ex:
+            for t, fut in governor.as_completed(ex, _segment_task, items, max_in_flight=jobs):
+                factor = t["factor"]
+                (row, ic_frame, audit_records), info = fut.result()
+                fp = footprints[factor]
+                governor.record(fp.key, info["peak_gb"], fp.data_bytes)
+                st = state[factor]
+                # Persist each finished (factor, segment) so --resume restarts at task granularity
+                df = _write_factor_outputs(
+                    factor, st["dir"], [row], [ic_frame] if ic_frame is not None else [], audit_records,
+                    st["existing"], st["merge"], segments, args, sort=True,
+                )
+                _write_profile(factor, st["dir"], [info["profile"]], st["merge"])
+                st["existing"], st["merge"] = df, True
+                _clear_checkpoints(st["dir"], args, [(t["segment_start"], t["segment_end"])])
+                results[factor] = df
+                done += 1
+                elapsed = time.time() - t0
+                eta = elapsed / done * (n_total - done)
+                print(
+                    f"[jobs] {done}/{n_total} {factor} {t['segment_start']} -> {t['segment_end']} | "
+                    f"task={info['seconds']:.1f}s private={info['private_mb']:.0f}MB peak={info['peak_gb']:.2f}GB "
+                    f"pid={info['pid']} "
+                    f"elapsed={elapsed:.0f}s eta={eta:.0f}s",
+                    flush=True,
+                )
+    finally:
+        governor.close()
+    for p in run_plan:
+        factor = p["factor"]
+        if factor not in results:
+            st = state[factor]
+            results[factor] = st["existing"] if st["existing"] is not None else pd.DataFrame()
+    return [results[p["factor"]] for p in run_plan]
+
+
+def _memo_key(p: dict, segments, args, code: str):
+    """(result key, key parts) for one factor of the run plan."""
+    payload = {
+        "runner": "run_segmented_factors",
+        "factor": p["factor"],
+        "weights": p["weights"],
+        "cfg_snapshot": p["cfg_snapshot"],
+        "segments": segments,
+        "long_pct": args.long_pct,
+        "short_pct": args.short_pct,
+        "single_pass": bool(args.single_pass),
+    }
+    config_hash = stable_hash(payload)
+    data_fp = data_fingerprint(data_paths(_engine_config(p["cfg_obj"], args)))
+    parts = {"config_hash": config_hash, "data_fingerprint": data_fp, "code_version": code}
+    return result_key(config_hash, data_fp, code), parts
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--factors", type=str, default="momentum,reversal,quality,value")
-    parser.add_argument("--start-date", type=str, default=getattr(core, "TRAIN_START", "2015-01-01"))
-    parser.add_argument("--end-date", type=str, default=getattr(core, "TEST_END", "2026-01-28"))
+    parser.add_argument("--start-date", type=str, default=DEFAULT_START)
+    parser.add_argument("--end-date", type=str, default=DEFAULT_END)
     parser.add_argument("--years", type=int, default=2)
     parser.add_argument("--long-pct", type=float, default=0.2)
     parser.add_argument("--short-pct", type=float, default=0.0)
     parser.add_argument("--save-raw", action="store_true")
     parser.add_argument("--resume", action="store_true")
     parser.add_argument("--max-segments", type=int, default=0)
+    parser.add_argument("--only-segments", type=str, default="",
+                        help="Comma-separated 0-based segment indices to run (e.g. 0,4,7)")
     parser.add_argument("--out-dir", type=str, default="")
     parser.add_argument("--invert-momentum", action="store_true")
     parser.add_argument("--set", action="append", default=[], help="Override config: KEY=VALUE (repeatable)")
@@ -1052,7 +1400,48 @@ def main():
     parser.add_argument("--freeze-file", type=str, default="", help="Path to freeze json (enforce if exists)")
     parser.add_argument("--write-freeze", action="store_true", help="Create freeze file if missing")
     parser.add_argument("--skip-guardrails", action="store_true", help="Skip PIT/lag guardrails (not recommended)")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="One backtest over all pending segments, sliced per segment (continuous rebalance schedule; "
+        "rows near segment boundaries can differ from per-segment runs)",
+    )
+    parser.add_argument(
+        "--no-engine-reuse",
+        action="store_true",
+        help="Build a fresh BacktestEngine per segment instead of reusing warm engines",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="Run factors x segments on N worker processes")
+    parser.add_argument(
+        "--store-dir",
+        type=str,
+        default="",
+        help="Shared memory-mapped price/fundamentals store for --jobs (default: cache/shared_store)",
+    )
+    parser.add_argument("--no-shared-store", action="store_true", help="Workers load pickles themselves (--jobs)")
+    parser.add_argument(
+        "--worker-mem-gb",
+        type=float,
+        default=0.0,
+        help="Per-worker private (non-shared) memory for --jobs; a worker above it drops its warm engines "
+        "after its task, and --jobs is lowered so jobs x this fits --mem-budget-gb (0 = budget / jobs)",
+    )
+    parser.add_argument(
+        "--mem-budget-gb",
+        type=float,
+        default=0.0,
+        help="Memory budget for --jobs tasks (0 = V4_MEM_BUDGET_GB or 75%% of RAM); see scripts/memory_governor.py",
+    )
+    parser.add_argument("--checkpoint-every", type=int, default=20,
+                        help="Checkpoint each segment's run every N rebalance dates (0 = off); reruns resume mid-segment")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the result store has this run")
+    parser.add_argument("--no-result-store", action="store_true", help="Neither read nor write the result store")
+    parser.add_argument("--result-store", type=str, default="", help="Result store root (default: cache/result_store)")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        raise SystemExit("--jobs must be >= 1")
+    if args.jobs > 1 and args.single_pass:
+        raise SystemExit("--single-pass runs one backtest per factor; use it without --jobs")
 
     factor_list = [f.strip().lower() for f in args.factors.split(",") if f.strip()]
     unknown = [f for f in factor_list if f not in FACTOR_SPECS]
@@ -1062,6 +1451,9 @@ def main():
     segments = _segment_ranges(args.start_date, args.end_date, args.years)
     if args.max_segments and args.max_segments > 0:
         segments = segments[: args.max_segments]
+    if args.only_segments:
+        keep = {int(x) for x in args.only_segments.split(",") if x.strip()}
+        segments = [seg for i, seg in enumerate(segments) if i in keep]
 
     if args.resume and not args.out_dir:
         raise SystemExit("--resume requires --out-dir pointing to an existing run folder")
@@ -1132,6 +1524,7 @@ def main():
             "refresh_cache": bool(args.refresh_cache),
             "resume": bool(args.resume),
             "max_segments": args.max_segments,
+            "only_segments": args.only_segments,
         },
     }
     if not args.skip_guardrails:
@@ -1223,13 +1616,56 @@ def main():
     )
     write_json(out_dir / "run_manifest.json", manifest)
 
-    all_rows = []
-    for p in run_plan:
-        factor = p["factor"]
-        cfg = p["cfg_obj"]
-        weights = p["weights"]
-        df = run_factor(factor, cfg, weights, segments, args, out_dir)
-        all_rows.append(df)
+    # Result memoization: (config hash, data fingerprint, code version) -> stored factor summary
+    store = None
+    code = None
+    if not args.no_result_store:
+        store = ResultStore(Path(args.result_store).expanduser().resolve() if args.result_store else RESULT_STORE_ROOT)
+        code = code_version(PROJECT_ROOT)
+        if code is None:
+            print("[memo] no git commit available; result store disabled", flush=True)
+    memo_keys = {}
+    by_factor = {}
+    if store is not None and code is not None:
+        for p in run_plan:
+            factor = p["factor"]
+            key, parts = _memo_key(p, segments, args, code)
+            memo_keys[factor] = (key, parts)
+            if force_requested(args.force) or args.save_raw:
+                continue
+            factor_dir = out_dir / factor
+            entry = store.restore(key, factor_dir)
+            if entry is None:
+                continue
+            print(f"[memo] {factor} hit key={key[:12]} source={entry.get('source_dir')}", flush=True)
+            update_run_meta(factor_dir, memo_hit=True, memo_key=key, memo_source=entry.get("source_dir"))
+            by_factor[factor] = pd.read_csv(factor_dir / "segment_summary.csv")
+
+    todo = [p for p in run_plan if p["factor"] not in by_factor]
+    if todo:
+        if args.jobs > 1:
+            frames = run_parallel(todo, segments, args, out_dir)
+        else:
+            frames = []
+            for p in todo:
+                try:
+                    frames.append(run_factor(p["factor"], p["cfg_obj"], p["weights"], segments, args, out_dir))
+                finally:
+                    # Factors differ in config: drop the engine, keep the shared data engines warm
+                    ENGINE_POOL.release_engines()
+        for p, df in zip(todo, frames):
+            factor = p["factor"]
+            by_factor[factor] = df
+            if factor in memo_keys:
+                key, parts = memo_keys[factor]
+                factor_dir = out_dir / factor
+                update_run_meta(factor_dir, memo_hit=False, memo_key=key)
+                store.save(key, factor_dir, MEMO_FILES, dict(parts, runner="run_segmented_factors", factor=factor))
+        # Stage timings, cache hit rates and peak RSS of the factors computed in this run
+        profiles = {p["factor"]: _read_profile(out_dir / p["factor"]) for p in todo}
+        manifest["profile"] = {k: v for k, v in profiles.items() if v is not None}
+        write_json(out_dir / "run_manifest.json", manifest)
+    all_rows = [by_factor[p["factor"]] for p in run_plan]
 
     if all_rows:
         combined_path = out_dir / "all_factors_summary.csv"
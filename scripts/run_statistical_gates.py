@@ -1,6 +1,8 @@
 import argparse
 import json
 import math
+import os
+import sys
 from datetime import datetime
 from pathlib import Path
 
@@ -9,6 +11,9 @@ import pandas as pd
 
 
 ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backtest.resampling import run_resampling
 
 
 def _norm_cdf(x: float) -> float:
@@ -65,17 +70,79 @@ def _aggregate(df: pd.DataFrame) -> pd.DataFrame:
     pos = g["ic"].apply(lambda s: float((pd.to_numeric(s, errors="coerce") > 0).mean()))
     out = out.merge(pos.rename("pos_ratio").reset_index(), on="factor", how="left")
     out["ic_std"] = pd.to_numeric(out["ic_std"], errors="coerce")
-    out["z_stat"] = out.apply(
-        lambda r: (float(r["ic_mean"]) / (float(r["ic_std"]) / math.sqrt(float(r["n"]))))
-        if pd.notna(r["ic_std"]) and float(r["ic_std"]) > 0 and float(r["n"]) >= 2
-        else np.nan,
-        axis=1,
-    )
+    mean = out["ic_mean"].to_numpy(dtype=float)
+    std = out["ic_std"].to_numpy(dtype=float)
+    n = out["n"].to_numpy(dtype=float)
+    ok = np.isfinite(std) & (std > 0) & (n >= 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["z_stat"] = np.where(ok, mean / (std / np.sqrt(n)), np.nan)
     out["p_value"] = out["z_stat"].apply(lambda z: _two_sided_p_from_z(z) if pd.notna(z) else np.nan)
     out["q_value_bh"] = _bh_qvalues(out["p_value"])
     return out
 
 
+def _factor_dir(summary_path: Path, factor: str) -> Path:
+    if summary_path.name == "segment_summary.csv":
+        return summary_path.parent
+    return summary_path.parent / factor
+
+
+def _ic_series(factor_dir: Path) -> np.ndarray | None:
+    """Per-date IC written by run_segmented_factors (one value per date, in date order)."""
+    path = factor_dir / "ic_by_date.csv"
+    if not path.exists():
+        return None
+    df = pd.read_csv(path, usecols=["date", "ic"])
+    df = df.drop_duplicates(subset=["date"], keep="last").sort_values("date")
+    return pd.to_numeric(df["ic"], errors="coerce").dropna().to_numpy()
+
+
+def _ic_panel(factor_dir: Path) -> pd.DataFrame | None:
+    """(date, signal, return) cross-sections from the analysis tables saved with --save-raw."""
+    files = sorted(factor_dir.glob("analysis_*.csv"))
+    if not files:
+        return None
+    cols = ["date", "symbol", "signal", "fwd_return", "executed_return"]
+    tab = pd.concat([pd.read_csv(f, usecols=lambda c: c in cols) for f in files], ignore_index=True)
+    tab = tab.drop_duplicates(subset=["date", "symbol"], keep="last")
+    ret_col = "fwd_return" if "fwd_return" in tab.columns and tab["fwd_return"].notna().any() else "executed_return"
+    if ret_col not in tab.columns:
+        return None
+    return pd.DataFrame({"date": tab["date"], "signal": tab["signal"], "return": tab[ret_col]})
+
+
+def _opt_float(r: pd.Series, key: str) -> float | None:
+    v = r.get(key)
+    return float(v) if v is not None and pd.notna(v) else None
+
+
+def _resample(agg: pd.DataFrame, summary_path: Path, args) -> pd.DataFrame:
+    """Bootstrap / permutation p-values, CIs and BH q-values per factor, merged into the gate table."""
+    tasks = []
+    for factor in agg["factor"].astype(str):
+        fdir = _factor_dir(summary_path, factor)
+        tasks.append({
+            "factor": factor,
+            "seed": int(args.seed),
+            "ic_series": _ic_series(fdir) if args.bootstrap_reps > 0 else None,
+            "panel": _ic_panel(fdir) if args.perm_reps > 0 else None,
+            "boot_reps": int(args.bootstrap_reps),
+            "perm_reps": int(args.perm_reps),
+            "block": int(args.block_size) or None,
+            "ci": float(args.ci),
+        })
+    jobs = int(args.jobs) if args.jobs else (os.cpu_count() or 1)
+    res = pd.DataFrame(run_resampling(tasks, jobs=jobs))
+    for col in ("boot_p_value", "perm_p_value"):
+        if col not in res.columns:
+            res[col] = np.nan
+    res["boot_q_value_bh"] = _bh_qvalues(res["boot_p_value"])
+    res["perm_q_value_bh"] = _bh_qvalues(res["perm_p_value"])
+    agg = agg.copy()
+    agg["factor"] = agg["factor"].astype(str)
+    return agg.merge(res, on="factor", how="left")
+
+
 def main() -> None:
     p = argparse.ArgumentParser(description="Statistical gates with multiple-testing control (BH-FDR).")
     p.add_argument("--summary-csv", default="", help="Segmented summary csv (default: latest segment_results/*/all_factors_summary.csv)")
@@ -84,6 +151,14 @@ def main() -> None:
     p.add_argument("--min-pos-ratio", type=float, default=0.60)
     p.add_argument("--min-ic-mean", type=float, default=0.0)
     p.add_argument("--out-dir", default="gate_results")
+    p.add_argument("--bootstrap-reps", type=int, default=0, help="Block bootstrap replicates over per-date IC (0=off; e.g. 10000)")
+    p.add_argument("--perm-reps", type=int, default=0, help="Within-date permutation replicates (0=off, e.g. 1000; needs --save-raw analysis tables)")
+    p.add_argument("--block-size", type=int, default=0, help="Bootstrap block length in dates (0=n^(1/3))")
+    p.add_argument("--ci", type=float, default=0.95)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--jobs", type=int, default=1, help="Resampling worker processes (0=all cores)")
+    p.add_argument("--gate-pvalue", choices=["z", "bootstrap", "permutation"], default="z",
+                   help="Which q-value drives gate_qvalue")
     args = p.parse_args()
 
     summary_path = Path(args.summary_csv).resolve() if args.summary_csv else _latest_segment_summary(ROOT, args.factor)
@@ -92,8 +167,13 @@ def main() -> None:
 
     df = pd.read_csv(summary_path)
     agg = _aggregate(df)
+    if args.bootstrap_reps > 0 or args.perm_reps > 0:
+        agg = _resample(agg, summary_path, args)
 
-    agg["gate_qvalue"] = agg["q_value_bh"] <= float(args.alpha)
+    q_col = {"z": "q_value_bh", "bootstrap": "boot_q_value_bh", "permutation": "perm_q_value_bh"}[args.gate_pvalue]
+    if q_col not in agg.columns:
+        raise SystemExit(f"--gate-pvalue {args.gate_pvalue} needs resampling enabled")
+    agg["gate_qvalue"] = agg[q_col] <= float(args.alpha)
     agg["gate_pos_ratio"] = agg["pos_ratio"] >= float(args.min_pos_ratio)
     agg["gate_ic_mean"] = agg["ic_mean"] > float(args.min_ic_mean)
     agg["gate_pass"] = agg["gate_qvalue"] & agg["gate_pos_ratio"] & agg["gate_ic_mean"]
@@ -118,6 +198,11 @@ def main() -> None:
                 "pos_ratio": float(r["pos_ratio"]) if pd.notna(r["pos_ratio"]) else None,
                 "p_value": float(r["p_value"]) if pd.notna(r["p_value"]) else None,
                 "q_value_bh": float(r["q_value_bh"]) if pd.notna(r["q_value_bh"]) else None,
+                "boot_p_value": _opt_float(r, "boot_p_value"),
+                "boot_ci": [_opt_float(r, "boot_ci_low"), _opt_float(r, "boot_ci_high")],
+                "boot_q_value_bh": _opt_float(r, "boot_q_value_bh"),
+                "perm_p_value": _opt_float(r, "perm_p_value"),
+                "perm_q_value_bh": _opt_float(r, "perm_q_value_bh"),
                 "gate_pass": bool(r["gate_pass"]),
             }
 
@@ -127,6 +212,7 @@ def main() -> None:
         "summary_csv": str(summary_path),
         "table_csv": str(table_csv),
         "n_factors": int(agg["factor"].nunique()),
+        "gate_pvalue": args.gate_pvalue,
         "n_pass": int(pd.to_numeric(agg["gate_pass"], errors="coerce").fillna(False).sum()),
         "focus": focus,
     }
@@ -153,6 +239,10 @@ def main() -> None:
             f"- pos_ratio: {focus.get('pos_ratio')}",
             f"- p_value: {focus.get('p_value')}",
             f"- q_value_bh: {focus.get('q_value_bh')}",
+            f"- boot_p_value: {focus.get('boot_p_value')} ci={focus.get('boot_ci')}",
+            f"- boot_q_value_bh: {focus.get('boot_q_value_bh')}",
+            f"- perm_p_value: {focus.get('perm_p_value')}",
+            f"- perm_q_value_bh: {focus.get('perm_q_value_bh')}",
         ]
     md_path.write_text("\n".join(lines))
 
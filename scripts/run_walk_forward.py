@@ -5,16 +5,33 @@ Walk-forward validation runner (rolling train/test windows).
 import argparse
 import gc
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 import importlib.util as _ilu
 
 import pandas as pd
 
+from backtest.analysis_table import default_return_column
 from backtest.backtest_engine import BacktestEngine
+from backtest.engine_pool import EnginePool
 from backtest.performance_analyzer import PerformanceAnalyzer
+from backtest.profiler import merge_profiles
+from backtest.run_checkpoint import checkpoint_path
+from backtest.span_backtest import SpanBacktest
 from backtest.walk_forward_validator import WalkForwardValidator
 import backtest.config as core
+from scripts.result_store import (
+    DEFAULT_ROOT as RESULT_STORE_ROOT,
+    ResultStore,
+    code_version,
+    data_fingerprint,
+    data_paths,
+    force_requested,
+    result_key,
+    run_signature,
+    update_run_meta,
+)
 from scripts.research_governance import (
     build_manifest,
     check_non_negative_int,
@@ -28,6 +45,12 @@ from scripts.research_governance import (
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 CORE_DIR = Path(core.__file__).resolve().parent
 
+# Warm engines shared by every window with the same config (shared with the research daemon)
+ENGINE_POOL = EnginePool()
+
+# Per-factor artifacts kept in the result store
+MEMO_FILES = ("walk_forward_summary.csv", "universe_filter_audit.csv", "run_meta.json")
+
 
 FACTOR_SPECS = {
     "momentum": {
@@ -162,6 +185,7 @@ def _make_engine_config(cfg):
         "TRANSACTION_COST": getattr(cfg, "TRANSACTION_COST", core.TRANSACTION_COST),
         "EXECUTION_DELAY": getattr(cfg, "EXECUTION_DELAY", core.EXECUTION_DELAY),
         "EXECUTION_USE_TRADING_DAYS": getattr(cfg, "EXECUTION_USE_TRADING_DAYS", False),
+        "EXECUTION_MODE": getattr(cfg, "EXECUTION_MODE", getattr(core, "EXECUTION_MODE", "trade")),
         "ENABLE_DYNAMIC_COST": getattr(cfg, "ENABLE_DYNAMIC_COST", False),
         "TRADE_SIZE_USD": getattr(cfg, "TRADE_SIZE_USD", 10000),
         "CALENDAR_SYMBOL": getattr(cfg, "CALENDAR_SYMBOL", getattr(core, "CALENDAR_SYMBOL", "SPY")),
@@ -237,6 +261,7 @@ def _make_engine_config(cfg):
         "COMBO_GATE_CLIP",
         "COMBO_VALUE_KEEP_Q",
         "COMBO_MOM_DROP_Q",
+        "PROFILE_STAGES",
     ]
     for key in optional_keys:
         if hasattr(cfg, key):
@@ -248,11 +273,39 @@ def _make_engine_config(cfg):
     return cfg_dict
 
 
-def _analyze(signals_df: pd.DataFrame, returns_df: pd.DataFrame):
-    analyzer = PerformanceAnalyzer()
-    ic_stats = analyzer.calculate_ic(signals_df, returns_df)
-    summary = analyzer.analyze_backtest(signals_df, returns_df)
-    return ic_stats, summary
+def _analyze(table: pd.DataFrame):
+    summary = PerformanceAnalyzer().analyze_table(table, default_return_column(table))
+    return summary["ic_stats"], summary
+
+
+WINDOW_KEYS = ("train_start", "train_end", "test_start", "test_end")
+
+
+def _write_profile(factor: str, factor_dir: Path, entries, merge: bool) -> dict:
+    """profile.json next to walk_forward_summary.csv: per-window stage profiles plus their total."""
+    path = factor_dir / "profile.json"
+    if merge and path.exists():
+        try:
+            with open(path) as f:
+                old = json.load(f).get("windows") or []
+        except (OSError, ValueError):
+            old = []
+        new_keys = {tuple(e.get(k) for k in WINDOW_KEYS) for e in entries}
+        entries = [e for e in old if tuple(e.get(k) for k in WINDOW_KEYS) not in new_keys] + list(entries)
+        entries.sort(key=lambda e: tuple(str(e.get(k)) for k in WINDOW_KEYS))
+    total = merge_profiles(entries)
+    total["seconds"] = round(sum(float(e.get("seconds") or 0.0) for e in entries), 3)
+    with open(path, "w") as f:
+        json.dump({"factor": factor, "total": total, "windows": entries}, f, indent=2)
+    return total
+
+
+def _read_profile(factor_dir: Path):
+    try:
+        with open(factor_dir / "profile.json") as f:
+            return json.load(f).get("total")
+    except (OSError, ValueError):
+        return None
 
 
 def run_factor(factor: str, cfg, weights: dict, windows, args, out_dir: Path):
@@ -271,43 +324,81 @@ def run_factor(factor: str, cfg, weights: dict, windows, args, out_dir: Path):
         except Exception:
             existing = None
 
-    rows = []
-    audit_rows = []
-    for w in windows:
-        key = (w["train_start"], w["train_end"], w["test_start"], w["test_end"])
-        if key in done_keys:
-            continue
-        cfg_dict = _make_engine_config(cfg)
-        engine = BacktestEngine(cfg_dict)
-
-        train = engine.run_backtest(
-            w["train_start"],
-            w["train_end"],
-            factor_weights=weights,
+    pending = [
+        w for w in windows
+        if (w["train_start"], w["train_end"], w["test_start"], w["test_end"]) not in done_keys
+    ]
+    span = None
+    span_t0 = time.time()
+    if getattr(args, "single_pass", False) and pending:
+        # One engine and one signal / forward-return pass over every pending window
+        span = SpanBacktest(
+            BacktestEngine(_make_engine_config(cfg)),
+            weights,
             rebalance_freq=cfg.REBALANCE_FREQ,
             holding_period=cfg.HOLDING_PERIOD,
             long_pct=args.long_pct,
             short_pct=args.short_pct,
         )
-        test = engine.run_backtest(
-            w["test_start"],
-            w["test_end"],
-            factor_weights=weights,
-            rebalance_freq=cfg.REBALANCE_FREQ,
-            holding_period=cfg.HOLDING_PERIOD,
-            long_pct=args.long_pct,
-            short_pct=args.short_pct,
+        n_dates = span.prepare(
+            [(w["train_start"], w["train_end"]) for w in pending]
+            + [(w["test_start"], w["test_end"]) for w in pending]
         )
+        print(f"[{factor}] single-pass: {n_dates} rebalance dates for {len(pending)} windows", flush=True)
+
+    ckpt_root = factor_dir / "checkpoints" if args.checkpoint_every > 0 else None
+    # A data refresh or code change between the crash and the rerun discards the checkpoints
+    ckpt_salt = run_signature(_make_engine_config(cfg)) if ckpt_root is not None else None
 
-        train_ret_for_ic = train.get("forward_returns")
-        if train_ret_for_ic is None or len(train_ret_for_ic) == 0:
-            train_ret_for_ic = train["returns"]
-        test_ret_for_ic = test.get("forward_returns")
-        if test_ret_for_ic is None or len(test_ret_for_ic) == 0:
-            test_ret_for_ic = test["returns"]
+    def _ckpt(start: str, end: str):
+        path = checkpoint_path(ckpt_root, start, end)
+        return str(path) if path is not None else None
 
-        train_ic, train_sum = _analyze(train["signals"], train_ret_for_ic)
-        test_ic, test_sum = _analyze(test["signals"], test_ret_for_ic)
+    rows = []
+    audit_rows = []
+    profiles = []
+    for w in pending:
+        t0 = time.time()
+        if span is not None:
+            engine = None
+            train = span.run(w["train_start"], w["train_end"])
+            test = span.run(w["test_start"], w["test_end"])
+        else:
+            cfg_dict = _make_engine_config(cfg)
+            engine = ENGINE_POOL.get(cfg_dict)
+
+            train = engine.run_backtest(
+                w["train_start"],
+                w["train_end"],
+                factor_weights=weights,
+                rebalance_freq=cfg.REBALANCE_FREQ,
+                holding_period=cfg.HOLDING_PERIOD,
+                long_pct=args.long_pct,
+                short_pct=args.short_pct,
+                checkpoint=_ckpt(w["train_start"], w["train_end"]),
+                checkpoint_every=args.checkpoint_every,
+                checkpoint_salt=ckpt_salt,
+            )
+            test = engine.run_backtest(
+                w["test_start"],
+                w["test_end"],
+                factor_weights=weights,
+                rebalance_freq=cfg.REBALANCE_FREQ,
+                holding_period=cfg.HOLDING_PERIOD,
+                long_pct=args.long_pct,
+                short_pct=args.short_pct,
+                checkpoint=_ckpt(w["test_start"], w["test_end"]),
+                checkpoint_every=args.checkpoint_every,
+                checkpoint_salt=ckpt_salt,
+            )
+            profiles.append(dict(
+                merge_profiles([train.get("profile"), test.get("profile")]),
+                **{k: w[k] for k in WINDOW_KEYS},
+                seconds=round(time.time() - t0, 3),
+            ))
+
+        train_ic, train_sum = _analyze(train["analysis_table"])
+        test_ic, test_sum = _analyze(test["analysis_table"])
 
         row = {
             "factor": factor,
@@ -370,6 +461,19 @@ def run_factor(factor: str, cfg, weights: dict, windows, args, out_dir: Path):
         del engine
         gc.collect()
 
+    if span is not None:
+        # The span engine's profiler covers the shared signal pass and every window
+        profiles.append(dict(
+            span.engine.profiler.to_dict(),
+            train_start=pending[0]["train_start"],
+            train_end=None,
+            test_start=None,
+            test_end=pending[-1]["test_end"],
+            window_count=len(pending),
+            seconds=round(time.time() - span_t0, 3),
+        ))
+    del span
+    gc.collect()
     df = pd.DataFrame(rows)
     if existing is not None:
         combined = pd.concat([existing, df], ignore_index=True)
@@ -391,9 +495,12 @@ def run_factor(factor: str, cfg, weights: dict, windows, args, out_dir: Path):
         "long_pct": args.long_pct,
         "short_pct": args.short_pct,
         "save_raw": bool(args.save_raw),
+        "single_pass": bool(getattr(args, "single_pass", False)),
     }
     with open(factor_dir / "run_meta.json", "w") as f:
         json.dump(meta, f, indent=2)
+    if profiles:
+        _write_profile(factor, factor_dir, profiles, bool(args.resume))
 
     audit_path = factor_dir / "universe_filter_audit.csv"
     if len(audit_rows) > 0:
@@ -412,9 +519,34 @@ def run_factor(factor: str, cfg, weights: dict, windows, args, out_dir: Path):
     elif not audit_path.exists():
         pd.DataFrame().to_csv(audit_path, index=False)
 
+    if ckpt_root is not None:
+        for w in pending:
+            for phase in ("train", "test"):
+                checkpoint_path(ckpt_root, w[f"{phase}_start"], w[f"{phase}_end"]).unlink(missing_ok=True)
+        if ckpt_root.is_dir() and not any(ckpt_root.iterdir()):
+            ckpt_root.rmdir()
+
     return df
 
 
+def _memo_key(p: dict, windows, args, code: str):
+    """(result key, key parts) for one factor of the run plan."""
+    payload = {
+        "runner": "run_walk_forward",
+        "factor": p["factor"],
+        "weights": p["weights"],
+        "cfg_snapshot": p["cfg_snapshot"],
+        "windows": windows,
+        "long_pct": args.long_pct,
+        "short_pct": args.short_pct,
+        "single_pass": bool(args.single_pass),
+    }
+    config_hash = stable_hash(payload)
+    data_fp = data_fingerprint(data_paths(_make_engine_config(p["cfg_obj"])))
+    parts = {"config_hash": config_hash, "data_fingerprint": data_fp, "code_version": code}
+    return result_key(config_hash, data_fp, code), parts
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--factors", type=str, default="momentum,reversal,quality,value")
@@ -426,6 +558,8 @@ def main():
     parser.add_argument("--short-pct", type=float, default=0.0)
     parser.add_argument("--save-raw", action="store_true")
     parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="Compute signals / forward returns once over all windows and slice per window")
     parser.add_argument("--max-windows", type=int, default=0)
     parser.add_argument("--only-years", type=str, default="")
     parser.add_argument("--out-dir", type=str, default="")
@@ -433,6 +567,11 @@ def main():
     parser.add_argument("--freeze-file", type=str, default="", help="Path to freeze json (enforce if exists)")
     parser.add_argument("--write-freeze", action="store_true", help="Create freeze file if missing")
     parser.add_argument("--skip-guardrails", action="store_true", help="Skip PIT/lag guardrails (not recommended)")
+    parser.add_argument("--checkpoint-every", type=int, default=20,
+                        help="Checkpoint each train/test run every N rebalance dates (0 = off); reruns resume mid-window")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the result store has this run")
+    parser.add_argument("--no-result-store", action="store_true", help="Neither read nor write the result store")
+    parser.add_argument("--result-store", type=str, default="", help="Result store root (default: cache/result_store)")
     args = parser.parse_args()
 
     factor_list = [f.strip().lower() for f in args.factors.split(",") if f.strip()]
@@ -565,12 +704,40 @@ def main():
     )
     write_json(out_dir / "run_manifest.json", manifest)
 
+    store = None
+    code = None
+    if not args.no_result_store:
+        store = ResultStore(Path(args.result_store).expanduser().resolve() if args.result_store else RESULT_STORE_ROOT)
+        code = code_version(PROJECT_ROOT)
+        if code is None:
+            print("[memo] no git commit available; result store disabled", flush=True)
+
     all_rows = []
+    computed = []
     for p in run_plan:
         factor = p["factor"]
         cfg = p["cfg_obj"]
         weights = p["weights"]
-        df = run_factor(factor, cfg, weights, windows, args, out_dir)
+        factor_dir = out_dir / factor
+        key = None
+        if store is not None and code is not None:
+            key, parts = _memo_key(p, windows, args, code)
+            if not (force_requested(args.force) or args.save_raw):
+                entry = store.restore(key, factor_dir)
+                if entry is not None:
+                    print(f"[memo] {factor} hit key={key[:12]} source={entry.get('source_dir')}", flush=True)
+                    update_run_meta(factor_dir, memo_hit=True, memo_key=key, memo_source=entry.get("source_dir"))
+                    all_rows.append(pd.read_csv(factor_dir / "walk_forward_summary.csv"))
+                    continue
+        try:
+            df = run_factor(factor, cfg, weights, windows, args, out_dir)
+        finally:
+            # Factors differ in config: drop the engine, keep the shared data engines warm
+            ENGINE_POOL.release_engines()
+        computed.append(factor)
+        if key is not None:
+            update_run_meta(factor_dir, memo_hit=False, memo_key=key)
+            store.save(key, factor_dir, MEMO_FILES, dict(parts, runner="run_walk_forward", factor=factor))
         all_rows.append(df)
 
     if all_rows:
@@ -587,6 +754,11 @@ def main():
                 pass
         new_all.to_csv(combined_path, index=False)
 
+    if computed:
+        # Stage timings, cache hit rates and peak RSS of the factors computed in this run
+        profiles = {f: _read_profile(out_dir / f) for f in computed}
+        manifest["profile"] = {k: v for k, v in profiles.items() if v is not None}
+        write_json(out_dir / "run_manifest.json", manifest)
     write_json(out_dir / "run_manifest_latest.json", manifest)
     print(f"Saved results to: {out_dir}")
 
@@ -15,7 +15,7 @@ try:
 except Exception as exc:
     raise SystemExit("Missing dependency: PyYAML. Install with `pip install pyyaml`.") from exc
 
-from backtest.backtest_engine import BacktestEngine
+from backtest.engine_pool import EnginePool
 from scripts.research_governance import (
     build_manifest,
     check_non_negative_int,
@@ -25,6 +25,9 @@ from scripts.research_governance import (
     write_json,
 )
 
+# Warm engines reused across runs inside the research daemon
+ENGINE_POOL = EnginePool()
+
 
 def _json_safe(obj: Any) -> Any:
     try:
@@ -377,18 +380,23 @@ def main() -> None:
         write_freeze=bool(args.write_freeze),
     )
 
-    engine = BacktestEngine(engine_cfg)
-    results = engine.run_out_of_sample_test(
-        train_start=periods.get("train_start"),
-        train_end=periods.get("train_end"),
-        test_start=periods.get("test_start"),
-        test_end=periods.get("test_end"),
-        factor_weights=weights,
-        rebalance_freq=rebalance_freq,
-        holding_period=holding_period,
-        long_pct=long_pct,
-        short_pct=short_pct,
-    )
+    engine = ENGINE_POOL.get(engine_cfg)
+    try:
+        results = engine.run_out_of_sample_test(
+            train_start=periods.get("train_start"),
+            train_end=periods.get("train_end"),
+            test_start=periods.get("test_start"),
+            test_end=periods.get("test_end"),
+            factor_weights=weights,
+            rebalance_freq=rebalance_freq,
+            holding_period=holding_period,
+            long_pct=long_pct,
+            short_pct=short_pct,
+        )
+    finally:
+        # A warm process (research daemon) runs many configs: keep only the shared data engines
+        del engine
+        ENGINE_POOL.release_engines()
 
     # CSV outputs
     train_sig_path = results_dir / f"train_signals_{ts}.csv"
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+SQLite work queue for spreading research runs over several hosts.
+
+Producers (run_factor_factory_batch --executor queue, run_production_gates
+--wf-queue-db) enqueue one task per run: a runner argv with paths relative
+to the project root, its log path and a memory key. Workers on any host
+with a checkout of the project and the queue file on a shared filesystem
+(`python scripts/work_queue.py worker --db <queue.sqlite>`) claim tasks,
+run them with the project root as cwd and write outputs into the usual
+audit/ tree, which the hosts share.
+
+Task states: pending -> leased -> done | failed (failures go back to
+pending until max_attempts). A claim is a lease: lease_until is pushed
+forward by a heartbeat thread while the task runs, and a lease that
+expires (worker died, host lost) makes the task claimable again. Every
+claim bumps the task's token; heartbeat / complete / fail only apply
+with the current token, so a worker that lost its lease cannot finish
+the task a second time. A task therefore completes exactly once even
+when it runs more than once; runners write to deterministic output dirs,
+so a rerun overwrites the same files.
+
+Overlap: a worker whose heartbeat finds the lease gone, or that cannot
+renew it (database unreachable) before its own lease runs out, stops its
+runner (SIGTERM, then SIGKILL after STOP_GRACE_SECONDS, to the runner's
+process group) and abandons the attempt. Workers take over an expired
+lease only one heartbeat interval after lease_until, so the old holder has
+already stopped. Two runs of one task can still overlap in the output dir
+when the old runner takes longer than that interval to exit after SIGTERM
+(at most STOP_GRACE_SECONDS), when clocks are skewed, or when workers use
+different --lease-seconds.
+
+The database uses SQLite's rollback journal (not WAL) so it works on
+filesystems with POSIX locks; leases compare wall clocks, so hosts need
+NTP-synced time (skew well under the lease length).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from scripts.memory_governor import MemoryGovernor, resolve_budget_gb, run_measured
+
+DEFAULT_DB = ROOT / "cache" / "work_queue" / "queue.sqlite"
+TERMINAL = ("done", "failed")
+STOP_GRACE_SECONDS = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id      TEXT PRIMARY KEY,
+    queue        TEXT NOT NULL,
+    payload      TEXT NOT NULL,
+    state        TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    token        INTEGER NOT NULL DEFAULT 0,
+    worker       TEXT,
+    lease_until  REAL,
+    heartbeat_at REAL,
+    created_at   REAL NOT NULL,
+    started_at   REAL,
+    finished_at  REAL,
+    result       TEXT,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (queue, state, created_at);
+"""
+
+
+@dataclass
+class Task:
+    task_id: str
+    queue: str
+    payload: dict[str, Any]
+    token: int
+    attempts: int
+    worker: str
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def task_key(payload: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+class WorkQueue:
+    """Leased tasks in one SQLite file; every method opens its own connection (thread / fork safe)."""
+
+    def __init__(self, path: Path | str = DEFAULT_DB, busy_timeout: float = 60.0):
+        self.path = Path(path)
+        self.busy_timeout = float(busy_timeout)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as con:
+            con.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(str(self.path), timeout=self.busy_timeout, isolation_level=None)
+        con.row_factory = sqlite3.Row
+        return con
+
+    def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn in one write transaction (BEGIN IMMEDIATE takes the database write lock up front)."""
+        con = self._connect()
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(con)
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+            return out
+        finally:
+            con.close()
+
+    # producers
+
+    def enqueue(self, payloads: Iterable[dict[str, Any]], queue: str = "default", max_attempts: int = 3,
+                task_ids: Iterable[str] | None = None) -> list[str]:
+        """Add tasks; an id that is already queued (any state) is left as is. Returns the ids."""
+        payloads = list(payloads)
+        ids = list(task_ids) if task_ids is not None else [task_key(p) for p in payloads]
+        now = time.time()
+
+        def _insert(con: sqlite3.Connection) -> None:
+            con.executemany(
+                "INSERT OR IGNORE INTO tasks (task_id, queue, payload, max_attempts, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(tid, queue, json.dumps(p), int(max_attempts), now) for tid, p in zip(ids, payloads)],
+            )
+
+        self._write(_insert)
+        return ids
+
+    def retry(self, task_ids: Iterable[str]) -> int:
+        """Put finished / failed tasks back to pending with a fresh attempt budget."""
+        ids = list(task_ids)
+
+        def _reset(con: sqlite3.Connection) -> int:
+            cur = con.executemany(
+                "UPDATE tasks SET state='pending', attempts=0, lease_until=NULL, error=NULL, result=NULL "
+                "WHERE task_id=? AND state IN ('done', 'failed')",
+                [(t,) for t in ids],
+            )
+            return cur.rowcount
+
+        return int(self._write(_reset))
+
+    def wait(self, task_ids: Iterable[str], poll_seconds: float = 2.0, timeout: float | None = None,
+             on_progress: Callable[[dict[str, int]], None] | None = None) -> list[dict[str, Any]]:
+        """Block until every task is done or failed; returns their rows."""
+        ids = list(task_ids)
+        deadline = None if timeout is None else time.time() + float(timeout)
+        last = None
+        while True:
+            rows = self.rows(ids)
+            counts = {}
+            for r in rows:
+                counts[r["state"]] = counts.get(r["state"], 0) + 1
+            if on_progress is not None and counts != last:
+                on_progress(counts)
+                last = counts
+            if len(rows) == len(ids) and all(r["state"] in TERMINAL for r in rows):
+                return rows
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"work queue: {counts} after {timeout}s")
+            time.sleep(poll_seconds)
+
+    # workers
+
+    def claim(self, worker: str, lease_seconds: float, queue: str | None = None,
+              grace: float = 0.0) -> Task | None:
+        """Lease the oldest pending task, or one whose lease expired more than grace seconds ago."""
+        now = time.time()
+
+        def _claim(con: sqlite3.Connection) -> Task | None:
+            sql = ("SELECT * FROM tasks WHERE (state='pending' OR (state='leased' AND lease_until < ?))"
+                   + (" AND queue=?" if queue else "") + " ORDER BY created_at, task_id LIMIT 1")
+            expired = now - float(grace)
+            while True:
+                row = con.execute(sql, (expired, queue) if queue else (expired,)).fetchone()
+                if row is None:
+                    return None
+                if row["state"] == "pending" or int(row["attempts"]) < int(row["max_attempts"]):
+                    break
+                # Expired lease on the last attempt: the worker died, the task is out of retries
+                con.execute(
+                    "UPDATE tasks SET state='failed', error=?, finished_at=?, lease_until=NULL WHERE task_id=?",
+                    (f"lease expired (worker {row['worker']})", now, row["task_id"]),
+                )
+            con.execute(
+                "UPDATE tasks SET state='leased', worker=?, token=token+1, attempts=attempts+1, lease_until=?, "
+                "heartbeat_at=?, started_at=? WHERE task_id=?",
+                (worker, now + lease_seconds, now, now, row["task_id"]),
+            )
+            return Task(row["task_id"], row["queue"], json.loads(row["payload"]), int(row["token"]) + 1,
+                        int(row["attempts"]) + 1, worker)
+
+        return self._write(_claim)
+
+    def heartbeat(self, task: Task, lease_seconds: float) -> bool:
+        """Extend the lease; False when the task was re-leased or finished by someone else."""
+        now = time.time()
+
+        def _beat(con: sqlite3.Connection) -> bool:
+            cur = con.execute(
+                "UPDATE tasks SET lease_until=?, heartbeat_at=? WHERE task_id=? AND token=? AND state='leased'",
+                (now + lease_seconds, now, task.task_id, task.token),
+            )
+            return cur.rowcount == 1
+
+        return bool(self._write(_beat))
+
+    def complete(self, task: Task, result: dict[str, Any]) -> bool:
+        """Mark done; False (nothing written) when this worker no longer holds the lease."""
+
+        def _done(con: sqlite3.Connection) -> bool:
+            cur = con.execute(
+                "UPDATE tasks SET state='done', result=?, finished_at=?, lease_until=NULL "
+                "WHERE task_id=? AND token=? AND state='leased'",
+                (json.dumps(result), time.time(), task.task_id, task.token),
+            )
+            return cur.rowcount == 1
+
+        return bool(self._write(_done))
+
+    def fail(self, task: Task, error: str, result: dict[str, Any] | None = None) -> bool:
+        """Back to pending while attempts remain, else failed; False when the lease was lost."""
+
+        def _fail(con: sqlite3.Connection) -> bool:
+            cur = con.execute(
+                "UPDATE tasks SET state=CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END, "
+                "error=?, result=?, finished_at=?, lease_until=NULL WHERE task_id=? AND token=? AND state='leased'",
+                (error[-4000:], json.dumps(result or {}), time.time(), task.task_id, task.token),
+            )
+            return cur.rowcount == 1
+
+        return bool(self._write(_fail))
+
+    # inspection
+
+    def rows(self, task_ids: Iterable[str] | None = None) -> list[dict[str, Any]]:
+        with closing(self._connect()) as con:
+            if task_ids is None:
+                rows = con.execute("SELECT * FROM tasks ORDER BY created_at, task_id").fetchall()
+            else:
+                ids = list(task_ids)
+                rows = []
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    rows += con.execute(
+                        f"SELECT * FROM tasks WHERE task_id IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+        out = []
+        for r in rows:
+            d = dict(r)
+            d["payload"] = json.loads(d["payload"])
+            d["result"] = json.loads(d["result"]) if d["result"] else None
+            out.append(d)
+        return out
+
+    def counts(self, queue: str | None = None) -> dict[str, int]:
+        with closing(self._connect()) as con:
+            sql = "SELECT state, COUNT(*) AS n FROM tasks" + (" WHERE queue=?" if queue else "") + " GROUP BY state"
+            return {r["state"]: int(r["n"]) for r in con.execute(sql, (queue,) if queue else ())}
+
+
+# -- tasks that run project scripts ------------------------------------------
+
+
+def _rel(token: str, root: Path) -> str:
+    try:
+        return str(Path(token).relative_to(root))
+    except ValueError:
+        return token
+
+
+def command_task(cmd: list[str], log_path: Path | str, root: Path = ROOT, **extra: Any) -> dict[str, Any]:
+    """
+    Payload for `python <script> args...`: the interpreter is dropped (each host uses
+    its own) and absolute paths under root become relative to it.
+    """
+    argv = list(cmd)
+    if argv and Path(argv[0]).name.startswith("python"):
+        argv = argv[1:]
+    root = Path(root).resolve()
+    argv = [_rel(a, root) if a.startswith("/") else a for a in argv]
+    return {"argv": argv, "log_path": _rel(str(log_path), root), **extra}
+
+
+def run_command_task(payload: dict[str, Any], root: Path = ROOT,
+                     stop: threading.Event | None = None) -> dict[str, Any]:
+    """
+    Worker handler for command_task payloads -> {"rc", "seconds", "peak_rss_gb", "host"}.
+    Setting stop kills the runner's process group (the worker lost the lease).
+    """
+    argv = [str(a) for a in payload["argv"]]
+    script = Path(argv[0])
+    cmd = [sys.executable, str(script if script.is_absolute() else root / script), *argv[1:]]
+    log = Path(payload.get("log_path") or "")
+    log = log if log.is_absolute() else root / log
+    log.parent.mkdir(parents=True, exist_ok=True)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(root) if not env.get("PYTHONPATH") else f"{root}:{env['PYTHONPATH']}"
+    t0 = time.time()
+    with open(log, "w") as f:
+        rc, peak_gb = run_measured(cmd, stop=stop, grace=STOP_GRACE_SECONDS, cwd=str(root), env=env, stdout=f,
+                                   stderr=subprocess.STDOUT)
+    return {"rc": int(rc), "seconds": round(time.time() - t0, 3), "peak_rss_gb": round(peak_gb, 3),
+            "host": socket.gethostname()}
+
+
+def run_worker(
+    wq: WorkQueue,
+    handler: Callable[..., dict[str, Any]] = run_command_task,
+    *,
+    worker: str | None = None,
+    queue: str | None = None,
+    lease_seconds: float = 300.0,
+    heartbeat_seconds: float | None = None,
+    poll_seconds: float = 5.0,
+    exit_when_idle: bool = True,
+    max_tasks: int = 0,
+    governor: MemoryGovernor | None = None,
+    log: Callable[[str], None] = print,
+) -> dict[str, int]:
+    """
+    Claim and run tasks until every task has finished (exit_when_idle) or
+    max_tasks ran. handler(payload, stop=event) returns a result dict; "rc"
+    != 0 or an exception counts as a failed attempt. The event is set when a
+    heartbeat finds the lease expired and re-claimed (or finished) elsewhere;
+    the handler must then stop its work, and the attempt counts as abandoned
+    (nothing is written to the queue). It is also set when heartbeats fail
+    (database unreachable) and the next one would land after the lease runs
+    out. Expired leases of other workers are taken one heartbeat interval
+    after they run out. With a governor, a claimed task waits
+    (lease kept alive) until its footprint, learned for the payload's
+    "mem_key" or its "mem_gb", fits this host's budget.
+    """
+    worker = worker or worker_id()
+    beat_every = heartbeat_seconds or max(0.05, lease_seconds / 3.0)
+    stats = {"done": 0, "failed": 0, "abandoned": 0}
+    ran = 0
+    while max_tasks <= 0 or ran < max_tasks:
+        claimed_at = time.time()
+        task = wq.claim(worker, lease_seconds, queue, grace=beat_every)
+        if task is None:
+            # A leased task can still come back (its worker may die), so only an all-finished queue is idle
+            counts = wq.counts(queue)
+            if exit_when_idle and not counts.get("pending") and not counts.get("leased"):
+                break
+            time.sleep(poll_seconds)
+            continue
+        ran += 1
+        log(f"[worker {worker}] claim {task.task_id} attempt={task.attempts}")
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def _beat(t: Task = task, deadline: float = claimed_at + lease_seconds) -> None:
+            while not stop.wait(beat_every):
+                sent = time.time()
+                try:
+                    held = wq.heartbeat(t, lease_seconds)
+                except sqlite3.Error:
+                    held = None
+                if held is False:
+                    lost.set()
+                    return
+                if held:
+                    deadline = sent + lease_seconds
+                elif time.time() + beat_every >= deadline:
+                    # Cannot renew before the lease runs out: stop before anyone may take the task over
+                    lost.set()
+                    return
+
+        beater = threading.Thread(target=_beat, daemon=True)
+        beater.start()
+        fp = None
+        try:
+            if governor is not None:
+                fp = governor.footprint(str(task.payload.get("mem_key") or task.task_id))
+                if fp.source != "history" and task.payload.get("mem_gb"):
+                    fp.gb = float(task.payload["mem_gb"])
+                governor.acquire(task.task_id, fp.gb)
+            if lost.is_set():
+                result, error = {}, "lease lost before start"
+            else:
+                result = handler(task.payload, stop=lost)
+                error = "" if int(result.get("rc", 0)) == 0 else f"rc={result.get('rc')}"
+        except Exception as e:
+            result, error = {"rc": 1}, f"{type(e).__name__}: {e}"
+        finally:
+            if fp is not None:
+                governor.release(task.task_id)
+            stop.set()
+            beater.join()
+        if lost.is_set():
+            # Another worker owns the task now; a killed run is neither a result nor a failure
+            stats["abandoned"] += 1
+            log(f"[worker {worker}] lease lost {task.task_id}; attempt abandoned")
+            continue
+        if fp is not None and result.get("peak_rss_gb"):
+            governor.record(fp.key, float(result["peak_rss_gb"]))
+        ok = wq.complete(task, result) if not error else wq.fail(task, error, result)
+        if not ok:
+            stats["abandoned"] += 1
+            log(f"[worker {worker}] lease lost {task.task_id}; attempt abandoned")
+        else:
+            stats["done" if not error else "failed"] += 1
+            log(f"[worker {worker}] {'done' if not error else 'failed'} {task.task_id} {error}".rstrip())
+    return stats
+
+
+def run_local_workers(wq: WorkQueue, n: int, **kwargs: Any) -> list[dict[str, int]]:
+    """n worker threads in this process (each task still runs as its own subprocess)."""
+    out: list[dict[str, int]] = [{} for _ in range(n)]
+
+    def _one(i: int) -> None:
+        out[i] = run_worker(wq, worker=f"{worker_id()}:{i}", **kwargs)
+
+    threads = [threading.Thread(target=_one, args=(i,)) for i in range(max(1, int(n)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def main(argv: list[str] | None = None) -> None:
+    ap = argparse.ArgumentParser(description="Multi-host work queue for research runs.")
+    ap.add_argument("--db", default=str(DEFAULT_DB), help="Queue database (on a filesystem every host mounts)")
+    sub = ap.add_subparsers(dest="op", required=True)
+    w = sub.add_parser("worker", help="Claim and run tasks")
+    w.add_argument("--queue", default="", help="Only this queue name (default: any)")
+    w.add_argument("--slots", type=int, default=1, help="Tasks run at once on this host")
+    w.add_argument("--lease-seconds", type=float, default=300.0)
+    w.add_argument("--poll-seconds", type=float, default=10.0)
+    w.add_argument("--forever", action="store_true", help="Keep polling when the queue is empty")
+    w.add_argument("--mem-budget-gb", type=float, default=0.0,
+                   help="This host's memory budget for --slots (0 = V4_MEM_BUDGET_GB or 75%% of RAM)")
+    s = sub.add_parser("status", help="Task counts and unfinished tasks")
+    s.add_argument("--queue", default="")
+    r = sub.add_parser("retry", help="Reset failed tasks to pending")
+    r.add_argument("--queue", default="")
+    args = ap.parse_args(argv)
+
+    wq = WorkQueue(args.db)
+    if args.op == "worker":
+        governor = MemoryGovernor(resolve_budget_gb(args.mem_budget_gb), name="work_queue_worker")
+        try:
+            stats = run_local_workers(
+                wq, args.slots, queue=args.queue or None, lease_seconds=args.lease_seconds,
+                poll_seconds=args.poll_seconds, exit_when_idle=not args.forever, governor=governor,
+            )
+        finally:
+            governor.close()
+        print(f"[done] {json.dumps(stats)}")
+    elif args.op == "status":
+        print(json.dumps(wq.counts(args.queue or None)))
+        for row in wq.rows():
+            if args.queue and row["queue"] != args.queue:
+                continue
+            if row["state"] != "done":
+                print(f"{row['state']:7s} {row['task_id']} attempts={row['attempts']} worker={row['worker'] or ''} "
+                      f"{row['error'] or ''}")
+    elif args.op == "retry":
+        failed = [
+            r["task_id"] for r in wq.rows() if r["state"] == "failed" and (not args.queue or r["queue"] == args.queue)
+        ]
+        print(f"[done] reset={wq.retry(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
+import argparse
 import os
 import sys
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -16,7 +18,10 @@ _spec = _ilu.spec_from_file_location("momentum_v1_config", _cfg_path)
 cfg = _ilu.module_from_spec(_spec)
 _spec.loader.exec_module(cfg)
 
+import pandas as pd
+
 from backtest.backtest_engine import BacktestEngine
+from backtest.momentum_sweep import MomentumSweep, sweep_unsupported
 import backtest.config as core
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -62,7 +67,94 @@ def _make_engine_config(momentum_lookback: int, momentum_skip: int, momentum_vol
     }
 
 
+FACTOR_WEIGHTS = {'momentum': 1.0, 'reversal': 0.0, 'low_vol': 0.0, 'pead': 0.0}
+
+
+def _engine_row(lookback, skip, hold, freq):
+    """One grid cell through the full engine (train + test backtests)."""
+    cfg_dict = _make_engine_config(lookback, skip, cfg.MOMENTUM_VOL_LOOKBACK)
+    engine = BacktestEngine(cfg_dict)
+    results = engine.run_out_of_sample_test(
+        train_start=cfg.TRAIN_START, train_end=cfg.TRAIN_END,
+        test_start=cfg.TEST_START, test_end=cfg.TEST_END,
+        factor_weights=dict(FACTOR_WEIGHTS),
+        rebalance_freq=freq,
+        holding_period=hold,
+        long_pct=0.2, short_pct=0.0
+    )
+    row = {
+        'lookback': lookback,
+        'skip': skip,
+        'holding_period': hold,
+        'rebalance_freq': freq,
+        'train_ic': results['train']['analysis'].get('ic'),
+        'test_ic': results['test']['analysis'].get('ic'),
+        'train_n': len(results['train']['returns']),
+        'test_n': len(results['test']['returns']),
+    }
+    return row, {
+        'params': row,
+        'train_analysis': results['train']['analysis'],
+        'test_analysis': results['test']['analysis'],
+    }
+
+
+def _run_engine_grid(lookbacks, skips, holding_periods, rebalance_freqs):
+    rows, detail = [], []
+    for lookback in lookbacks:
+        for skip in skips:
+            for hold in holding_periods:
+                for freq in rebalance_freqs:
+                    row, det = _engine_row(lookback, skip, hold, freq)
+                    rows.append(row)
+                    detail.append(det)
+                    print(f"done lb={lookback} skip={skip} hold={hold} freq={freq} "
+                          f"train_ic={row['train_ic']} test_ic={row['test_ic']}")
+    return rows, detail
+
+
+def _run_sweep_grid(lookbacks, skips, holding_periods, rebalance_freqs):
+    """
+    Whole grid from one shared pass per period (backtest.momentum_sweep).
+    train_n / test_n are IC observations here (signal rows with a forward return),
+    not executed trades.
+    """
+    engine = BacktestEngine(_make_engine_config(lookbacks[0], skips[0], cfg.MOMENTUM_VOL_LOOKBACK))
+    sweep = MomentumSweep(engine, lookbacks, skips, holding_periods, rebalance_freqs,
+                          factor_weights=dict(FACTOR_WEIGHTS))
+    keys = ['lookback', 'skip', 'holding_period', 'rebalance_freq']
+    train = sweep.run(cfg.TRAIN_START, cfg.TRAIN_END)
+    print(f"sweep train done: {len(train)} combinations")
+    test = sweep.run(cfg.TEST_START, cfg.TEST_END)
+    print(f"sweep test done: {len(test)} combinations")
+    both = train.merge(test, on=keys, suffixes=('_train', '_test'))
+
+    rows, detail = [], []
+    for r in both.to_dict(orient='records'):
+        row = {k: int(r[k]) for k in keys}
+        row.update({
+            'train_ic': r['ic_train'],
+            'test_ic': r['ic_test'],
+            'train_n': r['n_obs_train'],
+            'test_n': r['n_obs_test'],
+        })
+        rows.append(row)
+        detail.append({
+            'params': row,
+            'train_analysis': {'ic': r['ic_train'], 'ic_yearly': r['ic_yearly_train'], 'n_dates': r['n_dates_train']},
+            'test_analysis': {'ic': r['ic_test'], 'ic_yearly': r['ic_yearly_test'], 'n_dates': r['n_dates_test']},
+        })
+    return rows, detail
+
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["sweep", "engine"], default="sweep",
+                        help="sweep: whole grid in one shared pass per period; engine: one backtest pair per cell")
+    parser.add_argument("--verify-top", type=int, default=0,
+                        help="sweep mode: rerun the K best cells by train IC through the full engine")
+    args = parser.parse_args()
+
     lookbacks = [126, 252, 504]
     skips = [10, 21, 42]
     holding_periods = [5, 10, 20]
@@ -74,53 +166,34 @@ def main():
     summary_path = out_dir / f"grid_summary_{ts}.csv"
     detail_path = out_dir / f"grid_detail_{ts}.json"
 
-    rows = []
-    detail = []
-
-    for lookback in lookbacks:
-        for skip in skips:
-            for hold in holding_periods:
-                for freq in rebalance_freqs:
-                    cfg_dict = _make_engine_config(lookback, skip, cfg.MOMENTUM_VOL_LOOKBACK)
-                    engine = BacktestEngine(cfg_dict)
-                    factor_weights = {'momentum': 1.0, 'reversal': 0.0, 'low_vol': 0.0, 'pead': 0.0}
-
-                    results = engine.run_out_of_sample_test(
-                        train_start=cfg.TRAIN_START, train_end=cfg.TRAIN_END,
-                        test_start=cfg.TEST_START, test_end=cfg.TEST_END,
-                        factor_weights=factor_weights,
-                        rebalance_freq=freq,
-                        holding_period=hold,
-                        long_pct=0.2, short_pct=0.0
-                    )
-
-                    train_ic = results['train']['analysis'].get('ic')
-                    test_ic = results['test']['analysis'].get('ic')
-                    train_n = len(results['train']['returns'])
-                    test_n = len(results['test']['returns'])
-
-                    row = {
-                        'lookback': lookback,
-                        'skip': skip,
-                        'holding_period': hold,
-                        'rebalance_freq': freq,
-                        'train_ic': train_ic,
-                        'test_ic': test_ic,
-                        'train_n': train_n,
-                        'test_n': test_n,
-                    }
-                    rows.append(row)
-                    detail.append({
-                        'params': row,
-                        'train_analysis': results['train']['analysis'],
-                        'test_analysis': results['test']['analysis'],
-                    })
-
-                    print(f"done lb={lookback} skip={skip} hold={hold} freq={freq} "
-                          f"train_ic={train_ic} test_ic={test_ic}")
-
-    import pandas as pd
-    pd.DataFrame(rows).to_csv(summary_path, index=False)
+    mode = args.mode
+    if mode == "sweep":
+        probe = BacktestEngine(_make_engine_config(lookbacks[0], skips[0], cfg.MOMENTUM_VOL_LOOKBACK))
+        reason = sweep_unsupported(probe, FACTOR_WEIGHTS)
+        if reason:
+            print(f"sweep not supported ({reason}); falling back to --mode engine")
+            mode = "engine"
+
+    t0 = time.time()
+    if mode == "sweep":
+        rows, detail = _run_sweep_grid(lookbacks, skips, holding_periods, rebalance_freqs)
+    else:
+        rows, detail = _run_engine_grid(lookbacks, skips, holding_periods, rebalance_freqs)
+    print(f"grid ({mode}) finished in {time.time() - t0:.1f}s")
+
+    summary = pd.DataFrame(rows)
+    summary.insert(4, 'mode', mode)
+    if mode == "sweep" and args.verify_top > 0:
+        top = summary.sort_values('train_ic', ascending=False, na_position='last').head(args.verify_top)
+        for i, r in top.iterrows():
+            row, det = _engine_row(int(r['lookback']), int(r['skip']), int(r['holding_period']), int(r['rebalance_freq']))
+            for k in ('train_ic', 'test_ic', 'train_n', 'test_n'):
+                summary.loc[i, f'engine_{k}'] = row[k]
+            detail[i]['engine'] = det
+            print(f"verified lb={row['lookback']} skip={row['skip']} hold={row['holding_period']} "
+                  f"freq={row['rebalance_freq']} sweep_train_ic={r['train_ic']} engine_train_ic={row['train_ic']}")
+
+    summary.to_csv(summary_path, index=False)
     with open(detail_path, "w") as f:
         json.dump(detail, f, indent=2, default=str)
 
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from backtest.analysis_table import build_analysis_table, default_return_column
+from backtest.performance_analyzer import PerformanceAnalyzer
+
+
+def _frames(seed=3):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for d in pd.bdate_range("2021-01-04", periods=30):
+        syms = [f"S{j:02d}" for j in rng.choice(40, 25, replace=False)]
+        rows.append(pd.DataFrame({"symbol": syms, "date": d.strftime("%Y-%m-%d"), "signal": rng.normal(size=25)}))
+    signals = pd.concat(rows, ignore_index=True)
+    keys = signals[["symbol", "date"]].rename(columns={"date": "signal_date"})
+    fwd = keys.sample(frac=0.9, random_state=1).sort_index().assign(**{"return": lambda x: rng.normal(0, 0.05, len(x))})
+    raw = keys.assign(**{"return": rng.normal(0, 0.05, len(keys))})
+    pos = signals.groupby("date").head(5)[["symbol", "date"]].assign(position=1)
+    executed = pos.rename(columns={"date": "signal_date"}).assign(**{"return": 0.01})
+    return signals, fwd, raw, executed, pos
+
+
+def test_table_aligns_every_source():
+    signals, fwd, raw, executed, pos = _frames()
+    t = build_analysis_table(signals, fwd, raw, executed, pos)
+    assert len(t) == len(signals)
+    assert t["fwd_return"].notna().sum() == len(fwd)
+    assert t["fwd_return_raw"].notna().all()
+    assert (t["position"] == 1).sum() == len(pos)
+    assert t.loc[t["position"] == 1, "executed_return"].eq(0.01).all()
+    assert t["date"].dtype.kind == "M"
+    row = fwd.iloc[7]
+    hit = t[(t["symbol"] == row["symbol"]) & (t["date"] == pd.Timestamp(row["signal_date"]))]
+    assert hit["fwd_return"].iloc[0] == row["return"]
+
+
+def test_table_ic_matches_per_frame_merge():
+    signals, fwd, raw, executed, pos = _frames()
+    t = build_analysis_table(signals, fwd, raw, executed, pos)
+    pa = PerformanceAnalyzer()
+    for frame, col in ((fwd, "fwd_return"), (raw, "fwd_return_raw")):
+        old = pa.calculate_ic(signals, frame)
+        new = pa.calculate_ic_table(t, col)
+        assert new["ic"] == old["ic"]
+        assert new["ic_overall"] == old["ic_overall"]
+        assert new["n_merged"] == old["n_merged"]
+    summary = pa.analyze_table(t, "fwd_return")
+    legacy = pa.analyze_backtest(signals, fwd)
+    assert summary["mean_return"] == legacy["mean_return"]
+    assert summary["win_rate"] == legacy["win_rate"]
+
+
+def test_default_return_column_falls_back_to_executed():
+    signals, _, _, executed, pos = _frames()
+    t = build_analysis_table(signals, None, None, executed, pos)
+    assert default_return_column(t) == "executed_return"
+    assert len(build_analysis_table(signals.iloc[:0])) == 0
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from backtest.data_quality_filter import DataQualityFilter, PriceQualityMask
+
+
+def _price_frame(n=200, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 20 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    df = pd.DataFrame({
+        "date": pd.bdate_range("2020-01-01", periods=n),
+        "open": close * (1 + rng.normal(0, 0.01, n)),
+        "close": close,
+        "volume": rng.integers(1, 1000, n).astype(float),
+    })
+    df.loc[30, "close"] = df.loc[29, "close"] * 2.5      # jump
+    df.loc[60, "open"] = df.loc[60, "close"] * 3.0        # open/close breach
+    df.loc[90, "close"] = -1.0                            # non-positive
+    df.loc[120:128, "volume"] = 0.0                       # zero-volume run
+    return df
+
+
+def test_window_mask_matches_full_validation():
+    df = _price_frame()
+    mask = PriceQualityMask.from_frame(df)
+    legacy = DataQualityFilter()
+    fast = DataQualityFilter()
+    for lo in range(0, len(df) - 1):
+        for width in (1, 2, 5, 8, 12):
+            hi = min(len(df), lo + width)
+            exp = legacy.validate_price_data(df.iloc[lo:hi], "AAA")
+            got = fast.validate_window(mask, lo, hi, "AAA")
+            assert got == exp, (lo, hi)
+    assert legacy.get_log_counts() == fast.get_log_counts()
+
+
+def test_quality_log_counts_not_appends():
+    df = _price_frame()
+    mask = PriceQualityMask.from_frame(df)
+    f = DataQualityFilter()
+    for _ in range(50):
+        f.validate_window(mask, 88, 93, "AAA")
+    assert f.get_log_counts() == {"AAA: Zero/negative prices": 50}
+    assert f.get_log() == ["AAA: Zero/negative prices (x50)"]
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.delta_executor import DeltaExecutor, check_holding_period, diff_targets, target_weights
+from backtest.execution_simulator import ExecutionSimulator
+
+
+class _FrameEngine:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def get_price(self, symbol, start_date=None, end_date=None):
+        df = self.frames.get(symbol)
+        if df is None:
+            return None
+        m = pd.Series(True, index=df.index)
+        if start_date is not None:
+            m &= df["date"] >= pd.Timestamp(start_date)
+        if end_date is not None:
+            m &= df["date"] <= pd.Timestamp(end_date)
+        return df[m].reset_index(drop=True)
+
+
+def _frames(days, seed=3):
+    rng = np.random.default_rng(seed)
+    out = {}
+    for sym in ("A", "B", "C"):
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days))))
+        out[sym] = pd.DataFrame({
+            "date": days,
+            "open": close * (1 + rng.normal(0, 0.003, len(days))),
+            "close": close,
+            "volume": 1000.0,
+        })
+    return out
+
+
+def test_diff_targets_kinds():
+    changes = diff_targets({"A": 0.5, "B": 0.5}, {"B": 1 / 3, "C": 1 / 3, "D": 1 / 3})
+    kinds = {sym: kind for sym, _, _, kind in changes}
+    assert kinds == {"A": "drop", "B": "resize", "C": "add", "D": "add"}
+    assert diff_targets({"A": 1.0}, {"A": 1.0}) == []
+
+
+def test_retained_names_untouched_when_one_name_enters():
+    held = {f"S{i:02d}": 1 / 30 for i in range(30)}
+    target = {**{sym: 1 / 31 for sym in held}, "NEW": 1 / 31}
+    assert diff_targets(held, target) == [("NEW", 0.0, 1 / 31, "add")]
+    # A leg that halves is still resized; a sign flip always trades
+    assert [k for *_, k in diff_targets({"A": 0.5, "B": 0.5}, {"A": 1.0})] == ["resize", "drop"]
+    assert diff_targets({"A": 0.5}, {"A": -0.5}) == [("A", 0.5, -0.5, "resize")]
+
+
+def test_delta_mode_rejects_a_separate_holding_period():
+    check_holding_period(20, 20)
+    check_holding_period(10, 1, rebalance_mode="month_end")
+    with pytest.raises(ValueError, match="holding_period"):
+        check_holding_period(10, 5)
+
+
+def test_target_weights_equal_weight_per_leg():
+    pos = pd.DataFrame({"symbol": ["A", "B", "C"], "date": ["2020-01-01"] * 3, "position": [1, 1, -1]})
+    w = target_weights(pos)["2020-01-01"]
+    assert w == {"A": 0.5, "B": 0.5, "C": -1.0}
+
+
+def test_daily_returns_follow_book():
+    days = pd.bdate_range("2020-01-01", periods=30)
+    frames = _frames(days)
+    sim = ExecutionSimulator(_FrameEngine(frames), transaction_cost=0.0, execution_delay=1,
+                             execution_use_trading_days=True, trading_calendar=days,
+                             enable_quality_filter=False)
+    pos = pd.DataFrame({
+        "symbol": ["A", "A", "B"],
+        "date": [days[0].strftime("%Y-%m-%d"), days[10].strftime("%Y-%m-%d"), days[10].strftime("%Y-%m-%d")],
+        "position": [1, 1, 1],
+    })
+    out = DeltaExecutor(sim).run(pos, end_date=days[-1].strftime("%Y-%m-%d"))
+
+    # A retained (resized 1.0 -> 0.5), B added: only three fills instead of six
+    assert out["stats"]["execution_lookups"] == 3
+    assert list(out["trades"]["kind"]) == ["add", "resize", "add"]
+
+    daily = out["daily"].set_index("date")
+    a, b = frames["A"].set_index("date"), frames["B"].set_index("date")
+    # Entry day: open -> close on the new weight only
+    d1 = days[1]
+    assert np.isclose(daily.loc[d1, "gross_return"], a.loc[d1, "close"] / a.loc[d1, "open"] - 1)
+    # Plain holding day: close-to-close on the held weight
+    d5 = days[5]
+    assert np.isclose(daily.loc[d5, "gross_return"], a.loc[d5, "close"] / a.loc[days[4], "close"] - 1)
+    # Resize day: overnight on old weight, intraday on new weights
+    d11 = days[11]
+    exp = (a.loc[d11, "open"] / a.loc[days[10], "close"] - 1) \
+        + 0.5 * (a.loc[d11, "close"] / a.loc[d11, "open"] - 1) \
+        + 0.5 * (b.loc[d11, "close"] / b.loc[d11, "open"] - 1)
+    assert np.isclose(daily.loc[d11, "gross_return"], exp)
+    assert np.isclose(daily.loc[d11, "turnover"], 1.0)
+    assert (daily["net_return"] == daily["gross_return"]).all()
+    assert set(out["round_trips"]["exit_type"]) == {"open_mtm"}
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.engine_pool import EnginePool
+
+
+def _config(tmp_path, **overrides):
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range("2019-01-01", "2020-06-30")
+    (tmp_path / "prices").mkdir(exist_ok=True)
+    (tmp_path / "prices_delisted").mkdir(exist_ok=True)
+    for i in range(10):
+        sym = f"S{i:02d}" if i else "SPY"
+        close = 40 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        pd.DataFrame({
+            "date": dates, "open": close * (1 + rng.normal(0, 0.004, len(dates))),
+            "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }).to_pickle(tmp_path / "prices" / f"{sym}.pkl")
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+    cfg = {
+        "PRICE_DIR_ACTIVE": str(tmp_path / "prices"),
+        "PRICE_DIR_DELISTED": str(tmp_path / "prices_delisted"),
+        "DELISTED_INFO": str(tmp_path / "delisted.csv"),
+        "MIN_MARKET_CAP": 0, "MIN_DOLLAR_VOLUME": 0, "MIN_PRICE": 0,
+        "EXECUTION_USE_TRADING_DAYS": True,
+        "MOMENTUM_LOOKBACK": 40, "MOMENTUM_SKIP": 5, "MOMENTUM_USE_MONTHLY": False,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_pooled_engine_matches_fresh_engine_across_segments(tmp_path):
+    cfg = _config(tmp_path)
+    pool = EnginePool()
+    kw = dict(rebalance_freq=7, holding_period=10, long_pct=0.25)
+    for start, end in [("2019-06-01", "2019-10-31"), ("2019-11-01", "2020-06-30")]:
+        got = pool.get(dict(cfg)).run_backtest(start, end, {"momentum": 1.0}, **kw)
+        exp = BacktestEngine(cfg).run_backtest(start, end, {"momentum": 1.0}, **kw)
+        for key in ("signals", "positions", "returns", "forward_returns_raw", "analysis_table"):
+            pd.testing.assert_frame_equal(got[key], exp[key])
+        assert got["filter_stats"] == exp["filter_stats"]
+    assert pool.stats == {"engines_built": 1, "engines_reused": 1, "data_engines_built": 1}
+
+
+def test_pool_shares_data_engine_across_factor_configs(tmp_path):
+    cfg = _config(tmp_path)
+    pool = EnginePool()
+    a = pool.get(cfg)
+    b = pool.get(dict(cfg, MOMENTUM_LOOKBACK=60))
+    assert a is not b and len(pool) == 2
+    assert a.data_engine is b.data_engine
+    assert a.factor_engine.fundamentals_engine is b.factor_engine.fundamentals_engine
+    assert pool.stats["data_engines_built"] == 1
+
+
+def test_release_engines_keeps_shared_data(tmp_path):
+    cfg = _config(tmp_path)
+    pool = EnginePool()
+    first = pool.get(cfg)
+    pool.release_engines()
+    assert len(pool) == 0
+    second = pool.get(cfg)
+    assert second is not first and second.data_engine is first.data_engine
+    assert pool.stats["engines_built"] == 2 and pool.stats["data_engines_built"] == 1
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from backtest.exposure_engine import asof_market_cap, industry_exposure, size_exposure, top_overlap
+
+
+def _signals(n_dates=25, seed=11):
+    rng = np.random.default_rng(seed)
+    syms = [f"S{i:02d}" for i in range(60)]
+    rows = []
+    for d in pd.bdate_range("2021-01-04", periods=n_dates, freq="5B"):
+        pick = rng.choice(syms, 40, replace=False)
+        rows.append(pd.DataFrame({"symbol": pick, "date": d.strftime("%Y-%m-%d"),
+                                  "signal": np.round(rng.normal(size=40), 1)}))
+    return pd.concat(rows, ignore_index=True)
+
+
+def test_top_overlap_matches_nlargest_loop():
+    signals = _signals()
+    dates = sorted(signals["date"].unique())
+    exp = []
+    for d0, d1 in zip(dates[:-1], dates[1:]):
+        s0, s1 = signals[signals["date"] == d0], signals[signals["date"] == d1]
+        top0 = set(s0.nlargest(max(1, int(len(s0) * 0.2)), "signal")["symbol"])
+        top1 = set(s1.nlargest(max(1, int(len(s1) * 0.2)), "signal")["symbol"])
+        exp.append(len(top0 & top1) / max(1, len(top1)))
+    got = top_overlap(signals, top_pct=0.2)
+    assert got["n_pairs"] == len(exp)
+    assert np.allclose(got["by_date"]["overlap"].to_numpy()[1:], exp)
+    assert got["mean"] == float(np.mean(exp))
+
+
+def test_asof_market_cap_and_size_exposure():
+    signals = _signals()
+    caps = []
+    for i, sym in enumerate(sorted(signals["symbol"].unique())):
+        d = pd.bdate_range("2020-12-01", periods=12, freq="10B")
+        caps.append(pd.DataFrame({"symbol": sym, "date": d, "marketCap": (i + 1) * 1e9 * np.arange(1, 13)}))
+    panel = pd.concat(caps, ignore_index=True)
+    got = asof_market_cap(signals, panel)
+    for k in range(0, len(signals), 97):
+        row = signals.iloc[k]
+        sub = panel[(panel["symbol"] == row["symbol"]) & (panel["date"] <= pd.Timestamp(row["date"]))]
+        assert got[k] == sub["marketCap"].iloc[-1]
+
+    res = size_exposure(signals, got, min_names=30)
+    assert res["n_dates"] == signals["date"].nunique()
+    one = signals[signals["date"] == signals["date"].iloc[0]]
+    c = np.corrcoef(np.log(got[one.index]), one["signal"])[0, 1]
+    assert np.isclose(res["by_date"]["corr"].iloc[0], c)
+
+
+def test_industry_exposure_coverage():
+    signals = _signals()
+    profiles = pd.DataFrame({"symbol": [f"S{i:02d}" for i in range(30)],
+                             "industry": ["A", "B"] * 15, "sector": "X"})
+    res = industry_exposure(signals, profiles)
+    exp = signals["symbol"].isin(profiles["symbol"]).mean()
+    assert np.isclose(res["coverage"], exp)
+    assert res["n_dates"] == signals["date"].nunique()
+    assert set(res["top_industry_mean_signal"]) == {"A", "B"}
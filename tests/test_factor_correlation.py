@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.factor_correlation import FactorCorrelationAccumulator, cache_cross_sections, weights_hash
+from scripts.build_factor_correlation import _signature_dirs, main
+
+
+def _cross_section(rng, n=200):
+    a = rng.normal(size=n)
+    return pd.DataFrame({
+        "a": a,
+        "a_dup": a * 2 + rng.normal(scale=0.05, size=n),
+        "b": rng.normal(size=n),
+        "neg_b": None,
+    }, index=[f"S{i}" for i in range(n)]).assign(neg_b=lambda x: -x["b"])
+
+
+def test_average_matches_pandas_spearman():
+    rng = np.random.default_rng(0)
+    acc = FactorCorrelationAccumulator(["a", "a_dup", "b", "neg_b"], min_names=10)
+    exp = []
+    for _ in range(12):
+        xs = _cross_section(rng)
+        acc.update(xs)
+        exp.append(xs.corr(method="spearman").to_numpy())
+    assert np.allclose(acc.mean().to_numpy(), np.mean(exp, axis=0))
+    assert acc.n_dates == 12
+    red = acc.redundancy(0.7).set_index("factor")
+    assert red.loc["a", "most_similar"] == "a_dup"
+    assert red.loc["b", "redundant_with"].startswith("neg_b:-1.000")
+    cl = acc.clusters(0.7).set_index("factor")["cluster"]
+    assert cl["a"] == cl["a_dup"] and cl["b"] == cl["neg_b"] and cl["a"] != cl["b"]
+
+
+def test_missing_names_and_merge():
+    rng = np.random.default_rng(1)
+    left = FactorCorrelationAccumulator(["a", "a_dup", "b", "neg_b"], min_names=10)
+    right = FactorCorrelationAccumulator(["a", "a_dup", "b", "neg_b"], min_names=10)
+    for i in range(6):
+        xs = _cross_section(rng)
+        xs.loc[xs.index[:50], "b"] = np.nan
+        (left if i % 2 else right).update(xs[["a", "b"]] if i == 0 else xs)
+    left.merge(right)
+    assert left.n_dates == 6
+    assert left.pair_counts().loc["a", "b"] == 6
+    assert left.pair_counts().loc["a", "a_dup"] == 5
+
+
+def test_cache_cross_sections_reads_one_date_at_a_time(tmp_path):
+    factors = {"f1": {"momentum": 1.0}, "f2": {"reversal": 1.0}}
+    for day in ("20210104", "20210111"):
+        for name, w in factors.items():
+            pd.DataFrame({"symbol": ["A", "B", "C"], "date": day, "signal": [1.0, 2.0, 3.0]}).to_pickle(
+                tmp_path / f"{day}_{weights_hash(w)}.pkl"
+            )
+    got = list(cache_cross_sections(tmp_path, factors))
+    assert [d for d, _ in got] == ["2021-01-04", "2021-01-11"]
+    assert set(got[0][1].columns) == {"f1", "f2"}
+    assert got[0][1].loc["B", "f2"] == 2.0
+
+
+def test_factors_cached_under_different_signatures_are_all_read(tmp_path, capsys):
+    factors = {"f1": {"momentum": 1.0}, "f2": {"reversal": 1.0}, "f3": {"value": 1.0}, "gone": {"sue": 1.0}}
+    rng = np.random.default_rng(2)
+    layout = {"sigA": ["f1", "f2"], "sigB": ["f3"]}
+    for sig, names in layout.items():
+        (tmp_path / "signals" / sig).mkdir(parents=True)
+        for day in ("20210104", "20210111", "20210118"):
+            for name in names:
+                pd.DataFrame({"symbol": [f"S{i}" for i in range(30)], "date": day, "signal": rng.normal(size=30)}) \
+                    .to_pickle(tmp_path / "signals" / sig / f"{day}_{weights_hash(factors[name])}.pkl")
+    # f1 also has a stale, shorter run under sigB: the fuller sigA copy wins
+    pd.DataFrame({"symbol": ["S0"], "date": "20210104", "signal": [1.0]}) \
+        .to_pickle(tmp_path / "signals" / "sigB" / f"20210104_{weights_hash(factors['f1'])}.pkl")
+
+    dirs = _signature_dirs(tmp_path / "signals", factors)
+    assert {k: d.name for k, d in dirs.items()} == {"f1": "sigA", "f2": "sigA", "f3": "sigB"}
+    got = list(cache_cross_sections(dirs, factors))
+    assert len(got) == 3 and set(got[0][1].columns) == {"f1", "f2", "f3"}
+
+    catalog = tmp_path / "catalog.json"
+    catalog.write_text(json.dumps({"entries": [{"candidate_id": k, "weights": w} for k, w in factors.items()]}))
+    main(["--catalog", str(catalog), "--cache-dir", str(tmp_path / "signals"), "--min-names", "5",
+          "--out-dir", str(tmp_path / "out")])
+    report = json.loads(next((tmp_path / "out").glob("*/factor_corr_report.json")).read_text())
+    assert report["missing_factors"] == ["gone"] and report["n_dates"] == 3
+    assert "no cached signals for 1 of 4 factors: gone" in capsys.readouterr().err
+    with pytest.raises(SystemExit, match="covers 0 of 4"):
+        main(["--catalog", str(catalog), "--cache-dir", str(tmp_path / "nothing"), "--out-dir", str(tmp_path / "out")])
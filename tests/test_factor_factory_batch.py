@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pandas as pd
+
+from scripts import run_factor_factory_batch as ff
+
+
+def _candidate(tmp_path: Path, cid: str, family: str, ics: list[float]) -> ff.Candidate:
+    out_dir = tmp_path / cid
+    (out_dir / "mom").mkdir(parents=True)
+    pd.DataFrame({"n_dates": [10] * len(ics), "ic_overall": ics, "sharpe": [1.0] * len(ics)}).to_csv(
+        out_dir / "mom" / "segment_summary.csv", index=False
+    )
+    return ff.Candidate(cid, family, "mom", 2, [], out_dir, out_dir / "runner.log", ["py", "x.py", "--factors", "mom"])
+
+
+def test_halving_schedule_and_nested_segment_order():
+    assert ff._halving_schedule(8, 3, 1) == [1, 3, 8]
+    assert ff._halving_schedule(2, 3, 4) == [2]
+    order = ff._segment_order(8)
+    assert sorted(order) == list(range(8))
+    assert order[0] == 3 and {0, 7} <= set(order[:3])
+
+
+def test_prune_keeps_top_fraction_per_family_and_logs_decisions(tmp_path):
+    cands = [
+        _candidate(tmp_path, "a1", "a", [0.02, 0.03]),
+        _candidate(tmp_path, "a2", "a", [0.05, -0.04]),
+        _candidate(tmp_path, "a3", "a", [0.01, 0.01]),
+        _candidate(tmp_path, "b1", "b", [0.01, 0.02]),
+    ]
+    survivors, log = ff._prune(cands, 0, 3, "ic_t", failed={"b1"})
+    assert [c.candidate_id for c in survivors] == ["a1"]
+    log = pd.DataFrame(log).set_index("candidate_id")
+    assert log.loc["a2", "reason"] == "below top 1" and log.loc["b1", "reason"] == "failed"
+
+    rung = ff._rung_candidate(cands[0], 1, [5, 0, 3])
+    assert rung.cmd[-3:] == ["--only-segments", "0,3,5", "--resume"]
+    assert cands[0].cmd[-1] == "mom"
@@ -0,0 +1,102 @@
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtest.ic_analytics import RESUM_EVERY, ICAnalytics, _Window, market_regimes, regime_at
+from scripts.generate_daily_research_brief import _refresh_ic_analytics
+
+
+def _per_date(n_dates=300, seed=5):
+    rng = np.random.default_rng(seed)
+    ic = rng.normal(0.02, 0.1, n_dates)
+    ic[rng.choice(n_dates, 10, replace=False)] = np.nan
+    return pd.DataFrame({
+        "date": pd.bdate_range("2020-01-02", periods=n_dates),
+        "n": rng.integers(50, 100, n_dates),
+        "ic": ic,
+        "rank_ic": ic + rng.normal(0, 0.01, n_dates),
+    })
+
+
+def _regimes():
+    rng = np.random.default_rng(1)
+    days = pd.bdate_range("2019-01-01", "2021-12-31")
+    close = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(days)))), index=days)
+    return market_regimes(close, trend_window=50, vol_window=21)
+
+
+def test_rolling_and_calendar_match_pandas():
+    pdf = _per_date()
+    a = ICAnalytics.from_per_date(pdf, windows=(20, 60))
+    s = pd.Series(pdf["ic"].to_numpy(), index=pdf["date"]).dropna()
+    for w in (20, 60):
+        exp = s.rolling(w, min_periods=max(3, w // 5)).mean()
+        assert np.allclose(a.rolling(w).to_numpy(), exp.to_numpy(), equal_nan=True)
+
+    years = a.buckets_frame("year").set_index("bucket")
+    exp = s.groupby(s.index.year).agg(["mean", "std", "count"])
+    assert np.allclose(years["ic_mean"].to_numpy(dtype=float), exp["mean"].to_numpy())
+    assert np.allclose(years["ic_std"].to_numpy(dtype=float), exp["std"].to_numpy())
+    assert years["n_dates"].tolist() == exp["count"].tolist()
+
+
+def test_regime_buckets_use_asof_labels():
+    pdf = _per_date()
+    regimes = _regimes()
+    a = ICAnalytics.from_per_date(pdf, regimes)
+    labels = regime_at(pdf["date"], regimes)
+    key = labels["trend"] + "/" + labels["vol"]
+    exp = pd.Series(pdf["ic"].to_numpy(), index=key.to_numpy()).dropna().groupby(level=0).mean()
+    got = a.buckets_frame("regime").set_index("bucket")["ic_mean"]
+    assert set(got.index) == set(exp.index)
+    assert np.allclose(got.loc[exp.index].to_numpy(dtype=float), exp.to_numpy())
+
+
+def test_incremental_state_roundtrip_equals_full_pass():
+    pdf = _per_date()
+    regimes = _regimes()
+    full = ICAnalytics.from_per_date(pdf, regimes)
+
+    part = ICAnalytics.from_per_date(pdf.iloc[:200], regimes)
+    state = json.loads(json.dumps(part.to_dict()))
+    resumed = ICAnalytics.from_dict(state)
+    assert resumed.extend(pdf, regimes) == 100
+    assert resumed.extend(pdf, regimes) == 0
+
+    assert "rows" not in state and len(resumed) == len(full) == 300
+    # Only the dates added after the restore are held as rows
+    pd.testing.assert_frame_equal(resumed.frame(), full.frame().iloc[200:].reset_index(drop=True))
+    for kind in ("month", "vol", "regime"):
+        pd.testing.assert_frame_equal(resumed.buckets_frame(kind), full.buckets_frame(kind), check_exact=False)
+    assert resumed.latest() == full.latest()
+
+
+def test_window_sums_are_resummed_so_long_runs_do_not_drift():
+    rng = np.random.default_rng(3)
+    values = rng.normal(0.02, 0.1, 20 * RESUM_EVERY + 7)
+    w = _Window(60)
+    for i, v in enumerate(values, 1):
+        w.push(float(v))
+        if i % RESUM_EVERY == 0:
+            assert w.s == math.fsum(w.buf) and w.pushes == 0
+    tail = values[-60:]
+    assert w.pushes == 7
+    assert abs(w.mean(3) - tail.mean()) < 1e-12 and abs(w.std(3) - tail.std(ddof=1)) < 1e-12
+    restored = _Window.from_state(60, json.loads(json.dumps(w.state())))
+    assert restored.pushes == 7 and restored.s == w.s
+
+
+def test_daily_state_reset_on_a_new_run_dir_is_reported(tmp_path, capsys):
+    state = tmp_path / "state.json"
+    for i, run in enumerate(("run1", "run2")):
+        (tmp_path / "res" / run / "momentum").mkdir(parents=True)
+        _per_date(40, seed=i).to_csv(tmp_path / "res" / run / "momentum" / "ic_by_date.csv", index=False)
+        os.utime(tmp_path / "res" / run / "momentum" / "ic_by_date.csv", (1e9 + i, 1e9 + i))
+        lines, _ = _refresh_ic_analytics(tmp_path, "res", state, tmp_path / "no_spy.pkl")
+    assert lines[0].startswith("- WARNING: IC analytics state reset") and "run1" in lines[0]
+    assert "state reset" in capsys.readouterr().err
+    saved = json.loads(state.read_text())
+    assert saved["run_dir"].endswith("run2") and "rows" not in saved["factors"]["momentum"]
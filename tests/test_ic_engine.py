@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from backtest.ic_engine import ICEngine, average_ranks, grouped_corr, newey_west_tstat
+from backtest.performance_analyzer import PerformanceAnalyzer
+
+
+def _panel(n_dates=60, seed=11):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for d in pd.bdate_range("2020-11-02", periods=n_dates):
+        n = int(rng.integers(2, 30))
+        rows.append(pd.DataFrame({
+            "symbol": [f"S{j}" for j in range(n)],
+            "date": d.strftime("%Y-%m-%d"),
+            "signal": np.round(rng.normal(size=n), 1),
+        }))
+    signals = pd.concat(rows, ignore_index=True)
+    returns = signals[["symbol", "date"]].rename(columns={"date": "signal_date"})
+    returns["return"] = rng.normal(0, 0.05, len(returns)) + 0.02 * signals["signal"]
+    returns.loc[3, "return"] = np.nan
+    return signals, returns
+
+
+def test_grouped_corr_matches_pandas():
+    signals, returns = _panel()
+    m = signals.merge(returns, left_on=["symbol", "date"], right_on=["symbol", "signal_date"])
+    g, _ = pd.factorize(m["date"], sort=True)
+    corr, _ = grouped_corr(g, m["signal"].to_numpy(), m["return"].to_numpy(), g.max() + 1)
+    exp = m.groupby("date").apply(lambda x: x["signal"].corr(x["return"]))
+    assert np.allclose(corr, exp.to_numpy(), equal_nan=True)
+
+
+def test_rank_ic_matches_spearman():
+    signals, returns = _panel()
+    pdf = ICEngine.from_signals(signals, returns).per_date()
+    m = signals.merge(returns, left_on=["symbol", "date"], right_on=["symbol", "signal_date"])
+    exp = m.groupby("date").apply(lambda x: x["signal"].corr(x["return"], method="spearman"))
+    assert np.allclose(pdf["rank_ic"].to_numpy(), exp.to_numpy(), equal_nan=True)
+
+
+def test_average_ranks_ties():
+    r = average_ranks(np.array([0, 0, 0, 1, 1]), np.array([2.0, 1.0, 2.0, 5.0, np.nan]))
+    assert np.allclose(r[:4], [2.5, 1.0, 2.5, 1.0])
+    assert np.isnan(r[4])
+
+
+def test_newey_west_zero_lags_is_iid_population_se():
+    x = np.array([0.1, -0.05, 0.2, 0.03, 0.07])
+    m, se, t = newey_west_tstat(x, 0)
+    assert np.isclose(se, x.std(ddof=0) / np.sqrt(len(x)))
+    assert np.isclose(t, m / se)
+
+
+def test_calculate_ic_keys_and_rollups():
+    signals, returns = _panel()
+    pa = PerformanceAnalyzer()
+    out = pa.calculate_ic(signals, returns, holding_period=10, rebalance_freq=5)
+    assert out["hac_lags"] == 1
+    assert out["n"] > 1 and out["ic"] is not None and out["rank_ic"] is not None
+    assert out["icir"] == out["ic"] / out["ic_std"]
+    monthly = pa.calculate_ic_by_period(signals, returns, freq="M")
+    assert list(monthly["period"]) == sorted(monthly["period"])
+    m = signals.merge(returns, left_on=["symbol", "date"], right_on=["symbol", "signal_date"])
+    first = m[pd.to_datetime(m["date"]).dt.to_period("M").astype(str) == monthly["period"].iloc[0]]
+    assert np.isclose(monthly["ic"].iloc[0], first["signal"].corr(first["return"]))
+    assert monthly["n"].iloc[0] == len(first)
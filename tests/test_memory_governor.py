@@ -0,0 +1,121 @@
+import json
+import mmap
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.memory_governor import (
+    MemoryGovernor,
+    active_status,
+    estimate_gb,
+    private_bytes,
+    run_measured,
+    split_budget,
+)
+
+
+def test_admission_keeps_running_footprint_within_budget(tmp_path):
+    gov = MemoryGovernor(10.0, name="t", state_dir=tmp_path)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0, "seen": []}
+
+    def job(gb):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            state["seen"].append(json.loads(gov.status_path.read_text()))
+        time.sleep(0.1)
+        with lock:
+            state["active"] -= 1
+        return gb
+
+    items = [(f"j{i}", 4.0, 4.0) for i in range(5)] + [("huge", 25.0, 25.0)]
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        done = [fut.result() for _, fut in gov.as_completed(ex, job, items, max_in_flight=8)]
+    assert sorted(done) == [4.0] * 5 + [25.0]
+    assert state["peak"] == 2 and gov.peak_used_gb == 25.0
+    # The status file shows what runs and what waits while the queue drains
+    seen = state["seen"]
+    assert {s["budget_gb"] for s in seen} == {10.0} and max(s["used_gb"] for s in seen if s["queued"]) == 8.0
+    assert seen[-1]["running"][0]["job_id"] == "huge" and seen[-1]["running"][0]["waited_seconds"] > 0
+    assert [s["name"] for s in active_status(tmp_path)] == ["t"]
+    gov.close()
+    assert active_status(tmp_path) == []
+
+
+def test_admission_counts_memory_held_by_other_live_governors(tmp_path):
+    seg = MemoryGovernor(10.0, name="segmented", state_dir=tmp_path)
+    batch = MemoryGovernor(10.0, name="batch", state_dir=tmp_path)
+    assert seg.try_acquire("seg:momentum", 7.0)
+    time.sleep(0.25)
+    assert batch.peers_used_gb() == 7.0 and batch.fits(3.0) and not batch.fits(4.0)
+
+    admitted = threading.Event()
+
+    def _wait():
+        batch.acquire("cand:a", 4.0)
+        admitted.set()
+
+    t = threading.Thread(target=_wait)
+    t.start()
+    assert not admitted.wait(0.5)
+    assert [j["job_id"] for j in active_status(tmp_path, exclude=seg.status_path)[0]["queued"]] == ["cand:a"]
+    # The other governor's release is seen on the next poll
+    seg.release("seg:momentum")
+    assert admitted.wait(5.0)
+    t.join()
+    time.sleep(0.25)
+    assert not seg.fits(7.0) and seg.fits(6.0)
+    batch.release("cand:a")
+    batch.close()
+    time.sleep(0.25)
+    assert seg.fits(10.0) and seg.peers_used_gb() == 0.0
+    seg.close()
+
+
+def test_footprint_learns_from_recorded_peaks(tmp_path):
+    data = tmp_path / "prices"
+    data.mkdir()
+    (data / "A.pkl").write_bytes(b"x" * 1000)
+    gov = MemoryGovernor(8.0, name="t", state_dir=tmp_path / "state", publish=False)
+    fp = gov.footprint("seg:momentum", [str(data)], n_factors=2)
+    assert fp.source == "estimate" and fp.data_bytes == 1000 and fp.gb == round(estimate_gb(1000, 2), 3)
+
+    gov.record("seg:momentum", 2.0, data_bytes=1000)
+    again = MemoryGovernor(8.0, name="t", state_dir=tmp_path / "state", publish=False)
+    learned = again.footprint("seg:momentum", [str(data)])
+    assert learned.source == "history" and learned.gb == 2.2
+
+    # More input data than when the peak was recorded scales the learned footprint
+    (data / "B.pkl").write_bytes(b"x" * 1000)
+    grown = MemoryGovernor(8.0, name="t", state_dir=tmp_path / "state", publish=False)
+    assert grown.footprint("seg:momentum", [str(data)]).gb == 4.4
+
+
+def test_run_measured_reports_child_peak_rss():
+    code = "import sys; b = bytearray(200 * 1024 * 1024); sys.exit(3)"
+    rc, peak = run_measured([sys.executable, "-c", code], interval=0.05)
+    assert rc == 3 and peak >= 0.19
+
+
+def test_private_bytes_counts_written_memory_not_mapped_files(tmp_path):
+    mb = 1 << 20
+    data = tmp_path / "store.bin"
+    data.write_bytes(b"x" * (64 * mb))
+    before = private_bytes()
+    with open(data, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        assert sum(m[i] for i in range(0, len(m), 4096)) > 0  # touch every page
+        mapped = private_bytes()
+    buf = bytearray(64 * mb)
+    buf[::4096] = b"y" * len(buf[::4096])
+    written = private_bytes()
+    assert mapped - before < 16 * mb
+    assert written - before > 48 * mb
+
+
+def test_split_budget_bounds_jobs_times_worker_memory():
+    assert split_budget(4, 0.0, 32.0) == (4, 8.0)
+    assert split_budget(8, 6.0, 32.0) == (5, 6.0)
+    assert split_budget(2, 64.0, 32.0) == (1, 64.0)
+    assert split_budget(3, 0.0, 0.0) == (3, 0.0)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.momentum_sweep import MomentumSweep
+
+
+def _config(tmp_path, **overrides):
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range("2019-01-01", "2020-03-31")
+    (tmp_path / "prices").mkdir()
+    (tmp_path / "prices_delisted").mkdir()
+    for i in range(10):
+        sym = f"S{i:02d}" if i else "SPY"
+        close = 40 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        folder = "prices_delisted" if sym == "S09" else "prices"
+        pd.DataFrame({
+            "date": dates, "open": close * (1 + rng.normal(0, 0.004, len(dates))),
+            "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }).to_pickle(tmp_path / folder / f"{sym}.pkl")
+    pd.DataFrame({"symbol": ["S09"], "delistedDate": ["2019-12-16"]}).to_csv(tmp_path / "delisted.csv", index=False)
+    cfg = {
+        "PRICE_DIR_ACTIVE": str(tmp_path / "prices"),
+        "PRICE_DIR_DELISTED": str(tmp_path / "prices_delisted"),
+        "DELISTED_INFO": str(tmp_path / "delisted.csv"),
+        "MIN_MARKET_CAP": 0, "MIN_DOLLAR_VOLUME": 0, "MIN_PRICE": 0,
+        "EXECUTION_USE_TRADING_DAYS": True,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+@pytest.mark.parametrize("overrides", [{}, {"MOMENTUM_VOL_LOOKBACK": 15, "SIGNAL_SMOOTH_WINDOW": 2}])
+def test_sweep_ic_matches_run_backtest(tmp_path, overrides):
+    cfg = _config(tmp_path, **overrides)
+    start, end = "2019-10-01", "2020-01-31"
+    grid = MomentumSweep(BacktestEngine(cfg), [30, 60], [5], [5, 10], [5, 10]).run(start, end)
+    assert len(grid) == 8
+    for r in grid.itertuples():
+        engine = BacktestEngine(dict(cfg, MOMENTUM_LOOKBACK=r.lookback, MOMENTUM_SKIP=r.skip))
+        exp = engine.run_backtest(start, end, {"momentum": 1.0},
+                                  rebalance_freq=r.rebalance_freq, holding_period=r.holding_period)
+        assert r.ic == pytest.approx(exp["analysis"]["ic"], abs=1e-12)
+        assert r.n_obs == len(exp["analysis_table"][["signal", "fwd_return"]].dropna())
+        assert r.n_dates == len(exp["rebalance_dates"])
+
+
+def test_sweep_rejects_unsupported_configs(tmp_path):
+    engine = BacktestEngine(_config(tmp_path, MOMENTUM_USE_MONTHLY=True))
+    with pytest.raises(ValueError, match="MOMENTUM_USE_MONTHLY"):
+        MomentumSweep(engine, [30], [5], [5], [5])
+    with pytest.raises(ValueError, match="momentum-only"):
+        MomentumSweep(BacktestEngine(engine.config | {"MOMENTUM_USE_MONTHLY": False}), [30], [5], [5], [5],
+                      factor_weights={"momentum": 1.0, "low_vol": 0.5})
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from backtest.engine_pool import EnginePool
+from backtest.profiler import StageProfiler, merge_profiles, peak_rss_mb
+
+
+def _config(tmp_path, **overrides):
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range("2019-01-01", "2020-03-31")
+    (tmp_path / "prices").mkdir(exist_ok=True)
+    (tmp_path / "prices_delisted").mkdir(exist_ok=True)
+    for i in range(8):
+        sym = f"S{i:02d}" if i else "SPY"
+        close = 30 * np.exp(np.cumsum(rng.normal(0.0002, 0.02, len(dates))))
+        pd.DataFrame({
+            "date": dates, "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }).to_pickle(tmp_path / "prices" / f"{sym}.pkl")
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+    cfg = {
+        "PRICE_DIR_ACTIVE": str(tmp_path / "prices"),
+        "PRICE_DIR_DELISTED": str(tmp_path / "prices_delisted"),
+        "DELISTED_INFO": str(tmp_path / "delisted.csv"),
+        "MIN_MARKET_CAP": 0, "MIN_DOLLAR_VOLUME": 0, "MIN_PRICE": 0,
+        "MOMENTUM_LOOKBACK": 40, "MOMENTUM_SKIP": 5, "MOMENTUM_USE_MONTHLY": False,
+        "SIGNAL_CACHE_DIR": str(tmp_path / "signals"), "SIGNAL_CACHE_USE": True,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_run_backtest_reports_stage_timings_and_per_run_cache_counts(tmp_path):
+    pool = EnginePool()
+    kw = dict(rebalance_freq=10, holding_period=5, long_pct=0.25)
+    first = pool.get(_config(tmp_path)).run_backtest("2019-06-01", "2019-12-31", {"momentum": 1.0}, **kw)
+    prof = first["profile"]
+    n_dates = len(first["rebalance_dates"])
+    stages = prof["stages"]
+    for name in ("universe.get_universe", "factor.calculate_momentum", "standardize.finalize_signals",
+                 "execution", "forward_returns", "analysis"):
+        assert stages[name]["calls"] > 0 and stages[name]["wall_seconds"] >= 0
+    assert stages["signals"]["calls"] == n_dates
+    assert prof["caches"]["signal"] == {"hits": 0, "misses": n_dates, "hit_rate": 0.0}
+    assert prof["caches"]["price"]["misses"] == 8 and prof["peak_rss_mb"] > 0
+
+    # The warm engine starts from cached prices and cached signals; counts are per run
+    again = pool.get(_config(tmp_path)).run_backtest("2019-06-01", "2019-12-31", {"momentum": 1.0}, **kw)
+    prof2 = again["profile"]
+    assert prof2["caches"]["price"]["misses"] == 0 and prof2["caches"]["price"]["hits"] > 0
+    assert prof2["caches"]["signal"]["hit_rate"] == 1.0
+    assert "factor.calculate_momentum" not in prof2["stages"]
+
+    total = merge_profiles([prof, prof2])
+    assert total["runs"] == 2 and total["stages"]["signals"]["calls"] == 2 * n_dates
+    assert total["caches"]["signal"] == {"hits": n_dates, "misses": n_dates, "hit_rate": 0.5}
+
+
+def test_disabled_profiler_keeps_results_and_cache_counts(tmp_path):
+    kw = dict(rebalance_freq=10, holding_period=5, long_pct=0.25)
+    on = EnginePool().get(_config(tmp_path, SIGNAL_CACHE_USE=False))
+    off = EnginePool().get(_config(tmp_path, SIGNAL_CACHE_USE=False, PROFILE_STAGES=False))
+    a = on.run_backtest("2019-06-01", "2019-12-31", {"momentum": 1.0}, **kw)
+    b = off.run_backtest("2019-06-01", "2019-12-31", {"momentum": 1.0}, **kw)
+    pd.testing.assert_frame_equal(a["analysis_table"], b["analysis_table"])
+    assert b["profile"]["stages"] == {} and b["profile"]["caches"]["price"]["misses"] == 8
+    assert not hasattr(off.factor_engine.calculate_momentum, "_stage_profiled")
+
+    prof = StageProfiler()
+    with prof.stage("x"):
+        pass
+    prof.count("c", hit=True)
+    prof.reset()
+    assert prof.to_dict()["stages"] == {} and prof.to_dict()["caches"] == {}
+
+
+def test_reset_restarts_the_peak_rss_of_the_run():
+    big = np.ones(40_000_000)
+    before = peak_rss_mb()
+    del big
+    StageProfiler().reset()
+    assert peak_rss_mb() < before - 200
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from backtest.factor_engine import FactorEngine
+from backtest.quantile_engine import QuantileEngine, assign_buckets, rank_within_groups
+
+
+def _panel(n_dates=40, seed=5):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i, d in enumerate(pd.bdate_range("2022-01-03", periods=n_dates)):
+        n = int(rng.integers(4, 50))
+        sig = rng.normal(size=n)
+        if i % 4 == 0:
+            sig = np.round(sig, 1)  # ties
+        rows.append(pd.DataFrame({
+            "symbol": [f"S{j:03d}" for j in rng.choice(120, n, replace=False)],
+            "date": d.strftime("%Y-%m-%d"),
+            "signal": sig,
+        }))
+    signals = pd.concat(rows, ignore_index=True)
+    fwd = signals[["symbol", "date"]].rename(columns={"date": "signal_date"})
+    fwd["return"] = rng.normal(0, 0.05, len(fwd))
+    return signals, fwd
+
+
+def test_rank_within_groups_matches_pandas_first():
+    signals, _ = _panel()
+    g = pd.factorize(signals["date"])[0]
+    _, rank, size = rank_within_groups(g, signals["signal"].to_numpy())
+    exp = signals.groupby("date")["signal"].rank(method="first").astype(int).to_numpy()
+    assert (rank == exp).all()
+    assert (size == signals.groupby("date")["signal"].transform("size").to_numpy()).all()
+
+
+def test_qcut_buckets_match_pandas():
+    for s in range(1, 120):
+        for n in (2, 3, 5, 10):
+            if s < n:
+                continue
+            r = np.arange(1, s + 1)
+            exp = pd.qcut(r, n, labels=False) + 1
+            assert (assign_buckets(r, np.full(s, s), n) == exp).all(), (s, n)
+
+
+def test_bucket_returns_match_groupby():
+    signals, fwd = _panel()
+    eng = QuantileEngine.from_signals(signals, fwd)
+    got = eng.bucket_returns(5)
+
+    m = signals.merge(fwd, left_on=["symbol", "date"], right_on=["symbol", "signal_date"])
+    rows = []
+    for d, g in m.groupby("date"):
+        if len(g) < 5:
+            continue
+        q = pd.qcut(g["signal"].rank(method="first"), 5, labels=False) + 1
+        for k, r in g["return"].groupby(q):
+            rows.append((pd.Timestamp(d), int(k), r.mean(), (r > 0).mean()))
+    exp = pd.DataFrame(rows, columns=["date", "quantile", "mean_return", "hit_rate"])
+    assert len(got) == len(exp)
+    assert np.allclose(got["mean_return"], exp["mean_return"])
+    assert np.allclose(got["hit_rate"], exp["hit_rate"])
+
+
+def test_top_bottom_uses_build_positions_leg_sizes():
+    signals, fwd = _panel()
+    eng = QuantileEngine.from_signals(signals, fwd)
+    tb = eng.top_bottom(0.2, short_pct=0.1).set_index("date")
+    fe = FactorEngine.__new__(FactorEngine)
+    for d, g in signals.groupby("date"):
+        pos = fe.build_positions(g, long_pct=0.2, short_pct=0.1)
+        row = tb.loc[pd.Timestamp(d)]
+        assert row["n_long"] == (pos["position"] == 1).sum()
+        assert row["n_short"] == (pos["position"] == -1).sum()
+    sweep = eng.sweep([0.1, 0.2, 0.5])
+    assert list(sweep["long_pct"]) == [0.1, 0.2, 0.5]
+
+
+def test_turnover_identical_dates_is_zero():
+    d0 = pd.DataFrame({"symbol": list("ABCDEFGHIJ"), "date": "2022-01-03", "signal": np.arange(10.0)})
+    d1 = d0.assign(date="2022-01-04")
+    signals = pd.concat([d0, d1], ignore_index=True)
+    fwd = signals[["symbol", "date"]].rename(columns={"date": "signal_date"}).assign(**{"return": 0.01})
+    t = QuantileEngine.from_signals(signals, fwd).turnover(5)
+    assert (t["avg_turnover"] == 0.0).all()
+    assert (t["n_pairs"] == 1).all()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import backtest.trading_calendar as trading_calendar
+from scripts.research_daemon import ResearchDaemon, make_server, run_command, submit, try_daemon
+
+JOB = '''
+import sys
+
+CALLS = 0
+
+
+def main():
+    global CALLS
+    CALLS += 1
+    print("calls", CALLS, sys.argv[1:])
+    print("warn", file=sys.stderr)
+    raise SystemExit(3 if "--fail" in sys.argv else 0)
+'''
+
+
+def test_daemon_runs_jobs_in_warm_process_and_streams_output():
+    tmp = Path(tempfile.mkdtemp(prefix="rd_", dir="/tmp"))
+    (tmp / "job.py").write_text(JOB)
+    sock = tmp / "d.sock"
+    server = make_server(sock, ResearchDaemon(scripts_dir=tmp))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        events = []
+        first = submit({"op": "run", "script": str(tmp / "job.py"), "argv": ["--", "a"]}, sock, on_event=events.append)
+        assert first["rc"] == 0 and first["stdout"] == "calls 1 ['a']" and first["stderr"] == "warn"
+        assert [e["event"] for e in events][:2] == ["accepted", "started"]
+
+        second = submit({"op": "run", "script": str(tmp / "job.py"), "argv": ["--fail"]}, sock)
+        assert second["rc"] == 3 and second["stdout"].startswith("calls 2")
+
+        rejected = submit({"op": "run", "script": str(tmp.parent / "other.py")}, sock)
+        assert rejected["event"] == "error"
+
+        stats = submit({"op": "stats"}, sock)
+        assert stats["jobs"] == 2 and stats["modules"] == ["job.py"]
+    finally:
+        submit({"op": "shutdown"}, sock)
+        thread.join(timeout=5)
+        server.server_close()
+
+
+def test_clients_fall_back_without_daemon(monkeypatch):
+    monkeypatch.delenv("V4_RESEARCH_DAEMON", raising=False)
+    assert try_daemon({"op": "ping"}) is None
+    assert run_command(["python", "scripts/run_segmented_factors.py"]) is None
+    monkeypatch.setenv("V4_RESEARCH_DAEMON", "/tmp/no_such_research_daemon.sock")
+    assert run_command(["python", "scripts/run_segmented_factors.py"]) is None
+
+
+POOL_JOB = """
+ENGINE_POOL = None
+
+
+def main():
+    ENGINE_POOL.seen.append(ENGINE_POOL.cleared)
+"""
+
+
+class _Pool:
+    def __init__(self, price_dir):
+        self.price_dir = price_dir
+        self.cleared = 0
+        self.seen = []
+        self.stats = {}
+
+    def __len__(self):
+        return 1
+
+    def configs(self):
+        return [{"PRICE_DIR_ACTIVE": str(self.price_dir)}]
+
+    def clear(self):
+        self.cleared += 1
+
+
+def test_daemon_drops_warm_caches_when_input_data_changes(tmp_path, monkeypatch):
+    (tmp_path / "job.py").write_text(POOL_JOB)
+    prices = tmp_path / "prices"
+    prices.mkdir()
+    (prices / "AAA.pkl").write_bytes(b"1")
+    daemon = ResearchDaemon(scripts_dir=tmp_path)
+    daemon.pool = pool = _Pool(prices)
+    monkeypatch.setitem(trading_calendar._CALENDAR_CACHE, ("old",), None)
+    request = {"op": "run", "script": str(tmp_path / "job.py")}
+    sent = []
+
+    assert daemon.run(request, sent.append)["rc"] == 0
+    assert daemon.run(request, sent.append)["rc"] == 0
+    assert pool.seen == [0, 0] and ("old",) in trading_calendar._CALENDAR_CACHE
+
+    (prices / "BBB.pkl").write_bytes(b"22")
+    os.utime(prices / "BBB.pkl", (2e9, 2e9))
+    assert daemon.run(request, sent.append)["rc"] == 0
+    assert pool.seen == [0, 0, 1] and not trading_calendar._CALENDAR_CACHE
+    assert daemon.stats()["data_invalidations"] == 1
+    assert any("input data changed" in e.get("data", "") for e in sent)
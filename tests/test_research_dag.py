@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+
+import pytest
+
+from scripts.research_dag import DagNode, dependencies, nodes_from_plan, run_dag
+
+
+def _runner(log, sleep=0.2, fail=()):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def run(node):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            log.append(("start", node.node_id))
+        time.sleep(sleep)
+        for out in node.outputs:
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            with open(out, "w") as f:
+                f.write(node.node_id)
+        with lock:
+            state["active"] -= 1
+            log.append(("end", node.node_id))
+        return {"rc": 1 if node.node_id in fail else 0}
+
+    return run, state
+
+
+def _pipeline(tmp_path):
+    d = str(tmp_path)
+    return [
+        DagNode("seg_a", ["a"], inputs=[f"{d}/data.csv"], outputs=[f"{d}/seg/a.csv"]),
+        DagNode("seg_b", ["b"], inputs=[f"{d}/data.csv"], outputs=[f"{d}/seg/b.csv"]),
+        DagNode("gates", ["g"], inputs=[f"{d}/seg"], outputs=[f"{d}/gates.json"]),
+        DagNode("report", ["r"], inputs=[f"{d}/gates.json"], outputs=[f"{d}/report.md"]),
+        DagNode("diag", ["x"], inputs=[f"{d}/seg/*.csv"], outputs=[f"{d}/diag.json"]),
+    ]
+
+
+def test_independent_nodes_run_concurrently_and_dependents_wait(tmp_path):
+    (tmp_path / "data.csv").write_text("x")
+    nodes = _pipeline(tmp_path)
+    deps = dependencies(nodes, tmp_path)
+    assert deps["gates"] == {"seg_a", "seg_b"} and deps["report"] == {"gates"} and deps["diag"] == {"seg_a", "seg_b"}
+
+    log = []
+    run, state = _runner(log)
+    out = run_dag(nodes, run, cwd=tmp_path, cpu_budget=2, log=lambda _: None)
+    assert out["counts"]["ok"] == 5 and state["peak"] == 2
+    order = [nid for ev, nid in log if ev == "start"]
+    assert set(order[:2]) == {"seg_a", "seg_b"}
+    assert log.index(("end", "gates")) < log.index(("start", "report"))
+    assert out["wall_seconds"] < out["serial_seconds"]
+    assert all(n["seconds"] >= 0.2 for n in out["nodes"])
+
+
+def test_budgets_limit_concurrency(tmp_path):
+    nodes = [DagNode(f"n{i}", [str(i)], cpu=1, mem_gb=4) for i in range(4)]
+    run, state = _runner([], sleep=0.1)
+    out = run_dag(nodes, run, cwd=tmp_path, cpu_budget=8, mem_budget_gb=9, log=lambda _: None)
+    assert out["counts"]["ok"] == 4 and state["peak"] == 2
+    big = [DagNode("huge", ["h"], cpu=16)]
+    assert run_dag(big, _runner([], sleep=0)[0], cwd=tmp_path, cpu_budget=4, log=lambda _: None)["counts"]["ok"] == 1
+
+
+def test_up_to_date_nodes_skip_and_failures_block_downstream(tmp_path):
+    (tmp_path / "data.csv").write_text("x")
+    stamps = tmp_path / "stamps"
+    run, _ = _runner([], sleep=0)
+    run_dag(_pipeline(tmp_path), run, cwd=tmp_path, cpu_budget=4, stamp_dir=stamps, log=lambda _: None)
+
+    again = run_dag(_pipeline(tmp_path), run, cwd=tmp_path, cpu_budget=4, stamp_dir=stamps, log=lambda _: None)
+    assert again["counts"]["skipped_up_to_date"] == 5
+
+    # Outputs without a stamp (a run that died before stamping, or no stamp dir) are stale
+    (stamps / "report.json").unlink()
+    log = []
+    out = run_dag(_pipeline(tmp_path), _runner(log, sleep=0)[0], cwd=tmp_path, cpu_budget=4, stamp_dir=stamps,
+                  log=lambda _: None)
+    assert [nid for ev, nid in log if ev == "start"] == ["report"] and out["counts"]["skipped_up_to_date"] == 4
+    nostamp = run_dag(_pipeline(tmp_path), run, cwd=tmp_path, cpu_budget=4, log=lambda _: None)
+    assert nostamp["counts"]["ok"] == 5
+
+    # Newer input re-runs the chain below it; a failure blocks its dependents only
+    time.sleep(0.05)
+    (tmp_path / "data.csv").write_text("y")
+    log = []
+    run, _ = _runner(log, sleep=0, fail={"seg_b"})
+    out = run_dag(_pipeline(tmp_path), run, cwd=tmp_path, cpu_budget=4, stamp_dir=stamps, log=lambda _: None)
+    status = {n["node_id"]: n["status"] for n in out["nodes"]}
+    assert status == {"seg_a": "ok", "seg_b": "failed", "gates": "blocked", "report": "blocked", "diag": "blocked"}
+
+    changed = _pipeline(tmp_path)
+    changed[0].cmd = ["a", "--new-flag"]
+    assert changed[0].node_id in {
+        n["node_id"] for n in run_dag(changed[:1], run, cwd=tmp_path, cpu_budget=1, stamp_dir=stamps,
+                                      log=lambda _: None)["nodes"] if n["status"] == "ok"
+    }
+
+
+def test_plan_rows_become_nodes_with_defaults_and_cycles_are_rejected(tmp_path):
+    rows = [
+        {"rank": 1, "factor": "value", "command": "bash scripts/workstation_official_run.sh --workflow production_gates "
+                                                  "--tag t_value --freeze-file f.json --dq-input-csv dq.csv"},
+        {"rank": 2, "factor": "momentum", "command": "echo", "outputs": ["out/m.csv"], "after": ["1"], "mem_gb": 6},
+    ]
+    nodes = nodes_from_plan(rows, lambda rank, row: ["run", str(rank)], default_mem_gb=2)
+    assert nodes[0].node_id == "rank1_value" and nodes[0].inputs == ["f.json", "dq.csv"]
+    assert nodes[0].outputs == ["audit/workstation_runs/*t_value*"] and nodes[0].mem_gb == 2
+    assert nodes[1].after == ["rank1_value"] and nodes[1].mem_gb == 6 and nodes[1].cmd == ["run", "2"]
+
+    loop = [DagNode("a", [], inputs=["b.out"], outputs=["a.out"]), DagNode("b", [], inputs=["a.out"], outputs=["b.out"])]
+    with pytest.raises(ValueError, match="cycle"):
+        dependencies(loop, tmp_path)
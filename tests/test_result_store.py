@@ -0,0 +1,104 @@
+import os
+import subprocess
+
+import pandas as pd
+
+import backtest.factor_engine as factor_engine
+from scripts.result_store import (
+    FORCE_ENV,
+    ResultStore,
+    code_version,
+    data_fingerprint,
+    data_paths,
+    force_requested,
+    result_key,
+    update_run_meta,
+)
+
+
+def test_result_store_round_trip_and_miss(tmp_path):
+    src = tmp_path / "run" / "value"
+    src.mkdir(parents=True)
+    pd.DataFrame({"segment_start": ["2020-01-01"], "ic": [0.05]}).to_csv(src / "segment_summary.csv", index=False)
+    update_run_meta(src, factor="value")
+
+    store = ResultStore(tmp_path / "store")
+    key = result_key("cfg", "data", "commit")
+    assert store.lookup(key) is None
+    store.save(key, src, ["segment_summary.csv", "run_meta.json", "missing.csv"], {"runner": "test"})
+
+    dest = tmp_path / "again" / "value"
+    entry = store.restore(key, dest)
+    assert entry["files"] == ["segment_summary.csv", "run_meta.json"]
+    pd.testing.assert_frame_equal(pd.read_csv(dest / "segment_summary.csv"), pd.read_csv(src / "segment_summary.csv"))
+    assert store.restore(result_key("cfg", "data", "other"), tmp_path / "x") is None
+    assert (tmp_path / "store" / "index.jsonl").read_text().count(key) == 1
+
+
+def test_data_fingerprint_tracks_input_changes(tmp_path):
+    d = tmp_path / "prices"
+    d.mkdir()
+    (d / "AAA.pkl").write_bytes(b"1")
+    before = data_fingerprint([str(d)])
+    assert data_fingerprint([str(d)]) == before
+    (d / "BBB.pkl").write_bytes(b"22")
+    assert data_fingerprint([str(d)]) != before
+
+
+def test_earnings_refresh_misses_the_memo_when_the_config_names_no_event_paths(tmp_path, monkeypatch):
+    data = tmp_path / "data"
+    (data / "prices").mkdir(parents=True)
+    (data / "prices" / "AAA.pkl").write_bytes(b"1")
+    (data / "Owner_Earnings").mkdir()
+    (data / "Owner_Earnings" / "AAA.pkl").write_bytes(b"e1")
+    calendar = data / "earnings_calendar.csv"
+    calendar.write_text("symbol,date\nAAA,2020-01-30\n")
+    monkeypatch.setitem(factor_engine.DEFAULT_SOURCES, "EARNINGS_CALENDAR_PATH", str(calendar))
+    # Like every FACTOR_SPECS config: no EARNINGS_DIR / *_PATH keys, FactorEngine uses its defaults
+    cfg = {"PRICE_DIR_ACTIVE": str(data / "prices"), "SUE_THRESHOLD": 0.5}
+    paths = data_paths(cfg)
+    assert str((data / "Owner_Earnings").resolve()) in paths and str(calendar.resolve()) in paths
+    assert data_paths(cfg, engine_defaults=False) == [str((data / "prices").resolve())]
+
+    src = tmp_path / "run" / "sue"
+    src.mkdir(parents=True)
+    pd.DataFrame({"ic": [0.05]}).to_csv(src / "segment_summary.csv", index=False)
+    store = ResultStore(tmp_path / "store")
+    store.save(result_key("cfg", data_fingerprint(paths), "commit"), src, ["segment_summary.csv"], {})
+    assert store.restore(result_key("cfg", data_fingerprint(data_paths(cfg)), "commit"), tmp_path / "hit")
+
+    (data / "Owner_Earnings" / "AAA.pkl").write_bytes(b"e2")
+    os.utime(data / "Owner_Earnings" / "AAA.pkl", (2e9, 2e9))
+    refreshed = data_fingerprint(data_paths(cfg))
+    assert store.restore(result_key("cfg", refreshed, "commit"), tmp_path / "miss") is None
+    calendar.write_text("symbol,date\nAAA,2020-01-30\nAAA,2020-04-30\n")
+    assert data_fingerprint(data_paths(cfg)) != refreshed
+
+
+def test_force_requested_reads_flag_and_env(monkeypatch):
+    monkeypatch.delenv(FORCE_ENV, raising=False)
+    assert not force_requested()
+    assert force_requested(True)
+    monkeypatch.setenv(FORCE_ENV, "1")
+    assert force_requested()
+    monkeypatch.setenv(FORCE_ENV, "0")
+    assert not force_requested()
+
+
+def test_code_version_covers_untracked_sources(tmp_path):
+    (tmp_path / "backtest").mkdir()
+    (tmp_path / "backtest" / "engine.py").write_text("x = 1\n")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-c", "commit.gpgsign=false"]
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run([*git, "add", "."], cwd=tmp_path, check=True)
+    subprocess.run([*git, "commit", "-q", "-m", "init"], cwd=tmp_path, check=True)
+    clean = code_version(tmp_path)
+    assert clean and "+dirty" not in clean
+
+    # A new module in a new directory shows up in git status only as the directory name
+    (tmp_path / "backtest" / "extra").mkdir()
+    (tmp_path / "backtest" / "extra" / "new_factor.py").write_text("def f():\n    return 1\n")
+    first = code_version(tmp_path)
+    (tmp_path / "backtest" / "extra" / "new_factor.py").write_text("def f():\n    return 2\n")
+    second = code_version(tmp_path)
+    assert first.startswith(clean + "+dirty.") and second.startswith(clean + "+dirty.") and first != second
@@ -0,0 +1,106 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.run_checkpoint import RebalanceCheckpoint
+from scripts.result_store import run_signature
+
+
+def _config(tmp_path, **overrides):
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range("2019-01-01", "2020-06-30")
+    (tmp_path / "prices").mkdir()
+    (tmp_path / "prices_delisted").mkdir()
+    for i in range(10):
+        sym = f"S{i:02d}" if i else "SPY"
+        close = 40 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        pd.DataFrame({
+            "date": dates, "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }).to_pickle(tmp_path / "prices" / f"{sym}.pkl")
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+    cfg = {
+        "PRICE_DIR_ACTIVE": str(tmp_path / "prices"),
+        "PRICE_DIR_DELISTED": str(tmp_path / "prices_delisted"),
+        "DELISTED_INFO": str(tmp_path / "delisted.csv"),
+        "MIN_MARKET_CAP": 0, "MIN_DOLLAR_VOLUME": 0, "MIN_PRICE": 0,
+        "EXECUTION_USE_TRADING_DAYS": True,
+        "MOMENTUM_LOOKBACK": 40, "MOMENTUM_SKIP": 5, "MOMENTUM_USE_MONTHLY": False,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_checkpoint_reloads_flushed_batches_and_ignores_torn_tail(tmp_path):
+    path = tmp_path / "run.ckpt"
+    ckpt = RebalanceCheckpoint(path, "k1", every=2)
+    assert ckpt.load()["dates"] == []
+    frame = pd.DataFrame({"symbol": ["A"], "signal": [1.0]})
+    ckpt.step("2020-01-02", [frame], [], [{"n": 1}], {"A": [1.0]})
+    ckpt.step("2020-01-03", [], [], [], {"A": [1.0]})
+    ckpt.step("2020-01-06", [frame], [], [], {"A": [1.0, 1.0]})  # buffered, not flushed
+    with open(path, "ab") as f:
+        f.write(b"\x07\x00")
+
+    state = RebalanceCheckpoint(path, "k1").load()
+    assert state["dates"] == ["2020-01-02", "2020-01-03"]
+    pd.testing.assert_frame_equal(state["signals"][0], frame)
+    assert state["audit"] == [{"n": 1}] and state["history"] == {"A": [1.0]}
+    assert RebalanceCheckpoint(path, "other").load()["dates"] == []
+    assert RebalanceCheckpoint(path, "k1").load()["dates"] == []
+
+
+def test_resumed_run_backtest_matches_uninterrupted_run(tmp_path):
+    cfg = _config(tmp_path, SIGNAL_SMOOTH_WINDOW=3)
+    kw = dict(factor_weights={"momentum": 1.0}, rebalance_freq=5, holding_period=10)
+    exp = BacktestEngine(cfg).run_backtest("2019-06-01", "2020-03-31", **kw)
+
+    engine = BacktestEngine(cfg)
+    build = engine.factor_engine.build_positions
+    calls = []
+
+    def crash_after_20(*a, **k):
+        calls.append(1)
+        if len(calls) > 20:
+            raise RuntimeError("crash")
+        return build(*a, **k)
+
+    engine.factor_engine.build_positions = crash_after_20
+    ckpt = str(tmp_path / "seg.ckpt")
+    with pytest.raises(RuntimeError):
+        engine.run_backtest("2019-06-01", "2020-03-31", checkpoint=ckpt, checkpoint_every=8, **kw)
+
+    resumed = BacktestEngine(cfg)
+    computed = []
+    signals = resumed.factor_engine.compute_signals
+    resumed.factor_engine.compute_signals = lambda *a, **k: computed.append(1) or signals(*a, **k)
+    got = resumed.run_backtest("2019-06-01", "2020-03-31", checkpoint=ckpt, checkpoint_every=8, **kw)
+    assert len(computed) == len(exp["rebalance_dates"]) - 16
+    for key in ("signals", "positions", "returns", "forward_returns_raw", "analysis_table", "universe_audit"):
+        pd.testing.assert_frame_equal(got[key], exp[key])
+    assert got["filter_stats"] == exp["filter_stats"]
+
+
+def test_checkpoint_is_discarded_after_a_data_refresh(tmp_path):
+    cfg = _config(tmp_path)
+    kw = dict(factor_weights={"momentum": 1.0}, rebalance_freq=5, holding_period=10,
+              checkpoint=str(tmp_path / "seg.ckpt"), checkpoint_every=8)
+
+    def computed_dates():
+        engine = BacktestEngine(cfg)
+        computed = []
+        signals = engine.factor_engine.compute_signals
+        engine.factor_engine.compute_signals = lambda *a, **k: computed.append(1) or signals(*a, **k)
+        out = engine.run_backtest("2019-06-01", "2019-12-31", checkpoint_salt=run_signature(cfg), **kw)
+        return len(computed), len(out["rebalance_dates"])
+
+    first, n_dates = computed_dates()
+    assert first == n_dates and computed_dates()[0] == 0
+    px = pd.read_pickle(tmp_path / "prices" / "S01.pkl")
+    px.loc[len(px) - 1, "close"] *= 1.5
+    px.to_pickle(tmp_path / "prices" / "S01.pkl")
+    os.utime(tmp_path / "prices" / "S01.pkl", (2e9, 2e9))
+    assert computed_dates()[0] == n_dates
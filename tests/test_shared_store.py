@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from backtest.data_engine import DataEngine
+from backtest.shared_store import ColumnStore, open_price_store
+
+
+def _frames():
+    dates = pd.bdate_range("2020-01-01", periods=30)
+    rng = np.random.default_rng(3)
+    a = pd.DataFrame({"date": dates, "close": rng.normal(10, 1, 30), "volume": rng.integers(1, 9, 30)})
+    b = pd.DataFrame({"date": dates[:12], "close": rng.normal(5, 1, 12), "label": ["x"] * 11 + [None]})
+    return {"AAA": a, "BBB": b}
+
+
+def test_column_store_round_trip_preserves_columns_and_dtypes(tmp_path):
+    frames = _frames()
+    store = ColumnStore.build(tmp_path / "store", ["AAA", "BBB", "CCC"], frames.get)
+    assert len(store) == 2 and "CCC" not in store and store.frame("CCC") is None
+    for sym, df in frames.items():
+        got = store.frame(sym)
+        pd.testing.assert_frame_equal(got, df)
+    assert not store.frame("AAA")["close"].to_numpy().flags.writeable
+
+
+def test_price_store_serves_data_engine_and_rebuilds_on_source_change(tmp_path):
+    (tmp_path / "active").mkdir()
+    (tmp_path / "delisted").mkdir()
+    for sym, df in _frames().items():
+        df.to_pickle(tmp_path / "active" / f"{sym}.pkl")
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+    args = (str(tmp_path / "active"), str(tmp_path / "delisted"), str(tmp_path / "delisted.csv"))
+
+    plain = DataEngine(*args)
+    shared = DataEngine(*args)
+    shared.price_store = open_price_store(shared, str(tmp_path / "store"))
+    for sym in ("AAA", "BBB"):
+        pd.testing.assert_frame_equal(shared.get_price(sym, "2020-01-10"), plain.get_price(sym, "2020-01-10"))
+
+    assert open_price_store(plain, str(tmp_path / "store"), build=False) is not None
+    _frames()["AAA"].iloc[:5].to_pickle(tmp_path / "active" / "AAA.pkl")
+    assert open_price_store(plain, str(tmp_path / "store"), build=False) is None
+    rebuilt = open_price_store(plain, str(tmp_path / "store"))
+    assert len(rebuilt.frame("AAA")) == 5
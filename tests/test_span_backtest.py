@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from backtest.backtest_engine import BacktestEngine
+from backtest.span_backtest import SpanBacktest
+
+
+def _config(tmp_path, **overrides):
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range("2019-01-01", "2020-06-30")
+    (tmp_path / "prices").mkdir()
+    (tmp_path / "prices_delisted").mkdir()
+    for i in range(10):
+        sym = f"S{i:02d}" if i else "SPY"
+        close = 40 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+        pd.DataFrame({
+            "date": dates, "open": close * (1 + rng.normal(0, 0.004, len(dates))),
+            "high": close * 1.01, "low": close * 0.99, "close": close,
+            "volume": rng.integers(100_000, 900_000, len(dates)).astype(float),
+        }).to_pickle(tmp_path / "prices" / f"{sym}.pkl")
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+    cfg = {
+        "PRICE_DIR_ACTIVE": str(tmp_path / "prices"),
+        "PRICE_DIR_DELISTED": str(tmp_path / "prices_delisted"),
+        "DELISTED_INFO": str(tmp_path / "delisted.csv"),
+        "MIN_MARKET_CAP": 0, "MIN_DOLLAR_VOLUME": 0, "MIN_PRICE": 0,
+        "EXECUTION_USE_TRADING_DAYS": True,
+        "MOMENTUM_LOOKBACK": 40, "MOMENTUM_SKIP": 5, "MOMENTUM_USE_MONTHLY": False,
+    }
+    cfg.update(overrides)
+    return cfg
+
+
+def test_span_windows_match_run_backtest(tmp_path):
+    cfg = _config(tmp_path)
+    windows = [("2019-06-01", "2019-10-31"), ("2019-11-01", "2020-02-28"), ("2019-08-01", "2020-02-28")]
+    kw = dict(rebalance_freq=7, holding_period=10, long_pct=0.25)
+    span = SpanBacktest(BacktestEngine(cfg), {"momentum": 1.0}, **kw)
+    assert span.prepare(windows) > 0
+    for start, end in windows:
+        exp = BacktestEngine(cfg).run_backtest(start, end, {"momentum": 1.0}, **kw)
+        got = span.run(start, end)
+        assert got["rebalance_dates"] == exp["rebalance_dates"]
+        for key in ("signals", "positions", "returns", "forward_returns", "forward_returns_raw", "analysis_table"):
+            pd.testing.assert_frame_equal(got[key], exp[key], check_dtype=False)
@@ -0,0 +1,83 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from backtest.data_engine import DataEngine
+from backtest.data_quality_filter import FLAG_JUMP, build_price_quality_flags
+from backtest.fundamentals_engine import FundamentalsEngine
+from backtest.market_cap_engine import MarketCapEngine
+from backtest.synthetic_market import MarketSpec, symbol_name, write_market
+from scripts.run_benchmarks import main as run_benchmarks
+
+
+def _digest(root):
+    return {
+        str(p.relative_to(root)): hashlib.md5(p.read_bytes()).hexdigest()
+        for p in sorted(root.rglob("*")) if p.is_file()
+    }
+
+
+def test_generator_is_deterministic_and_symbols_do_not_depend_on_n(tmp_path):
+    spec = MarketSpec(n_symbols=40, n_days=300, split_rate=1.0)
+    write_market(spec, tmp_path / "a")
+    write_market(spec, tmp_path / "b")
+    assert _digest(tmp_path / "a") == _digest(tmp_path / "b")
+
+    write_market(MarketSpec(n_symbols=60, n_days=300, split_rate=1.0), tmp_path / "c")
+    a, c = _digest(tmp_path / "a"), _digest(tmp_path / "c")
+    shared = [k for k in a if k.startswith("prices") or k.startswith("fmp/market_cap")]
+    assert shared and all(a[k] == c[k] for k in shared)
+
+
+def test_layout_is_read_by_the_engines(tmp_path):
+    cfg = write_market(MarketSpec(n_symbols=60, n_days=400, split_rate=1.0, delist_frac=0.3), tmp_path)
+    meta = json.loads((tmp_path / "synthetic_market.json").read_text())
+    data = DataEngine(cfg["PRICE_DIR_ACTIVE"], cfg["PRICE_DIR_DELISTED"], cfg["DELISTED_INFO"])
+    assert len(data.get_all_symbols()) == 61 and len(data.symbols["delisted"]) == meta["n_delisted"] > 0
+
+    # Delisted names stop trading before their delisting date; the engine cuts reads there
+    sym = sorted(data.symbols["delisted"])[0]
+    delisted_at = data.delisted_info[sym]
+    prices = data.get_price(sym, end_date=meta["end"])
+    assert prices["date"].max() < delisted_at and data.is_delisted(sym, meta["end"])
+
+    cal = data.get_price("SPY")["date"]
+    frames = {s: data.get_price(s) for s in data.get_all_symbols() if s != "SPY"}
+    late = [s for s, f in frames.items() if f["date"].iloc[0] > cal.iloc[0]]
+    gaps = [s for s, f in frames.items() if len(f) < cal.between(f["date"].iloc[0], f["date"].iloc[-1]).sum()]
+    jumps = [s for s, f in frames.items() if (build_price_quality_flags(f) & FLAG_JUMP).any()]
+    assert late and gaps and jumps
+
+    # Market cap follows the price through splits; fundamentals only after their available_date
+    mc = MarketCapEngine(cfg["MARKET_CAP_DIR"])
+    name = symbol_name(1)
+    hist = mc.history(name)
+    assert np.abs(np.diff(np.log(hist["marketCap"].to_numpy()))).max() < 1.0
+    fund = FundamentalsEngine(cfg["FUNDAMENTALS_DIR"])
+    q = pd.read_pickle(f"{cfg['FUNDAMENTALS_DIR']}/{name}.pkl")
+    first = q["available_date"].iloc[0]
+    assert fund.get_latest_metrics(name, first - pd.Timedelta(days=1)) is None
+    assert fund.get_latest_metrics(name, first)["roe"] == q["roe"].iloc[0]
+    events = pd.read_pickle(f"{cfg['EARNINGS_DIR']}/{name}.pkl")
+    assert {"epsActual", "epsEstimated"} <= set(events.columns) and len(events) >= 4
+
+
+def test_benchmark_suite_runs_every_bench(tmp_path):
+    out = tmp_path / "out"
+    run_benchmarks(["--scales", "30x300", "--factors", "momentum,quality", "--dates", "2", "--eval-days", "40",
+                    "--data-dir", str(tmp_path / "data"), "--out-dir", str(out)])
+    rows = json.loads((out / "benchmarks.json").read_text())["rows"]
+    assert [r["bench"] for r in rows] == [
+        "load_prices", "get_price", "get_price_window", "get_universe", "compute_signals:momentum",
+        "compute_signals:quality", "execute_trades", "calculate_forward_returns", "run_backtest",
+    ]
+    assert all(r["seconds"] > 0 and r["items"] > 0 for r in rows)
+    assert rows[-1]["profile"]["stages"]["signals"]["calls"] == rows[-1]["items"]
+
+    again = tmp_path / "again"
+    run_benchmarks(["--scales", "30x300", "--factors", "momentum", "--dates", "2", "--eval-days", "40",
+                    "--data-dir", str(tmp_path / "data"), "--out-dir", str(again), "--baseline",
+                    str(out / "benchmarks.json")])
+    assert all("speedup" in r for r in json.loads((again / "benchmarks.json").read_text())["rows"])
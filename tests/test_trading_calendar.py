@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from backtest.data_engine import DataEngine
+from backtest.trading_calendar import TradingCalendar, _CALENDAR_CACHE, date_codes, load_trading_calendar
+from backtest.execution_simulator import ExecutionSimulator
+
+
+def _legacy_shift(cal: pd.DatetimeIndex, base: pd.Timestamp, n: int) -> pd.Timestamp:
+    pos = cal.searchsorted(base)
+    if pos >= len(cal):
+        return cal[-1]
+    target = min(max(pos + n, 0), len(cal) - 1)
+    return cal[target]
+
+
+def test_date_codes_roundtrip():
+    cal = TradingCalendar(pd.bdate_range("2020-01-01", "2020-01-10"))
+    assert cal.codes[0] == 20200101
+    assert list(date_codes(["2020-02-29"])) == [20200229]
+    assert cal.date_of([0])[0] == pd.Timestamp("2020-01-01")
+
+
+def test_shift_matches_searchsorted_semantics():
+    dates = pd.bdate_range("2020-01-01", "2020-03-31")
+    cal = TradingCalendar(dates)
+    probes = pd.date_range("2019-12-25", "2020-04-05", freq="D")
+    for n in (-3, 0, 1, 5, 40):
+        got = cal.shift(probes, n)
+        exp = [_legacy_shift(dates, p, n) for p in probes]
+        assert list(got) == exp
+
+
+def test_index_of_and_between():
+    cal = TradingCalendar(pd.bdate_range("2020-01-06", "2020-01-17"))
+    # Saturday maps to the following Monday
+    assert cal.index_of("2020-01-11")[0] == 5
+    assert cal.is_trading_day(["2020-01-10", "2020-01-11"]).tolist() == [True, False]
+    win = cal.between("2020-01-08", "2020-01-14")
+    assert win[0] == pd.Timestamp("2020-01-08")
+    assert win[-1] == pd.Timestamp("2020-01-14")
+    assert len(win) == 5
+
+
+def test_execution_simulator_uses_calendar():
+    cal = TradingCalendar(pd.bdate_range("2020-01-01", "2020-01-31"))
+    sim = ExecutionSimulator(data_engine=None, execution_use_trading_days=True, trading_calendar=cal)
+    # Friday + 1 session -> Monday
+    assert sim._shift_date(pd.Timestamp("2020-01-03"), 1) == pd.Timestamp("2020-01-06")
+    out = sim._shift_dates(["2020-01-03", "2020-01-30"], 2)
+    assert list(out) == [pd.Timestamp("2020-01-07"), pd.Timestamp("2020-01-31")]
+    assert np.all(sim._shift_dates(["2020-01-03"], 0) == pd.DatetimeIndex(["2020-01-03"]))
+
+
+def test_calendar_cache_follows_a_price_refresh(tmp_path):
+    (tmp_path / "active").mkdir()
+    (tmp_path / "delisted").mkdir()
+    pd.DataFrame(columns=["symbol", "delistedDate"]).to_csv(tmp_path / "delisted.csv", index=False)
+
+    def write_spy(end):
+        dates = pd.bdate_range("2020-01-01", end)
+        pd.DataFrame({"date": dates, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0}) \
+            .to_pickle(tmp_path / "active" / "SPY.pkl")
+
+    def calendar():
+        engine = DataEngine(str(tmp_path / "active"), str(tmp_path / "delisted"), str(tmp_path / "delisted.csv"))
+        return load_trading_calendar(engine, ["SPY"])
+
+    write_spy("2020-03-31")
+    first = calendar()
+    assert calendar() is first
+    write_spy("2020-06-30")
+    refreshed = calendar()
+    assert refreshed.dates[-1] == pd.Timestamp("2020-06-30") and first.dates[-1] == pd.Timestamp("2020-03-31")
+    assert sum(1 for k in _CALENDAR_CACHE if k[0] == str(tmp_path / "active")) == 1
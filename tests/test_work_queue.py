@@ -0,0 +1,158 @@
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from scripts.work_queue import WorkQueue, command_task, run_command_task, run_worker
+
+
+def _flaky_handler(runs_dir):
+    def handle(payload, stop=None):
+        with open(os.path.join(runs_dir, payload["name"]), "a") as f:
+            f.write(f"{os.getpid()}\n")
+        # The first worker to pick up "crash" dies mid-task, like a lost host
+        if payload["name"] == "crash" and not os.path.exists(os.path.join(runs_dir, "crashed")):
+            open(os.path.join(runs_dir, "crashed"), "w").close()
+            os._exit(1)
+        time.sleep(payload["sleep"])
+        return {"rc": 0, "pid": os.getpid()}
+
+    return handle
+
+
+def _worker(db, runs_dir, idx):
+    run_worker(WorkQueue(db), _flaky_handler(runs_dir), worker=f"w{idx}", lease_seconds=0.6,
+               heartbeat_seconds=0.1, poll_seconds=0.05, exit_when_idle=True, log=lambda _: None)
+
+
+def test_workers_on_many_processes_complete_each_task_exactly_once(tmp_path):
+    db = str(tmp_path / "q.sqlite")
+    runs = tmp_path / "runs"
+    runs.mkdir()
+    wq = WorkQueue(db)
+    payloads = [{"name": f"t{i:02d}", "sleep": 0.02 * (i % 5)} for i in range(40)]
+    payloads.insert(3, {"name": "crash", "sleep": 0.0})
+    ids = wq.enqueue(payloads, queue="seg")
+    assert wq.enqueue(payloads, queue="seg") == ids and wq.counts() == {"pending": 41}
+
+    ctx = mp.get_context("fork")
+    procs = [ctx.Process(target=_worker, args=(db, str(runs), i)) for i in range(4)]
+    for p in procs:
+        p.start()
+    # Idle workers keep polling while a task is leased; the crashed worker's lease expires and is reclaimed
+    rows = wq.wait(ids, poll_seconds=0.05, timeout=60)
+    for p in procs:
+        p.join(timeout=30)
+
+    assert {r["state"] for r in rows} == {"done"} and len(rows) == 41
+    executions = {f.name: len(f.read_text().split()) for f in runs.iterdir() if f.name != "crashed"}
+    assert all(executions[p["name"]] == 1 for p in payloads if p["name"] != "crash")
+    crash = next(r for r in rows if r["payload"]["name"] == "crash")
+    assert executions["crash"] == 2 and crash["attempts"] == 2
+    assert len({r["worker"] for r in rows}) > 1
+
+
+def test_stale_lease_holder_cannot_finish_and_failures_exhaust_attempts(tmp_path):
+    wq = WorkQueue(tmp_path / "q.sqlite")
+    (tid,) = wq.enqueue([{"name": "a"}], max_attempts=2)
+    slow = wq.claim("slow", lease_seconds=0.05)
+    time.sleep(0.1)
+    fast = wq.claim("fast", lease_seconds=30)
+    assert fast.task_id == tid and fast.token == slow.token + 1
+    assert not wq.heartbeat(slow, 30) and not wq.complete(slow, {"rc": 0})
+    assert wq.complete(fast, {"rc": 0}) and not wq.complete(fast, {"rc": 0})
+    assert wq.rows([tid])[0]["worker"] == "fast" and wq.claim("late", 30) is None
+
+    (bad,) = wq.enqueue([{"name": "b"}], max_attempts=2)
+    assert wq.fail(wq.claim("w", 30), "rc=1") and wq.counts()["pending"] == 1
+    assert wq.fail(wq.claim("w", 30), "rc=1") and wq.rows([bad])[0]["state"] == "failed"
+    assert wq.retry([bad]) == 1 and wq.counts()["pending"] == 1
+
+
+def test_command_tasks_use_paths_relative_to_the_project_root(tmp_path):
+    root = tmp_path / "proj"
+    (root / "scripts").mkdir(parents=True)
+    (root / "scripts" / "echo_args.py").write_text(
+        "import pathlib, sys\npathlib.Path(sys.argv[2]).parent.mkdir(parents=True, exist_ok=True)\n"
+        "pathlib.Path(sys.argv[2]).write_text('ok')\n"
+    )
+    cmd = [sys.executable, str(root / "scripts" / "echo_args.py"), "--out", str(root / "audit" / "x" / "out.txt")]
+    payload = command_task(cmd, root / "audit" / "x" / "run.log", root=root, mem_key="k")
+    assert payload == {"argv": ["scripts/echo_args.py", "--out", "audit/x/out.txt"],
+                       "log_path": "audit/x/run.log", "mem_key": "k"}
+    res = run_command_task(payload, root=root)
+    assert res["rc"] == 0 and (root / "audit" / "x" / "out.txt").read_text() == "ok"
+    assert (root / "audit" / "x" / "run.log").exists()
+
+
+def test_worker_that_loses_its_lease_kills_the_runner_and_abandons_the_attempt(tmp_path):
+    root = tmp_path / "proj"
+    (root / "scripts").mkdir(parents=True)
+    (root / "scripts" / "slow.py").write_text(
+        "import os, pathlib, sys, time\npathlib.Path(sys.argv[1]).write_text(str(os.getpid()))\n"
+        "time.sleep(60)\npathlib.Path(sys.argv[1] + '.finished').write_text('x')\n"
+    )
+    pid_file = root / "child.pid"
+    wq = WorkQueue(tmp_path / "q.sqlite")
+    (tid,) = wq.enqueue([{"argv": ["scripts/slow.py", str(pid_file)], "log_path": "run.log"}])
+    stats = {}
+
+    def _run():
+        # Heartbeats slower than the lease: the lease expires mid-run and another worker takes the task
+        stats.update(run_worker(wq, lambda payload, stop: run_command_task(payload, root=root, stop=stop),
+                                worker="slow", lease_seconds=0.3, heartbeat_seconds=1.0, max_tasks=1,
+                                log=lambda _: None))
+
+    t0 = time.time()
+    th = threading.Thread(target=_run)
+    th.start()
+    while not pid_file.exists() or not pid_file.read_text():
+        time.sleep(0.02)
+    pid = int(pid_file.read_text())
+    time.sleep(0.4)
+    thief = wq.claim("thief", lease_seconds=30)
+    assert thief is not None and thief.task_id == tid
+    th.join(timeout=30)
+
+    assert not th.is_alive() and time.time() - t0 < 20
+    assert stats == {"done": 0, "failed": 0, "abandoned": 1}
+    try:
+        os.kill(pid, 0)
+        alive = True
+    except ProcessLookupError:
+        alive = False
+    assert not alive and not (root / "child.pid.finished").exists()
+    row = wq.rows([tid])[0]
+    assert row["state"] == "leased" and row["worker"] == "thief" and row["error"] is None
+    assert wq.complete(thief, {"rc": 0})
+
+
+def test_expired_lease_is_taken_over_only_after_the_grace_and_unreachable_holders_stop(tmp_path):
+    wq = WorkQueue(tmp_path / "q.sqlite")
+    (tid,) = wq.enqueue([{"name": "a"}])
+    old = wq.claim("old", lease_seconds=0.05)
+    time.sleep(0.1)
+    assert wq.claim("new", 30, grace=1.0) is None
+    assert wq.claim("new", 30, grace=0.02).token == old.token + 1
+
+    class _Unreachable(WorkQueue):
+        def heartbeat(self, task, lease_seconds):
+            raise sqlite3.OperationalError("database is locked")
+
+    (tid2,) = _Unreachable(tmp_path / "q.sqlite").enqueue([{"name": "b"}])
+    stopped = {}
+
+    def handler(payload, stop):
+        t0 = time.time()
+        stopped["set"] = stop.wait(10)
+        stopped["after"] = time.time() - t0
+        return {"rc": 1}
+
+    stats = run_worker(_Unreachable(tmp_path / "q.sqlite"), handler, worker="cut-off", lease_seconds=0.6,
+                       heartbeat_seconds=0.1, max_tasks=1, log=lambda _: None)
+    # The runner is stopped before the lease runs out, then the attempt is abandoned
+    assert stopped["set"] and stopped["after"] < 0.6
+    assert stats == {"done": 0, "failed": 0, "abandoned": 1}
+    assert wq.rows([tid2])[0]["state"] == "leased"